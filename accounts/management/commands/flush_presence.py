@@ -0,0 +1,33 @@
+"""
+Copy buffered presence heartbeats into ``users.last_seen_at`` / ``last_seen_source``.
+
+Heartbeats land in the cache (see ``accounts.presence``) so the user table is not
+updated once a minute per online user. This command is the other half: one bulk
+UPDATE per run for every user who has beaten since the previous flush.
+
+API responses already read the cache, so the cadence only bounds how stale the
+*database* columns may get — which matters for the few places that still filter on
+them in SQL, and for what survives a cache restart.
+
+Usage:
+    python manage.py flush_presence
+
+Intended cadence: every 15 minutes. Beats live for an hour in the cache, so a missed
+run or two loses nothing.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from accounts.presence import flush_last_seen
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered presence heartbeats to users.last_seen_at'
+
+    def handle(self, *args, **options):
+        updated = flush_last_seen()
+        logger.info('flush_presence: updated last_seen_at for %d user(s)', updated)
+        self.stdout.write(self.style.SUCCESS(f'Updated last_seen_at for {updated} user(s)'))
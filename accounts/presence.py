@@ -0,0 +1,210 @@
+"""
+Buffered user presence ("online now" / "last seen").
+
+Clients heartbeat roughly once a minute. Writing every beat straight to ``users``
+meant a steady stream of UPDATEs on the table that JWT auth reads on every request,
+so beats now land in the Django cache and reach the database in batches:
+
+- ``accounts:presence:v1:user:<id>`` holds the user's latest beat (timestamp and
+  source). Each user is its only writer, so it never races.
+- ``accounts:presence:v1:roster:<company_id>`` is the company's online set: ids that
+  have beaten recently. It is rewritten only when a beating user is missing from it,
+  so a concurrent write that drops a member heals on that member's next beat. Every
+  beat extends its TTL, so a roster only expires once its company has gone quiet.
+- ``flush_presence`` (cron, every 15 minutes) copies beats newer than the previous
+  flush into ``users.last_seen_at`` / ``last_seen_source`` with one bulk UPDATE.
+
+Readers go through :func:`last_seen` / :func:`is_online`, which take the newer of the
+cached beat and the database column. A cache restart therefore costs freshness (up to
+one flush interval), never correctness.
+
+As with tenant-chat typing indicators, set REDIS_URL in production: with
+LocMemCache each Gunicorn worker only sees the beats it received itself.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from accounts.models import User
+
+PRESENCE_CACHE_PREFIX = "accounts:presence:v1"
+
+# A user is "online" when their last beat is at most this old (1.5x the client cadence).
+ONLINE_WINDOW = timedelta(seconds=90)
+
+# Beats must outlive the flush interval by a wide margin; otherwise a user who goes
+# offline between two flushes would never get their final last_seen_at written.
+BEAT_TTL_SECONDS = 60 * 60
+ROSTER_TTL_SECONDS = 24 * 60 * 60
+
+# Users without a company (platform super admins) share one roster.
+_NO_COMPANY = 0
+
+_ROSTER_INDEX_KEY = f"{PRESENCE_CACHE_PREFIX}:rosters"
+_FLUSH_WATERMARK_KEY = f"{PRESENCE_CACHE_PREFIX}:flushed_until"
+
+# Memo attribute on User instances so is_online / last_seen_at on one serializer row
+# share a single cache read.
+_MEMO_ATTR = "_presence_beat"
+_MISSING = object()
+
+# Serializer context key for beats prefetched for a whole page (see prefetch_beats).
+CONTEXT_KEY = "presence_beats"
+
+
+def _beat_key(user_id: int) -> str:
+    return f"{PRESENCE_CACHE_PREFIX}:user:{user_id}"
+
+
+def _roster_key(company_id: int) -> str:
+    return f"{PRESENCE_CACHE_PREFIX}:roster:{company_id}"
+
+
+def _ensure_member(key: str, member: int) -> None:
+    members = cache.get(key) or []
+    if member in members:
+        cache.touch(key, ROSTER_TTL_SECONDS)
+        return
+    cache.set(key, sorted(set(members) | {member}), timeout=ROSTER_TTL_SECONDS)
+
+
+def _decode(raw) -> Optional[tuple]:
+    if not raw or not isinstance(raw, dict):
+        return None
+    try:
+        seen_at = datetime.fromtimestamp(float(raw["ts"]), tz=dt_timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return seen_at, str(raw.get("source") or "unknown")
+
+
+def _cached_beats(user_ids: Iterable[int]) -> dict:
+    """``{user_id: (seen_at, source)}`` for every id with a live cached beat."""
+    ids = list(user_ids)
+    if not ids:
+        return {}
+    raw = cache.get_many([_beat_key(uid) for uid in ids])
+    beats = {}
+    for uid in ids:
+        beat = _decode(raw.get(_beat_key(uid)))
+        if beat is not None:
+            beats[uid] = beat
+    return beats
+
+
+def record_heartbeat(user, source: str, *, now=None) -> datetime:
+    """Record a presence beat for ``user`` without touching the database."""
+    now = now or timezone.now()
+    cache.set(
+        _beat_key(user.pk),
+        {"ts": now.timestamp(), "source": source},
+        timeout=BEAT_TTL_SECONDS,
+    )
+    setattr(user, _MEMO_ATTR, (now, source))
+
+    company_id = getattr(user, "company_id", None) or _NO_COMPANY
+    _ensure_member(_roster_key(company_id), user.pk)
+    _ensure_member(_ROSTER_INDEX_KEY, company_id)
+    return now
+
+
+def prime(users: Iterable) -> None:
+    """Load cached beats for a page of users in one cache round trip."""
+    users = [u for u in users if getattr(u, "pk", None)]
+    beats = _cached_beats(u.pk for u in users)
+    for user in users:
+        setattr(user, _MEMO_ATTR, beats.get(user.pk))
+
+
+def prefetch_beats(user_ids: Iterable[int]) -> dict:
+    """
+    ``{user_id: beat or None}`` in one cache round trip, for pages that reach users
+    through other rows (message senders): put it in the serializer context under
+    ``CONTEXT_KEY`` and PresenceFieldsMixin reads from it.
+    """
+    ids = {uid for uid in user_ids if uid}
+    beats = _cached_beats(ids)
+    return {uid: beats.get(uid) for uid in ids}
+
+
+def use_prefetched(user, beats: dict) -> None:
+    """Hand ``user`` its beat from ``prefetch_beats`` so reads skip the cache."""
+    if user.pk in beats and getattr(user, _MEMO_ATTR, _MISSING) is _MISSING:
+        setattr(user, _MEMO_ATTR, beats[user.pk])
+
+
+def last_seen(user) -> tuple:
+    """``(last_seen_at, last_seen_source)``: the newer of the cached beat and the DB row."""
+    beat = getattr(user, _MEMO_ATTR, _MISSING)
+    if beat is _MISSING:
+        beat = _cached_beats([user.pk]).get(user.pk)
+        setattr(user, _MEMO_ATTR, beat)
+
+    db_seen = getattr(user, "last_seen_at", None)
+    if beat is not None and (db_seen is None or beat[0] >= db_seen):
+        return beat
+    return db_seen, getattr(user, "last_seen_source", None)
+
+
+def is_online(user, *, now=None) -> bool:
+    seen_at, _source = last_seen(user)
+    if not seen_at:
+        return False
+    return ((now or timezone.now()) - seen_at) <= ONLINE_WINDOW
+
+
+def online_user_ids(company_id: int, *, now=None) -> set:
+    """Ids of the company's users whose cached beat is inside the online window."""
+    now = now or timezone.now()
+    roster = cache.get(_roster_key(company_id or _NO_COMPANY)) or []
+    return {
+        uid
+        for uid, (seen_at, _source) in _cached_beats(roster).items()
+        if (now - seen_at) <= ONLINE_WINDOW
+    }
+
+
+def flush_last_seen(*, now=None) -> int:
+    """
+    Copy beats recorded since the previous flush into ``users``; returns rows updated.
+
+    Also prunes roster members whose beat has expired, so the online sets stay small.
+    """
+    now = now or timezone.now()
+    flushed_until = cache.get(_FLUSH_WATERMARK_KEY) or 0
+
+    pending = {}
+    for company_id in cache.get(_ROSTER_INDEX_KEY) or []:
+        key = _roster_key(company_id)
+        roster = cache.get(key) or []
+        beats = _cached_beats(roster)
+        if len(beats) != len(roster):
+            cache.set(key, sorted(beats), timeout=ROSTER_TTL_SECONDS)
+        for uid, beat in beats.items():
+            if beat[0].timestamp() > flushed_until:
+                pending[uid] = beat
+
+    changed = []
+    if pending:
+        for user in User.objects.filter(pk__in=list(pending)).only(
+            "id", "last_seen_at", "last_seen_source"
+        ):
+            seen_at, source = pending[user.pk]
+            if user.last_seen_at and user.last_seen_at >= seen_at:
+                continue
+            user.last_seen_at = seen_at
+            user.last_seen_source = source
+            changed.append(user)
+        User.objects.bulk_update(changed, ["last_seen_at", "last_seen_source"], batch_size=500)
+
+    # Overlap the next window slightly: a beat stamped just before ``now`` may reach the
+    # cache after the rosters were read. Re-reading it is harmless, the DB check above
+    # skips rows that are already current.
+    cache.set(_FLUSH_WATERMARK_KEY, (now - ONLINE_WINDOW).timestamp(), timeout=None)
+    return len(changed)
@@ -5,6 +5,7 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from drf_spectacular.utils import extend_schema_field
+from . import presence
 from .models import User, Role, TwoFactorAuth, LimitedAdmin, SupervisorPermission
 from companies.models import Company
 from subscriptions.models import Plan, Subscription, SubscriptionStatus, BillingCycle
@@ -43,7 +44,46 @@ from datetime import timedelta
 from django.utils import timezone
 
 
-class UserSerializer(serializers.ModelSerializer):
+class PresenceListSerializer(serializers.ListSerializer):
+    """Loads the page's cached presence beats in one round trip before rendering rows."""
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, "all") else data)
+        presence.prime(users)
+        return super().to_representation(users)
+
+
+class PresenceFieldsMixin(serializers.Serializer):
+    """
+    last_seen_at / last_seen_source / is_online read through accounts.presence, so they
+    include heartbeats still buffered in the cache and not yet flushed to ``users``.
+    """
+
+    last_seen_at = serializers.SerializerMethodField()
+    last_seen_source = serializers.SerializerMethodField()
+    is_online = serializers.SerializerMethodField()
+
+    def _with_presence(self, obj):
+        beats = self.context.get(presence.CONTEXT_KEY)
+        if beats:
+            presence.use_prefetched(obj, beats)
+        return obj
+
+    @extend_schema_field(serializers.DateTimeField(allow_null=True))
+    def get_last_seen_at(self, obj):
+        seen_at, _source = presence.last_seen(self._with_presence(obj))
+        return serializers.DateTimeField().to_representation(seen_at) if seen_at else None
+
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_last_seen_source(self, obj):
+        return presence.last_seen(self._with_presence(obj))[1]
+
+    @extend_schema_field(serializers.BooleanField())
+    def get_is_online(self, obj):
+        return presence.is_online(self._with_presence(obj))
+
+
+class UserSerializer(PresenceFieldsMixin, serializers.ModelSerializer):
     is_me = serializers.SerializerMethodField()
     company_name = serializers.CharField(source="company.name", read_only=True)
     company_specialization = serializers.CharField(source="company.specialization", read_only=True)
@@ -58,7 +98,6 @@ class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
     limited_admin = serializers.SerializerMethodField()
     supervisor_permissions = serializers.SerializerMethodField()
-    is_online = serializers.SerializerMethodField()
     is_company_owner = serializers.SerializerMethodField()
 
     class Meta:
@@ -463,24 +502,19 @@ class UserSerializer(serializers.ModelSerializer):
                 "can_manage_whatsapp_calls": sp.can_manage_whatsapp_calls,
             },
         }
-    @extend_schema_field(serializers.BooleanField())
-    def get_is_online(self, obj):
-        if not obj.last_seen_at:
-            return False
-        return (timezone.now() - obj.last_seen_at) <= timedelta(seconds=90)
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(PresenceFieldsMixin, serializers.ModelSerializer):
     """Simplified serializer for list views"""
 
     company_name = serializers.CharField(source="company.name", read_only=True)
     company_specialization = serializers.CharField(source="company.specialization", read_only=True)
     company_timezone = serializers.SerializerMethodField()
     is_me = serializers.SerializerMethodField()
-    is_online = serializers.SerializerMethodField()
 
     class Meta:
         model = User
+        list_serializer_class = PresenceListSerializer
         fields = [
             "id",
             "username",
@@ -523,12 +557,6 @@ class UserListSerializer(serializers.ModelSerializer):
             return "UTC"
         return getattr(c, "timezone", None) or "UTC"
 
-    @extend_schema_field(serializers.BooleanField())
-    def get_is_online(self, obj):
-        if not obj.last_seen_at:
-            return False
-        return (timezone.now() - obj.last_seen_at) <= timedelta(seconds=90)
-
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom serializer to return user information with token"""
@@ -27,6 +27,7 @@ from ..serializers import (
     ImpersonateSerializer,
     build_user_auth_payload,
 )
+from ..presence import record_heartbeat
 from ..permissions import CanAccessUser, CanManageLimitedAdmins, CanManageSupervisors, HasActiveSubscription, IsSuperAdmin
 from companies.models import Company
 from django.conf import settings
@@ -238,16 +239,14 @@ class UserViewSet(viewsets.ModelViewSet):
         if source not in allowed_sources:
             source = "unknown"
 
-        user = request.user
-        user.last_seen_at = timezone.now()
-        user.last_seen_source = source
-        user.save(update_fields=["last_seen_at", "last_seen_source"])
+        # Buffered in the cache and flushed to `users` in batches (flush_presence).
+        seen_at = record_heartbeat(request.user, source)
 
         return success_response(
             message="Presence heartbeat recorded.",
             data={
-                "last_seen_at": user.last_seen_at,
-                "last_seen_source": user.last_seen_source,
+                "last_seen_at": seen_at,
+                "last_seen_source": source,
             },
         )
 
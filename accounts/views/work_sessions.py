@@ -5,7 +5,7 @@ Deliberately separate from ``UserViewSet.presence_heartbeat``. That action is al
 called by the mobile app on every foreground resume and has no company opt-in gate,
 no role gate, and no impersonation guard — extending it would have started writing
 hours for every existing tenant. The ping here refreshes presence as a side effect
-(same row, same UPDATE), so clients that run this loop can skip the legacy heartbeat
+(the same buffered beat, see ``accounts.presence``), so clients that run this loop can skip the legacy heartbeat
 and total request volume stays flat.
 """
 
@@ -32,6 +32,7 @@ from django.db.models import F
 from django.utils import timezone
 
 from accounts.models import Role, User, WorkDaySummary
+from accounts.presence import record_heartbeat
 
 try:  # Python 3.9+
     from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -252,13 +253,16 @@ def credit_work_time(user, *, source="web", now=None):
     else:
         credited = min(int((now - prev).total_seconds()), MAX_CREDIT_SECONDS)
 
+    # Presence is buffered in the cache (accounts.presence); only the crediting cursor
+    # still needs the database, because its conditional UPDATE is what stops two
+    # clients from double-counting.
+    record_heartbeat(user, source, now=now)
+
     with transaction.atomic():
         # Conditional update = the whole concurrency story. No row lock on `users`,
         # which is read on every authenticated request.
         rows = User.objects.filter(pk=user.pk, work_last_ping_at=prev).update(
             work_last_ping_at=now,
-            last_seen_at=now,
-            last_seen_source=source,
         )
         if rows != 1:
             # Another client advanced the cursor first; crediting again would double-count.
@@ -271,8 +275,6 @@ def credit_work_time(user, *, source="web", now=None):
             }
 
         user.work_last_ping_at = now
-        user.last_seen_at = now
-        user.last_seen_source = source
 
         if prev is None:
             today_seconds = today_seconds_for(user, now=now)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0023_company_work_hours_idle_timeout_minutes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='patient_number_block_size',
+            field=models.PositiveSmallIntegerField(default=1, help_text='File numbers a server process reserves per counter update (1 = no gaps, 1-1000).'),
+        ),
+    ]
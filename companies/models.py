@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from enum import Enum
 
 
@@ -105,6 +105,12 @@ class Company(models.Model):
         default=10,
         help_text="Minutes of no activity before tracking pauses and the user is alerted (1-120).",
     )
+    # Patient file numbers (companies.patient_numbers). 1 = contiguous numbers in
+    # creation order; larger values let each process reserve that many at once.
+    patient_number_block_size = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="File numbers a server process reserves per counter update (1 = no gaps, 1-1000).",
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -119,7 +125,7 @@ class Company(models.Model):
 class CompanyPatientCounter(models.Model):
     """
     Per-company monotonic counter for Client.patient_file_number (clinic file #).
-    Updated under select_for_update when creating new patients.
+    Updated under select_for_update; companies.patient_numbers decides how often.
     """
 
     company = models.OneToOneField(
@@ -135,6 +141,18 @@ class CompanyPatientCounter(models.Model):
     def __str__(self):
         return f"CompanyPatientCounter(company={self.company_id}, next={self.next_number})"
 
+    @classmethod
+    def allocate(cls, company_id, count=1):
+        """Reserve *count* consecutive file numbers for the company; returns the first."""
+        with transaction.atomic():
+            ctr, _ = cls.objects.select_for_update().get_or_create(
+                company_id=company_id,
+                defaults={"next_number": 1},
+            )
+            first = ctr.next_number
+            cls.objects.filter(pk=ctr.pk).update(next_number=first + count)
+        return first
+
 
 class AdminTenantWhatsAppMessage(models.Model):
     """Platform WhatsApp thread: admin panel ↔ company owner (not CRM client leads)."""
@@ -0,0 +1,67 @@
+"""
+Patient file number allocation (Client.patient_file_number).
+
+With ``Company.patient_number_block_size`` of 1 every new patient takes the
+CompanyPatientCounter row lock, so numbers are contiguous in creation order; but
+concurrent inserts for one company queue on that row until each insert transaction
+commits. A larger block size makes a process reserve that many numbers in one counter
+update and hand them out from memory: the row is locked once per block instead of once
+per lead, at the cost of gaps (numbers reserved by a process that never used them, or
+by a rolled-back insert) and of numbers not following creation order across processes.
+Uniqueness still holds: reserved ranges never overlap, and the
+``uniq_client_company_patient_file_number`` constraint is unchanged.
+"""
+from __future__ import annotations
+
+import threading
+
+from django.db import transaction
+
+from companies.models import CompanyPatientCounter
+
+# company_id -> [next, end): numbers this process reserved and has not handed out.
+_blocks: dict[int, list[int]] = {}
+_lock = threading.Lock()
+
+
+def _publish(company_id: int, start: int, end: int) -> None:
+    with _lock:
+        _blocks[company_id] = [start, end]
+
+
+def allocate_patient_file_numbers(company_id: int, count: int = 1, *, block_size: int = 1) -> int:
+    """
+    Reserve *count* consecutive file numbers for the company; returns the first.
+
+    A reservation's leftover numbers are only handed out once the transaction that
+    bumped the counter has committed: were it rolled back, the counter would go back
+    and another process could reserve the same range.
+    """
+    if block_size <= 1:
+        return CompanyPatientCounter.allocate(company_id, count)
+
+    with _lock:
+        block = _blocks.get(company_id)
+        if block and block[1] - block[0] >= count:
+            first = block[0]
+            block[0] += count
+            return first
+
+    size = max(block_size, count)
+    first = CompanyPatientCounter.allocate(company_id, size)
+    if count < size:
+        transaction.on_commit(lambda: _publish(company_id, first + count, first + size))
+    return first
+
+
+def patient_number_block_size(company) -> int:
+    return max(1, int(getattr(company, "patient_number_block_size", 1) or 1))
+
+
+def forget_reserved_numbers(company_id: int | None = None) -> None:
+    """Drop this process's reserved numbers (one company's, or all); they become gaps."""
+    with _lock:
+        if company_id is None:
+            _blocks.clear()
+        else:
+            _blocks.pop(company_id, None)
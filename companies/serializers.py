@@ -36,6 +36,7 @@ class CompanySerializer(serializers.ModelSerializer):
             "arrival_escalation_minutes",
             "work_hours_tracking_enabled",
             "work_hours_idle_timeout_minutes",
+            "patient_number_block_size",
             "created_at",
             "updated_at",
         ]
@@ -51,6 +52,11 @@ class CompanySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("timezone must be a valid IANA name (e.g. Asia/Baghdad).")
         return name
 
+    def validate_patient_number_block_size(self, value):
+        if not 1 <= value <= 1000:
+            raise serializers.ValidationError("patient_number_block_size must be between 1 and 1000.")
+        return value
+
     def get_owner_phone(self, obj):
         return getattr(obj.owner, "phone", None) or ""
 
@@ -4,7 +4,7 @@ Smart lead auto-assignment: workload by pipeline status, fair tie-breaking, day-
 from __future__ import annotations
 
 from django.db import transaction
-from django.db.models import Count, F, FloatField, Q
+from django.db.models import F, FloatField
 from django.db.models.functions import Coalesce
 
 from accounts.models import Role, User
@@ -14,16 +14,11 @@ from crm.availability import (
     user_is_on_shift_for_urgent,
     user_is_on_shift_or_unscheduled,
 )
-from settings.models import StatusCategory
-
-# Statuses that represent real sales work in the assignee's queue.
-_ACTIVE_WORKLOAD_CATEGORIES = (
-    StatusCategory.ACTIVE.value,
-    StatusCategory.FOLLOW_UP.value,
+from crm.workload import (
+    ACTIVE_WORKLOAD_CATEGORIES as _ACTIVE_WORKLOAD_CATEGORIES,
+    INACTIVE_WORKLOAD_CATEGORY as _INACTIVE_WORKLOAD_CATEGORY,
+    INACTIVE_WORKLOAD_WEIGHT as _INACTIVE_WORKLOAD_WEIGHT,
 )
-_INACTIVE_WORKLOAD_CATEGORY = StatusCategory.INACTIVE.value
-# Inactive leads count at half weight (still owned, but less demanding than active/follow-up).
-_INACTIVE_WORKLOAD_WEIGHT = 0.5
 
 
 def _assignment_role_filter(company) -> list[str]:
@@ -43,7 +38,12 @@ def _eligible_assignees_queryset(company):
 
 
 def _employees_with_workload_queryset(company):
-    """Annotate eligible users with a workload score (lower = more available)."""
+    """
+    Annotate eligible users with a workload score (lower = more available).
+
+    Reads the maintained AssigneeWorkload counters (crm.workload) rather than counting
+    the company's clients; users without a counter row have no assigned leads.
+    """
     return (
         User.objects.filter(
             company=company,
@@ -51,21 +51,8 @@ def _employees_with_workload_queryset(company):
             is_active=True,
         )
         .annotate(
-            active_workload=Count(
-                "assigned_clients",
-                filter=(
-                    Q(assigned_clients__status__category__in=_ACTIVE_WORKLOAD_CATEGORIES)
-                    | Q(assigned_clients__status__isnull=True)
-                ),
-                distinct=True,
-            ),
-            inactive_workload=Count(
-                "assigned_clients",
-                filter=Q(
-                    assigned_clients__status__category=_INACTIVE_WORKLOAD_CATEGORY
-                ),
-                distinct=True,
-            ),
+            active_workload=Coalesce(F("assignee_workload__active_count"), 0),
+            inactive_workload=Coalesce(F("assignee_workload__inactive_count"), 0),
         )
         .annotate(
             workload_score=Coalesce(
@@ -248,13 +235,18 @@ def _next_among_tied(tied_employees, last_id):
     return tied_employees[next_index]
 
 
-def plan_bulk_auto_assignments(company, clients):
+def plan_bulk_auto_assignments(company, clients, *, reassigning=False):
     """
     Plan assignees for many leads without per-lead DB workload queries or FCM.
 
     Loads eligible employees once, picks in memory (updating workload / RR pointer
     locally), then writes ``Company.last_auto_assigned_employee`` once.
 
+    With ``reassigning=True`` the clients are already assigned and count in their
+    current assignee's workload: a lead whose pick is its current assignee stays put
+    (no workload change), otherwise its weight moves from the old assignee to the new
+    one — the same outcome as picking and saving the leads one by one.
+
     Returns a list of ``User | None`` aligned with *clients* (None = skipped).
     Single-lead paths should keep using ``get_auto_assign_employee``.
     """
@@ -301,7 +293,12 @@ def plan_bulk_auto_assignments(company, clients):
 
         selected = _next_among_tied(tied, last_id)
         last_id = selected.id
-        scores[selected.id] = scores[selected.id] + _workload_weight_for_client(client)
+        weight = _workload_weight_for_client(client)
+        current_id = client.assigned_to_id if reassigning else None
+        if selected.id != current_id:
+            scores[selected.id] = scores[selected.id] + weight
+            if current_id in scores:
+                scores[current_id] = scores[current_id] - weight
         picks.append(by_id[selected.id])
 
     if picks and any(picks):
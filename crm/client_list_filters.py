@@ -52,7 +52,13 @@ def _filter_multi_iexact(queryset, field, values):
 
 def apply_client_list_filters(queryset, request, *, exclude_status=False):
     """Apply list query params to a permission-scoped Client queryset."""
-    params = request.query_params
+    return filter_client_list(
+        queryset, request.query_params, request.user, exclude_status=exclude_status
+    )
+
+
+def filter_client_list(queryset, params, user, *, exclude_status=False):
+    """apply_client_list_filters without a request: *params* is the query dict, *user* the viewer."""
 
     type_values = _csv_values(params, "type")
     if type_values:
@@ -71,7 +77,7 @@ def apply_client_list_filters(queryset, request, *, exclude_status=False):
                 queryset = queryset.filter(status__name__in=status_values)
 
     if _truthy_param(params.get("assigned_to_me")):
-        queryset = queryset.filter(assigned_to=request.user)
+        queryset = queryset.filter(assigned_to=user)
     else:
         assigned_values = _csv_values(params, "assigned_to")
         if assigned_values:
@@ -20,12 +20,14 @@ from django.db.models import (
 from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 
+from accounts import presence
 from accounts.models import Role, User
 from crm.models import Client, ClientCall, ClientTask, ClientVisit, Deal, Task
 from crm.serializers import ClientActivitySummaryMixin
+from settings.reference_cache import lead_statuses
 
 
-ONLINE_WINDOW = timedelta(seconds=90)
+ONLINE_WINDOW = presence.ONLINE_WINDOW
 HOT_STAGE_BOOST = {"following", "meeting", "done_meeting", "follow_after_meeting"}
 HOT_STAGE_PENALTY = {"not_interested", "out_of_service", "cancellation"}
 TEAM_GOAL_ROLES = {Role.EMPLOYEE.value, Role.DOCTOR.value, Role.DATA_ENTRY.value}
@@ -291,8 +293,15 @@ def build_dashboard_summary(
     # --- Stats ---
     total_leads = overview["total"]
     today_clients = client_qs.filter(created_at__gte=today_start, created_at__lt=today_end)
-    today_touched = today_clients.exclude(status__name="Untouched").count()
-    today_untouched = today_clients.filter(status__name="Untouched").count()
+    if user.company_id:
+        # Status ids from the cached reference table instead of joining settings_leadstatus.
+        untouched = Q(status_id__in=[
+            status.id for status in lead_statuses(user.company_id) if status.name == "Untouched"
+        ])
+    else:
+        untouched = Q(status__name="Untouched")
+    today_touched = today_clients.exclude(untouched).count()
+    today_untouched = today_clients.filter(untouched).count()
 
     # Parity with FE: unassigned, created before (today-3), no client-task on/after lead calendar day.
     delayed_candidates = list(
@@ -482,10 +491,12 @@ def build_dashboard_summary(
 
     now = timezone.now()
     presence_rows = []
+    presence.prime(company_users)
     for u in company_users:
         if u.role in PRESENCE_EXCLUDED_ROLES:
             continue
-        is_online = bool(u.last_seen_at and (now - u.last_seen_at) <= ONLINE_WINDOW)
+        seen_at, _source = presence.last_seen(u)
+        is_online = bool(seen_at and (now - seen_at) <= ONLINE_WINDOW)
         presence_rows.append(
             {
                 "id": u.id,
@@ -493,8 +504,8 @@ def build_dashboard_summary(
                 "username": u.username,
                 "role": u.role,
                 "is_online": is_online,
-                "last_seen_at": u.last_seen_at.isoformat() if u.last_seen_at else None,
-                "_seen_ts": u.last_seen_at.timestamp() if u.last_seen_at else 0,
+                "last_seen_at": seen_at.isoformat() if seen_at else None,
+                "_seen_ts": seen_at.timestamp() if seen_at else 0,
             }
         )
     presence_rows.sort(key=lambda r: (0 if r["is_online"] else 1, -r["_seen_ts"]))
@@ -0,0 +1,483 @@
+"""
+Server-side CSV / XLSX export of leads, deals and activities.
+
+Rows come straight from ``values_list(...).iterator(chunk_size=...)`` — no model
+instances, serializers or prefetches — and are written as they are read, so memory
+stays flat whatever the tenant size. Small exports stream inline in the response
+(``StreamingHttpResponse``); exports above ``EXPORT_INLINE_MAX_ROWS`` run on the
+task cluster as an ExportJob whose file is downloaded afterwards.
+
+The XLSX writer is a minimal SpreadsheetML producer over ``zipfile`` (one sheet,
+inline strings), so it needs no spreadsheet library and never holds the sheet in
+memory; zipfile handles the unseekable response stream with data descriptors.
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+import logging
+import re
+import zipfile
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import QueryDict, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TASK_PATH = "crm.exports.run_export_job"
+
+CSV = "csv"
+XLSX = "xlsx"
+FORMATS = {
+    CSV: "text/csv; charset=utf-8",
+    XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# Query params consumed by the export itself rather than the list filters. ``format``
+# is taken by DRF content negotiation, hence ``export_format``.
+EXPORT_FORMAT_PARAM = "export_format"
+EXPORT_ASYNC_PARAM = "async"
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
+
+
+def inline_max_rows() -> int:
+    return int(getattr(settings, "EXPORT_INLINE_MAX_ROWS", 20000))
+
+
+# ---------------------------------------------------------------------------
+# Datasets
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Column:
+    header: str
+    fields: tuple
+    fmt: Optional[Callable] = None
+
+
+def _col(header, *fields, fmt=None):
+    return Column(header, fields, fmt)
+
+
+def _person(first, last, username):
+    return f"{first or ''} {last or ''}".strip() or (username or "")
+
+
+def _person_col(header, prefix):
+    return _col(
+        header,
+        f"{prefix}__first_name",
+        f"{prefix}__last_name",
+        f"{prefix}__username",
+        fmt=_person,
+    )
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    columns: tuple
+    ordering: tuple = ("-created_at", "-id")
+
+    @property
+    def fields(self):
+        return [field for column in self.columns for field in column.fields]
+
+
+LEADS = Dataset(
+    "leads",
+    (
+        _col("ID", "id"),
+        _col("Name", "name"),
+        _col("Phone", "phone_number"),
+        _col("Status", "status__name"),
+        _col("Priority", "priority"),
+        _col("Type", "type"),
+        _col("Source", "source"),
+        _col("Channel", "communication_way__name"),
+        _col("Campaign", "campaign__name"),
+        _person_col("Assigned To", "assigned_to"),
+        _col("Assigned At", "assigned_at"),
+        _col("Budget", "budget"),
+        _col("Company Name", "lead_company_name"),
+        _col("Profession", "profession"),
+        _col("Residence", "residence"),
+        _col("Last Contacted At", "last_contacted_at"),
+        _col("Notes", "notes"),
+        _col("Created At", "created_at"),
+    ),
+)
+
+DEALS = Dataset(
+    "deals",
+    (
+        _col("ID", "id"),
+        _col("Client ID", "client_id"),
+        _col("Client", "client__name"),
+        _person_col("Employee", "employee"),
+        _col("Stage", "stage"),
+        _col("Status", "status"),
+        _col("Value", "value"),
+        _col("Payment Method", "payment_method"),
+        _col("Discount Amount", "discount_amount"),
+        _col("Start Date", "start_date"),
+        _col("Closed Date", "closed_date"),
+        _col("Description", "description"),
+        _col("Created At", "created_at"),
+    ),
+)
+
+ACTIVITIES = Dataset(
+    "activities",
+    (
+        _col("ID", "id"),
+        _col("Client ID", "client_id"),
+        _col("Client", "client__name"),
+        _col("Stage", "stage__name"),
+        _col("Notes", "notes"),
+        _col("Reminder", "reminder_date"),
+        _col("Reminder Completed At", "reminder_completed_at"),
+        _person_col("Created By", "created_by"),
+        _col("Created At", "created_at"),
+    ),
+)
+
+DATASETS = {dataset.name: dataset for dataset in (LEADS, DEALS, ACTIVITIES)}
+
+
+def _export_queryset(dataset: Dataset, scoped_queryset):
+    """
+    Re-select the scoped, filtered rows by pk so list-only joins, ``distinct()`` and
+    prefetches do not ride along, then read just the export columns.
+    """
+    model = scoped_queryset.model
+    return (
+        model.objects.filter(pk__in=scoped_queryset.values("pk"))
+        .order_by(*dataset.ordering)
+        .values_list(*dataset.fields)
+    )
+
+
+def iter_rows(dataset: Dataset, scoped_queryset) -> Iterator[list]:
+    """Header row, then one list of Python values per record, read in chunks."""
+    yield [column.header for column in dataset.columns]
+    tz = timezone.get_current_timezone()
+    for values in _export_queryset(dataset, scoped_queryset).iterator(chunk_size=_chunk_size()):
+        row = []
+        position = 0
+        for column in dataset.columns:
+            width = len(column.fields)
+            parts = values[position:position + width]
+            position += width
+            value = column.fmt(*parts) if column.fmt else parts[0]
+            if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+                value = timezone.localtime(value, tz).replace(tzinfo=None)
+            row.append(value)
+        yield row
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+# A spreadsheet treats a CSV cell starting with one of these as a formula. Lead names
+# and notes come from public lead APIs, so such text is prefixed with a quote
+# (OWASP "CSV injection"). XLSX inline strings are never evaluated and stay as is.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value) -> str:
+    text = _text(value)
+    if isinstance(value, str) and text.startswith(_FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+class _Pipe:
+    """Write-only sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class _TextPipe:
+    """Text-mode view of a _Pipe for csv.writer."""
+
+    def __init__(self, pipe):
+        self._pipe = pipe
+
+    def write(self, value):
+        return self._pipe.write(value.encode("utf-8"))
+
+
+def iter_csv(rows: Iterable[list]) -> Iterator[bytes]:
+    """CSV bytes, one chunk per ~chunk_size rows; UTF-8 BOM so Excel reads Arabic."""
+    pipe = _Pipe()
+    text = _TextPipe(pipe)
+    writer = csv.writer(text)
+    pipe.write("\ufeff".encode("utf-8"))
+    chunk = _chunk_size()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if index % chunk == 0:
+            yield pipe.drain()
+    tail = pipe.drain()
+    if tail:
+        yield tail
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    text = _XML_ILLEGAL.sub("", _text(value))
+    if not text:
+        return "<c/>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def iter_xlsx(rows: Iterable[list], sheet_name: str = "Export") -> Iterator[bytes]:
+    """XLSX bytes produced incrementally; only the current chunk is ever in memory."""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_STATIC.items():
+            archive.writestr(name, xml)
+        archive.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        yield pipe.drain()
+
+        chunk = _chunk_size()
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            for index, row in enumerate(rows, start=1):
+                cells = "".join(_xlsx_cell(value) for value in row)
+                sheet.write(f"<row>{cells}</row>".encode("utf-8"))
+                if index % chunk == 0:
+                    yield pipe.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield pipe.drain()
+
+
+def iter_export_bytes(file_format: str, rows: Iterable[list], sheet_name: str) -> Iterator[bytes]:
+    if file_format == XLSX:
+        return iter_xlsx(rows, sheet_name=sheet_name)
+    return iter_csv(rows)
+
+
+def export_filename(dataset: Dataset, file_format: str) -> str:
+    return f"{dataset.name}-{timezone.localdate().isoformat()}.{file_format}"
+
+
+def streaming_export_response(dataset: Dataset, scoped_queryset, file_format: str):
+    response = StreamingHttpResponse(
+        iter_export_bytes(file_format, iter_rows(dataset, scoped_queryset), dataset.name),
+        content_type=FORMATS[file_format],
+    )
+    response["Content-Disposition"] = content_disposition_header(
+        True, export_filename(dataset, file_format)
+    )
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+# dataset name -> crm.list_scopes function building the list's rows for a user.
+_LIST_QUERYSETS = {
+    "leads": "crm.list_scopes.client_list_queryset",
+    "deals": "crm.list_scopes.deal_list_queryset",
+    "activities": "crm.list_scopes.client_task_list_queryset",
+}
+
+
+def export_root() -> Path:
+    root = Path(getattr(settings, "EXPORT_ROOT", Path(settings.BASE_DIR) / "private_data" / "exports"))
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def scoped_queryset_for(dataset_name: str, user, company, params):
+    """
+    The rows the dataset's list endpoint would show *user* in *company* for the query
+    *params* (a QueryDict, or the plain dict stored on an ExportJob): role scoping,
+    search and list filters — the same functions the viewsets use.
+    """
+    from django.utils.module_loading import import_string
+
+    if not isinstance(params, QueryDict):
+        query = QueryDict(mutable=True)
+        for key, value in (params or {}).items():
+            query.setlist(key, value if isinstance(value, list) else [value])
+        params = query
+    return import_string(_LIST_QUERYSETS[dataset_name])(user, company, params)
+
+
+def enqueue_export_job(job) -> bool:
+    """Queue *job* on the cluster; False when the broker refused it (job marked failed)."""
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            EXPORT_TASK_PATH,
+            job.pk,
+            task_name=f"export:{job.dataset}:{job.pk}",
+            timeout=int(getattr(settings, "EXPORT_JOB_TIMEOUT_SECONDS", 1800)),
+        )
+        return True
+    except Exception as exc:
+        logger.warning("Could not enqueue export job id=%s (%s)", job.pk, exc)
+        _fail(job, f"Could not queue export: {exc}")
+        return False
+
+
+def _fail(job, message: str):
+    from crm.models import ExportJobStatus
+
+    job.status = ExportJobStatus.FAILED
+    job.error = message[:2000]
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def run_export_job(job_id: int) -> Optional[str]:
+    """Cluster task: write the export file for ExportJob *job_id*; returns its path."""
+    from crm.models import ExportJob, ExportJobStatus
+
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJobStatus.PENDING).update(
+        status=ExportJobStatus.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = ExportJob.objects.select_related("requested_by", "company").get(pk=job_id)
+    dataset = DATASETS[job.dataset]
+
+    path = export_root() / f"export-{job.pk}-{dataset.name}.{job.file_format}"
+    partial = path.with_suffix(path.suffix + ".part")
+    row_count = 0
+    try:
+        scoped = scoped_queryset_for(dataset.name, job.requested_by, job.company, job.params)
+
+        def counted(rows):
+            nonlocal row_count
+            for index, row in enumerate(rows):
+                if index:
+                    row_count += 1
+                yield row
+
+        with open(partial, "wb") as handle:
+            for data in iter_export_bytes(
+                job.file_format, counted(iter_rows(dataset, scoped)), dataset.name
+            ):
+                handle.write(data)
+        partial.replace(path)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        partial.unlink(missing_ok=True)
+        _fail(job, str(exc) or exc.__class__.__name__)
+        return None
+
+    job.status = ExportJobStatus.READY
+    job.row_count = row_count
+    job.file_path = str(path)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "row_count", "file_path", "finished_at"])
+    return str(path)
+
+
+def export_params(request) -> dict:
+    """Query params to replay for a background export (export-only params dropped)."""
+    return {
+        key: values if len(values) > 1 else values[0]
+        for key, values in request.query_params.lists()
+        if key not in (EXPORT_FORMAT_PARAM, EXPORT_ASYNC_PARAM)
+    }
+
+
+def prune_export_files(older_than: datetime.timedelta) -> int:
+    """Delete export jobs (and their files) created before now - *older_than*."""
+    from crm.models import ExportJob
+
+    cutoff = timezone.now() - older_than
+    removed = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).only("pk", "file_path").iterator():
+        if job.file_path:
+            Path(job.file_path).unlink(missing_ok=True)
+        job.delete()
+        removed += 1
+    return removed
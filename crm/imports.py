@@ -0,0 +1,543 @@
+"""
+Bulk lead import (CSV upload or JSON array) run on the task cluster as a LeadImportJob.
+
+Creating a lead one at a time runs, per lead, the phone-uniqueness queries
+(``_assert_company_phone_unique``), the patient-number counter lock in
+``Client.save``, the auto-assign pick and the notification signals. The import does
+each of those once per chunk instead:
+
+* phones are checked against an in-memory index of the company's numbers, built once
+  per job from the same canonical / fuzzy keys as the single-lead check; accepted rows
+  join the index, so duplicates inside the file are caught as well;
+* patient file numbers are reserved for a whole chunk at once;
+* clients and phone rows are written with ``bulk_create``, assignees are planned in
+  memory (``plan_bulk_auto_assignments``), workload counters move once per chunk and
+  the assignment notifications go out in one batched on_commit callback.
+
+``bulk_create`` skips the Client save signals, so imported leads get no welcome
+SMS / WhatsApp: they are existing contacts, not new enquiries.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+IMPORT_TASK_PATH = "crm.imports.run_lead_import_job"
+
+CSV = "csv"
+JSON = "json"
+FORMATS = (CSV, JSON)
+
+# Rejected rows kept on the job for the progress endpoint; error_count has the total.
+MAX_RECORDED_ERRORS = 200
+
+DEFAULT_PRIORITY = "medium"
+DEFAULT_TYPE = "fresh"
+DEFAULT_SOURCE = "manual"
+
+# Column names accepted for each field besides the field name itself.
+_HEADER_ALIASES = {
+    "full_name": "name",
+    "phone_number": "phone",
+    "mobile": "phone",
+    "phone_numbers": "phones",
+    "extra_phones": "phones",
+    "channel": "communication_way",
+    "external_lead_id": "external_id",
+    "company_name": "lead_company_name",
+}
+_TEXT_FIELDS = ("lead_company_name", "profession", "residence")
+_EXTRA_PHONE_SEPARATORS = re.compile(r"[;,|]")
+
+
+def chunk_size() -> int:
+    return int(getattr(settings, "LEAD_IMPORT_CHUNK_SIZE", 1000))
+
+
+def max_rows() -> int:
+    return int(getattr(settings, "LEAD_IMPORT_MAX_ROWS", 100000))
+
+
+def import_root() -> Path:
+    root = Path(getattr(settings, "IMPORT_ROOT", Path(settings.BASE_DIR) / "private_data" / "imports"))
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+# ---------------------------------------------------------------------------
+# Source files
+# ---------------------------------------------------------------------------
+
+
+def _normalize_key(key) -> str:
+    key = re.sub(r"[\s\-]+", "_", str(key or "").strip().lower())
+    return _HEADER_ALIASES.get(key, key)
+
+
+def _normalize_row(raw):
+    if not isinstance(raw, dict):
+        return raw
+    return {_normalize_key(key): value for key, value in raw.items() if key is not None}
+
+
+def iter_import_rows(path, file_format: str) -> Iterator:
+    """Rows of an import file as dicts keyed by normalized field name (CSV read lazily)."""
+    if file_format == CSV:
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            for raw in csv.DictReader(handle):
+                if any((value or "").strip() for value in raw.values() if isinstance(value, str)):
+                    yield _normalize_row(raw)
+    else:
+        with open(path, encoding="utf-8") as handle:
+            for raw in json.load(handle):
+                yield _normalize_row(raw)
+
+
+def csv_header_fields(path) -> list[str]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        header = next(csv.reader(handle), [])
+    return [_normalize_key(column) for column in header]
+
+
+def store_import_source(job, *, upload=None, rows=None) -> int:
+    """
+    Write the upload (CSV) or the JSON rows to the job's source file and record
+    ``total_rows``; returns it.
+    """
+    path = import_root() / f"import-{job.pk}.{job.file_format}"
+    if upload is not None:
+        with open(path, "wb") as handle:
+            for data in upload.chunks():
+                handle.write(data)
+    else:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(rows, handle, ensure_ascii=False)
+    job.file_path = str(path)
+    job.total_rows = sum(1 for _ in iter_import_rows(path, job.file_format))
+    job.save(update_fields=["file_path", "total_rows"])
+    return job.total_rows
+
+
+def discard_import(job) -> None:
+    """Drop a job rejected before it was queued, with its source file."""
+    if job.file_path:
+        Path(job.file_path).unlink(missing_ok=True)
+    job.delete()
+
+
+def enqueue_import_job(job) -> bool:
+    """Queue *job* on the cluster; False when the broker refused it (job marked failed)."""
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            IMPORT_TASK_PATH,
+            job.pk,
+            task_name=f"lead_import:{job.pk}",
+            timeout=int(getattr(settings, "LEAD_IMPORT_JOB_TIMEOUT_SECONDS", 3600)),
+        )
+        return True
+    except Exception as exc:
+        logger.warning("Could not enqueue lead import job id=%s (%s)", job.pk, exc)
+        _fail(job, f"Could not queue import: {exc}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Company indexes
+# ---------------------------------------------------------------------------
+
+
+class PhoneIndex:
+    """
+    The company's phone numbers as the keys ``_assert_company_phone_unique`` matches
+    on: canonical E.164 digits, plus the fuzzy ``phone_match_keys`` of every number.
+    """
+
+    def __init__(self, company):
+        from crm.models import Client, ClientPhoneNumber
+
+        self.canonical: set[str] = set()
+        self.fuzzy: set[str] = set()
+        primaries = (
+            Client.objects.filter(company=company)
+            .exclude(phone_number__isnull=True)
+            .exclude(phone_number="")
+            .values_list("phone_number", flat=True)
+        )
+        extras = ClientPhoneNumber.objects.filter(company=company).values_list(
+            "phone_number", flat=True
+        )
+        for phones in (primaries, extras):
+            for phone in phones.iterator(chunk_size=chunk_size()):
+                self.add(phone)
+
+    def add(self, phone: str) -> None:
+        from integrations.services.phone_match import canonical_phone_key, phone_match_keys
+
+        canon = canonical_phone_key(phone)
+        if canon:
+            self.canonical.add(canon)
+        self.fuzzy |= phone_match_keys(phone)
+
+    def __contains__(self, phone: str) -> bool:
+        from integrations.services.phone_match import canonical_phone_key, phone_match_keys
+
+        # Non-dialable values are never enforced, like the single-lead check.
+        canon = canonical_phone_key(phone)
+        if not canon:
+            return False
+        return canon in self.canonical or bool(phone_match_keys(phone) & self.fuzzy)
+
+
+class _Lookups:
+    """Company statuses and channels by id and lower-cased name, loaded once per job."""
+
+    def __init__(self, company):
+        from crm.lead_defaults import get_default_lead_status
+        from settings.models import Channel, LeadStatus
+
+        self.statuses = self._index(LeadStatus.objects.filter(company=company))
+        self.channels = self._index(Channel.objects.filter(company=company))
+        self.default_status = get_default_lead_status(company)
+
+    @staticmethod
+    def _index(queryset):
+        index = {}
+        for row in queryset:
+            index[str(row.pk)] = row
+            index.setdefault(row.name.strip().lower(), row)
+        return index
+
+    @staticmethod
+    def resolve(index, value, label):
+        if value in (None, ""):
+            return None
+        row = index.get(str(value).strip().lower())
+        if row is None:
+            raise RowError(f"Unknown {label}: {value}")
+        return row
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+
+class RowError(Exception):
+    def __init__(self, message, code="invalid_row"):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass
+class _PreparedRow:
+    row_number: int
+    client: object
+    phones: list = field(default_factory=list)
+
+
+def _text(raw, key) -> str:
+    value = raw.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _choice(raw, key, choices, default) -> str:
+    value = _text(raw, key).lower() or default
+    if value not in choices:
+        raise RowError(f"{key} must be one of: {', '.join(sorted(choices))}.")
+    return value
+
+
+def _row_phones(raw) -> list[str]:
+    phones = [_text(raw, "phone")]
+    extra = raw.get("phones")
+    if isinstance(extra, (list, tuple)):
+        phones.extend(str(phone).strip() for phone in extra if phone is not None)
+    elif extra:
+        phones.extend(part.strip() for part in _EXTRA_PHONE_SEPARATORS.split(str(extra)))
+    unique = []
+    for phone in phones:
+        if phone and phone not in unique:
+            unique.append(phone)
+    return unique
+
+
+def _build_client(raw, company, lookups, job):
+    """An unsaved Client for *raw*, or RowError."""
+    from crm.models import Client, Priority, Type
+
+    if not isinstance(raw, dict):
+        raise RowError("Row must be an object.")
+    name = _text(raw, "name")
+    if not name:
+        raise RowError("name is required.")
+
+    phones = _row_phones(raw)
+    for phone in phones:
+        if len(phone) > Client._meta.get_field("phone_number").max_length:
+            raise RowError(f"Phone number is too long: {phone}")
+
+    values = {}
+    for key in ("name", *_TEXT_FIELDS):
+        value = name if key == "name" else _text(raw, key)
+        if len(value) > Client._meta.get_field(key).max_length:
+            raise RowError(f"{key} is too long.")
+        values[key] = value or None
+    values["name"] = name
+
+    budget = _text(raw, "budget")
+    if budget:
+        try:
+            values["budget"] = Decimal(budget.replace(",", ""))
+        except InvalidOperation:
+            raise RowError(f"budget is not a number: {budget}") from None
+
+    notes = _text(raw, "notes")
+    email = _text(raw, "email")
+    if email:
+        notes = "\n".join(part for part in (notes, f"Email: {email}") if part)
+
+    sources = {value for value, _ in Client._meta.get_field("source").choices}
+    status = lookups.resolve(lookups.statuses, raw.get("status"), "status") or lookups.default_status
+    return Client(
+        company=company,
+        priority=_choice(raw, "priority", {p.value for p in Priority}, DEFAULT_PRIORITY),
+        type=_choice(raw, "type", {t.value for t in Type}, DEFAULT_TYPE),
+        source=_choice(raw, "source", sources, DEFAULT_SOURCE),
+        status=status,
+        communication_way=lookups.resolve(lookups.channels, raw.get("communication_way"), "channel"),
+        phone_number=phones[0] if phones else None,
+        external_lead_id=_text(raw, "external_id") or None,
+        notes=notes or None,
+        created_by=job.requested_by,
+        **values,
+    ), phones
+
+
+class _Importer:
+    """Per-job state: company indexes and the running counters saved after each chunk."""
+
+    def __init__(self, job):
+        self.job = job
+        self.company = job.company
+        self.lookups = _Lookups(self.company)
+        self.reload_indexes()
+
+    def reload_indexes(self):
+        from crm.models import Client
+
+        self.phones = PhoneIndex(self.company)
+        self.external_ids = set(
+            Client.objects.filter(company=self.company, external_lead_id__isnull=False)
+            .values_list("external_lead_id", flat=True)
+            .iterator(chunk_size=chunk_size())
+        )
+
+    def _prepare(self, rows):
+        """Split a chunk into new clients, duplicates and rejected rows (indexes updated)."""
+        prepared, rejected = [], []
+        for row_number, raw in rows:
+            try:
+                client, phones = _build_client(raw, self.company, self.lookups, self.job)
+                if client.external_lead_id and client.external_lead_id in self.external_ids:
+                    raise RowError("A lead with this external_id already exists.", "duplicate_external_id")
+                if any(phone in self.phones for phone in phones):
+                    raise RowError(
+                        "A lead with this phone number already exists in your company.",
+                        "duplicate_lead_phone",
+                    )
+            except RowError as exc:
+                rejected.append({"row": row_number, "code": exc.code, "error": str(exc)})
+                continue
+            for phone in phones:
+                self.phones.add(phone)
+            if client.external_lead_id:
+                self.external_ids.add(client.external_lead_id)
+            prepared.append(_PreparedRow(row_number, client, phones))
+        return prepared, rejected
+
+    def _write(self, prepared):
+        from companies.patient_numbers import (
+            allocate_patient_file_numbers,
+            patient_number_block_size,
+        )
+        from crm.assignment import plan_bulk_auto_assignments
+        from crm.models import Client, ClientEvent, ClientPhoneNumber
+        from crm.signals import notify_lead_assignment_changes
+        from crm.workload import record_bulk_client_changes
+        from integrations.services.phone_match import canonical_phone_key
+        from subscriptions.entitlements import require_quota
+
+        clients = [row.client for row in prepared]
+        require_quota(
+            self.company,
+            "max_clients",
+            current_count=Client.objects.filter(company=self.company).count(),
+            requested_delta=len(clients),
+            message="Lead limit reached for this company plan.",
+            error_key="plan_quota_max_clients_exceeded",
+        )
+
+        first_number = allocate_patient_file_numbers(
+            self.company.pk, len(clients), block_size=patient_number_block_size(self.company)
+        )
+        picks = [None] * len(clients)
+        if self.company.auto_assign_enabled:
+            picks = plan_bulk_auto_assignments(self.company, clients)
+        now = timezone.now()
+        for offset, (client, employee) in enumerate(zip(clients, picks)):
+            client.patient_file_number = first_number + offset
+            if employee:
+                client.assigned_to = employee
+                client.assigned_at = now
+
+        Client.objects.bulk_create(clients, batch_size=500)
+        ClientPhoneNumber.objects.bulk_create(
+            [
+                ClientPhoneNumber(
+                    client=row.client,
+                    company=self.company,
+                    phone_number=phone,
+                    phone_normalized=canonical_phone_key(phone) or "",
+                    phone_type="mobile",
+                    is_primary=index == 0,
+                )
+                for row in prepared
+                for index, phone in enumerate(row.phones)
+            ],
+            batch_size=500,
+        )
+        for client in clients:
+            client._tracked_snapshot = dict.fromkeys(Client.TRACKED_FIELDS)
+        record_bulk_client_changes(clients)
+
+        actor = self.job.requested_by
+        events = []
+        assignments = []
+        for client, employee in zip(clients, picks):
+            events.append(
+                ClientEvent(
+                    client=client,
+                    event_type="created",
+                    new_value="Import",
+                    notes=f"Imported from {self.job.file_format.upper()} (import #{self.job.pk})",
+                    created_by=actor,
+                )
+            )
+            if employee:
+                events.append(
+                    ClientEvent(
+                        client=client,
+                        event_type="assignment",
+                        old_value="Unassigned",
+                        new_value=employee.get_full_name() or employee.username,
+                        notes="Auto-assigned on import",
+                        created_by=actor,
+                    )
+                )
+                assignments.append((client, None, employee))
+        ClientEvent.objects.bulk_create(events, batch_size=500)
+        notify_lead_assignment_changes(assignments, actor=actor)
+
+    def import_chunk(self, rows):
+        """Import one chunk in its own transaction and save the job's progress."""
+        prepared, rejected = self._prepare(rows)
+        if prepared:
+            try:
+                with transaction.atomic():
+                    self._write(prepared)
+            except IntegrityError:
+                # A lead with one of these phones / external ids was created while the
+                # job ran: rebuild the indexes and retry the chunk once.
+                logger.info("Lead import %s: retrying a chunk after a conflict", self.job.pk)
+                self.reload_indexes()
+                prepared, rejected = self._prepare(rows)
+                if prepared:
+                    with transaction.atomic():
+                        self._write(prepared)
+
+        job = self.job
+        duplicates = sum(1 for row in rejected if row["code"].startswith("duplicate"))
+        job.processed_rows += len(rows)
+        job.created_count += len(prepared)
+        job.duplicate_count += duplicates
+        job.error_count += len(rejected) - duplicates
+        room = MAX_RECORDED_ERRORS - len(job.errors)
+        if room > 0:
+            job.errors = job.errors + rejected[:room]
+        job.save(
+            update_fields=[
+                "processed_rows",
+                "created_count",
+                "duplicate_count",
+                "error_count",
+                "errors",
+            ]
+        )
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _fail(job, message: str):
+    from crm.models import LeadImportJobStatus
+
+    job.status = LeadImportJobStatus.FAILED
+    job.error = message[:2000]
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def run_lead_import_job(job_id: int) -> Optional[int]:
+    """Cluster task: import the rows of LeadImportJob *job_id*; returns the created count."""
+    from rest_framework.exceptions import ValidationError
+
+    from crm.models import LeadImportJob, LeadImportJobStatus
+
+    claimed = LeadImportJob.objects.filter(
+        pk=job_id, status=LeadImportJobStatus.PENDING
+    ).update(status=LeadImportJobStatus.RUNNING, started_at=timezone.now())
+    if not claimed:
+        return None
+    job = LeadImportJob.objects.select_related("company", "requested_by").get(pk=job_id)
+
+    try:
+        importer = _Importer(job)
+        for rows in _chunks(iter_import_rows(job.file_path, job.file_format), chunk_size()):
+            importer.import_chunk(rows)
+    except ValidationError as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {}
+        _fail(job, str(detail.get("error") or exc))
+        return None
+    except Exception as exc:
+        logger.exception("Lead import job %s failed", job.pk)
+        _fail(job, str(exc) or exc.__class__.__name__)
+        return None
+    finally:
+        if job.file_path:
+            Path(job.file_path).unlink(missing_ok=True)
+
+    job.status = LeadImportJobStatus.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    return job.created_count
@@ -2,21 +2,17 @@
 
 
 def get_default_lead_status(company):
-    from settings.models import LeadStatus
+    from settings.reference_cache import lead_statuses
 
-    default = LeadStatus.objects.filter(
-        company=company,
-        is_active=True,
-        is_hidden=False,
-        is_default=True,
-    ).first()
-    if default:
-        return default
-    return (
-        LeadStatus.objects.filter(company=company, is_active=True, is_hidden=False)
-        .order_by("id")
-        .first()
-    )
+    visible = [
+        status for status in lead_statuses(company) if status.is_active and not status.is_hidden
+    ]
+    # Rows come in LeadStatus.Meta.ordering (-is_default, name): with several defaults
+    # the alphabetically first one wins. Without any, the oldest visible status.
+    for status in visible:
+        if status.is_default:
+            return status
+    return min(visible, key=lambda status: status.pk) if visible else None
 
 
 def get_default_lead_status_id(company) -> int | None:
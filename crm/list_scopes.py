@@ -0,0 +1,132 @@
+"""
+Role scoping and list filters for the lead, deal and activity lists.
+
+These are plain functions of (user, company, query params) so that code without a
+request — the background export job — applies exactly the rows the list endpoints
+would show. The viewsets call the same functions from ``get_queryset``.
+"""
+import operator
+import re
+from functools import reduce
+
+from django.db.models import Q
+
+from crm_saas_api.utils import clean_int_param
+
+from .client_list_filters import filter_client_list
+
+SEARCH_PARAM = "search"
+
+CLIENT_SEARCH_FIELDS = [
+    "name",
+    "phone_number",
+    "phone_numbers__phone_number",
+    "priority",
+    "type",
+    "communication_way__name",
+    "status__name",
+    "tags__name",
+    "notes",
+    "residence",
+    "lead_company_name",
+    "profession",
+    "source",
+    "campaign__name",
+]
+DEAL_SEARCH_FIELDS = ["client__name", "stage", "company__name"]
+CLIENT_TASK_SEARCH_FIELDS = ["notes", "stage__name", "client__name"]
+
+
+def scope_clients(queryset, user, company):
+    """Clients *user* may see in *company*."""
+    if user.is_admin() or user.is_reception():
+        return queryset.filter(company=company).distinct()
+
+    if user.is_supervisor() and user.supervisor_has_permission("manage_leads"):
+        return queryset.filter(company=company).distinct()
+
+    if user.is_data_entry():
+        return queryset.filter(company=company).distinct()
+
+    if user.is_call_center():
+        return queryset.filter(company=company).distinct()
+
+    if user.is_assigned_clinical_staff():
+        return queryset.filter(assigned_to=user).distinct()
+
+    return queryset.none()
+
+
+def scope_deals(queryset, user, company, params):
+    """Deals *user* may see in *company*, narrowed by the ``stage`` param."""
+    if user.is_admin():
+        queryset = queryset.filter(company=company)
+    elif user.is_supervisor() and user.supervisor_has_permission("manage_deals"):
+        queryset = queryset.filter(company=company)
+    elif user.is_employee():
+        queryset = queryset.filter(employee=user)
+    else:
+        return queryset.none()
+
+    stage = params.get("stage")
+    if stage:
+        queryset = queryset.filter(stage=stage)
+    return queryset
+
+
+def scope_client_tasks(queryset, user, company, params):
+    """Client activities *user* may see in *company*, narrowed by the ``client`` param."""
+    if user.is_admin() or user.is_reception():
+        queryset = queryset.filter(client__company=company)
+    elif user.is_supervisor() and user.supervisor_has_permission("manage_leads"):
+        queryset = queryset.filter(client__company=company)
+    elif user.is_assigned_clinical_staff():
+        queryset = queryset.filter(client__assigned_to=user)
+    else:
+        queryset = queryset.none()
+
+    client_id = clean_int_param(params, "client")
+    if client_id is not None:
+        queryset = queryset.filter(client_id=client_id)
+    return queryset
+
+
+def search_queryset(queryset, search_fields, params):
+    """
+    The ``search`` param as DRF's SearchFilter applies it: terms split on whitespace
+    and commas, every term must match at least one field (case-insensitive contains).
+    """
+    raw = (params.get(SEARCH_PARAM) or "").replace("\x00", "")
+    terms = [term for term in re.split(r"[\s,]+", raw) if term]
+    if not terms:
+        return queryset
+    conditions = [
+        reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in search_fields))
+        for term in terms
+    ]
+    return queryset.filter(reduce(operator.and_, conditions)).distinct()
+
+
+def client_list_queryset(user, company, params):
+    """Leads list rows: scoping, search and the list filters."""
+    from .models import Client
+
+    queryset = scope_clients(Client.objects.all(), user, company)
+    queryset = search_queryset(queryset, CLIENT_SEARCH_FIELDS, params)
+    return filter_client_list(queryset, params, user)
+
+
+def deal_list_queryset(user, company, params):
+    """Deals list rows: scoping and search."""
+    from .models import Deal
+
+    queryset = scope_deals(Deal.objects.all(), user, company, params)
+    return search_queryset(queryset, DEAL_SEARCH_FIELDS, params)
+
+
+def client_task_list_queryset(user, company, params):
+    """Activities list rows: scoping and search."""
+    from .models import ClientTask
+
+    queryset = scope_client_tasks(ClientTask.objects.all(), user, company, params)
+    return search_queryset(queryset, CLIENT_TASK_SEARCH_FIELDS, params)
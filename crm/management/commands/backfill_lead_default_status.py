@@ -16,6 +16,7 @@ from django.db.models import F
 from companies.models import Company
 from crm.lead_defaults import get_default_lead_status
 from crm.models import Client
+from crm.workload import reconcile_workloads
 
 
 class Command(BaseCommand):
@@ -92,6 +93,8 @@ class Command(BaseCommand):
                     status_id=default_status.id,
                     status_entered_at=F("created_at"),
                 )
+                # queryset.update() skips the save signals that move workload counters.
+                reconcile_workloads(company_id=cid)
                 self.stdout.write(
                     self.style.SUCCESS(
                         f'company={cid} ({company.name!r}): set status '
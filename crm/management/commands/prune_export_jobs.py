@@ -0,0 +1,36 @@
+"""
+Delete old ExportJob rows and their files under EXPORT_ROOT.
+
+Export files are full copies of a tenant's leads, deals or activities; they only need
+to live long enough for the requester to download them.
+
+Usage:
+    python manage.py prune_export_jobs
+    python manage.py prune_export_jobs --days 3
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from crm.exports import prune_export_files
+
+
+class Command(BaseCommand):
+    help = 'Delete ExportJob rows and files older than --days (default: 7)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Delete exports created more than this many days ago (default: 7)',
+        )
+
+    def handle(self, *args, **options):
+        days = options.get('days', 7)
+        if days < 1:
+            self.stdout.write(self.style.ERROR('--days must be at least 1.'))
+            return
+
+        removed = prune_export_files(timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {removed} export job(s) older than {days} day(s)'))
@@ -0,0 +1,49 @@
+"""
+Rebuild the per-assignee workload counters (AssigneeWorkload) from the client table.
+
+The counters are maintained on assignment and status changes; this catches anything
+that bypassed those paths (raw queryset.update(), manual SQL, imports).
+
+Usage:
+    python manage.py reconcile_assignee_workload
+    python manage.py reconcile_assignee_workload --dry-run
+    python manage.py reconcile_assignee_workload --company-id 1
+"""
+
+from django.core.management.base import BaseCommand
+
+from crm.workload import reconcile_workloads
+
+
+class Command(BaseCommand):
+    help = "Recompute assignee workload counters from assigned clients and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company-id",
+            type=int,
+            default=None,
+            help="Limit to one company ID.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drift without updating.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drift = reconcile_workloads(options["company_id"], dry_run=dry_run)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Assignee workload counters are in sync."))
+            return
+
+        prefix = "[DRY RUN] " if dry_run else ""
+        for user_id, (have, want) in sorted(drift.items()):
+            self.stdout.write(
+                f"{prefix}user={user_id}: active {have[0]} -> {want[0]}, "
+                f"inactive {have[1]} -> {want[1]}"
+            )
+        verb = "would be corrected" if dry_run else "corrected"
+        self.stdout.write(self.style.SUCCESS(f"\n{prefix}{len(drift)} user(s) {verb}."))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def _backfill_assignee_workload(apps, schema_editor):
+    Client = apps.get_model("crm", "Client")
+    AssigneeWorkload = apps.get_model("crm", "AssigneeWorkload")
+
+    rows = (
+        Client.objects.filter(assigned_to__isnull=False)
+        .values("assigned_to_id")
+        .annotate(
+            active=Count(
+                "id",
+                filter=Q(status__category__in=("active", "follow_up"))
+                | Q(status__isnull=True),
+            ),
+            inactive=Count("id", filter=Q(status__category="inactive")),
+        )
+    )
+    AssigneeWorkload.objects.bulk_create(
+        [
+            AssigneeWorkload(
+                user_id=row["assigned_to_id"],
+                active_count=row["active"],
+                inactive_count=row["inactive"],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0057_leadarrival'),
+        ('settings', '0024_tag'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssigneeWorkload',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='assignee_workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_count', models.IntegerField(default=0, help_text='Assigned leads in an active or follow-up status, or with no status.')),
+                ('inactive_count', models.IntegerField(default=0, help_text='Assigned leads in an inactive status (count at half weight).')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'crm_assignee_workload',
+            },
+        ),
+        migrations.RunPython(_backfill_assignee_workload, migrations.RunPython.noop),
+    ]
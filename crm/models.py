@@ -302,28 +302,76 @@ class Client(models.Model):
             ),
         ]
 
+    # Fields whose previous value save() and the pre_save signals compare against.
+    # Captured when the row is loaded and by the first post_save receiver, so change
+    # detection does not re-read the row (even for saves nested in post_save).
+    TRACKED_FIELDS = ("status_id", "assigned_to_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_tracked_fields(fields)
+
+    def _remember_tracked_fields(self, fields=None):
+        """Record the current value of the tracked fields named in ``fields`` (all if None)."""
+        deferred = self.get_deferred_fields()
+        snapshot = dict(getattr(self, "_tracked_snapshot", {}))
+        for attname in self.TRACKED_FIELDS:
+            if attname in deferred:
+                continue
+            if fields is None or attname in fields or attname[:-3] in fields:
+                snapshot[attname] = getattr(self, attname)
+        self._tracked_snapshot = snapshot
+
+    def tracked_originals(self):
+        """
+        Tracked field values as last loaded or saved, keyed by attname; all None for a
+        client without a pk and None when the row does not exist. Only fields missing
+        from the snapshot (deferred, or the instance was built by hand) cost a query,
+        and the fetched values are kept so pre_save and post_save agree.
+        """
+        if self.pk is None:
+            return dict.fromkeys(self.TRACKED_FIELDS)
+        known = dict(getattr(self, "_tracked_snapshot", {}))
+        missing = [attname for attname in self.TRACKED_FIELDS if attname not in known]
+        if missing:
+            row = type(self).objects.filter(pk=self.pk).values(*missing).first()
+            if row is None:
+                return None
+            known.update(row)
+            self._tracked_snapshot = known
+        return dict(known)
+
     def save(self, *args, **kwargs):
         """
         Enforce weekly day off on assignee changes. bulk_update() bypasses save(); use normal
         save(update_fields=[...,'assigned_to',...]) for bulk assign so this always runs.
         """
         if self._state.adding and self.company_id and self.patient_file_number is None:
-            from django.db import transaction
+            from companies.patient_numbers import (
+                allocate_patient_file_numbers,
+                patient_number_block_size,
+            )
 
-            from companies.models import CompanyPatientCounter
-
-            with transaction.atomic():
-                ctr, _ = CompanyPatientCounter.objects.select_for_update().get_or_create(
-                    company_id=self.company_id,
-                    defaults={"next_number": 1},
-                )
-                n = ctr.next_number
-                self.patient_file_number = n
-                CompanyPatientCounter.objects.filter(pk=ctr.pk).update(next_number=n + 1)
+            self.patient_file_number = allocate_patient_file_numbers(
+                self.company_id, block_size=patient_number_block_size(self.company)
+            )
 
         skip = kwargs.pop("_skip_assignee_availability_check", False)
         update_fields = kwargs.get("update_fields")
 
+        if update_fields is not None and {"status", "status_id"}.intersection(update_fields):
+            originals = self.tracked_originals() or {}
+            if originals.get("status_id") != self.status_id:
+                # The pre_save handler stamps these on a status change; a partial save
+                # of the status must write them too, or the stamp is lost.
+                kwargs["update_fields"] = {*update_fields, "status_entered_at", "last_contacted_at"}
+
         if (
             not skip
             and self.assigned_to_id
@@ -333,15 +381,8 @@ class Client(models.Model):
 
             from crm.availability import user_accepts_new_assignments
 
-            old_aid = None
-            if self.pk:
-                old_aid = (
-                    type(self)
-                    .objects.filter(pk=self.pk)
-                    .values_list("assigned_to_id", flat=True)
-                    .first()
-                )
-            if old_aid != self.assigned_to_id:
+            originals = self.tracked_originals() or {}
+            if originals.get("assigned_to_id") != self.assigned_to_id:
                 assignee = self.assigned_to
                 cal = getattr(self, "company", None)
                 if cal is None and self.company_id:
@@ -981,3 +1022,128 @@ class LeadArrival(models.Model):
 
     def __str__(self):
         return f"{self.client.name} arrived at {self.announced_at}"
+
+
+class AssigneeWorkload(models.Model):
+    """
+    Per-user count of assigned leads by workload bucket, read by least-busy
+    auto-assignment instead of aggregating the company's client table.
+
+    Maintained by crm.workload on assignment and status-category changes;
+    ``manage.py reconcile_assignee_workload`` rebuilds it from the client table.
+    """
+    user = models.OneToOneField(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="assignee_workload",
+    )
+    active_count = models.IntegerField(
+        default=0,
+        help_text="Assigned leads in an active or follow-up status, or with no status.",
+    )
+    inactive_count = models.IntegerField(
+        default=0,
+        help_text="Assigned leads in an inactive status (count at half weight).",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "crm_assignee_workload"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.active_count} active / {self.inactive_count} inactive"
+
+
+class ExportJobStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    READY = "ready", "Ready"
+    FAILED = "failed", "Failed"
+
+
+class ExportJob(models.Model):
+    """
+    A background CSV/XLSX export too large to stream inline (crm.exports).
+
+    ``params`` holds the query params of the original export request; the worker
+    replays them through the same viewset scoping and filters as the request would.
+    """
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.CASCADE, related_name="export_jobs",
+    )
+    requested_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+    dataset = models.CharField(max_length=20)
+    file_format = models.CharField(max_length=8)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=ExportJobStatus.choices, default=ExportJobStatus.PENDING,
+    )
+    row_count = models.PositiveIntegerField(null=True, blank=True)
+    file_path = models.CharField(max_length=512, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "crm_export_job"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["requested_by", "-created_at"], name="export_job_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset}.{self.file_format} export #{self.pk} ({self.status})"
+
+
+class LeadImportJobStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+
+
+class LeadImportJob(models.Model):
+    """
+    A bulk lead import (CSV upload or JSON array) processed in chunks on the task
+    cluster (crm.imports). The counters are updated after every chunk so clients can
+    poll progress; ``errors`` keeps the first rejected rows with their reasons.
+    """
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.CASCADE, related_name="lead_import_jobs",
+    )
+    requested_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.CASCADE,
+        related_name="lead_import_jobs",
+    )
+    file_format = models.CharField(max_length=8)
+    file_path = models.CharField(max_length=512, blank=True, default="")
+    status = models.CharField(
+        max_length=10, choices=LeadImportJobStatus.choices, default=LeadImportJobStatus.PENDING,
+    )
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "crm_lead_import_job"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["requested_by", "-created_at"], name="import_job_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"lead import #{self.pk} ({self.status}, {self.processed_rows}/{self.total_rows})"
@@ -12,7 +12,8 @@ from django.utils import timezone
 
 from accounts.models import Role, User, WorkDaySummary
 from crm.models import Campaign, Client, ClientCall, Deal
-from settings.models import LeadStatus, StatusCategory
+from settings.models import StatusCategory
+from settings.reference_cache import lead_statuses
 
 UNTOUCHED_SLUGS = {"untouched", "new_lead", "new", "newlead"}
 FOLLOWING_SLUGS = {"following", "follow_up", "followup", "follow-up"}
@@ -81,17 +82,19 @@ def _filter_clients(
 
 
 def _default_status_ids(company) -> set[int]:
-    return set(
-        LeadStatus.objects.filter(company=company, is_default=True).values_list("id", flat=True)
-    )
+    return {status.id for status in lead_statuses(company) if status.is_default}
 
 
 def _status_maps(company):
-    statuses = list(
-        LeadStatus.objects.filter(company=company, is_active=True).values(
-            "id", "name", "category", "is_default"
-        )
-    )
+    statuses = [
+        {
+            "id": status.id,
+            "name": status.name,
+            "category": status.category,
+            "is_default": status.is_default,
+        }
+        for status in lead_statuses(company).active()
+    ]
     category_by_id = {row["id"]: (row.get("category") or "").lower() for row in statuses}
     default_ids = {row["id"] for row in statuses if row.get("is_default")}
     return statuses, category_by_id, default_ids
@@ -491,16 +494,8 @@ def _summarize_crm_calls(calls: list[ClientCall]) -> dict:
 
 
 def _build_pbx_report_section(company, from_date: str | None, to_date: str | None):
-    from django.db.models import Avg
-
-    from integrations.models import (
-        PbxCallDisposition,
-        PbxCallDirection,
-        PbxCallRecord,
-        PbxEventType,
-        PbxSettings,
-        UserPbxExtension,
-    )
+    from integrations.models import PbxSettings
+    from integrations.services.pbx_reports import build_pbx_report
 
     try:
         settings = PbxSettings.objects.get(company=company)
@@ -510,51 +505,11 @@ def _build_pbx_report_section(company, from_date: str | None, to_date: str | Non
     if not settings.is_enabled:
         return {"enabled": False, "summary": None, "agents": [], "_from_date": from_date, "_to_date": to_date}
 
-    qs = PbxCallRecord.objects.filter(company=company, event_type=PbxEventType.HANGUP)
-    if from_date:
-        qs = qs.filter(started_at__date__gte=from_date)
-    if to_date:
-        qs = qs.filter(started_at__date__lte=to_date)
-
-    summary = {
-        "total": qs.count(),
-        "inbound": qs.filter(direction=PbxCallDirection.INBOUND).count(),
-        "outbound": qs.filter(direction=PbxCallDirection.OUTBOUND).count(),
-        "answered": qs.filter(disposition=PbxCallDisposition.ANSWERED).count(),
-        "missed": qs.filter(
-            disposition__in=[PbxCallDisposition.NO_ANSWER, PbxCallDisposition.BUSY]
-        ).count(),
-        "avg_duration_sec": round(qs.aggregate(avg=Avg("billsec"))["avg"] or 0, 1),
-    }
-
-    agents = []
-    for ext in qs.values_list("extension", flat=True).distinct():
-        if not ext:
-            continue
-        ext_qs = qs.filter(extension=ext)
-        mapping = (
-            UserPbxExtension.objects.filter(company=company, extension=ext)
-            .select_related("user")
-            .first()
-        )
-        agents.append(
-            {
-                "extension": ext,
-                "user_id": mapping.user_id if mapping else None,
-                "username": mapping.user.username if mapping else None,
-                "total": ext_qs.count(),
-                "answered": ext_qs.filter(disposition=PbxCallDisposition.ANSWERED).count(),
-                "missed": ext_qs.filter(
-                    disposition__in=[PbxCallDisposition.NO_ANSWER, PbxCallDisposition.BUSY]
-                ).count(),
-                "avg_duration_sec": round(ext_qs.aggregate(avg=Avg("billsec"))["avg"] or 0, 1),
-            }
-        )
-
+    report = build_pbx_report(company, from_date, to_date)
     return {
         "enabled": True,
-        "summary": summary,
-        "agents": agents,
+        "summary": report["summary"],
+        "agents": report["agents"],
         "_from_date": from_date,
         "_to_date": to_date,
     }
@@ -562,6 +517,7 @@ def _build_pbx_report_section(company, from_date: str | None, to_date: str | Non
 
 def _build_combined_call_summary(crm_summary: dict, pbx_section: dict, company):
     from integrations.models import PbxCallDisposition, PbxCallRecord, PbxEventType
+    from integrations.services.pbx_reports import period_bounds
 
     combined = {
         "total": crm_summary["total"],
@@ -586,10 +542,11 @@ def _build_combined_call_summary(crm_summary: dict, pbx_section: dict, company):
         company=company,
         event_type=PbxEventType.HANGUP,
     )
-    if pbx_section.get("_from_date"):
-        pbx_qs = pbx_qs.filter(started_at__date__gte=pbx_section["_from_date"])
-    if pbx_section.get("_to_date"):
-        pbx_qs = pbx_qs.filter(started_at__date__lte=pbx_section["_to_date"])
+    start, end = period_bounds(company, pbx_section.get("_from_date"), pbx_section.get("_to_date"))
+    if start:
+        pbx_qs = pbx_qs.filter(started_at__gte=start)
+    if end:
+        pbx_qs = pbx_qs.filter(started_at__lt=end)
 
     unlinked_qs = pbx_qs.exclude(id__in=linked_ids)
     unlinked_total = unlinked_qs.count()
@@ -148,10 +148,13 @@ from .models import (
     ClientFieldVisit,
     ClientPhoneNumber,
     ClientEvent,
+    ExportJob,
+    LeadImportJob,
     LeadArrival,
 )
 from .field_visit_uploads import validate_client_location_photo
-from settings.models import Tag
+from settings.models import Channel, LeadStatus, Tag
+from settings.reference_cache import reference_table
 from settings.serializers import TagListSerializer
 from settings.feature_policy import is_field_visit_allowed
 from .geo import (
@@ -385,6 +388,29 @@ class ClientPhoneNumberSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
+class CachedReferenceField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField for the settings reference models (statuses, channels,
+    tags): ids of the client's company come from the cached reference table instead
+    of one query per id. Other ids still go through the queryset, so unknown ids are
+    rejected as before and foreign ones reach the serializer's company validators.
+    """
+
+    def _company_id(self):
+        node = self.parent
+        while node is not None and not hasattr(node, "reference_company_id"):
+            node = node.parent
+        return node.reference_company_id() if node is not None else None
+
+    def to_internal_value(self, data):
+        company_id = self._company_id()
+        if company_id and not isinstance(data, bool):
+            row = reference_table(self.get_queryset().model, company_id).get(data)
+            if row is not None:
+                return row
+        return super().to_internal_value(data)
+
+
 class ClientSerializer(ClientActivitySummaryMixin, ClientCreatorDisplayMixin, serializers.ModelSerializer):
     company_name = serializers.CharField(source="company.name", read_only=True)
     assigned_to_username = serializers.CharField(
@@ -394,7 +420,13 @@ class ClientSerializer(ClientActivitySummaryMixin, ClientCreatorDisplayMixin, se
         source="communication_way.name", read_only=True
     )
     status_name = serializers.CharField(source="status.name", read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    communication_way = CachedReferenceField(
+        queryset=Channel.objects.all(), required=False, allow_null=True
+    )
+    status = CachedReferenceField(
+        queryset=LeadStatus.objects.all(), required=False, allow_null=True
+    )
+    tags = CachedReferenceField(
         many=True, required=False, queryset=Tag.objects.all()
     )
     tags_detail = TagListSerializer(many=True, read_only=True, source="tags")
@@ -491,6 +523,19 @@ class ClientSerializer(ClientActivitySummaryMixin, ClientCreatorDisplayMixin, se
             )
         return value
 
+    def reference_company_id(self):
+        """Company whose cached statuses / channels / tags resolve the related ids."""
+        if self.instance is not None and getattr(self.instance, "company_id", None):
+            return self.instance.company_id
+        try:
+            company_id = int(getattr(self, "initial_data", {}).get("company") or 0)
+        except (AttributeError, TypeError, ValueError):
+            company_id = 0
+        if company_id:
+            return company_id
+        request = self.context.get("request")
+        return getattr(getattr(request, "user", None), "company_id", None)
+
     def validate_communication_way(self, value):
         """Ensure communication_way belongs to the same company"""
         if value:
@@ -1407,11 +1452,13 @@ class ClientCallSerializer(serializers.ModelSerializer):
     pbx_duration_sec = serializers.SerializerMethodField(read_only=True)
     pbx_recording_url = serializers.SerializerMethodField(read_only=True)
     pbx_recording_status = serializers.SerializerMethodField(read_only=True)
+    pbx_recording_waveform = serializers.SerializerMethodField(read_only=True)
     whatsapp_direction = serializers.SerializerMethodField(read_only=True)
     whatsapp_call_status = serializers.SerializerMethodField(read_only=True)
     whatsapp_duration_sec = serializers.SerializerMethodField(read_only=True)
     whatsapp_recording_url = serializers.SerializerMethodField(read_only=True)
     whatsapp_recording_status = serializers.SerializerMethodField(read_only=True)
+    whatsapp_recording_waveform = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = ClientCall
@@ -1428,11 +1475,13 @@ class ClientCallSerializer(serializers.ModelSerializer):
             "pbx_duration_sec",
             "pbx_recording_url",
             "pbx_recording_status",
+            "pbx_recording_waveform",
             "whatsapp_direction",
             "whatsapp_call_status",
             "whatsapp_duration_sec",
             "whatsapp_recording_url",
             "whatsapp_recording_status",
+            "whatsapp_recording_waveform",
             "notes",
             "call_datetime",
             "follow_up_date",
@@ -1482,6 +1531,14 @@ class ClientCallSerializer(serializers.ModelSerializer):
         rec = self._pbx_record(obj)
         return rec.recording_status if rec else None
 
+    def get_pbx_recording_waveform(self, obj):
+        rec = self._pbx_record(obj)
+        if not rec:
+            return None
+        from integrations.services.recording_transcode import recording_waveform
+
+        return recording_waveform(rec)
+
     def get_whatsapp_direction(self, obj):
         wa = self._wa_call(obj)
         return wa.direction if wa else None
@@ -1506,6 +1563,14 @@ class ClientCallSerializer(serializers.ModelSerializer):
         wa = self._wa_call(obj)
         return wa.recording_status if wa else None
 
+    def get_whatsapp_recording_waveform(self, obj):
+        wa = self._wa_call(obj)
+        if not wa:
+            return None
+        from integrations.services.recording_transcode import recording_waveform
+
+        return recording_waveform(wa)
+
     def validate_call_method(self, value):
         """Ensure call_method belongs to the same company as the client"""
         if value:
@@ -1918,3 +1983,45 @@ class ClientCallListSerializer(serializers.ModelSerializer):
     def get_whatsapp_recording_status(self, obj):
         wa = self._wa_call(obj)
         return wa.recording_status if wa else None
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Status of a background export; the file is fetched from the download action."""
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "dataset",
+            "file_format",
+            "status",
+            "row_count",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class LeadImportJobSerializer(serializers.ModelSerializer):
+    """Progress of a bulk lead import; ``errors`` lists the first rejected rows."""
+
+    class Meta:
+        model = LeadImportJob
+        fields = [
+            "id",
+            "file_format",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "error_count",
+            "errors",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
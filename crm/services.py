@@ -5,6 +5,7 @@ from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from crm.availability import user_accepts_new_assignments
+from crm.workload import record_bulk_client_changes
 from .models import Client, ClientEvent
 
 
@@ -45,6 +46,7 @@ def assign_unassigned_clients(company, employee, triggered_by):
         )
 
     Client.objects.bulk_update(unassigned, ["assigned_to", "assigned_at"])
+    record_bulk_client_changes(unassigned)
     ClientEvent.objects.bulk_create(events)
     for client in unassigned:
         notify_lead_assignment_change(
@@ -117,6 +119,7 @@ def bulk_assign_clients(client_ids, company, target_user, triggered_by):
 
     if changed:
         Client.objects.bulk_update(changed, ["assigned_to", "assigned_at"])
+        record_bulk_client_changes(changed)
         ClientEvent.objects.bulk_create(events)
         for client, old_assignee in notification_changes:
             notify_lead_assignment_change(
@@ -197,6 +200,7 @@ def distribute_clients_to_least_busy(company, clients, triggered_by, *, event_no
 
     if changed:
         Client.objects.bulk_update(changed, ["assigned_to", "assigned_at"])
+        record_bulk_client_changes(changed)
     if events:
         ClientEvent.objects.bulk_create(events)
 
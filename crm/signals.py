@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.db import transaction
 from django.dispatch import receiver
 from django.utils import timezone
@@ -14,6 +14,8 @@ from .models import (
     Deal,
 )
 from accounts.models import User, Role
+from settings.models import LeadStatus
+from crm.workload import record_client_change, record_status_category_change
 from notifications.services import NotificationService
 from notifications.models import NotificationType
 from notifications.team_activity import notify_owner_team_activity
@@ -93,6 +95,102 @@ def get_next_data_entry_round_robin_employee(company):
         return selected_employee
 
 
+_WORKLOAD_FIELDS = frozenset({"status", "status_id", "assigned_to", "assigned_to_id"})
+
+
+@receiver(post_save, sender=Client)
+def update_assignee_workload(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Move the assignee workload counters when the lead's assignee or status changes.
+    Runs before remember_client_tracked_fields, while the snapshot still holds the
+    previous values.
+    """
+    if update_fields is not None and not _WORKLOAD_FIELDS.intersection(update_fields):
+        return
+    if created:
+        originals = {"status_id": None, "assigned_to_id": None}
+    else:
+        originals = instance.tracked_originals()
+        if originals is None:
+            return
+
+    new_status_id = instance.status_id
+    new_assignee_id = instance.assigned_to_id
+    if update_fields is not None:
+        if not {"status", "status_id"}.intersection(update_fields):
+            new_status_id = originals["status_id"]
+        if not {"assigned_to", "assigned_to_id"}.intersection(update_fields):
+            new_assignee_id = originals["assigned_to_id"]
+
+    known = {}
+    if (
+        new_status_id is not None
+        and new_status_id == instance.status_id
+        and Client.status.is_cached(instance)
+    ):
+        known[new_status_id] = instance.status.category
+    record_client_change(
+        old_assignee_id=originals["assigned_to_id"],
+        old_status_id=originals["status_id"],
+        new_assignee_id=new_assignee_id,
+        new_status_id=new_status_id,
+        known_categories=known,
+    )
+
+
+@receiver(post_delete, sender=Client)
+def release_assignee_workload_on_delete(sender, instance, **kwargs):
+    """Drop a deleted lead from its assignee's workload counters."""
+    originals = getattr(instance, "_tracked_snapshot", None) or {}
+    record_client_change(
+        old_assignee_id=originals.get("assigned_to_id", instance.assigned_to_id),
+        old_status_id=originals.get("status_id", instance.status_id),
+        new_assignee_id=None,
+        new_status_id=None,
+    )
+
+
+@receiver(pre_save, sender=LeadStatus)
+def remember_lead_status_category(sender, instance, **kwargs):
+    """Stash the stored category so post_save can tell whether leads change bucket."""
+    instance._previous_category = None
+    if instance.pk:
+        instance._previous_category = (
+            LeadStatus.objects.filter(pk=instance.pk)
+            .values_list("category", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=LeadStatus)
+def move_workload_on_status_category_change(sender, instance, created, **kwargs):
+    """Re-bucket the assigned leads of a status whose category was edited."""
+    previous = getattr(instance, "_previous_category", None)
+    if created or previous is None or previous == instance.category:
+        return
+    record_status_category_change(instance.pk, previous, instance.category)
+
+
+@receiver(pre_delete, sender=LeadStatus)
+def move_workload_on_status_delete(sender, instance, **kwargs):
+    """
+    Leads of a deleted status fall back to no status (SET_NULL), which counts as active.
+    Only existing counter rows are touched: in a company cascade the users go too.
+    """
+    record_status_category_change(
+        instance.pk, instance.category, None, create_missing=False
+    )
+
+
+@receiver(post_save, sender=Client)
+def remember_client_tracked_fields(sender, instance, update_fields=None, **kwargs):
+    """
+    Refresh the change-tracking snapshot right after the write. Connected before the
+    other post_save receivers so a save() they make (auto-assign) sees the new row.
+    """
+    instance._remember_tracked_fields(update_fields)
+
+
 @receiver(post_save, sender=Client)
 def auto_assign_client(sender, instance, created, **kwargs):
     """
@@ -275,18 +373,14 @@ def handle_client_pre_save(sender, instance, **kwargs):
     """Combined handler for pre-save changes to avoid multiple DB hits."""
     if not instance.pk:  # Only for existing instances
         return
-        
-    try:
-        old_instance = Client.objects.get(pk=instance.pk)
-    except Client.DoesNotExist:
-        return
-    except Exception as e:
-        logger.error(f"Error in handle_client_pre_save: {e}")
+
+    originals = instance.tracked_originals()
+    if originals is None:
         return
 
     # --- Check for status changes ---
-    old_status_id = old_instance.status.id if old_instance.status else None
-    new_status_id = instance.status.id if instance.status else None
+    old_status_id = originals["status_id"]
+    new_status_id = instance.status_id
 
     if old_status_id != new_status_id:
         instance.status_entered_at = timezone.now()
@@ -315,12 +409,14 @@ def handle_client_pre_save(sender, instance, **kwargs):
                 logger.error(f"Error sending status change notification: {e}")
 
     # --- Check for assignment changes ---
-    notify_lead_assignment_change(
-        client=instance,
-        old_assignee=old_instance.assigned_to,
-        new_assignee=instance.assigned_to,
-        actor=getattr(instance, "_notification_actor", None),
-    )
+    old_assigned_id = originals["assigned_to_id"]
+    if old_assigned_id != instance.assigned_to_id:
+        notify_lead_assignment_change(
+            client=instance,
+            old_assignee=User.objects.filter(pk=old_assigned_id).first() if old_assigned_id else None,
+            new_assignee=instance.assigned_to,
+            actor=getattr(instance, "_notification_actor", None),
+        )
 
 
 def notify_lead_assignment_change(*, client, old_assignee, new_assignee, actor=None):
@@ -368,6 +464,49 @@ def notify_lead_assignment_change(*, client, old_assignee, new_assignee, actor=N
             logger.error(f"Error sending transfer notification: {e}")
 
 
+def notify_lead_assignment_changes(changes, *, actor=None):
+    """
+    Batch form of notify_lead_assignment_change for ``(client, old_assignee,
+    new_assignee)`` triples written with bulk_update. Same recipients and payloads,
+    but one on_commit callback that loads every recipient in one query instead of
+    one callback and one user lookup per notification.
+    """
+    actor_id = actor.pk if actor is not None else None
+    sends = []
+    for client, old_assignee, new_assignee in changes:
+        old_assigned_id = old_assignee.pk if old_assignee else None
+        new_assigned_id = new_assignee.pk if new_assignee else None
+        if old_assigned_id == new_assigned_id:
+            continue
+        data = {
+            'lead_id': client.id,
+            'lead_name': client.name,
+            'invalidate': 'crm:leads',
+            'client_id': str(client.id),
+        }
+        if new_assigned_id and new_assigned_id != actor_id:
+            sends.append((new_assigned_id, NotificationType.LEAD_ASSIGNED, data))
+        if old_assigned_id and old_assigned_id != actor_id:
+            sends.append((old_assigned_id, NotificationType.LEAD_TRANSFERRED, data))
+    if not sends:
+        return
+
+    def _run():
+        users = User.objects.in_bulk({user_id for user_id, _, _ in sends})
+        for user_id, notification_type, data in sends:
+            user = users.get(user_id)
+            if user is None:
+                continue
+            try:
+                NotificationService.send_notification(
+                    user, notification_type=notification_type, data=data
+                )
+            except Exception as e:
+                logger.error(f"Error sending {notification_type} notification: {e}")
+
+    transaction.on_commit(_run)
+
+
 @receiver(post_save, sender=Client)
 def notify_lead_updated(sender, instance, created, **kwargs):
     """Update last_contacted_at when lead is updated (any field change)"""
@@ -1,5 +1,6 @@
 from django.utils import timezone
 from datetime import timedelta
+from django.db import transaction
 from django.db.models import Exists, OuterRef, Q
 from .models import (
     Client,
@@ -10,7 +11,8 @@ from .models import (
     ClientVisit,
     Deal,
 )
-from crm.assignment import get_auto_assign_employee
+from crm.assignment import plan_bulk_auto_assignments
+from crm.workload import record_bulk_client_changes
 
 
 def _assignee_acted_since_assignment():
@@ -91,6 +93,58 @@ def _assignee_acted_since_assignment():
     )
 
 
+def _reassign_clients(company, clients, hours_threshold):
+    """
+    Move *clients* to new assignees in one pass: picks come from the bulk planner
+    (workload simulated as it assigns, one Company lock), rows are written with
+    bulk_update/bulk_create and the notifications go out in one batch after commit.
+    Leads whose pick is their current assignee are left alone.
+    """
+    from crm.signals import notify_lead_assignment_changes
+
+    picks = plan_bulk_auto_assignments(company, clients, reassigning=True)
+    now = timezone.now()
+    notes = f'تم إعادة التعيين تلقائياً بعد {hours_threshold} ساعة من عدم التواصل'
+
+    changed = []
+    events = []
+    notifications = []
+    for client, new_employee in zip(clients, picks):
+        # Only reassign if we have a different employee available
+        if not new_employee or new_employee.id == client.assigned_to_id:
+            continue
+        current_employee = client.assigned_to
+        old_employee_name = current_employee.get_full_name() or current_employee.username if current_employee else "Unassigned"
+        new_employee_name = new_employee.get_full_name() or new_employee.username
+
+        client.assigned_to = new_employee
+        client.assigned_at = now
+        # The per-lead save() nulled this and notify_lead_updated (post_save) then
+        # stamped it with the save time; bulk_update skips signals, so stamp it here.
+        client.last_contacted_at = now
+        changed.append(client)
+        events.append(
+            ClientEvent(
+                client=client,
+                event_type='re_assignment',
+                old_value=old_employee_name,
+                new_value=new_employee_name,
+                notes=notes,
+            )
+        )
+        notifications.append((client, current_employee, new_employee))
+
+    if changed:
+        with transaction.atomic():
+            Client.objects.bulk_update(
+                changed, ['assigned_to', 'assigned_at', 'last_contacted_at'], batch_size=500
+            )
+            record_bulk_client_changes(changed)
+            ClientEvent.objects.bulk_create(events, batch_size=500)
+            notify_lead_assignment_changes(notifications)
+    return len(changed)
+
+
 def re_assign_inactive_clients():
     """
     Re-assign clients that haven't been contacted within the specified hours
@@ -120,33 +174,10 @@ def re_assign_inactive_clients():
             .filter(_assignee_acted_since_assignment=False)
         )
 
-        for client in clients_to_reassign:
-            # Get new employee (different from current one)
-            current_employee = client.assigned_to
-            new_employee = get_auto_assign_employee(company)
-            
-            # Only reassign if we have a different employee available
-            if new_employee and new_employee != current_employee:
-                old_employee_name = current_employee.get_full_name() or current_employee.username if current_employee else "Unassigned"
-                new_employee_name = new_employee.get_full_name() or new_employee.username
-                
-                client.assigned_to = new_employee
-                client.assigned_at = timezone.now()
-                # Reset last_contacted_at since it's a new assignment
-                client.last_contacted_at = None
-                client.save(update_fields=['assigned_to', 'assigned_at', 'last_contacted_at'])
-                
-                # Create event log
-                ClientEvent.objects.create(
-                    client=client,
-                    event_type='re_assignment',
-                    old_value=old_employee_name,
-                    new_value=new_employee_name,
-                    notes=f'تم إعادة التعيين تلقائياً بعد {hours_threshold} ساعة من عدم التواصل'
-                )
-                
-                total_reassigned += 1
-    
+        clients = list(clients_to_reassign.select_related("assigned_to", "status"))
+        if clients:
+            total_reassigned += _reassign_clients(company, clients, hours_threshold)
+
     return f"تم إعادة تعيين {total_reassigned} عميل"
 
 
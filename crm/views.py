@@ -12,6 +12,7 @@ from accounts.permissions import (
     IsAdmin, HasActiveSubscription, IsAdminOrReadOnlyForEmployee,
     IsAdminOrSupervisorLeadsOrReadOnlyForEmployee,
 )
+from crm_saas_api.file_responses import ranged_file_response
 from crm_saas_api.responses import success_response, error_response
 from crm_saas_api.utils import clean_int_query_param
 from .arrivals import announce_arrival, acknowledge_arrival, ArrivalCooldownActive
@@ -25,6 +26,9 @@ from .models import (
     ClientVisit,
     ClientFieldVisit,
     ClientEvent,
+    ExportJob,
+    ExportJobStatus,
+    LeadImportJob,
     LeadArrival,
 )
 from accounts.models import User, Role
@@ -32,6 +36,14 @@ from notifications.models import NotificationType
 from notifications.services import NotificationService
 from settings.models import LeadStatus
 from .client_list_filters import apply_client_list_filters
+from .list_scopes import (
+    CLIENT_SEARCH_FIELDS,
+    CLIENT_TASK_SEARCH_FIELDS,
+    DEAL_SEARCH_FIELDS,
+    scope_client_tasks,
+    scope_clients,
+    scope_deals,
+)
 from .serializers import (
     ClientSerializer,
     ClientListSerializer,
@@ -50,34 +62,69 @@ from .serializers import (
     ClientFieldVisitSerializer,
     ClientFieldVisitListSerializer,
     ClientEventSerializer,
+    ExportJobSerializer,
+    LeadImportJobSerializer,
     LeadArrivalSerializer,
 )
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ExportActionMixin:
+    """
+    ``GET <list>/export/?export_format=csv|xlsx`` for a list viewset: the same rows the
+    list would return (role scoping, search and list filters), streamed inline as a
+    file, or queued as an ExportJob (202) above EXPORT_INLINE_MAX_ROWS or with
+    ``async=1``. Subclasses name their crm.exports dataset in ``export_dataset``.
+    """
+
+    export_dataset = None
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        from crm import exports
+
+        params = request.query_params
+        file_format = (params.get(exports.EXPORT_FORMAT_PARAM) or exports.CSV).strip().lower()
+        if file_format not in exports.FORMATS:
+            return error_response(
+                "export_format must be one of: csv, xlsx.",
+                code="invalid_export_format",
+            )
+        dataset = exports.DATASETS[self.export_dataset]
+        company = getattr(request.user, "company", None)
+        queryset = exports.scoped_queryset_for(dataset.name, request.user, company, params)
+
+        run_async = str(params.get(exports.EXPORT_ASYNC_PARAM) or "").lower() in ("1", "true", "yes")
+        if not run_async and queryset.count() <= exports.inline_max_rows():
+            return exports.streaming_export_response(dataset, queryset, file_format)
+
+        if company is None:
+            return error_response(
+                "Background exports need a company account.",
+                code="export_requires_company",
+            )
+        job = ExportJob.objects.create(
+            company=company,
+            requested_by=request.user,
+            dataset=dataset.name,
+            file_format=file_format,
+            params=exports.export_params(request),
+        )
+        exports.enqueue_export_job(job)
+        job.refresh_from_db()
+        return Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ClientViewSet(ExportActionMixin, viewsets.ModelViewSet):
     """ViewSet for managing Client instances (CRUD)."""
 
+    export_dataset = "leads"
+
     queryset = Client.objects.all()
     permission_classes = [
         IsAuthenticated, HasActiveSubscription, DenyCallCenterWriteExceptCreate, CanAccessClient,
     ]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = [
-        "name",
-        "phone_number",
-        "phone_numbers__phone_number",
-        "priority",
-        "type",
-        "communication_way__name",
-        "status__name",
-        "tags__name",
-        "notes",
-        "residence",
-        "lead_company_name",
-        "profession",
-        "source",
-        "campaign__name",
-    ]
+    search_fields = CLIENT_SEARCH_FIELDS
     ordering_fields = ["created_at", "name", "priority"]
     ordering = ["-created_at"]
 
@@ -106,22 +153,7 @@ class ClientViewSet(viewsets.ModelViewSet):
                 "client_field_visits",
             )
 
-        if user.is_admin() or user.is_reception():
-            return queryset.filter(company=user.company).distinct()
-
-        if user.is_supervisor() and user.supervisor_has_permission("manage_leads"):
-            return queryset.filter(company=user.company).distinct()
-
-        if user.is_data_entry():
-            return queryset.filter(company=user.company).distinct()
-
-        if user.is_call_center():
-            return queryset.filter(company=user.company).distinct()
-
-        if user.is_assigned_clinical_staff():
-            return queryset.filter(assigned_to=user).distinct()
-
-        return queryset.none()
+        return scope_clients(queryset, user, user.company)
 
     def filter_queryset(self, queryset):
         queryset = super().filter_queryset(queryset)
@@ -466,8 +498,10 @@ class ClientViewSet(viewsets.ModelViewSet):
 
         if changed_clients:
             from crm.signals import notify_lead_assignment_change
+            from crm.workload import record_bulk_client_changes
 
             Client.objects.bulk_update(changed_clients, ["assigned_to", "assigned_at"])
+            record_bulk_client_changes(changed_clients)
             ClientEvent.objects.bulk_create(events_to_create)
             for client, old_assignee in notification_changes:
                 notify_lead_assignment_change(
@@ -484,15 +518,17 @@ class ClientViewSet(viewsets.ModelViewSet):
         )
 
 
-class DealViewSet(viewsets.ModelViewSet):
+class DealViewSet(ExportActionMixin, viewsets.ModelViewSet):
     """ViewSet for managing Deal instances (CRUD)."""
 
+    export_dataset = "deals"
+
     queryset = Deal.objects.all()
     permission_classes = [
         IsAuthenticated, HasActiveSubscription, DenyDataEntryNonLeadAPI, DenyCallCenterNonLeadAPI, CanAccessDeal,
     ]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["client__name", "stage", "company__name"]
+    search_fields = DEAL_SEARCH_FIELDS
     ordering_fields = ["created_at", "updated_at", "stage"]
     ordering = ["-created_at"]
 
@@ -503,20 +539,7 @@ class DealViewSet(viewsets.ModelViewSet):
             "unit", "project",
         )
 
-        if user.is_admin():
-            queryset = queryset.filter(company=user.company)
-        elif user.is_supervisor() and user.supervisor_has_permission("manage_deals"):
-            queryset = queryset.filter(company=user.company)
-        elif user.is_employee():
-            queryset = queryset.filter(employee=user)
-        else:
-            return queryset.none()
-
-        stage = self.request.query_params.get("stage")
-        if stage:
-            queryset = queryset.filter(stage=stage)
-
-        return queryset
+        return scope_deals(queryset, user, user.company, self.request.query_params)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -649,15 +672,17 @@ class CampaignViewSet(viewsets.ModelViewSet):
         return CampaignSerializer
 
 
-class ClientTaskViewSet(viewsets.ModelViewSet):
+class ClientTaskViewSet(ExportActionMixin, viewsets.ModelViewSet):
     """ViewSet for managing ClientTask instances (CRUD)."""
 
+    export_dataset = "activities"
+
     queryset = ClientTask.objects.all()
     permission_classes = [
         IsAuthenticated, HasActiveSubscription, DenyDataEntryNonLeadAPI, DenyCallCenterNonLeadAPI, CanAccessClient,
     ]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["notes", "stage__name", "client__name"]
+    search_fields = CLIENT_TASK_SEARCH_FIELDS
     ordering_fields = ["created_at", "reminder_date", "stage__name"]
     ordering = ["-created_at"]
 
@@ -667,20 +692,7 @@ class ClientTaskViewSet(viewsets.ModelViewSet):
             "client", "client__company", "stage", "created_by",
         )
 
-        if user.is_admin() or user.is_reception():
-            queryset = queryset.filter(client__company=user.company)
-        elif user.is_supervisor() and user.supervisor_has_permission("manage_leads"):
-            queryset = queryset.filter(client__company=user.company)
-        elif user.is_assigned_clinical_staff():
-            queryset = queryset.filter(client__assigned_to=user)
-        else:
-            queryset = queryset.none()
-
-        client_id = clean_int_query_param(self.request, "client")
-        if client_id is not None:
-            queryset = queryset.filter(client_id=client_id)
-
-        return queryset
+        return scope_client_tasks(queryset, user, user.company, self.request.query_params)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -929,6 +941,132 @@ class ClientEventViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.none()
 
 
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Background exports requested by the current user, and their file downloads."""
+
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        from pathlib import Path
+
+        job = self.get_object()
+        path = Path(job.file_path) if job.file_path else None
+        if job.status != ExportJobStatus.READY or path is None or not path.exists():
+            return error_response(
+                "Export file is not available.",
+                code="export_not_ready",
+                status_code=status.HTTP_409_CONFLICT,
+            )
+        from crm.exports import DATASETS, FORMATS, export_filename
+
+        return ranged_file_response(
+            request,
+            path,
+            filename=export_filename(DATASETS[job.dataset], job.file_format),
+            content_type=FORMATS[job.file_format],
+        )
+
+
+class LeadImportJobViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Bulk lead imports started by the current user.
+
+    POST /lead-imports/      -> multipart ``file`` (CSV) or JSON ``{"leads": [...]}``; 202 + job
+    GET  /lead-imports/{id}/ -> progress counters and the first rejected rows
+    """
+
+    serializer_class = LeadImportJobSerializer
+    permission_classes = [
+        IsAuthenticated, HasActiveSubscription, IsAdminOrSupervisorLeadsOrReadOnlyForEmployee,
+    ]
+
+    def get_queryset(self):
+        return LeadImportJob.objects.filter(requested_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        import csv
+
+        from crm import imports
+        from rest_framework.exceptions import ValidationError
+
+        user = request.user
+        company = getattr(user, "company", None)
+        if company is None:
+            return error_response(
+                "Lead imports need a company account.",
+                code="import_requires_company",
+            )
+
+        upload = request.FILES.get("file")
+        rows = None
+        if upload is None:
+            rows = request.data if isinstance(request.data, list) else request.data.get("leads")
+            if not isinstance(rows, list) or not rows:
+                return error_response(
+                    'Upload a CSV "file" or send a non-empty "leads" array.',
+                    code="invalid_import",
+                )
+            if len(rows) > imports.max_rows():
+                return error_response(
+                    f"An import can hold at most {imports.max_rows()} leads.",
+                    code="import_too_large",
+                )
+
+        job = LeadImportJob.objects.create(
+            company=company,
+            requested_by=user,
+            file_format=imports.CSV if upload is not None else imports.JSON,
+        )
+        try:
+            total = imports.store_import_source(job, upload=upload, rows=rows)
+            if upload is not None and "name" not in imports.csv_header_fields(job.file_path):
+                imports.discard_import(job)
+                return error_response(
+                    'The CSV file needs a "name" column.',
+                    code="invalid_import",
+                )
+        except (UnicodeDecodeError, csv.Error) as exc:
+            imports.discard_import(job)
+            return error_response(
+                f"Could not read the CSV file: {exc}",
+                code="invalid_import",
+            )
+        if not total or total > imports.max_rows():
+            imports.discard_import(job)
+            return error_response(
+                f"An import must hold between 1 and {imports.max_rows()} leads.",
+                code="import_too_large" if total else "invalid_import",
+            )
+
+        if not user.is_super_admin():
+            from subscriptions.entitlements import require_quota
+
+            try:
+                require_quota(
+                    company,
+                    "max_clients",
+                    current_count=Client.objects.filter(company=company).count(),
+                    requested_delta=total,
+                    message="You have reached your plan leads limit. Please upgrade your plan to add more leads.",
+                    error_key="plan_quota_max_clients_exceeded",
+                )
+            except ValidationError:
+                imports.discard_import(job)
+                raise
+
+        imports.enqueue_import_job(job)
+        job.refresh_from_db()
+        return Response(LeadImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class LeadArrivalViewSet(
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -0,0 +1,232 @@
+"""
+Per-assignee workload counters (AssigneeWorkload) kept in step with Client rows.
+
+Least-busy auto-assignment reads these counters instead of aggregating every eligible
+user's assigned clients on each pick. They move wherever a lead's assignee or status
+category changes: the Client save/delete signals, the bulk_update assignment paths
+(record_bulk_client_changes) and LeadStatus category edits/deletes.
+reconcile_workloads() rebuilds them from the client table.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from settings.models import LeadStatus, StatusCategory
+
+# Statuses that represent real sales work in the assignee's queue.
+ACTIVE_WORKLOAD_CATEGORIES = (
+    StatusCategory.ACTIVE.value,
+    StatusCategory.FOLLOW_UP.value,
+)
+INACTIVE_WORKLOAD_CATEGORY = StatusCategory.INACTIVE.value
+# Inactive leads count at half weight (still owned, but less demanding than active/follow-up).
+INACTIVE_WORKLOAD_WEIGHT = 0.5
+
+_ACTIVE_FIELD = "active_count"
+_INACTIVE_FIELD = "inactive_count"
+
+
+def workload_bucket(category):
+    """
+    Counter field a lead in a status of *category* counts towards (``None`` = the lead
+    has no status, which counts as active). Returns None for closed statuses.
+    """
+    if category is None or category in ACTIVE_WORKLOAD_CATEGORIES:
+        return _ACTIVE_FIELD
+    if category == INACTIVE_WORKLOAD_CATEGORY:
+        return _INACTIVE_FIELD
+    return None
+
+
+def _status_categories(status_ids, known=None):
+    """Map status id -> category, querying only ids not already in *known*."""
+    categories = dict(known or {})
+    missing = {sid for sid in status_ids if sid is not None and sid not in categories}
+    if missing:
+        categories.update(
+            LeadStatus.objects.filter(pk__in=missing).values_list("id", "category")
+        )
+    return categories
+
+
+def _add_move(deltas, categories, old_assignee_id, old_status_id, new_assignee_id, new_status_id):
+    if (old_assignee_id, old_status_id) == (new_assignee_id, new_status_id):
+        return
+    if old_assignee_id:
+        bucket = workload_bucket(categories.get(old_status_id))
+        if bucket:
+            deltas[(old_assignee_id, bucket)] -= 1
+    if new_assignee_id:
+        bucket = workload_bucket(categories.get(new_status_id))
+        if bucket:
+            deltas[(new_assignee_id, bucket)] += 1
+
+
+def apply_workload_deltas(deltas, *, create_missing=True):
+    """
+    Add ``{(user_id, counter_field): delta}`` to the counters with one F() UPDATE per user.
+
+    A user without a row gets one when *create_missing* and the change adds work;
+    pure decrements never create rows (deletion paths pass ``create_missing=False``
+    so nothing is inserted for users being deleted in the same cascade).
+    """
+    from crm.models import AssigneeWorkload
+
+    by_user = defaultdict(dict)
+    for (user_id, field), delta in deltas.items():
+        if delta:
+            by_user[user_id][field] = delta
+
+    now = timezone.now()
+    for user_id, changes in by_user.items():
+        values = {field: F(field) + delta for field, delta in changes.items()}
+        rows = AssigneeWorkload.objects.filter(user_id=user_id)
+        if rows.update(updated_at=now, **values):
+            continue
+        if not create_missing or not any(delta > 0 for delta in changes.values()):
+            continue
+        AssigneeWorkload.objects.bulk_create(
+            [AssigneeWorkload(user_id=user_id)], ignore_conflicts=True
+        )
+        rows.update(updated_at=now, **values)
+
+
+def record_client_change(
+    *,
+    old_assignee_id,
+    old_status_id,
+    new_assignee_id,
+    new_status_id,
+    known_categories=None,
+):
+    """Move one lead's weight from its old (assignee, status) to the new one."""
+    if (old_assignee_id, old_status_id) == (new_assignee_id, new_status_id):
+        return
+    if not old_assignee_id and not new_assignee_id:
+        return
+    categories = _status_categories((old_status_id, new_status_id), known_categories)
+    deltas = Counter()
+    _add_move(deltas, categories, old_assignee_id, old_status_id, new_assignee_id, new_status_id)
+    apply_workload_deltas(deltas)
+
+
+def record_bulk_client_changes(clients):
+    """
+    Apply the counter moves for *clients* just written with ``bulk_update`` (which
+    skips the save signals). Compares each client's tracked snapshot with its current
+    assignee/status, so the clients must have been loaded from the database before
+    being changed; the snapshots are then refreshed.
+    """
+    moves = []
+    for client in clients:
+        originals = client.tracked_originals() or {}
+        moves.append(
+            (
+                originals.get("assigned_to_id"),
+                originals.get("status_id"),
+                client.assigned_to_id,
+                client.status_id,
+            )
+        )
+        client._remember_tracked_fields()
+
+    categories = _status_categories(
+        status_id for move in moves for status_id in (move[1], move[3])
+    )
+    deltas = Counter()
+    for move in moves:
+        _add_move(deltas, categories, *move)
+    apply_workload_deltas(deltas)
+
+
+def record_status_category_change(status_id, old_category, new_category, *, create_missing=True):
+    """
+    Move every assigned lead in *status_id* between buckets when the status changes
+    category. Pass ``new_category=None`` when the status is deleted (its leads fall
+    back to no status, which counts as active).
+    """
+    from crm.models import Client
+
+    old_field = workload_bucket(old_category)
+    new_field = workload_bucket(new_category)
+    if old_field == new_field:
+        return
+
+    rows = (
+        Client.objects.filter(status_id=status_id, assigned_to__isnull=False)
+        .values("assigned_to_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    deltas = Counter()
+    for row in rows:
+        if old_field:
+            deltas[(row["assigned_to_id"], old_field)] -= row["n"]
+        if new_field:
+            deltas[(row["assigned_to_id"], new_field)] += row["n"]
+    apply_workload_deltas(deltas, create_missing=create_missing)
+
+
+def expected_workloads(company_id=None):
+    """``{user_id: (active_count, inactive_count)}`` computed from the client table."""
+    from crm.models import Client
+
+    clients = Client.objects.filter(assigned_to__isnull=False)
+    if company_id is not None:
+        clients = clients.filter(assigned_to__company_id=company_id)
+    rows = (
+        clients.values("assigned_to_id")
+        .annotate(
+            active=Count(
+                "id",
+                filter=Q(status__category__in=ACTIVE_WORKLOAD_CATEGORIES)
+                | Q(status__isnull=True),
+            ),
+            inactive=Count("id", filter=Q(status__category=INACTIVE_WORKLOAD_CATEGORY)),
+        )
+        .order_by()
+    )
+    return {row["assigned_to_id"]: (row["active"], row["inactive"]) for row in rows}
+
+
+def reconcile_workloads(company_id=None, *, dry_run=False):
+    """
+    Rebuild the counters from the client table (all users, or one company's).
+
+    Returns ``{user_id: (stored, expected)}`` for the users whose counters were wrong;
+    unless *dry_run*, those rows are rewritten in one upsert.
+    """
+    from crm.models import AssigneeWorkload
+
+    expected = expected_workloads(company_id)
+    stored_rows = AssigneeWorkload.objects.all()
+    if company_id is not None:
+        stored_rows = stored_rows.filter(user__company_id=company_id)
+    stored = {
+        row.user_id: (row.active_count, row.inactive_count) for row in stored_rows
+    }
+
+    drift = {}
+    for user_id in set(expected) | set(stored):
+        want = expected.get(user_id, (0, 0))
+        have = stored.get(user_id, (0, 0))
+        if want != have:
+            drift[user_id] = (have, want)
+
+    if drift and not dry_run:
+        AssigneeWorkload.objects.bulk_create(
+            [
+                AssigneeWorkload(
+                    user_id=user_id, active_count=want[0], inactive_count=want[1]
+                )
+                for user_id, (_, want) in drift.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["active_count", "inactive_count", "updated_at"],
+            batch_size=500,
+        )
+    return drift
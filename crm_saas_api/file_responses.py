@@ -0,0 +1,175 @@
+"""
+Streaming file downloads with HTTP Range support.
+
+Large files (database backups, call recordings) must never be read into memory to
+serve them. ``ranged_file_response`` streams a file from disk in fixed-size chunks
+and honours a single ``Range: bytes=...`` request, so interrupted downloads resume
+and media players can seek. Multi-range requests are answered with the whole file,
+which RFC 9110 permits.
+
+``ranged_stream_response`` applies the same rules to content that is not on local disk
+(object storage): the caller supplies the size and a ``(start, length)`` reader.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single byte range into inclusive ``(start, end)``.
+
+    Returns None when there is no usable range (absent, malformed, multi-range), in
+    which case the whole file is served. Raises RangeNotSatisfiable when the range
+    lies entirely outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: Path, start: int, length: int, chunk_size: int) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fh.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _requested_range(request, size: int, etag: Optional[str]):
+    """
+    Resolve the request's Range against ``size``.
+
+    Returns ``(byte_range, None)`` or ``(None, 416 response)``. A stale If-Range (the
+    client's ETag no longer matches) means the whole entity is served.
+    """
+    if_range = request.headers.get("If-Range")
+    if if_range and not (etag and if_range == etag):
+        return None, None
+    try:
+        return parse_range_header(request.headers.get("Range"), size), None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return None, response
+
+
+def _finish(response, etag: Optional[str]):
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def ranged_file_response(
+    request,
+    path,
+    *,
+    filename: Optional[str] = None,
+    content_type: str = "application/octet-stream",
+    as_attachment: bool = True,
+    etag: Optional[str] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+):
+    """
+    Serve ``path`` as a streamed response: 200 for the whole file, 206 for a range.
+
+    ``etag`` (already quoted) is sent as ETag and checked against If-Range, so a
+    resumed download of a file that has since changed gets the full new file.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    filename = filename or path.name
+
+    byte_range, error = _requested_range(request, size, etag)
+    if error is not None:
+        return error
+
+    if byte_range is None:
+        response = FileResponse(
+            open(path, "rb"),
+            as_attachment=as_attachment,
+            filename=filename,
+            content_type=content_type,
+        )
+        response.block_size = chunk_size
+        return _finish(response, etag)
+    return ranged_stream_response(
+        request,
+        size=size,
+        read_range=lambda start, length: _iter_file_range(path, start, length, chunk_size),
+        filename=filename,
+        content_type=content_type,
+        as_attachment=as_attachment,
+        etag=etag,
+        byte_range=byte_range,
+    )
+
+
+def ranged_stream_response(
+    request,
+    *,
+    size: int,
+    read_range: Callable[[int, int], Iterator[bytes]],
+    filename: str,
+    content_type: str = "application/octet-stream",
+    as_attachment: bool = True,
+    etag: Optional[str] = None,
+    byte_range: Optional[tuple[int, int]] = None,
+):
+    """
+    Stream ``size`` bytes produced by ``read_range(start, length)``: 200 or 206.
+
+    ``byte_range`` skips Range parsing when the caller already resolved it.
+    """
+    if byte_range is None:
+        byte_range, error = _requested_range(request, size, etag)
+        if error is not None:
+            return error
+
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+    response = StreamingHttpResponse(
+        read_range(start, length), status=status, content_type=content_type
+    )
+    response["Content-Length"] = str(length)
+    if status == 206:
+        response["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+    response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    return _finish(response, etag)
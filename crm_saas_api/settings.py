@@ -343,6 +343,25 @@ SUPABASE_CHAT_BUCKET = (os.getenv("SUPABASE_CHAT_BUCKET", "tenant-chat") or "ten
 BACKUP_ROOT = Path(MEDIA_ROOT / "backups")
 BACKUP_ROOT.mkdir(parents=True, exist_ok=True)
 
+# Lead / deal / activity exports (crm.exports). Up to EXPORT_INLINE_MAX_ROWS rows stream
+# straight into the response; larger exports run on the task cluster and land here.
+# Deliberately outside MEDIA_ROOT: /media/ is served without auth, and export files are
+# only handed out by the authenticated ExportJob download action.
+EXPORT_ROOT = Path(os.getenv("EXPORT_ROOT") or BASE_DIR / "private_data" / "exports")
+EXPORT_INLINE_MAX_ROWS = int(os.getenv("EXPORT_INLINE_MAX_ROWS", "20000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+# Per-task timeout for the cluster. It may exceed Q_CLUSTER["retry"]: a redelivered
+# export is a no-op because run_export_job only claims PENDING jobs.
+EXPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("EXPORT_JOB_TIMEOUT_SECONDS", "1800"))
+
+# Bulk lead imports (crm.imports): uploads wait here until the cluster task has read them.
+# Outside MEDIA_ROOT for the same reason as EXPORT_ROOT: the files hold a tenant's lead
+# names, phones and emails, and /media/ is served without auth.
+IMPORT_ROOT = Path(os.getenv("IMPORT_ROOT") or BASE_DIR / "private_data" / "imports")
+LEAD_IMPORT_MAX_ROWS = int(os.getenv("LEAD_IMPORT_MAX_ROWS", "100000"))
+LEAD_IMPORT_CHUNK_SIZE = int(os.getenv("LEAD_IMPORT_CHUNK_SIZE", "1000"))
+LEAD_IMPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("LEAD_IMPORT_JOB_TIMEOUT_SECONDS", "3600"))
+
 # ============================================================================
 # Default Primary Key Field Type
 # ============================================================================
@@ -490,6 +509,9 @@ STRIPE_RETURN_URL = f"{API_BASE_URL}/api/payments/stripe-return/"
 # Integrations OAuth Settings
 # ============================================================================
 
+# Custom Lead API batch endpoint (integrations/leads/inbound/batch/): max leads per request.
+LEAD_API_BATCH_MAX_LEADS = int(os.getenv("LEAD_API_BATCH_MAX_LEADS", "500"))
+
 # Meta (Facebook/Instagram) OAuth
 META_CLIENT_ID = os.getenv("META_CLIENT_ID", "")
 META_CLIENT_SECRET = os.getenv("META_CLIENT_SECRET", "")
@@ -590,6 +612,27 @@ RECORDING_STORAGE_BACKEND = (
 RECORDING_S3_BUCKET = (os.getenv("RECORDING_S3_BUCKET", "") or "").strip()
 RECORDING_S3_ENDPOINT_URL = (os.getenv("RECORDING_S3_ENDPOINT_URL", "") or "").strip()
 RECORDING_S3_REGION = (os.getenv("RECORDING_S3_REGION", "") or "").strip()
+# Partial resumable uploads from the PBX connector, staged on local disk until the last
+# range arrives. Outside MEDIA_ROOT: /media/ is served without auth and in-progress
+# call audio must not be reachable by URL.
+RECORDING_INCOMING_ROOT = Path(
+    os.getenv("RECORDING_INCOMING_ROOT") or BASE_DIR / "private_data" / "recording_uploads"
+)
+
+# Opus/OGG renditions of stored recordings (integrations.services.recording_transcode).
+#
+# Default off: transcoding runs on the cluster and needs ffmpeg (FFMPEG_BINARY) on the
+# worker hosts. Recordings stored while it is off are picked up by the
+# transcode_recordings sweep once it is turned on. The timeout must stay below
+# Q_CLUSTER["retry"], or the broker re-delivers a transcode that is still running.
+RECORDING_TRANSCODE_ENABLED = os.getenv("RECORDING_TRANSCODE_ENABLED", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+RECORDING_TRANSCODE_BITRATE = os.getenv("RECORDING_TRANSCODE_BITRATE", "16k").strip() or "16k"
+RECORDING_TRANSCODE_TIMEOUT_SECONDS = int(os.getenv("RECORDING_TRANSCODE_TIMEOUT_SECONDS", "100"))
+RECORDING_WAVEFORM_PEAKS = int(os.getenv("RECORDING_WAVEFORM_PEAKS", "200"))
 
 # ============================================================================
 # Firebase Cloud Messaging
@@ -625,6 +668,29 @@ PUSH_QUEUE_ENABLED = os.getenv("PUSH_QUEUE_ENABLED", "").strip().lower() in (
     "yes",
 )
 
+# Apply PBX pushes per call, in order, on the cluster (integrations.services.pbx_event_queue).
+#
+# Default off: the webhook then processes each push inline as before. Like
+# PUSH_QUEUE_ENABLED, only turn this on once `qcluster` is running; events left in the
+# queue after turning it off again are still drained by drain_pbx_event_queue.
+PBX_EVENT_QUEUE_ENABLED = os.getenv("PBX_EVENT_QUEUE_ENABLED", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Send Meta Conversion Leads qualification events in per-pixel batches on the cluster
+# (integrations.services.meta_conversion_leads) instead of one Graph call per lead
+# inside the request. Default off, like the queues above; the
+# flush_meta_conversion_events sweep sends retries and anything a lost task left.
+META_CONVERSION_QUEUE_ENABLED = os.getenv("META_CONVERSION_QUEUE_ENABLED", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Events per Conversions API request; Meta accepts at most 1000.
+META_CONVERSION_BATCH_SIZE = min(int(os.getenv("META_CONVERSION_BATCH_SIZE", "1000")), 1000)
+
 # Broker: Redis in production, ORM as the fallback.
 #
 # The ORM broker makes the cluster poll Postgres in a loop for work that is almost
@@ -639,6 +705,29 @@ if _redis_url:
 else:
     Q_CLUSTER["orm"] = "default"
 
+# Scheduled AI lead analysis (run_ai_lead_analysis).
+#
+# Tenants bring their own OpenAI key, so the limits here protect the box and the
+# tenant's bill rather than ours: at most this many requests in flight across all
+# tenants, and at most this many tokens spent per tenant per run.
+AI_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("AI_ANALYSIS_MAX_CONCURRENCY", "4"))
+AI_ANALYSIS_TENANT_TOKEN_BUDGET = int(os.getenv("AI_ANALYSIS_TENANT_TOKEN_BUDGET", "150000"))
+
+# PBX report rollups (rollup_pbx_reports).
+#
+# An hour is rolled up only this long after it ends, so hangups that arrive late
+# (long calls report at hangup, connectors retry) usually land before it is frozen.
+# Later ones are still caught: they mark the hour dirty and the next run redoes it.
+PBX_REPORT_ROLLUP_SETTLE_MINUTES = int(os.getenv("PBX_REPORT_ROLLUP_SETTLE_MINUTES", "60"))
+
+# PBX connector command long-poll (integrations.services.pbx_commands).
+#
+# A waiting connector holds a gthread slot (see gunicorn_config.py: 2 x 4 threads),
+# so each process lets only this many wait at once; the rest get an immediate answer
+# and fall back to short polling. The hold must stay well under gunicorn's timeout.
+PBX_COMMAND_LONG_POLL_SECONDS = int(os.getenv("PBX_COMMAND_LONG_POLL_SECONDS", "20"))
+PBX_COMMAND_LONG_POLL_MAX_WAITERS = int(os.getenv("PBX_COMMAND_LONG_POLL_MAX_WAITERS", "2"))
+
 # ============================================================================
 # Logging Configuration
 # ============================================================================
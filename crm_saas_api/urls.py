@@ -78,6 +78,8 @@ from crm.views import (
     ClientVisitViewSet,
     ClientFieldVisitViewSet,
     ClientEventViewSet,
+    ExportJobViewSet,
+    LeadImportJobViewSet,
     LeadArrivalViewSet,
     feature_policy_view,
 )
@@ -164,6 +166,8 @@ router.register(
 )
 router.register(r"client-events", ClientEventViewSet, basename="clientevent")
 router.register(r"lead-arrivals", LeadArrivalViewSet, basename="leadarrival")
+router.register(r"exports", ExportJobViewSet, basename="exportjob")
+router.register(r"lead-imports", LeadImportJobViewSet, basename="leadimportjob")
 
 router.register(r"deals", DealViewSet, basename="deal")
 router.register(r"tasks", TaskViewSet, basename="task")
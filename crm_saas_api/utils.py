@@ -67,7 +67,13 @@ def clean_int_query_param(request, name):
     integer/ForeignKey ``filter()`` lookup so a UI sending an "All" sentinel
     can never trigger a 500.
     """
-    raw = request.query_params.get(name) if hasattr(request, "query_params") else request.GET.get(name)
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    return clean_int_param(params, name)
+
+
+def clean_int_param(params, name):
+    """clean_int_query_param over a plain query dict (no request at hand)."""
+    raw = params.get(name)
     if raw is None:
         return None
     value = str(raw).strip()
@@ -3,6 +3,8 @@ Encryption utilities for sensitive data (Access Tokens, Refresh Tokens).
 Uses Fernet symmetric encryption from the cryptography library.
 """
 import logging
+import threading
+import time
 from cryptography.fernet import Fernet, InvalidToken
 from django.conf import settings
 
@@ -10,6 +12,14 @@ logger = logging.getLogger(__name__)
 
 _fernet_instance = None
 
+# Decrypted tokens, per process, for a few minutes. Keyed by owner *and* ciphertext,
+# so a rotated or re-saved token misses the cache instead of returning a stale value.
+# Never moved to the shared cache: plaintext tokens must not leave the process.
+DECRYPTED_TOKEN_TTL_SECONDS = 300
+DECRYPTED_TOKEN_CACHE_MAX = 1024
+_decrypted_tokens = {}
+_decrypted_tokens_lock = threading.Lock()
+
 
 class EncryptionKeyMissing(Exception):
     """Raised when INTEGRATION_ENCRYPTION_KEY is not configured."""
@@ -92,3 +102,33 @@ def decrypt_token(encrypted_token):
     except Exception as e:
         logger.error(f"Failed to decrypt token: {e}")
         raise
+
+
+def decrypt_token_cached(owner_key, encrypted_token):
+    """
+    decrypt_token with a short-lived in-process cache.
+
+    Sending a WhatsApp message reads the account token several times per request;
+    each read used to run a full Fernet decrypt (HMAC check + AES).
+    """
+    if not encrypted_token:
+        return None
+
+    key = (owner_key, encrypted_token)
+    now = time.monotonic()
+    with _decrypted_tokens_lock:
+        hit = _decrypted_tokens.get(key)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+
+    plaintext = decrypt_token(encrypted_token)
+    with _decrypted_tokens_lock:
+        if len(_decrypted_tokens) >= DECRYPTED_TOKEN_CACHE_MAX:
+            _decrypted_tokens.clear()
+        _decrypted_tokens[key] = (plaintext, now + DECRYPTED_TOKEN_TTL_SECONDS)
+    return plaintext
+
+
+def clear_decrypted_token_cache():
+    with _decrypted_tokens_lock:
+        _decrypted_tokens.clear()
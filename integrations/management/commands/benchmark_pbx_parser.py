@@ -0,0 +1,88 @@
+"""
+Micro-benchmark the ZYCOO push parser over a corpus of captured payloads.
+
+Each payload goes through what every push costs before the database is touched:
+parsing into a ``PbxEvent`` and building the push log summary. Two paths are timed:
+``webhook`` (raw body + content type, as the PBX posts it) and ``batch`` (decoded
+objects, as the connector's ``events`` array arrives). Reports the best of
+``--repeat`` runs in events/second.
+
+Usage:
+    python manage.py benchmark_pbx_parser
+    python manage.py benchmark_pbx_parser --iterations 5000 --corpus /tmp/pushes.jsonl
+
+The corpus is JSON lines of ``{"content_type": ..., "body": ...}`` (the default one
+lives in ``integrations/fixtures/zycoo_push_corpus.jsonl``). Not a scheduled job.
+"""
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from integrations.services.zycoo_parser import (
+    _parse_body,
+    parse_zycoo_event,
+    parse_zycoo_payload,
+)
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "fixtures" / "zycoo_push_corpus.jsonl"
+
+
+class Command(BaseCommand):
+    help = "Measure ZYCOO push parsing throughput (events/second) over a payload corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            default=str(DEFAULT_CORPUS),
+            help="JSON-lines file of captured pushes (default: bundled corpus)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=2000,
+            help="Passes over the corpus per run (default 2000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per path; the best is reported (default 3)",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["corpus"])
+        try:
+            lines = [line for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+            rows = [json.loads(line) for line in lines]
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read corpus {path}: {exc}") from exc
+        if not rows:
+            raise CommandError(f"Corpus {path} is empty")
+
+        raw = [(row["body"].encode("utf-8"), row.get("content_type", "")) for row in rows]
+        decoded = [_parse_body(body, content_type) for body, content_type in raw]
+        iterations = max(options["iterations"], 1)
+        repeat = max(options["repeat"], 1)
+
+        def webhook():
+            for body, content_type in raw:
+                parse_zycoo_payload(body, content_type).summary()
+
+        def batch():
+            for data in decoded:
+                parse_zycoo_event(data).summary()
+
+        self.stdout.write(f"Corpus: {path} ({len(rows)} payloads), {iterations} passes")
+        for name, run in (("webhook", webhook), ("batch", batch)):
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    run()
+                best = min(best, time.perf_counter() - started)
+            events = iterations * len(rows)
+            self.stdout.write(
+                f"{name:8} {events / best:12,.0f} events/s  {best / events * 1e6:8.2f} µs/event"
+            )
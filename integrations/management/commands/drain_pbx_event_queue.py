@@ -0,0 +1,39 @@
+"""
+Apply queued PBX pushes whose drain task never ran.
+
+With PBX_EVENT_QUEUE_ENABLED each push is stored per call and a cluster task is
+queued to apply it (see ``integrations.services.pbx_event_queue``). This sweep
+catches calls whose task was lost, whose worker died holding the call, or whose
+event failed and is waiting for a retry. It drains those calls inline, oldest first.
+
+Usage:
+    python manage.py drain_pbx_event_queue
+    python manage.py drain_pbx_event_queue --limit 500
+
+Intended cadence: every minute. Runs whether or not the flag is on, so events queued
+before it was turned off are not stranded.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from integrations.services.pbx_event_queue import drain_stale_queues
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Apply queued PBX pushes that no cluster task has drained"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=200,
+            help="Maximum number of calls to drain in this run (default 200)",
+        )
+
+    def handle(self, *args, **options):
+        done = drain_stale_queues(limit=max(options["limit"], 0))
+        logger.info("drain_pbx_event_queue: %d event(s) applied", done)
+        self.stdout.write(self.style.SUCCESS(f"Done. PBX events applied: {done}"))
@@ -0,0 +1,40 @@
+"""
+Send queued Meta Conversion Leads events that no cluster task is going to send.
+
+With META_CONVERSION_QUEUE_ENABLED qualification events are stored per pixel and a
+cluster task is queued to send them in batches (see
+``integrations.services.meta_conversion_leads``). This sweep sends batches whose
+retry backoff has passed and events whose task was lost or whose worker died,
+inline, one pixel at a time.
+
+Usage:
+    python manage.py flush_meta_conversion_events
+    python manage.py flush_meta_conversion_events --limit 50
+
+Intended cadence: every minute. Runs whether or not the flag is on, so events queued
+before it was turned off are not stranded.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from integrations.services.meta_conversion_leads import flush_stale_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send queued Meta Conversion Leads events that are due"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=200,
+            help="Maximum number of pixels to flush in this run (default 200)",
+        )
+
+    def handle(self, *args, **options):
+        sent = flush_stale_events(limit=max(options["limit"], 0))
+        logger.info("flush_meta_conversion_events: %d event(s) sent", sent)
+        self.stdout.write(self.style.SUCCESS(f"Done. Meta Conversion Leads events sent: {sent}"))
@@ -0,0 +1,53 @@
+"""
+Roll closed hours of PBX hangups into ``PbxHourlyRollup`` for the call reports.
+
+Reports read these rows for whole hours up to each company's watermark and only
+aggregate the rest of the range live (see ``integrations.services.pbx_reports``).
+Each run continues from the watermark, so the first run backfills history in weekly
+batches and later runs only add the hours that closed since.
+
+Usage:
+    python manage.py rollup_pbx_reports
+    python manage.py rollup_pbx_reports --company-id 12
+
+Intended cadence: hourly. Reports stay correct without it — they just aggregate more
+CDRs live the longer it has not run.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from integrations.models import PbxSettings
+from integrations.services.pbx_reports import rollup_company
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Roll up closed hours of PBX hangups for the call reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company-id",
+            type=int,
+            help="Run for a single company id only",
+        )
+
+    def handle(self, *args, **options):
+        company_ids = PbxSettings.objects.filter(is_enabled=True)
+        if options.get("company_id"):
+            company_ids = company_ids.filter(company_id=options["company_id"])
+
+        total = 0
+        for company_id in company_ids.values_list("company_id", flat=True):
+            try:
+                written = rollup_company(company_id)
+            except Exception:
+                logger.exception("rollup_pbx_reports failed for company_id=%s", company_id)
+                continue
+            total += written
+            if written:
+                self.stdout.write(f"Company {company_id}: {written} rollup row(s)")
+
+        logger.info("rollup_pbx_reports: wrote %d rollup row(s)", total)
+        self.stdout.write(self.style.SUCCESS(f"Done. Rollup rows written: {total}"))
@@ -1,11 +1,14 @@
 """
 Run AI lead analysis for all companies with OpenAI integration enabled.
+
+Tenants are analysed concurrently: their OpenAI requests share one pooled HTTP client
+and at most --concurrency (default AI_ANALYSIS_MAX_CONCURRENCY) are in flight at once.
 """
 from django.core.management.base import BaseCommand
 
 from companies.models import Company
 from integrations.models import OpenAISettings
-from integrations.services.ai_lead_analysis import run_company_analysis
+from integrations.services.ai_lead_analysis import run_companies_analysis
 
 
 class Command(BaseCommand):
@@ -17,6 +20,11 @@ class Command(BaseCommand):
             type=int,
             help="Run for a single company id only",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Maximum OpenAI requests in flight across all companies",
+        )
 
     def handle(self, *args, **options):
         company_id = options.get("company_id")
@@ -29,11 +37,12 @@ class Command(BaseCommand):
             ).values_list("company_id", flat=True)
             companies = Company.objects.filter(id__in=company_ids)
 
+        results = run_companies_analysis(companies, concurrency=options.get("concurrency"))
+
         total_created = 0
-        for company in companies:
-            result = run_company_analysis(company)
+        for cid, result in results.items():
             if result.get("created"):
                 total_created += result["created"]
-            self.stdout.write(f"Company {company.id}: {result}")
+            self.stdout.write(f"Company {cid}: {result}")
 
         self.stdout.write(self.style.SUCCESS(f"Done. Insights created: {total_created}"))
@@ -0,0 +1,42 @@
+"""
+Build Opus renditions for stored call recordings that do not have one yet.
+
+New recordings are transcoded by a cluster task queued when they are stored (see
+``integrations.services.recording_transcode``). This sweep catches the rest: tasks
+that could not be queued, workers that had no ffmpeg, and recordings stored before
+transcoding was turned on. It runs the transcodes inline, newest first.
+
+Usage:
+    python manage.py transcode_recordings
+    python manage.py transcode_recordings --limit 500
+
+Intended cadence: hourly. Does nothing while RECORDING_TRANSCODE_ENABLED is off.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from integrations.services.recording_transcode import transcode_backlog, transcode_enabled
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Transcode stored call recordings that have no compressed rendition yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=50,
+            help="Maximum number of recordings to transcode in this run (default 50)",
+        )
+
+    def handle(self, *args, **options):
+        if not transcode_enabled():
+            self.stdout.write("RECORDING_TRANSCODE_ENABLED is off; nothing to do.")
+            return
+
+        done = transcode_backlog(limit=max(options["limit"], 0))
+        logger.info("transcode_recordings: %d recording(s) transcoded", done)
+        self.stdout.write(self.style.SUCCESS(f"Done. Recordings transcoded: {done}"))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0023_company_work_hours_idle_timeout_minutes_and_more'),
+        ('integrations', '0046_whatsapp_call_error_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pbxsettings',
+            name='report_rollup_dirty_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pbxsettings',
+            name='report_rollup_through',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PbxHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour_start', models.DateTimeField()),
+                ('extension', models.CharField(blank=True, default='', max_length=32)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('inbound', models.PositiveIntegerField(default=0)),
+                ('outbound', models.PositiveIntegerField(default=0)),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('missed', models.PositiveIntegerField(default=0)),
+                ('billsec_sum', models.PositiveBigIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pbx_hourly_rollups', to='companies.company')),
+            ],
+            options={
+                'db_table': 'integrations_pbx_hourly_rollup',
+                'ordering': ['-hour_start', 'extension'],
+                'constraints': [models.UniqueConstraint(fields=('company', 'hour_start', 'extension'), name='uniq_pbx_rollup_company_hour_extension')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0047_pbx_hourly_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pbxcallrecord',
+            name='recording_compressed_key',
+            field=models.CharField(blank=True, default='', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='pbxcallrecord',
+            name='recording_duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pbxcallrecord',
+            name='recording_peaks',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='pbxcallrecord',
+            name='recording_transcode_status',
+            field=models.CharField(choices=[('none', 'None'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='whatsappcall',
+            name='recording_compressed_key',
+            field=models.CharField(blank=True, default='', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='whatsappcall',
+            name='recording_duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='whatsappcall',
+            name='recording_peaks',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='whatsappcall',
+            name='recording_transcode_status',
+            field=models.CharField(choices=[('none', 'None'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0048_recording_transcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pbxsettings',
+            name='connector_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
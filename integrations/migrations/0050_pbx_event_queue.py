@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0023_company_work_hours_idle_timeout_minutes_and_more'),
+        ('integrations', '0049_pbx_connector_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PbxCallLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('call_key', models.CharField(max_length=128)),
+                ('holder', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pbx_call_leases', to='companies.company')),
+            ],
+            options={
+                'db_table': 'integrations_pbx_call_lease',
+                'constraints': [models.UniqueConstraint(fields=('company', 'call_key'), name='uniq_pbx_call_lease_company_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PbxQueuedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('call_key', models.CharField(max_length=128)),
+                ('source', models.CharField(default='webhook', max_length=16)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('raw_body', models.TextField(blank=True, default='')),
+                ('webhook_token_prefix', models.CharField(blank=True, default='', max_length=16)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pbx_queued_events', to='companies.company')),
+            ],
+            options={
+                'db_table': 'integrations_pbx_queued_event',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['company', 'call_key', 'status'], name='integration_company_44f4b5_idx'), models.Index(fields=['status', 'created_at'], name='integration_status_2f320d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0024_company_patient_number_block_size'),
+        ('crm', '0060_leadimportjob'),
+        ('integrations', '0050_pbx_event_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaConversionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pixel_id', models.CharField(max_length=64)),
+                ('event_name', models.CharField(max_length=32)),
+                ('event_time', models.BigIntegerField(help_text="Unix seconds; part of the event_id Meta dedups on")),
+                ('leadgen_id', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=32)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meta_conversion_events', to='integrations.integrationaccount')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meta_conversion_events', to='crm.client')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meta_conversion_events', to='companies.company')),
+            ],
+            options={
+                'db_table': 'integrations_meta_conversion_event',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['account', 'pixel_id', 'status', 'next_attempt_at'], name='meta_conv_event_pixel_idx'), models.Index(fields=['status', 'next_attempt_at'], name='meta_conv_event_due_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from companies.models import Company
-from .encryption import encrypt_token, decrypt_token
+from .encryption import encrypt_token, decrypt_token, decrypt_token_cached
 
 User = get_user_model()
 
@@ -152,7 +152,7 @@ class IntegrationAccount(models.Model):
         """الحصول على Access Token (مفكوك التشفير)"""
         if not self.access_token:
             return None
-        return decrypt_token(self.access_token)
+        return decrypt_token_cached(("integration_account", self.pk), self.access_token)
     
     def set_access_token(self, token):
         """حفظ Access Token (مشفر)"""
@@ -378,7 +378,7 @@ class WhatsAppAccount(models.Model):
         """الحصول على Access Token (مفكوك التشفير)"""
         if not self.access_token:
             return None
-        return decrypt_token(self.access_token)
+        return decrypt_token_cached(("whatsapp_account", self.pk), self.access_token)
 
     def set_access_token(self, token):
         """حفظ Access Token (مشفر)"""
@@ -1137,6 +1137,15 @@ class PbxRecordingStatus(models.TextChoices):
     SKIPPED = "skipped", "Skipped"
 
 
+class RecordingTranscodeStatus(models.TextChoices):
+    """Compressed (Opus/OGG) rendition of a stored call recording."""
+
+    NONE = "none", "None"
+    PENDING = "pending", "Pending"
+    READY = "ready", "Ready"
+    FAILED = "failed", "Failed"
+
+
 class PbxSettings(models.Model):
     """Per-company PBX integration (ZYCOO CooVox / Asterisk AMI)."""
 
@@ -1162,6 +1171,12 @@ class PbxSettings(models.Model):
     auto_log_calls = models.BooleanField(default=True)
     screen_pop_enabled = models.BooleanField(default=True)
     connector_last_seen_at = models.DateTimeField(blank=True, null=True)
+    # Recording-transfer counters from the connector's latest heartbeat.
+    connector_stats = models.JSONField(default=dict, blank=True)
+    # PbxHourlyRollup covers whole hours before report_rollup_through, except from
+    # report_rollup_dirty_from on, where late hangups landed after the rollup ran.
+    report_rollup_through = models.DateTimeField(blank=True, null=True)
+    report_rollup_dirty_from = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1240,6 +1255,14 @@ class PbxCallRecord(models.Model):
         default=PbxRecordingStatus.SKIPPED,
         db_index=True,
     )
+    recording_compressed_key = models.CharField(max_length=512, blank=True, default="")
+    recording_transcode_status = models.CharField(
+        max_length=16,
+        choices=RecordingTranscodeStatus.choices,
+        default=RecordingTranscodeStatus.NONE,
+    )
+    recording_duration_ms = models.PositiveIntegerField(blank=True, null=True)
+    recording_peaks = models.JSONField(default=list, blank=True)
     client = models.ForeignKey(
         "crm.Client",
         on_delete=models.SET_NULL,
@@ -1277,6 +1300,37 @@ class PbxCallRecord(models.Model):
         return f"{self.uniqueid} ({self.event_type})"
 
 
+class PbxHourlyRollup(models.Model):
+    """Hangup counters per (UTC hour, extension); see integrations.services.pbx_reports."""
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="pbx_hourly_rollups",
+    )
+    hour_start = models.DateTimeField()
+    extension = models.CharField(max_length=32, blank=True, default="")
+    total = models.PositiveIntegerField(default=0)
+    inbound = models.PositiveIntegerField(default=0)
+    outbound = models.PositiveIntegerField(default=0)
+    answered = models.PositiveIntegerField(default=0)
+    missed = models.PositiveIntegerField(default=0)
+    billsec_sum = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "integrations_pbx_hourly_rollup"
+        ordering = ["-hour_start", "extension"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "hour_start", "extension"],
+                name="uniq_pbx_rollup_company_hour_extension",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.hour_start:%Y-%m-%d %H:00} {self.extension or '-'} ({self.total})"
+
+
 class PbxDialCommand(models.Model):
     """Queued click-to-dial command for the LAN connector."""
 
@@ -1321,6 +1375,73 @@ class PbxDialCommand(models.Model):
         return f"Dial {self.phone_number} via {self.extension} ({self.status})"
 
 
+class PbxQueuedEventStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    FAILED = "failed", "Failed"
+
+
+class PbxQueuedEvent(models.Model):
+    """
+    A PBX push waiting to be applied by the per-call queue
+    (see integrations.services.pbx_event_queue). Deleted once applied.
+    """
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="pbx_queued_events",
+    )
+    call_key = models.CharField(max_length=128)
+    source = models.CharField(max_length=16, default="webhook")
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    raw_body = models.TextField(blank=True, default="")
+    webhook_token_prefix = models.CharField(max_length=16, blank=True, default="")
+    status = models.CharField(
+        max_length=16,
+        choices=PbxQueuedEventStatus.choices,
+        default=PbxQueuedEventStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "integrations_pbx_queued_event"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["company", "call_key", "status"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.call_key} #{self.id} ({self.status})"
+
+
+class PbxCallLease(models.Model):
+    """Which worker is applying one call's queued events; expires if it dies."""
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="pbx_call_leases",
+    )
+    call_key = models.CharField(max_length=128)
+    holder = models.CharField(max_length=32)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "integrations_pbx_call_lease"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "call_key"],
+                name="uniq_pbx_call_lease_company_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.call_key} held by {self.holder} until {self.expires_at:%H:%M:%S}"
+
+
 class WhatsAppCallDirection(models.TextChoices):
     INBOUND = "inbound", "Inbound"
     OUTBOUND = "outbound", "Outbound"
@@ -1398,6 +1519,14 @@ class WhatsAppCall(models.Model):
         default=WhatsAppCallRecordingStatus.NONE,
         db_index=True,
     )
+    recording_compressed_key = models.CharField(max_length=512, blank=True, default="")
+    recording_transcode_status = models.CharField(
+        max_length=16,
+        choices=RecordingTranscodeStatus.choices,
+        default=RecordingTranscodeStatus.NONE,
+    )
+    recording_duration_ms = models.PositiveIntegerField(blank=True, null=True)
+    recording_peaks = models.JSONField(default=list, blank=True)
     client_call = models.ForeignKey(
         "crm.ClientCall",
         on_delete=models.SET_NULL,
@@ -1498,3 +1627,60 @@ class WhatsAppCallErrorLog(models.Model):
     def __str__(self):
         return f"{self.source}:{self.error_code or self.error_message[:40]}"
 
+
+
+class MetaConversionEventStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    FAILED = "failed", "Failed"
+
+
+class MetaConversionEvent(models.Model):
+    """
+    A Conversion Leads qualification event waiting to be sent to a pixel in a batch
+    (see integrations.services.meta_conversion_leads). Deleted once Meta accepts it.
+    """
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="meta_conversion_events",
+    )
+    account = models.ForeignKey(
+        IntegrationAccount,
+        on_delete=models.CASCADE,
+        related_name="meta_conversion_events",
+    )
+    client = models.ForeignKey(
+        "crm.Client",
+        on_delete=models.CASCADE,
+        related_name="meta_conversion_events",
+    )
+    pixel_id = models.CharField(max_length=64)
+    event_name = models.CharField(max_length=32)
+    event_time = models.BigIntegerField(help_text="Unix seconds; part of the event_id Meta dedups on")
+    leadgen_id = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=16,
+        choices=MetaConversionEventStatus.choices,
+        default=MetaConversionEventStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    claimed_by = models.CharField(max_length=32, blank=True, default="")
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "integrations_meta_conversion_event"
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["account", "pixel_id", "status", "next_attempt_at"],
+                name="meta_conv_event_pixel_idx",
+            ),
+            models.Index(fields=["status", "next_attempt_at"], name="meta_conv_event_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_name} for client {self.client_id} ({self.status})"
@@ -13,6 +13,8 @@ import hashlib
 import base64
 from urllib.parse import urlencode, parse_qs, urlparse
 
+from integrations.services import graph_http
+
 META_GRAPH_API_VERSION = "v25.0"
 META_GRAPH_API_BASE_URL = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}"
 META_DIALOG_API_BASE_URL = f"https://www.facebook.com/{META_GRAPH_API_VERSION}"
@@ -133,7 +135,7 @@ class MetaOAuth(OAuthBase):
             'code': code,
         }
         
-        response = requests.post(self.token_url, params=params)
+        response = graph_http.post(self.token_url, params=params)
         response.raise_for_status()
         data = response.json()
 
@@ -168,7 +170,7 @@ class MetaOAuth(OAuthBase):
             'fb_exchange_token': access_token,
         }
         
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -184,7 +186,7 @@ class MetaOAuth(OAuthBase):
         proof = self._appsecret_proof(access_token)
         if proof:
             params['appsecret_proof'] = proof
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         return {'id': data.get('id'), 'name': data.get('name') or ''}
@@ -198,7 +200,7 @@ class MetaOAuth(OAuthBase):
             params = {'access_token': access_token, 'fields': fields}
             if proof:
                 params['appsecret_proof'] = proof
-            response = requests.get(url, params=params)
+            response = graph_http.get(url, params=params)
             if response.ok:
                 data = response.json().get('data', [])
                 for page in data:
@@ -220,7 +222,7 @@ class MetaOAuth(OAuthBase):
             params1 = {'access_token': access_token, 'fields': 'accounts{id,name}'}
             if proof:
                 params1['appsecret_proof'] = proof
-            r1 = requests.get(f"{self.graph_api_url}/me", params=params1)
+            r1 = graph_http.get(f"{self.graph_api_url}/me", params=params1)
             r1.raise_for_status()
             data = r1.json().get('accounts', {}).get('data', [])
             if data:
@@ -242,7 +244,7 @@ class MetaOAuth(OAuthBase):
                     params['appsecret_proof'] = proof
             elif 'appsecret_proof' in params:
                 params.pop('appsecret_proof', None)
-            response = requests.get(url, params=params)
+            response = graph_http.get(url, params=params)
             if response.ok:
                 return response.json().get('access_token')
             if use_proof:
@@ -271,7 +273,7 @@ class MetaOAuth(OAuthBase):
                     params['appsecret_proof'] = proof
             elif 'appsecret_proof' in params:
                 params.pop('appsecret_proof', None)
-            response = requests.get(url, params=params)
+            response = graph_http.get(url, params=params)
             if response.ok:
                 return response.json().get('data', [])
             try:
@@ -296,7 +298,7 @@ class MetaOAuth(OAuthBase):
         proof = self._appsecret_proof(page_access_token)
         if proof:
             params['appsecret_proof'] = proof
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         return response.json()
 
@@ -313,7 +315,7 @@ class MetaOAuth(OAuthBase):
         proof = self._appsecret_proof(page_access_token)
         if proof:
             params['appsecret_proof'] = proof
-        response = requests.post(url, params=params)
+        response = graph_http.post(url, params=params)
         try:
             data = response.json()
         except ValueError:
@@ -334,7 +336,7 @@ class MetaOAuth(OAuthBase):
         proof = self._appsecret_proof(page_access_token)
         if proof:
             params['appsecret_proof'] = proof
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         try:
             data = response.json()
         except ValueError:
@@ -370,7 +372,7 @@ class MetaOAuth(OAuthBase):
             'client_secret': self.client_secret,
             'grant_type': 'client_credentials',
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         return data.get('access_token', '')
@@ -388,7 +390,7 @@ class MetaOAuth(OAuthBase):
             'input_token': user_access_token,
             'access_token': app_token,
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         data = response.json().get('data', {})
         return data
@@ -403,7 +405,7 @@ class MetaOAuth(OAuthBase):
         proof = self._appsecret_proof(user_access_token)
         if proof:
             params['appsecret_proof'] = proof
-        response = requests.delete(url, params=params)
+        response = graph_http.delete(url, params=params)
         if response.status_code == 200:
             return True
         try:
@@ -427,7 +429,7 @@ class MetaOAuth(OAuthBase):
         if proof:
             params['appsecret_proof'] = proof
         body = {'data': events}
-        response = requests.post(url, params=params, json=body)
+        response = graph_http.post(url, params=params, json=body)
         try:
             data = response.json()
         except ValueError:
@@ -492,7 +494,7 @@ class WhatsAppOAuth(OAuthBase):
             'redirect_uri': effective_redirect,
             'code': code,
         }
-        response = requests.post(self.token_url, params=params)
+        response = graph_http.post(self.token_url, params=params)
         response.raise_for_status()
         data = response.json()
         token_data = {
@@ -522,7 +524,7 @@ class WhatsAppOAuth(OAuthBase):
             'client_secret': self.client_secret,
             'fb_exchange_token': access_token,
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         return {
@@ -537,7 +539,7 @@ class WhatsAppOAuth(OAuthBase):
             'access_token': access_token,
             'fields': 'id,name',
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         return response.json()
 
@@ -548,7 +550,7 @@ class WhatsAppOAuth(OAuthBase):
             'client_secret': self.client_secret,
             'grant_type': 'client_credentials',
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         return response.json().get('access_token', '')
 
@@ -561,7 +563,7 @@ class WhatsAppOAuth(OAuthBase):
             'input_token': user_access_token,
             'access_token': app_token,
         }
-        response = requests.get(url, params=params)
+        response = graph_http.get(url, params=params)
         response.raise_for_status()
         return response.json().get('data', {})
 
@@ -576,7 +578,7 @@ class WhatsAppOAuth(OAuthBase):
                 return
         phones = []
         try:
-            ph_resp = requests.get(
+            ph_resp = graph_http.get(
                 f"{graph}/{waba_id}/phone_numbers",
                 params={
                     'access_token': access_token,
@@ -622,7 +624,7 @@ class WhatsAppOAuth(OAuthBase):
         name_status = ''
         verified_name = ''
         try:
-            resp = requests.get(
+            resp = graph_http.get(
                 f"{self.graph_api_url}/{pid}",
                 params={
                     'access_token': access_token,
@@ -658,7 +660,7 @@ class WhatsAppOAuth(OAuthBase):
         out = []
         businesses = []
         try:
-            resp = requests.get(
+            resp = graph_http.get(
                 f"{graph}/me/businesses",
                 params={
                     'access_token': access_token,
@@ -685,7 +687,7 @@ class WhatsAppOAuth(OAuthBase):
 
         if not out:
             try:
-                resp = requests.get(
+                resp = graph_http.get(
                     f"{graph}/me",
                     params={
                         'access_token': access_token,
@@ -32,28 +32,49 @@ class InboundLeadSerializer(serializers.Serializer):
         allow_null=True,
     )
 
-    def __init__(self, *args, company=None, **kwargs):
+    _REFERENCE_MODELS = {
+        "campaign_id": Campaign,
+        "communication_way_id": Channel,
+        "status_id": LeadStatus,
+    }
+
+    def __init__(self, *args, company=None, reference_ids=None, **kwargs):
         self.company = company
+        # {field: set of the company's ids} from load_reference_ids(); batches validate
+        # every item against it instead of one query per item and field.
+        self.reference_ids = reference_ids
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def load_reference_ids(cls, company) -> dict:
+        return {
+            field: set(model.objects.filter(company=company).values_list("id", flat=True))
+            for field, model in cls._REFERENCE_MODELS.items()
+        }
+
+    def _belongs_to_company(self, field, value) -> bool:
+        if self.reference_ids is not None:
+            return value in self.reference_ids[field]
+        return self._REFERENCE_MODELS[field].objects.filter(id=value, company=self.company).exists()
+
     def validate_campaign_id(self, value):
         if value is None:
             return None
-        if not Campaign.objects.filter(id=value, company=self.company).exists():
+        if not self._belongs_to_company("campaign_id", value):
             raise serializers.ValidationError("Campaign not found for this company.")
         return value
 
     def validate_communication_way_id(self, value):
         if value is None:
             return None
-        if not Channel.objects.filter(id=value, company=self.company).exists():
+        if not self._belongs_to_company("communication_way_id", value):
             raise serializers.ValidationError("Communication channel not found for this company.")
         return value
 
     def validate_status_id(self, value):
         if value is None:
             return None
-        if not LeadStatus.objects.filter(id=value, company=self.company).exists():
+        if not self._belongs_to_company("status_id", value):
             raise serializers.ValidationError("Lead status not found for this company.")
         return value
 
@@ -42,6 +42,7 @@ class PbxSettingsSerializer(serializers.ModelSerializer):
             "screen_pop_enabled",
             "connector_last_seen_at",
             "connector_online",
+            "connector_stats",
             "created_at",
             "updated_at",
         ]
@@ -51,6 +52,7 @@ class PbxSettingsSerializer(serializers.ModelSerializer):
             "connector_api_key",
             "connector_install_key",
             "connector_last_seen_at",
+            "connector_stats",
             "created_at",
             "updated_at",
         ]
@@ -1,15 +1,26 @@
 """
 AI lead analysis via tenant OpenAI API key (BYOK).
+
+A run is split into a synchronous database half (prepare_company_run /
+finish_company_run) and the OpenAI requests in between. The on-demand view runs one
+tenant inline; the scheduled command sends every tenant's requests concurrently
+(run_companies_analysis), so one slow tenant no longer holds up the rest and the
+six-hourly run finishes before the next one starts.
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import timedelta
 
+from django.conf import settings as django_settings
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
@@ -29,6 +40,19 @@ TERMINAL_STAGE_NAMES = frozenset(
     {"not_interested", "out_of_service", "cancellation"}
 )
 
+# Recent tasks / calls / visits included per lead.
+SNAPSHOT_ACTIVITY_LIMIT = 5
+
+# Leads per OpenAI request. Bounded prompts keep each response well inside the
+# model's output limit and let a tenant's budget stop between requests.
+CHUNK_MAX_LEADS = 10
+CHUNK_MAX_CHARS = 24_000
+COMPLETION_TOKENS_PER_LEAD = 250
+
+REQUEST_TIMEOUT_SECONDS = 120
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_TENANT_TOKEN_BUDGET = 150_000
+
 SYSTEM_PROMPT = """You analyze CRM leads for a sales/clinic team using only the provided data.
 Identify leads that need urgent follow-up based on employee notes and activities.
 Output valid JSON only with this schema:
@@ -56,53 +80,68 @@ def _is_terminal_stage(client: Client) -> bool:
     return _stage_key(client) in TERMINAL_STAGE_NAMES
 
 
-def _build_activity_snapshot(client: Client) -> dict:
-    tasks = list(
-        ClientTask.objects.filter(client=client)
-        .select_related("stage", "created_by")
-        .order_by("-created_at")[:5]
-    )
-    calls = list(
-        ClientCall.objects.filter(client=client)
-        .select_related("call_method", "created_by")
-        .order_by("-created_at")[:5]
-    )
-    visits = list(
-        ClientVisit.objects.filter(client=client)
-        .select_related("visit_type", "created_by")
-        .order_by("-created_at")[:5]
+def _latest_per_client(queryset, client_ids):
+    """
+    The SNAPSHOT_ACTIVITY_LIMIT newest rows per client, for all ``client_ids`` in one query.
+
+    ROW_NUMBER() over a per-client partition replaces the former ``[:5]`` query per
+    client and activity type (three queries per lead).
+    """
+    ranked = queryset.filter(client_id__in=client_ids).annotate(
+        _recent_rank=Window(
+            RowNumber(),
+            partition_by=[F("client_id")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
     )
+    grouped: dict[int, list] = defaultdict(list)
+    for row in ranked.filter(_recent_rank__lte=SNAPSHOT_ACTIVITY_LIMIT).order_by(
+        "client_id", "_recent_rank"
+    ):
+        grouped[row.client_id].append(row)
+    return grouped
+
+
+def _build_activity_snapshots(clients: list[Client]) -> dict[int, dict]:
+    """Activity snapshots for ``clients`` keyed by client id: three queries in total."""
+    client_ids = [c.id for c in clients]
+    tasks = _latest_per_client(ClientTask.objects.select_related("stage"), client_ids)
+    calls = _latest_per_client(ClientCall.objects.all(), client_ids)
+    visits = _latest_per_client(ClientVisit.objects.all(), client_ids)
     return {
-        "client_id": client.id,
-        "name": client.name,
-        "priority": client.priority,
-        "stage": _stage_key(client),
-        "notes": client.notes or "",
-        "tasks": [
-            {
-                "notes": t.notes or "",
-                "reminder_date": t.reminder_date.isoformat() if t.reminder_date else None,
-                "created_at": t.created_at.isoformat() if t.created_at else None,
-                "stage": t.stage.name if t.stage else None,
-            }
-            for t in tasks
-        ],
-        "calls": [
-            {
-                "notes": c.notes or "",
-                "call_datetime": c.call_datetime.isoformat() if c.call_datetime else None,
-                "created_at": c.created_at.isoformat() if c.created_at else None,
-            }
-            for c in calls
-        ],
-        "visits": [
-            {
-                "summary": v.summary or "",
-                "visit_datetime": v.visit_datetime.isoformat() if v.visit_datetime else None,
-                "created_at": v.created_at.isoformat() if v.created_at else None,
-            }
-            for v in visits
-        ],
+        client.id: {
+            "client_id": client.id,
+            "name": client.name,
+            "priority": client.priority,
+            "stage": _stage_key(client),
+            "notes": client.notes or "",
+            "tasks": [
+                {
+                    "notes": t.notes or "",
+                    "reminder_date": t.reminder_date.isoformat() if t.reminder_date else None,
+                    "created_at": t.created_at.isoformat() if t.created_at else None,
+                    "stage": t.stage.name if t.stage else None,
+                }
+                for t in tasks.get(client.id, ())
+            ],
+            "calls": [
+                {
+                    "notes": c.notes or "",
+                    "call_datetime": c.call_datetime.isoformat() if c.call_datetime else None,
+                    "created_at": c.created_at.isoformat() if c.created_at else None,
+                }
+                for c in calls.get(client.id, ())
+            ],
+            "visits": [
+                {
+                    "summary": v.summary or "",
+                    "visit_datetime": v.visit_datetime.isoformat() if v.visit_datetime else None,
+                    "created_at": v.created_at.isoformat() if v.created_at else None,
+                }
+                for v in visits.get(client.id, ())
+            ],
+        }
+        for client in clients
     }
 
 
@@ -155,25 +194,60 @@ def _parse_leads_response(content: str) -> list[dict]:
     return []
 
 
-def _call_openai(api_key: str, model: str, snapshots: list[dict]) -> tuple[list[dict], int | None]:
-    from openai import OpenAI
+def _chunk_snapshots(snapshots: list[dict]) -> list[list[dict]]:
+    """Split snapshots into prompts of at most CHUNK_MAX_LEADS leads / CHUNK_MAX_CHARS chars."""
+    chunks: list[list[dict]] = []
+    current: list[dict] = []
+    size = 0
+    for snap in snapshots:
+        snap_size = len(json.dumps(snap, ensure_ascii=False))
+        if current and (len(current) >= CHUNK_MAX_LEADS or size + snap_size > CHUNK_MAX_CHARS):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(snap)
+        size += snap_size
+    if current:
+        chunks.append(current)
+    return chunks
 
-    client = OpenAI(api_key=api_key)
-    user_content = json.dumps({"leads": snapshots}, ensure_ascii=False)
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+
+def _estimate_tokens(snapshots: list[dict]) -> int:
+    """Rough prompt + completion estimate (~4 chars per token) for the budget check."""
+    prompt_chars = len(SYSTEM_PROMPT) + len(json.dumps({"leads": snapshots}, ensure_ascii=False))
+    return prompt_chars // 4 + COMPLETION_TOKENS_PER_LEAD * len(snapshots)
+
+
+def _completion_kwargs(model: str, snapshots: list[dict]) -> dict:
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_content},
+            {"role": "user", "content": json.dumps({"leads": snapshots}, ensure_ascii=False)},
         ],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-    )
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2,
+    }
+
+
+def _read_completion(response) -> tuple[list[dict], int | None]:
     text = response.choices[0].message.content or "{}"
     tokens = getattr(response.usage, "total_tokens", None) if response.usage else None
     return _parse_leads_response(text), tokens
 
 
+def _call_openai(api_key: str, model: str, snapshots: list[dict]) -> tuple[list[dict], int | None]:
+    from openai import OpenAI
+
+    client = OpenAI(api_key=api_key)
+    response = client.chat.completions.create(**_completion_kwargs(model, snapshots))
+    return _read_completion(response)
+
+
+async def _acall_openai(client, model: str, snapshots: list[dict]) -> tuple[list[dict], int | None]:
+    response = await client.chat.completions.create(**_completion_kwargs(model, snapshots))
+    return _read_completion(response)
+
+
 def test_openai_connection(api_key: str, model: str) -> tuple[bool, str]:
     try:
         from openai import OpenAI
@@ -260,9 +334,47 @@ def persist_insight(
     )
 
 
-def run_company_analysis(company, *, force: bool = False) -> dict:
+@dataclass
+class CompanyRun:
+    """Everything one tenant's analysis needs once the database work is done."""
+
+    company: object
+    settings: OpenAISettings
+    api_key: str
+    model: str
+    clients: dict[int, Client]
+    hash_by_client: dict[int, str]
+    chunks: list[list[dict]]
+    token_budget: int
+    # Filled in while the chunks are sent.
+    results: list[tuple[list[dict], int | None]] = field(default_factory=list)
+    tokens_spent: int = 0
+    leads_over_budget: int = 0
+    error: Exception | None = None
+
+    def admit(self, chunk: list[dict]) -> bool:
+        """False once sending ``chunk`` would overrun the tenant's token budget."""
+        if self.tokens_spent + _estimate_tokens(chunk) <= self.token_budget:
+            return True
+        self.leads_over_budget = sum(len(c) for c in self.chunks[len(self.results):])
+        return False
+
+    def record(self, leads_payload: list[dict], tokens_used: int | None, chunk: list[dict]) -> None:
+        self.results.append((leads_payload, tokens_used))
+        self.tokens_spent += tokens_used if tokens_used is not None else _estimate_tokens(chunk)
+
+
+def _mark_analyzed(settings: OpenAISettings) -> None:
+    settings.last_analysis_at = timezone.now()
+    settings.last_error = ""
+    settings.save(update_fields=["last_analysis_at", "last_error"])
+
+
+def prepare_company_run(company, *, force: bool = False) -> CompanyRun | dict:
     """
-    Run AI analysis for one company. Returns stats dict.
+    Database half of a run: settings, eligible leads, snapshots and chunking.
+
+    Returns a finished stats dict instead when there is nothing to send.
     """
     try:
         settings = OpenAISettings.objects.get(company=company)
@@ -281,60 +393,167 @@ def run_company_analysis(company, *, force: bool = False) -> dict:
     limit = settings.max_leads_per_run or OpenAISettings.DEFAULT_MAX_LEADS_PER_RUN
     clients = get_eligible_clients(company, limit=limit)
     if not clients:
-        settings.last_analysis_at = timezone.now()
-        settings.last_error = ""
-        settings.save(update_fields=["last_analysis_at", "last_error"])
+        _mark_analyzed(settings)
         return {"analyzed": 0, "created": 0}
 
-    snapshots = []
-    hash_by_client = {}
-    for client in clients:
-        snap = _build_activity_snapshot(client)
-        h = snapshot_hash(snap)
-        hash_by_client[client.id] = h
-        if not force:
-            pending = ClientAIInsight.objects.filter(
-                client=client,
+    snapshot_by_client = _build_activity_snapshots(clients)
+    hash_by_client = {cid: snapshot_hash(snap) for cid, snap in snapshot_by_client.items()}
+
+    pending = set()
+    if not force:
+        pending = set(
+            ClientAIInsight.objects.filter(
+                client_id__in=list(hash_by_client),
                 status=AIInsightStatus.PENDING,
-                source_snapshot_hash=h,
-            ).exists()
-            if pending:
-                continue
-        snapshots.append(snap)
+            ).values_list("client_id", "source_snapshot_hash")
+        )
+    snapshots = [
+        snapshot_by_client[c.id]
+        for c in clients
+        if (c.id, hash_by_client[c.id]) not in pending
+    ]
 
     if not snapshots:
-        settings.last_analysis_at = timezone.now()
-        settings.last_error = ""
-        settings.save(update_fields=["last_analysis_at", "last_error"])
+        _mark_analyzed(settings)
         return {"analyzed": 0, "created": 0, "unchanged": len(clients)}
 
-    model = settings.model or OpenAISettings.DEFAULT_MODEL
-    try:
-        leads_payload, tokens_used = _call_openai(api_key, model, snapshots)
-    except Exception as exc:
-        log_openai_failure(logger, exc, company_id=company.id, context="analysis")
-        info = persist_openai_settings_error(settings, exc)
-        return {"error": info.message, "code": info.code}
+    return CompanyRun(
+        company=company,
+        settings=settings,
+        api_key=api_key,
+        model=settings.model or OpenAISettings.DEFAULT_MODEL,
+        clients={c.id: c for c in clients},
+        hash_by_client=hash_by_client,
+        chunks=_chunk_snapshots(snapshots),
+        token_budget=getattr(
+            django_settings, "AI_ANALYSIS_TENANT_TOKEN_BUDGET", DEFAULT_TENANT_TOKEN_BUDGET
+        ),
+    )
 
-    client_map = {c.id: c for c in clients}
+
+def finish_company_run(run: CompanyRun) -> dict:
+    """Database half after the OpenAI calls: store insights and the run's outcome."""
     created = 0
-    for item in leads_payload:
-        cid = item.get("client_id")
-        client = client_map.get(cid)
-        if not client:
-            continue
-        insight = persist_insight(
-            company=company,
-            client=client,
-            lead_payload=item,
-            snapshot_hash_value=hash_by_client.get(cid, ""),
-            model_used=model,
-            tokens_used=tokens_used,
+    for leads_payload, tokens_used in run.results:
+        for item in leads_payload:
+            cid = item.get("client_id")
+            client = run.clients.get(cid)
+            if not client:
+                continue
+            insight = persist_insight(
+                company=run.company,
+                client=client,
+                lead_payload=item,
+                snapshot_hash_value=run.hash_by_client.get(cid, ""),
+                model_used=run.model,
+                tokens_used=tokens_used,
+            )
+            if insight:
+                created += 1
+
+    analyzed = sum(len(chunk) for chunk in run.chunks[: len(run.results)])
+    if run.error is not None:
+        log_openai_failure(logger, run.error, company_id=run.company.id, context="analysis")
+        info = persist_openai_settings_error(run.settings, run.error)
+        return {"error": info.message, "code": info.code, "analyzed": analyzed, "created": created}
+
+    _mark_analyzed(run.settings)
+    result = {"analyzed": analyzed, "created": created, "tokens_used": run.tokens_spent}
+    if run.leads_over_budget:
+        logger.info(
+            "AI analysis for company %s stopped at its token budget; %d lead(s) deferred",
+            run.company.id,
+            run.leads_over_budget,
         )
-        if insight:
-            created += 1
+        result["deferred_over_budget"] = run.leads_over_budget
+    return result
 
-    settings.last_analysis_at = timezone.now()
-    settings.last_error = ""
-    settings.save(update_fields=["last_analysis_at", "last_error"])
-    return {"analyzed": len(snapshots), "created": created, "tokens_used": tokens_used}
+
+def run_company_analysis(company, *, force: bool = False) -> dict:
+    """
+    Run AI analysis for one company. Returns stats dict.
+    """
+    run = prepare_company_run(company, force=force)
+    if isinstance(run, dict):
+        return run
+
+    for chunk in run.chunks:
+        if not run.admit(chunk):
+            break
+        try:
+            leads_payload, tokens_used = _call_openai(run.api_key, run.model, chunk)
+        except Exception as exc:
+            run.error = exc
+            break
+        run.record(leads_payload, tokens_used, chunk)
+    return finish_company_run(run)
+
+
+async def _send_company_chunks(run: CompanyRun, http_client, semaphore: asyncio.Semaphore) -> None:
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(
+        api_key=run.api_key,
+        http_client=http_client,
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    )
+    # One tenant's chunks go out in order so the budget check sees real usage; the
+    # semaphore is what bounds concurrency across tenants.
+    for chunk in run.chunks:
+        if not run.admit(chunk):
+            return
+        try:
+            async with semaphore:
+                leads_payload, tokens_used = await _acall_openai(client, run.model, chunk)
+        except Exception as exc:
+            run.error = exc
+            return
+        run.record(leads_payload, tokens_used, chunk)
+
+
+async def _send_all(runs: list[CompanyRun], *, concurrency: int, http_client) -> None:
+    import httpx
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    if http_client is not None:
+        await asyncio.gather(*(_send_company_chunks(r, http_client, semaphore) for r in runs))
+        return
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max(1, concurrency)),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    ) as pooled:
+        await asyncio.gather(*(_send_company_chunks(r, pooled, semaphore) for r in runs))
+
+
+def run_companies_analysis(
+    companies,
+    *,
+    force: bool = False,
+    concurrency: int | None = None,
+    http_client=None,
+) -> dict:
+    """
+    Scheduled run across many tenants. Returns ``{company_id: stats}``.
+
+    The ORM work (preparing snapshots, storing insights) stays synchronous and runs
+    before and after the network phase; only the OpenAI requests run on the event
+    loop, through one pooled HTTP client, at most ``concurrency`` at a time.
+    ``http_client`` lets tests point the run at a local stub of the API.
+    """
+    if concurrency is None:
+        concurrency = getattr(django_settings, "AI_ANALYSIS_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+
+    results: dict[int, dict] = {}
+    runs: list[CompanyRun] = []
+    for company in companies:
+        run = prepare_company_run(company, force=force)
+        if isinstance(run, dict):
+            results[company.id] = run
+        else:
+            runs.append(run)
+
+    if runs:
+        asyncio.run(_send_all(runs, concurrency=concurrency, http_client=http_client))
+    for run in runs:
+        results[run.company.id] = finish_company_run(run)
+    return results
@@ -0,0 +1,281 @@
+"""
+Shared HTTP client for outbound calls to Meta (Graph API, OAuth, WhatsApp media).
+
+Every call used to go through bare ``requests.get/post``: no Session, so each send
+from an agent console paid a fresh TCP + TLS handshake to graph.facebook.com. This
+module keeps one ``httpx.Client`` per process with keep-alive pooling and HTTP/2, so
+sends reuse a warm connection.
+
+Call sites keep the ``requests`` surface they were written against:
+
+- responses expose ``status_code`` / ``ok`` / ``json()`` / ``text`` / ``content`` /
+  ``raise_for_status()``;
+- failures raise ``requests`` exceptions (``HTTPError`` from raise_for_status,
+  ``Timeout`` / ``ConnectionError`` for transport errors), so existing
+  ``except requests.RequestException`` handlers are unchanged.
+
+Retries are uniform: 429 and 5xx are retried with backoff (honouring Retry-After)
+for idempotent methods. A POST is retried only when Meta could not have acted on it
+(429, or the connection was never established); a message send that hit a 502 may
+still have been delivered, and retrying it would send it twice.
+
+Per-endpoint latency is kept in-process (``latency_snapshot()``) and slow calls are
+logged, with ids collapsed so ``/123/messages`` and ``/456/messages`` share a row.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 30
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 60
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.5
+MAX_RETRY_AFTER_SECONDS = 10
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE", "OPTIONS"})
+
+SLOW_CALL_SECONDS = 2.0
+
+_ID_SEGMENT = re.compile(r"^(?:\d+|act_\d+|wamid\.[\w=-]+|[0-9a-f]{24,})$", re.IGNORECASE)
+
+
+class GraphResponse:
+    """The subset of ``requests.Response`` the Meta call sites use."""
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.reason = response.reason_phrase
+
+    @property
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self, **kwargs) -> Any:
+        return self._response.json(**kwargs)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            kind = "Client" if self.status_code < 500 else "Server"
+            path = urlsplit(self.url).path
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {path}",
+                response=self,
+            )
+
+    def __repr__(self) -> str:
+        return f"<GraphResponse [{self.status_code}]>"
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(1000 * self.total_seconds / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(1000 * self.max_seconds, 1),
+        }
+
+
+_stats: dict[str, EndpointStats] = {}
+_stats_lock = threading.Lock()
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """``"POST graph.facebook.com/{id}/messages"``: host plus path with ids collapsed."""
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    if segments and re.fullmatch(r"v\d+\.\d+", segments[0]):
+        segments = segments[1:]
+    path = "/".join("{id}" if _ID_SEGMENT.match(s) else s for s in segments)
+    return f"{method.upper()} {parts.hostname}/{path}"
+
+
+def _record(key: str, seconds: float, *, failed: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(key, EndpointStats())
+        stats.calls += 1
+        stats.errors += int(failed)
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+    if seconds >= SLOW_CALL_SECONDS:
+        logger.warning("Slow Meta call %s took %.0f ms", key, seconds * 1000)
+
+
+def latency_snapshot() -> dict[str, dict]:
+    """Per-endpoint call counts and latency for this process."""
+    with _stats_lock:
+        return {key: stats.as_dict() for key, stats in sorted(_stats.items())}
+
+
+def reset_latency_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _drop_none(mapping):
+    # requests silently omits None-valued params / form fields; httpx would send them
+    # as empty strings.
+    if isinstance(mapping, dict):
+        return {k: v for k, v in mapping.items() if v is not None}
+    return mapping
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+            except ValueError:
+                pass
+    return BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)) * (1 + random.random() / 2)
+
+
+class GraphClient:
+    def __init__(self, *, transport: Optional[httpx.BaseTransport] = None):
+        self._client = httpx.Client(
+            http2=transport is None,
+            transport=transport,
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            follow_redirects=True,
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params=None,
+        json=None,
+        data=None,
+        files=None,
+        headers=None,
+        timeout=DEFAULT_TIMEOUT_SECONDS,
+    ) -> GraphResponse:
+        method = method.upper()
+        key = endpoint_key(method, url)
+        idempotent = method in IDEMPOTENT_METHODS
+        kwargs = {
+            "params": _drop_none(params),
+            "json": json,
+            "data": _drop_none(data),
+            "files": files,
+            "headers": headers,
+            "timeout": timeout,
+        }
+
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            try:
+                response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as exc:
+                _record(key, time.monotonic() - started, failed=True)
+                # A POST whose connection never opened was never seen by Meta.
+                never_sent = isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt < MAX_ATTEMPTS and (idempotent or never_sent):
+                    time.sleep(_retry_delay(attempt, None))
+                    continue
+                if isinstance(exc, httpx.TimeoutException):
+                    raise requests.exceptions.Timeout(str(exc)) from exc
+                raise requests.exceptions.ConnectionError(str(exc)) from exc
+            except httpx.HTTPError as exc:
+                _record(key, time.monotonic() - started, failed=True)
+                raise requests.exceptions.RequestException(str(exc)) from exc
+
+            status = response.status_code
+            _record(key, time.monotonic() - started, failed=status >= 400)
+            retryable = status in RETRY_STATUSES and (idempotent or status == 429)
+            if retryable and attempt < MAX_ATTEMPTS:
+                logger.info("Meta %s returned %s; retrying (attempt %d)", key, status, attempt + 1)
+                time.sleep(_retry_delay(attempt, response))
+                continue
+            return GraphResponse(response)
+
+    def get(self, url, **kwargs) -> GraphResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs) -> GraphResponse:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs) -> GraphResponse:
+        return self.request("DELETE", url, **kwargs)
+
+
+_client: Optional[GraphClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GraphClient:
+    """The process-wide client; rebuilt after a fork (Gunicorn preload) so workers never share sockets."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = GraphClient()
+                _client_pid = pid
+    return _client
+
+
+def set_client(client: Optional[GraphClient]) -> None:
+    """Swap the process-wide client (tests inject one built on a mock transport)."""
+    global _client, _client_pid
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid() if client is not None else None
+
+
+def get(url, **kwargs) -> GraphResponse:
+    return get_client().get(url, **kwargs)
+
+
+def post(url, **kwargs) -> GraphResponse:
+    return get_client().post(url, **kwargs)
+
+
+def delete(url, **kwargs) -> GraphResponse:
+    return get_client().delete(url, **kwargs)
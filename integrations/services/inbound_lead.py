@@ -7,7 +7,7 @@ import json
 import logging
 from typing import Any
 
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
@@ -195,6 +195,32 @@ def notify_owner_new_lead(company, client) -> None:
         logger.exception("Failed to notify owner of new lead for client_id=%s", client.id)
 
 
+def _new_client(*, company, account, payload: dict[str, Any], source: str, status_id):
+    """Unsaved Client for an inbound *payload* (validated by InboundLeadSerializer)."""
+    from crm.models import Client
+
+    default_name = "Mujeb Lead" if source == "mujeb" else "API Lead"
+    return Client(
+        name=(payload.get("name") or "").strip() or default_name,
+        priority=payload.get("priority") or "medium",
+        type=payload.get("type") or "fresh",
+        company=company,
+        source=source,
+        integration_account=account,
+        external_lead_id=(payload.get("external_id") or "").strip() or None,
+        phone_number=(payload.get("phone") or "").strip() or None,
+        notes=_build_notes(
+            notes=payload.get("notes"),
+            email=payload.get("email"),
+            custom_fields=payload.get("custom_fields"),
+        ),
+        communication_way_id=payload.get("communication_way_id"),
+        status_id=status_id,
+        campaign_id=payload.get("campaign_id"),
+        created_by=None,
+    )
+
+
 def create_inbound_lead(
     *,
     company,
@@ -264,37 +290,17 @@ def create_inbound_lead(
 
     name = (payload.get("name") or "").strip() or default_name
     phone = (payload.get("phone") or "").strip() or None
-    priority = payload.get("priority") or "medium"
-    lead_type = payload.get("type") or "fresh"
-    notes = _build_notes(
-        notes=payload.get("notes"),
-        email=payload.get("email"),
-        custom_fields=payload.get("custom_fields"),
-    )
 
     status_id = payload.get("status_id")
     if not status_id:
         status_id = _default_lead_status_id(company)
 
-    from django.db import transaction
-
     try:
         with transaction.atomic():
-            client = Client.objects.create(
-                name=name,
-                priority=priority,
-                type=lead_type,
-                company=company,
-                source=source,
-                integration_account=account,
-                external_lead_id=external_id,
-                phone_number=phone,
-                notes=notes,
-                communication_way_id=payload.get("communication_way_id"),
-                status_id=status_id,
-                campaign_id=payload.get("campaign_id"),
-                created_by=None,
+            client = _new_client(
+                company=company, account=account, payload=payload, source=source, status_id=status_id,
             )
+            client.save()
             if phone:
                 ClientPhoneNumber.objects.create(
                     client=client,
@@ -369,3 +375,292 @@ def create_inbound_lead(
         },
         True,
     )
+
+
+WELCOME_MESSAGES_TASK_PATH = "integrations.services.inbound_lead.send_lead_created_welcome_messages"
+
+
+def _lead_result(client, *, duplicate: bool) -> dict[str, Any]:
+    return {
+        "client_id": client.id,
+        "patient_file_number": client.patient_file_number,
+        "created_at": client.created_at.isoformat() if client.created_at else None,
+        "duplicate": duplicate,
+    }
+
+
+def send_lead_created_welcome_messages(client_ids: list[int]) -> None:
+    """Cluster task: the welcome SMS / WhatsApp of leads created in one batch."""
+    from integrations.services.lead_created_sms import send_lead_created_welcome_sms_batch
+    from integrations.services.lead_created_whatsapp import (
+        send_lead_created_welcome_whatsapp_batch,
+    )
+
+    send_lead_created_welcome_sms_batch(client_ids)
+    send_lead_created_welcome_whatsapp_batch(client_ids)
+
+
+def _after_inbound_batch_commit(company, clients) -> None:
+    """Owner notifications and welcome messages for a committed batch of new leads."""
+    from crm.models import Campaign
+
+    campaigns = Campaign.objects.in_bulk({c.campaign_id for c in clients if c.campaign_id})
+    for client in clients:
+        if client.campaign_id in campaigns:
+            client.campaign = campaigns[client.campaign_id]
+        notify_owner_new_lead(company, client)
+
+    client_ids = [client.pk for client in clients]
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            WELCOME_MESSAGES_TASK_PATH,
+            client_ids,
+            task_name=f"lead-welcome:{company.pk}:{client_ids[0]}",
+        )
+    except Exception as exc:
+        logger.warning(
+            "Could not enqueue welcome messages for %s leads company_id=%s (%s); sending inline",
+            len(client_ids),
+            company.pk,
+            exc,
+        )
+        send_lead_created_welcome_messages(client_ids)
+
+
+def _bulk_insert_inbound_leads(*, company, account, payloads, source: str) -> list:
+    """
+    Insert new inbound leads with bulk_create (call inside a transaction): one
+    patient-number allocation, one assignment plan and bulk rows for phones, events
+    and integration logs. Does what the Client save signals do for a single lead.
+    """
+    from companies.patient_numbers import (
+        allocate_patient_file_numbers,
+        patient_number_block_size,
+    )
+    from crm.assignment import plan_bulk_auto_assignments
+    from crm.lead_defaults import get_default_lead_status
+    from crm.models import Client, ClientEvent, ClientPhoneNumber
+    from crm.signals import _integration_auto_assign_event_notes, notify_lead_assignment_changes
+    from crm.workload import record_bulk_client_changes
+    from integrations.services.phone_match import canonical_phone_key
+    from settings.models import LeadStatus
+
+    source_label = _SOURCE_LABELS.get(source, "Custom Lead API")
+    log_action = _LOG_ACTIONS.get(source, "api_lead_received")
+
+    default_status = get_default_lead_status(company)
+    statuses = LeadStatus.objects.in_bulk({p["status_id"] for p in payloads if p.get("status_id")})
+    clients = []
+    for payload in payloads:
+        status = statuses.get(payload.get("status_id")) or default_status
+        client = _new_client(
+            company=company,
+            account=account,
+            payload=payload,
+            source=source,
+            status_id=status.pk if status else None,
+        )
+        client.status = status
+        clients.append(client)
+
+    first_number = allocate_patient_file_numbers(
+        company.pk, len(clients), block_size=patient_number_block_size(company)
+    )
+    picks = [None] * len(clients)
+    if company.auto_assign_enabled:
+        picks = plan_bulk_auto_assignments(company, clients)
+    now = timezone.now()
+    for offset, (client, employee) in enumerate(zip(clients, picks)):
+        client.patient_file_number = first_number + offset
+        if employee:
+            client.assigned_to = employee
+            client.assigned_at = now
+
+    Client.objects.bulk_create(clients)
+    ClientPhoneNumber.objects.bulk_create(
+        [
+            ClientPhoneNumber(
+                client=client,
+                company=company,
+                phone_number=client.phone_number,
+                phone_normalized=canonical_phone_key(client.phone_number) or "",
+                phone_type="mobile",
+                is_primary=True,
+            )
+            for client in clients
+            if client.phone_number
+        ]
+    )
+    for client in clients:
+        client._tracked_snapshot = dict.fromkeys(Client.TRACKED_FIELDS)
+    record_bulk_client_changes(clients)
+
+    events = []
+    logs = []
+    assignments = []
+    for client, payload, employee in zip(clients, payloads, picks):
+        event_notes = f"Lead from {source_label}"
+        if payload.get("email"):
+            event_notes += f". Email: {payload['email']}"
+        events.append(
+            ClientEvent(client=client, event_type="created", new_value=source_label, notes=event_notes)
+        )
+        if employee:
+            events.append(
+                ClientEvent(
+                    client=client,
+                    event_type="assignment",
+                    old_value="Unassigned",
+                    new_value=employee.get_full_name() or employee.username,
+                    notes=_integration_auto_assign_event_notes(client),
+                )
+            )
+            assignments.append((client, None, employee))
+        logs.append(
+            IntegrationLog(
+                account=account,
+                action=log_action,
+                status="success",
+                message=f"Lead created: {client.name}",
+                response_data={
+                    "client_id": client.id,
+                    "external_id": client.external_lead_id,
+                    "name": client.name,
+                    "phone": client.phone_number,
+                },
+            )
+        )
+    ClientEvent.objects.bulk_create(events)
+    IntegrationLog.objects.bulk_create(logs)
+    notify_lead_assignment_changes(assignments)
+    transaction.on_commit(lambda: _after_inbound_batch_commit(company, clients))
+    return clients
+
+
+def create_inbound_leads_batch(
+    *,
+    company,
+    account: IntegrationAccount,
+    payloads: list[dict[str, Any]],
+    source: str = "api",
+    platform_gate: str = LEAD_API_PLATFORM,
+) -> list[dict]:
+    """
+    Batch form of create_inbound_lead for validated *payloads*: one result per payload,
+    in order, with the single-lead response keys.
+
+    Identity checks cost one query for the external ids and one batched phone lookup
+    (find_clients_by_phones); a repeat inside the batch resolves to its first
+    occurrence as a duplicate. The gate and plan quota are checked once and raise the
+    same errors as create_inbound_lead. New leads go in with one bulk insert; if a
+    concurrent request took one of their external ids or phones meanwhile, the batch
+    falls back to create_inbound_lead per lead, which reports those as duplicates.
+    """
+    from crm.models import Client
+    from integrations.services.phone_match import (
+        canonical_phone_key,
+        find_clients_by_phones,
+        phone_match_keys,
+    )
+    from subscriptions.entitlements import require_quota
+
+    identities = [
+        (
+            (payload.get("external_id") or "").strip() or None,
+            (payload.get("phone") or "").strip() or None,
+        )
+        for payload in payloads
+    ]
+    external_ids = {external_id for external_id, _ in identities if external_id}
+    existing_by_external_id = {}
+    if external_ids:
+        existing_by_external_id = {
+            client.external_lead_id: client
+            for client in Client.objects.filter(company=company, external_lead_id__in=external_ids)
+        }
+    existing_by_phone = find_clients_by_phones(
+        company,
+        [
+            phone
+            for external_id, phone in identities
+            if phone and external_id not in existing_by_external_id
+        ],
+    )
+
+    results: list[dict | None] = [None] * len(payloads)
+    new: list[tuple[int, dict]] = []
+    repeats: list[tuple[int, int]] = []
+    first_by_external_id: dict[str, int] = {}
+    first_by_phone_key: dict[str, int] = {}
+    for index, (payload, (external_id, phone)) in enumerate(zip(payloads, identities)):
+        existing = existing_by_external_id.get(external_id) if external_id else None
+        if existing is None and phone:
+            existing = existing_by_phone.get(phone)
+        if existing is not None:
+            results[index] = _lead_result(existing, duplicate=True)
+            continue
+
+        keys = phone_match_keys(phone) if phone and canonical_phone_key(phone) else set()
+        earlier = first_by_external_id.get(external_id) if external_id else None
+        if earlier is None:
+            earlier = next((first_by_phone_key[key] for key in keys if key in first_by_phone_key), None)
+        if earlier is not None:
+            repeats.append((index, earlier))
+            continue
+        if external_id:
+            first_by_external_id[external_id] = index
+        for key in keys:
+            first_by_phone_key.setdefault(key, index)
+        new.append((index, payload))
+
+    if new:
+        source_label = _SOURCE_LABELS.get(source, "Custom Lead API")
+        gate = integration_gate(company, platform_gate)
+        if not gate["enabled"]:
+            raise DRFValidationError(
+                detail={
+                    "code": "integration_disabled",
+                    "message": gate.get("message") or f"{source_label} is disabled for this company.",
+                },
+                code=403,
+            )
+        require_quota(
+            company,
+            "max_clients",
+            current_count=Client.objects.filter(company=company).count(),
+            requested_delta=len(new),
+            message="Lead limit reached for this company plan.",
+            error_key="plan_quota_max_clients_exceeded",
+        )
+
+        try:
+            with transaction.atomic():
+                clients = _bulk_insert_inbound_leads(
+                    company=company,
+                    account=account,
+                    payloads=[payload for _, payload in new],
+                    source=source,
+                )
+        except IntegrityError:
+            logger.info(
+                "Inbound lead batch conflicted with a concurrent insert company_id=%s; "
+                "creating one by one",
+                company.id,
+            )
+            for index, payload in new:
+                results[index], _ = create_inbound_lead(
+                    company=company,
+                    account=account,
+                    payload=payload,
+                    source=source,
+                    platform_gate=platform_gate,
+                )
+        else:
+            for (index, _), client in zip(new, clients):
+                results[index] = _lead_result(client, duplicate=False)
+
+    for index, earlier in repeats:
+        results[index] = {**results[earlier], "duplicate": True}
+    return results
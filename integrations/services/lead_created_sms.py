@@ -5,6 +5,7 @@ Runs after transaction commit so ClientPhoneNumber rows exist.
 from __future__ import annotations
 
 import logging
+from collections import defaultdict
 
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
@@ -15,7 +16,8 @@ from integrations.policy import is_integration_allowed
 from integrations.services.company_sms import send_company_sms
 from integrations.services.message_placeholders import (
     build_message_placeholder_values,
-    render_message_placeholders,
+    render_message_placeholders_for_client,
+    render_message_placeholders_for_clients,
 )
 from subscriptions.entitlements import increment_monthly_usage, require_monthly_usage
 
@@ -28,8 +30,7 @@ def build_lead_sms_placeholder_values(client: Client) -> dict[str, str]:
 
 
 def render_lead_created_sms_template(template: str, client: Client) -> str:
-    values = build_lead_sms_placeholder_values(client)
-    return render_message_placeholders(template or "", values)
+    return render_message_placeholders_for_client(template or "", client)
 
 
 def resolve_client_sms_phone(client: Client) -> str | None:
@@ -58,47 +59,94 @@ def send_lead_created_welcome_sms(client_id: int) -> None:
         logger.exception("send_lead_created_welcome_sms failed for client_id=%s", client_id)
 
 
-def _send_lead_created_welcome_sms_impl(client_id: int) -> None:
-    client = (
-        Client.objects.select_related(
-            "company",
-            "status",
-            "communication_way",
-            "assigned_to",
-        )
-        .filter(pk=client_id)
-        .first()
+def send_lead_created_welcome_sms_batch(client_ids: list[int]) -> None:
+    """
+    Welcome SMS for a batch of new leads: settings and plan gates are read once per
+    company and the template is rendered for all of its leads in one query.
+    Swallows errors per lead, like send_lead_created_welcome_sms.
+    """
+    clients = Client.objects.select_related("company").filter(
+        pk__in=list(client_ids), company__isnull=False
     )
-    if not client or not client.company_id:
-        return
-
-    company = client.company
+    by_company: dict[int, list[Client]] = defaultdict(list)
+    for client in clients:
+        by_company[client.company_id].append(client)
+
+    for company_clients in by_company.values():
+        company = company_clients[0].company
+        try:
+            gate = _welcome_sms_settings(company)
+            if gate is None:
+                continue
+            twilio_settings, template = gate
+            bodies = render_message_placeholders_for_clients(template, company_clients)
+        except Exception:
+            logger.exception("lead_created_sms: batch setup failed for company_id=%s", company.pk)
+            continue
+        for client in company_clients:
+            if client.pk not in bodies:
+                continue
+            try:
+                _send_welcome_sms(twilio_settings, client, bodies[client.pk])
+            except Exception:
+                logger.exception("send_lead_created_welcome_sms failed for client_id=%s", client.pk)
+
+
+def _welcome_sms_settings(company) -> tuple[TwilioSettings, str] | None:
+    """(settings, template) when *company* sends welcome SMS at all; None otherwise."""
     try:
         twilio_settings = TwilioSettings.objects.get(company=company)
     except TwilioSettings.DoesNotExist:
-        return
+        return None
 
     if not twilio_settings.lead_created_sms_enabled:
-        return
+        return None
 
     template = (twilio_settings.lead_created_sms_template or "").strip()
     if not template:
-        logger.info("lead_created_sms: empty template, skip client_id=%s", client_id)
-        return
+        logger.info("lead_created_sms: empty template, skip company_id=%s", company.pk)
+        return None
 
     if not twilio_settings.is_enabled:
-        logger.info("lead_created_sms: Twilio integration disabled, skip client_id=%s", client_id)
-        return
+        logger.info("lead_created_sms: Twilio integration disabled, skip company_id=%s", company.pk)
+        return None
 
     sms_platform = twilio_settings.provider or SmsProvider.TWILIO
     if not _sms_integration_allowed(company, sms_platform):
         logger.info(
-            "lead_created_sms: integration/plan gate blocked provider=%s, skip client_id=%s",
+            "lead_created_sms: integration/plan gate blocked provider=%s, skip company_id=%s",
             sms_platform,
-            client_id,
+            company.pk,
         )
+        return None
+    return twilio_settings, template
+
+
+def _send_lead_created_welcome_sms_impl(client_id: int) -> None:
+    client = (
+        Client.objects.select_related(
+            "company",
+            "status",
+            "communication_way",
+            "assigned_to",
+        )
+        .filter(pk=client_id)
+        .first()
+    )
+    if not client or not client.company_id:
         return
 
+    gate = _welcome_sms_settings(client.company)
+    if gate is None:
+        return
+    twilio_settings, template = gate
+    _send_welcome_sms(twilio_settings, client, render_lead_created_sms_template(template, client))
+
+
+def _send_welcome_sms(twilio_settings: TwilioSettings, client: Client, body: str) -> None:
+    """Quota, phone, send and log for one lead whose welcome text is already rendered."""
+    company = client.company
+    client_id = client.pk
     try:
         require_monthly_usage(
             company,
@@ -116,7 +164,6 @@ def _send_lead_created_welcome_sms_impl(client_id: int) -> None:
         logger.info("lead_created_sms: no phone for client_id=%s", client_id)
         return
 
-    body = render_lead_created_sms_template(template, client)
     if not (body or "").strip():
         return
 
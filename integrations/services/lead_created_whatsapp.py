@@ -5,15 +5,17 @@ Runs after transaction commit so ClientPhoneNumber rows exist.
 from __future__ import annotations
 
 import logging
+from collections import defaultdict
 
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 
 from crm.models import Client
-from integrations.models import MessageSendSource, TwilioSettings
+from integrations.models import MessageSendSource, MessageTemplate, TwilioSettings
 from integrations.policy import is_integration_allowed
 from integrations.services.lead_created_sms import resolve_client_sms_phone
 from integrations.services.whatsapp_template_send import send_approved_whatsapp_template
+from integrations.views.templates_whatsapp import build_whatsapp_template_components_for_clients
 from subscriptions.entitlements import increment_monthly_usage, require_monthly_usage
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,68 @@ def send_lead_created_welcome_whatsapp(client_id: int) -> None:
         logger.exception("send_lead_created_welcome_whatsapp failed for client_id=%s", client_id)
 
 
+def send_lead_created_welcome_whatsapp_batch(client_ids: list[int]) -> None:
+    """
+    Welcome WhatsApp for a batch of new leads: settings and plan gates are read once
+    per company and the template components are built for all of its leads in one query.
+    Swallows errors per lead, like send_lead_created_welcome_whatsapp.
+    """
+    clients = Client.objects.select_related("company").filter(
+        pk__in=list(client_ids), company__isnull=False
+    )
+    by_company: dict[int, list[Client]] = defaultdict(list)
+    for client in clients:
+        by_company[client.company_id].append(client)
+
+    for company_clients in by_company.values():
+        company = company_clients[0].company
+        try:
+            template = _welcome_whatsapp_template(company)
+            if template is None:
+                continue
+            components = build_whatsapp_template_components_for_clients(template, company_clients)
+        except Exception:
+            logger.exception(
+                "lead_created_whatsapp: batch setup failed for company_id=%s", company.pk
+            )
+            continue
+        for client in company_clients:
+            if client.pk not in components:
+                continue
+            try:
+                _send_welcome_whatsapp(template, client, components=components[client.pk])
+            except Exception:
+                logger.exception(
+                    "send_lead_created_welcome_whatsapp failed for client_id=%s", client.pk
+                )
+
+
+def _welcome_whatsapp_template(company) -> MessageTemplate | None:
+    """The welcome template when *company* sends welcome WhatsApp at all; None otherwise."""
+    try:
+        settings = TwilioSettings.objects.select_related("lead_created_whatsapp_template").get(
+            company=company
+        )
+    except TwilioSettings.DoesNotExist:
+        return None
+
+    if not settings.lead_created_whatsapp_enabled:
+        return None
+
+    template = settings.lead_created_whatsapp_template
+    if template is None:
+        logger.info("lead_created_whatsapp: no template, skip company_id=%s", company.pk)
+        return None
+
+    if not is_integration_allowed(company, "whatsapp"):
+        logger.info(
+            "lead_created_whatsapp: integration/plan gate blocked, skip company_id=%s",
+            company.pk,
+        )
+        return None
+    return template
+
+
 def _send_lead_created_welcome_whatsapp_impl(client_id: int) -> None:
     client = (
         Client.objects.select_related(
@@ -44,29 +108,16 @@ def _send_lead_created_welcome_whatsapp_impl(client_id: int) -> None:
     if not client or not client.company_id:
         return
 
-    company = client.company
-    try:
-        settings = TwilioSettings.objects.select_related("lead_created_whatsapp_template").get(
-            company=company
-        )
-    except TwilioSettings.DoesNotExist:
-        return
-
-    if not settings.lead_created_whatsapp_enabled:
-        return
-
-    template = settings.lead_created_whatsapp_template
+    template = _welcome_whatsapp_template(client.company)
     if template is None:
-        logger.info("lead_created_whatsapp: no template, skip client_id=%s", client_id)
         return
+    _send_welcome_whatsapp(template, client)
 
-    if not is_integration_allowed(company, "whatsapp"):
-        logger.info(
-            "lead_created_whatsapp: integration/plan gate blocked, skip client_id=%s",
-            client_id,
-        )
-        return
 
+def _send_welcome_whatsapp(template: MessageTemplate, client: Client, components=None) -> None:
+    """Quota, phone and send for one lead; *components* when already built for a batch."""
+    company = client.company
+    client_id = client.pk
     try:
         require_monthly_usage(
             company,
@@ -95,6 +146,7 @@ def _send_lead_created_welcome_whatsapp_impl(client_id: int) -> None:
         send_source=MessageSendSource.AUTO_WELCOME,
         created_by=None,
         persist_message=True,
+        components=components,
     )
     if not ok:
         logger.warning(
@@ -6,6 +6,11 @@ Supports both bracket and curly forms, e.g.:
   [Phone] / { رقم الهاتف }
 
 Meta Cloud API still receives positional {{1}}, {{2}} after conversion at submit/send time.
+
+Values are built per placeholder, so a text only pays for the placeholders it uses: the
+stage, visit type and fallback phone each cost a query per client. To render one text
+for many clients, ``render_message_placeholders_for_clients`` loads just the columns
+those placeholders read, with the three lookups as subqueries, in a single query.
 """
 from __future__ import annotations
 
@@ -13,9 +18,11 @@ import logging
 import re
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Callable, Optional
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional
 from zoneinfo import ZoneInfo
 
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone as dj_timezone
 
 logger = logging.getLogger(__name__)
@@ -62,10 +69,18 @@ def _client_customer_name(client) -> str:
     return name
 
 
+# Set by load_placeholder_clients; without them each lookup is a query per client.
+PHONE_ANNOTATION = "_placeholder_phone"
+STAGE_ANNOTATION = "_placeholder_stage"
+VISIT_TYPE_ANNOTATION = "_placeholder_visit_type"
+
+
 def _resolve_phone(client) -> str:
     raw = (getattr(client, "phone_number", None) or "").strip()
     if raw:
         return raw
+    if hasattr(client, PHONE_ANNOTATION):
+        return (getattr(client, PHONE_ANNOTATION) or "").strip()
     try:
         from crm.models import ClientPhoneNumber
 
@@ -103,6 +118,8 @@ def _channel_name(client) -> str:
 
 
 def _latest_task_stage(client) -> str:
+    if hasattr(client, STAGE_ANNOTATION):
+        return (getattr(client, STAGE_ANNOTATION) or "").strip()
     try:
         task = client.client_tasks.select_related("stage").order_by("-created_at").first()
         if task and task.stage_id:
@@ -113,6 +130,8 @@ def _latest_task_stage(client) -> str:
 
 
 def _latest_visit_type(client) -> str:
+    if hasattr(client, VISIT_TYPE_ANNOTATION):
+        return (getattr(client, VISIT_TYPE_ANNOTATION) or "").strip()
     try:
         visit = client.client_visits.select_related("visit_type").order_by("-created_at").first()
         if visit and visit.visit_type_id:
@@ -264,47 +283,91 @@ def _alias_to_canonical() -> dict[str, str]:
 ALIAS_TO_CANONICAL = _alias_to_canonical()
 
 
+def _text_attr(attr: str) -> Callable[..., str]:
+    def value(client, employee, now) -> str:
+        return (getattr(client, attr, None) or "").strip()
+
+    return value
+
+
+def _first_name_value(client, employee, now) -> str:
+    name = _client_customer_name(client)
+    return _first_name(name) or name
+
+
+def _company_name_value(client, employee, now) -> str:
+    return _tenant_company_name(client) or (getattr(client, "lead_company_name", None) or "").strip()
+
+
+def _employee_name_value(client, employee, now) -> str:
+    return _user_display_name(employee if employee is not None else getattr(client, "assigned_to", None))
+
+
+def _source_value(client, employee, now) -> str:
+    return (getattr(client, "source", None) or "").strip() or _channel_name(client)
+
+
+# Value key -> builder(client, employee, local_now). Keys are the canonical ids plus
+# the backward-compatible snake keys used by welcome SMS (name, company, source, budget).
+_VALUE_BUILDERS: dict[str, Callable[..., str]] = {
+    "customer_name": lambda client, employee, now: _client_customer_name(client),
+    "first_name": _first_name_value,
+    "phone": lambda client, employee, now: _resolve_phone(client),
+    "employee_name": _employee_name_value,
+    "company_name": _company_name_value,
+    "current_date": lambda client, employee, now: now.strftime("%Y-%m-%d"),
+    "current_time": lambda client, employee, now: now.strftime("%H:%M"),
+    "status": lambda client, employee, now: _status_name(client),
+    "stage": lambda client, employee, now: _latest_task_stage(client),
+    "channel": lambda client, employee, now: _channel_name(client),
+    "visit_type": lambda client, employee, now: _latest_visit_type(client),
+    "profession": _text_attr("profession"),
+    "lead_company_name": _text_attr("lead_company_name"),
+    "amount": lambda client, employee, now: _budget_str(client),
+    "invoice_number": _text_attr("invoice_number"),
+    "priority": _text_attr("priority"),
+    "type": _text_attr("type"),
+    "name": lambda client, employee, now: _client_customer_name(client),
+    "company": _company_name_value,
+    "source": _source_value,
+    "budget": lambda client, employee, now: _budget_str(client),
+}
+
+PLACEHOLDER_VALUE_KEYS = frozenset(_VALUE_BUILDERS)
+_CLOCK_KEYS = frozenset({"current_date", "current_time"})
+
+
 def build_message_placeholder_values(
     client,
     *,
     employee=None,
     now: Optional[datetime] = None,
+    keys: Optional[Iterable[str]] = None,
 ) -> dict[str, str]:
     """
     Canonical placeholder values for a lead/client.
     employee: optional override (defaults to client.assigned_to).
+    keys: only build these value keys (see text_placeholder_keys); all by default.
     """
-    name = _client_customer_name(client)
-    company_name = _tenant_company_name(client) or (
-        getattr(client, "lead_company_name", None) or ""
-    ).strip()
-    local_now = _company_now(client, now)
-    assignee = employee if employee is not None else getattr(client, "assigned_to", None)
-
-    return {
-        "customer_name": name,
-        "first_name": _first_name(name) or name,
-        "phone": _resolve_phone(client),
-        "employee_name": _user_display_name(assignee),
-        "company_name": company_name,
-        "current_date": local_now.strftime("%Y-%m-%d"),
-        "current_time": local_now.strftime("%H:%M"),
-        "status": _status_name(client),
-        "stage": _latest_task_stage(client),
-        "channel": _channel_name(client),
-        "visit_type": _latest_visit_type(client),
-        "profession": (getattr(client, "profession", None) or "").strip(),
-        "lead_company_name": (getattr(client, "lead_company_name", None) or "").strip(),
-        "amount": _budget_str(client),
-        "invoice_number": (getattr(client, "invoice_number", None) or "").strip(),
-        "priority": (getattr(client, "priority", None) or "").strip(),
-        "type": (getattr(client, "type", None) or "").strip(),
-        # Backward-compatible snake keys used by welcome SMS
-        "name": name,
-        "company": company_name,
-        "source": (getattr(client, "source", None) or "").strip() or _channel_name(client),
-        "budget": _budget_str(client),
-    }
+    wanted = PLACEHOLDER_VALUE_KEYS if keys is None else PLACEHOLDER_VALUE_KEYS.intersection(keys)
+    local_now = _company_now(client, now) if wanted & _CLOCK_KEYS else None
+    return {key: _VALUE_BUILDERS[key](client, employee, local_now) for key in wanted}
+
+
+def placeholder_value_key(raw_key: str) -> Optional[str]:
+    """Value key an [alias] / { alias } token reads, or None when it is not a placeholder."""
+    key = _norm_key(raw_key)
+    if key in _VALUE_BUILDERS:
+        return key
+    canonical = ALIAS_TO_CANONICAL.get(key)
+    return canonical if canonical in _VALUE_BUILDERS else None
+
+
+@lru_cache(maxsize=512)
+def text_placeholder_keys(text: str) -> frozenset[str]:
+    """Value keys the placeholders of *text* need; parsed once per distinct text."""
+    raw_keys = _BRACKET_RE.findall(text or "") + _CURLY_RE.findall(text or "")
+    return frozenset(key for key in map(placeholder_value_key, raw_keys) if key)
 
 
 def lookup_placeholder_value(values: dict[str, str], raw_key: str) -> Optional[str]:
@@ -349,10 +412,101 @@ def render_message_placeholders_for_client(
     employee=None,
     now: Optional[datetime] = None,
 ) -> str:
-    values = build_message_placeholder_values(client, employee=employee, now=now)
+    values = build_message_placeholder_values(
+        client, employee=employee, now=now, keys=text_placeholder_keys(text or "")
+    )
     return render_message_placeholders(text, values)
 
 
+# Client columns each value key reads (FKs are joined); stage, visit type and the
+# fallback phone are subquery annotations instead.
+_VALUE_KEY_FIELDS: dict[str, tuple[str, ...]] = {
+    "customer_name": ("name",),
+    "first_name": ("name",),
+    "name": ("name",),
+    "phone": ("phone_number",),
+    "employee_name": ("assigned_to",),
+    "company_name": ("lead_company_name",),
+    "company": ("lead_company_name",),
+    "status": ("status",),
+    "channel": ("communication_way", "source"),
+    "source": ("communication_way", "source"),
+    "profession": ("profession",),
+    "lead_company_name": ("lead_company_name",),
+    "amount": ("budget", "budget_max"),
+    "budget": ("budget", "budget_max"),
+    "priority": ("priority",),
+    "type": ("type",),
+}
+_JOINED_FIELDS = ("assigned_to", "status", "communication_way")
+
+
+def load_placeholder_clients(client_ids: Iterable[int], keys: Iterable[str]) -> dict:
+    """
+    Clients by id with what the given value keys need, in one query. The company is
+    always joined: it names the tenant and sets the clock for date/time placeholders.
+    """
+    from crm.models import Client, ClientPhoneNumber, ClientTask, ClientVisit
+
+    keys = set(keys)
+    fields = {"company"}
+    for key in keys:
+        fields.update(_VALUE_KEY_FIELDS.get(key, ()))
+    queryset = (
+        Client.objects.filter(pk__in=list(client_ids))
+        .select_related("company", *(f for f in _JOINED_FIELDS if f in fields))
+        .only(*fields)
+    )
+    annotations = {}
+    if "phone" in keys:
+        annotations[PHONE_ANNOTATION] = Subquery(
+            ClientPhoneNumber.objects.filter(client=OuterRef("pk"))
+            .order_by("-is_primary", "id")
+            .values("phone_number")[:1]
+        )
+    if "stage" in keys:
+        annotations[STAGE_ANNOTATION] = Subquery(
+            ClientTask.objects.filter(client=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("stage__name")[:1]
+        )
+    if "visit_type" in keys:
+        annotations[VISIT_TYPE_ANNOTATION] = Subquery(
+            ClientVisit.objects.filter(client=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("visit_type__name")[:1]
+        )
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return {client.pk: client for client in queryset}
+
+
+def render_message_placeholders_for_clients(
+    text: str,
+    clients: Iterable[Any],
+    *,
+    employee=None,
+    now: Optional[datetime] = None,
+) -> dict[int, str]:
+    """
+    Render one text for many clients (Client rows or ids) -> {client_id: text}.
+
+    The clients are re-read through load_placeholder_clients, so callers can pass bare
+    ids; ids that no longer exist are left out.
+    """
+    keys = text_placeholder_keys(text or "")
+    client_ids = [getattr(client, "pk", client) for client in clients]
+    loaded = load_placeholder_clients(client_ids, keys)
+    rendered = {}
+    for client_id in client_ids:
+        client = loaded.get(client_id)
+        if client is None:
+            continue
+        values = build_message_placeholder_values(client, employee=employee, now=now, keys=keys)
+        rendered[client_id] = render_message_placeholders(text, values)
+    return rendered
+
+
 # --- Meta conversion helpers (named tokens → {{n}} in appearance order) ---
 
 Getter = Callable[[Any], str]
@@ -360,7 +514,7 @@ Getter = Callable[[Any], str]
 
 def _getter_for_canonical(canonical: str) -> Getter:
     def getter(client) -> str:
-        values = build_message_placeholder_values(client)
+        values = build_message_placeholder_values(client, keys=(canonical,))
         return (values.get(canonical) or "").strip()
 
     return getter
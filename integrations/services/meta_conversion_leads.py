@@ -1,18 +1,72 @@
 """
 Meta Conversion Leads (CAPI) — send CRM funnel stage events back to Meta for Lead Ads optimization.
+
+Qualification events are sent inline, one Graph call per lead, unless
+``META_CONVERSION_QUEUE_ENABLED`` is on. Then a qualification change only stores a
+``MetaConversionEvent`` and a cluster task flushes the pixel's queue:
+
+- up to ``META_CONVERSION_BATCH_SIZE`` events per Conversions API request, with the
+  page access token resolved once per flush rather than once per lead;
+- a request that fails on throttling, a 5xx or the network is retried in place after
+  ``SEND_RETRY_DELAYS``; if it still fails the batch goes back to the queue with an
+  exponential ``RETRY_BACKOFF``, and after ``MAX_SEND_ATTEMPTS`` it is marked FAILED;
+- Meta rejects a whole request when one event in it is invalid, so a batch refused
+  with any other 4xx is bisected: the valid events are sent and only the invalid
+  ones go back to the queue (within ``MAX_SPLIT_REQUESTS`` per batch);
+- ``meta_qualification_sent_at`` / ``meta_qualification_error`` are written with one
+  UPDATE per batch;
+- a newer qualification change of the same lead replaces its pending event, and the
+  ``flush_meta_conversion_events`` sweep sends retries and queues a lost task left.
+
+Raw Lead events from the lead webhook are still sent inline.
 """
 from __future__ import annotations
 
 import logging
-from typing import Any
-
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Iterable
+
+import requests
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from integrations.models import IntegrationAccount, IntegrationLog
+from integrations.models import (
+    IntegrationAccount,
+    IntegrationLog,
+    MetaConversionEvent,
+    MetaConversionEventStatus,
+)
 from integrations.oauth_utils import MetaOAuth
 
 logger = logging.getLogger(__name__)
 
+FLUSH_TASK_PATH = "integrations.services.meta_conversion_leads.flush_pixel_queue"
+
+# Conversions API limit on events per request.
+MAX_BATCH_SIZE = 1000
+MAX_SEND_ATTEMPTS = 5
+# Waits before re-sending a batch within one flush after a transient failure.
+SEND_RETRY_DELAYS = (1, 4)
+# A batch that still fails waits RETRY_BACKOFF * 2 ** (attempts - 1) for the sweep.
+# Requests one rejected batch may spend on bisecting: a single bad event needs about
+# 2 * log2(batch) of them, while a rejection of every event (bad pixel/token setup)
+# would need 2 * batch without the cap.
+MAX_SPLIT_REQUESTS = 40
+# Graph error codes for rate limiting and for token/permission problems: the request
+# was refused as a whole, so splitting it would not help.
+_GRAPH_THROTTLE_CODES = frozenset({4, 17, 32, 613, 80004})
+_GRAPH_AUTH_CODES = frozenset({10, 102, 190})
+RETRY_BACKOFF = timedelta(minutes=1)
+# Long enough for one batch request and its in-place retries. A worker that dies
+# holding a batch delays it by at most this long.
+CLAIM_DURATION = timedelta(minutes=2)
+# The sweep leaves fresh events to the task that was queued for them.
+SWEEP_GRACE = timedelta(minutes=1)
+
 LEAD_EVENT_SOURCE = "LOOP CRM"
 EVENT_RAW_LEAD = "Raw Lead"
 EVENT_QUALIFIED = "Qualified"
@@ -77,6 +131,10 @@ def _resolve_access_token_for_client(client) -> str | None:
     account = client.integration_account
     if account is None:
         return None
+    return _resolve_account_access_token(account)
+
+
+def _resolve_account_access_token(account: IntegrationAccount) -> str | None:
     metadata = _account_metadata(account)
     page_id = str(metadata.get("selected_page_id") or "").strip()
     if page_id:
@@ -110,6 +168,31 @@ def build_conversion_lead_event(
     }
 
 
+def _event_precondition_error(client) -> str | None:
+    """Error key when the client cannot have Conversion Leads events at all."""
+    if client.source != "meta_lead_form":
+        return "metaQualificationErrorNotMetaLead"
+    if not client.meta_leadgen_id:
+        return "metaQualificationErrorNoLeadgenId"
+    account = client.integration_account
+    if account is None:
+        return "metaQualificationErrorNoAccount"
+    if not conversion_leads_enabled(account):
+        return "metaQualificationErrorNoPixelConfigured"
+    return None
+
+
+def _resolve_event_time(client, event_time: int | None) -> int:
+    if event_time is not None:
+        return int(event_time)
+    resolved_time = int(timezone.now().timestamp())
+    if client.created_at:
+        created_ts = int(client.created_at.timestamp())
+        if created_ts >= resolved_time:
+            resolved_time = created_ts + 1
+    return resolved_time
+
+
 def send_conversion_lead_event(
     client, event_name: str, event_time: int | None = None
 ) -> dict[str, Any]:
@@ -117,35 +200,21 @@ def send_conversion_lead_event(
     Send a single Conversion Leads stage event to Meta for a Client.
     Returns dict with keys: success, error_key (optional), message (optional), response (optional).
     """
-    if client.source != "meta_lead_form":
-        return {"success": False, "error_key": "metaQualificationErrorNotMetaLead"}
-    if not client.meta_leadgen_id:
-        return {"success": False, "error_key": "metaQualificationErrorNoLeadgenId"}
+    error_key = _event_precondition_error(client)
+    if error_key:
+        return {"success": False, "error_key": error_key}
     account = client.integration_account
-    if account is None:
-        return {"success": False, "error_key": "metaQualificationErrorNoAccount"}
-    if not conversion_leads_enabled(account):
-        return {"success": False, "error_key": "metaQualificationErrorNoPixelConfigured"}
 
     pixel_id = get_pixel_id(account)
     access_token = _resolve_access_token_for_client(client)
     if not pixel_id or not access_token:
         return {"success": False, "error_key": "metaQualificationErrorNoToken"}
 
-    if event_time is not None:
-        resolved_time = int(event_time)
-    else:
-        resolved_time = int(timezone.now().timestamp())
-        if client.created_at:
-            created_ts = int(client.created_at.timestamp())
-            if created_ts >= resolved_time:
-                resolved_time = created_ts + 1
-
     payload_event = build_conversion_lead_event(
         client_id=client.id,
         event_name=event_name,
         leadgen_id=client.meta_leadgen_id,
-        event_time=resolved_time,
+        event_time=_resolve_event_time(client, event_time),
     )
 
     meta_oauth = MetaOAuth()
@@ -213,11 +282,24 @@ def apply_qualification_status_change(client, new_status: str | None, previous_s
     if new_status == previous_status:
         return
     if new_status not in ("qualified", "unqualified"):
+        cancel_queued_events([client.id])
         client.meta_qualification_sent_at = None
         client.meta_qualification_error = None
         client.save(update_fields=["meta_qualification_sent_at", "meta_qualification_error"])
         return
 
+    if conversion_queue_enabled():
+        result = queue_qualification_events([(client, new_status)])[client.id]
+        if result.get("success"):
+            # Pending until the pixel's batch is accepted.
+            client.meta_qualification_sent_at = None
+            client.meta_qualification_error = None
+            client.save(update_fields=["meta_qualification_sent_at", "meta_qualification_error"])
+        else:
+            client.meta_qualification_error = _qualification_error_storage(result)
+            client.save(update_fields=["meta_qualification_error"])
+        return
+
     result = send_qualification_event(client, new_status)
     if result.get("success"):
         client.meta_qualification_sent_at = timezone.now()
@@ -226,3 +308,348 @@ def apply_qualification_status_change(client, new_status: str | None, previous_s
     else:
         client.meta_qualification_error = _qualification_error_storage(result)
         client.save(update_fields=["meta_qualification_error"])
+
+
+# ---------------------------------------------------------------------------
+# Batched qualification events (META_CONVERSION_QUEUE_ENABLED)
+# ---------------------------------------------------------------------------
+
+
+def conversion_queue_enabled() -> bool:
+    return bool(getattr(django_settings, "META_CONVERSION_QUEUE_ENABLED", False))
+
+
+def _batch_size() -> int:
+    size = int(getattr(django_settings, "META_CONVERSION_BATCH_SIZE", MAX_BATCH_SIZE) or MAX_BATCH_SIZE)
+    return max(1, min(size, MAX_BATCH_SIZE))
+
+
+def cancel_queued_events(client_ids: Iterable[int]) -> int:
+    """Drop pending events of these clients (their qualification changed again)."""
+    client_ids = list(client_ids)
+    if not client_ids:
+        return 0
+    deleted, _ = MetaConversionEvent.objects.filter(
+        client_id__in=client_ids, status=MetaConversionEventStatus.PENDING
+    ).delete()
+    return deleted
+
+
+def queue_qualification_events(changes: Iterable[tuple[Any, str]]) -> dict[int, dict[str, Any]]:
+    """
+    Queue one qualification event per (client, status) and schedule a flush of each
+    pixel involved on commit. Returns a send_qualification_event-style result per
+    client id; clients that cannot have events get their error key without queueing.
+    """
+    latest = {client.id: (client, status) for client, status in changes}
+    results: dict[int, dict[str, Any]] = {}
+    rows = []
+    now = timezone.now()
+    for client_id, (client, status) in latest.items():
+        event_name = QUALIFICATION_EVENT_NAMES.get(status)
+        error_key = (
+            "metaQualificationErrorUnknownStatus" if not event_name
+            else _event_precondition_error(client)
+        )
+        if error_key:
+            results[client_id] = {"success": False, "error_key": error_key}
+            continue
+        rows.append(
+            MetaConversionEvent(
+                company_id=client.company_id,
+                account_id=client.integration_account_id,
+                client_id=client_id,
+                pixel_id=get_pixel_id(client.integration_account),
+                event_name=event_name,
+                event_time=_resolve_event_time(client, None),
+                leadgen_id=client.meta_leadgen_id,
+                next_attempt_at=now,
+            )
+        )
+        results[client_id] = {"success": True, "queued": True}
+
+    if rows:
+        cancel_queued_events(row.client_id for row in rows)
+        MetaConversionEvent.objects.bulk_create(rows)
+        pixels = sorted({(row.account_id, row.pixel_id) for row in rows})
+        transaction.on_commit(lambda: _schedule_flushes(pixels))
+    return results
+
+
+def _schedule_flushes(pixels) -> None:
+    for account_id, pixel_id in pixels:
+        schedule_flush(account_id, pixel_id)
+
+
+def schedule_flush(account_id: int, pixel_id: str) -> None:
+    """Queue a flush of one pixel's events; flushes inline when the broker refuses it."""
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            FLUSH_TASK_PATH,
+            account_id,
+            pixel_id,
+            task_name=f"meta-capi:{account_id}:{pixel_id}"[:100],
+        )
+    except Exception as exc:
+        logger.warning(
+            "Could not enqueue Meta Conversion Leads flush account=%s pixel=%s (%s); flushing inline",
+            account_id,
+            pixel_id,
+            exc,
+        )
+        flush_pixel_queue(account_id, pixel_id)
+
+
+def _claim_batch(account_id: int, pixel_id: str) -> list[MetaConversionEvent]:
+    now = timezone.now()
+    unclaimed = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    ids = list(
+        MetaConversionEvent.objects.filter(
+            unclaimed,
+            account_id=account_id,
+            pixel_id=pixel_id,
+            status=MetaConversionEventStatus.PENDING,
+            next_attempt_at__lte=now,
+        )
+        .order_by("id")
+        .values_list("id", flat=True)[: _batch_size()]
+    )
+    if not ids:
+        return []
+    holder = uuid.uuid4().hex
+    MetaConversionEvent.objects.filter(unclaimed, pk__in=ids).update(
+        claimed_by=holder, claimed_until=now + CLAIM_DURATION
+    )
+    return list(MetaConversionEvent.objects.filter(pk__in=ids, claimed_by=holder).order_by("id"))
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def _graph_error_code(response) -> int | None:
+    try:
+        data = response.json()
+    except Exception:
+        return None
+    error = data.get("error") if isinstance(data, dict) else None
+    code = error.get("code") if isinstance(error, dict) else None
+    return code if isinstance(code, int) else None
+
+
+def _is_event_rejection(exc: Exception) -> bool:
+    """A 4xx that is neither throttling nor an auth/permission error: some event is invalid."""
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is None or not 400 <= status_code < 500 or status_code in (401, 403, 429):
+        return False
+    code = _graph_error_code(response)
+    return not (
+        code in _GRAPH_THROTTLE_CODES or code in _GRAPH_AUTH_CODES or (code and 200 <= code < 300)
+    )
+
+
+def _send_batch(pixel_id: str, access_token: str, events: list[dict[str, Any]]) -> dict:
+    meta_oauth = MetaOAuth()
+    for delay in (*SEND_RETRY_DELAYS, None):
+        try:
+            return meta_oauth.send_conversion_leads_events(pixel_id, access_token, events)
+        except Exception as exc:
+            if delay is None or not _is_transient(exc):
+                raise
+            logger.warning(
+                "Meta Conversion Leads batch of %d to pixel %s failed (%s); retrying in %ss",
+                len(events),
+                pixel_id,
+                exc,
+                delay,
+            )
+            time.sleep(delay)
+
+
+def _current_client_ids(ids: list[int]) -> list[int]:
+    # Events deleted while the batch was in flight were replaced by a newer change.
+    return list(MetaConversionEvent.objects.filter(pk__in=ids).values_list("client_id", flat=True))
+
+
+def _mark_sent(account: IntegrationAccount, pixel_id: str, batch, response: dict) -> None:
+    from crm.models import Client
+
+    ids = [row.pk for row in batch]
+    with transaction.atomic():
+        client_ids = _current_client_ids(ids)
+        MetaConversionEvent.objects.filter(pk__in=ids).delete()
+        Client.objects.filter(pk__in=client_ids).update(
+            meta_qualification_sent_at=timezone.now(),
+            meta_qualification_error=None,
+        )
+    IntegrationLog.objects.create(
+        account=account,
+        action="meta_conversion_lead_event",
+        status="success",
+        message=f"Sent {len(batch)} Meta Conversion Leads event(s) to pixel {pixel_id}",
+        response_data={
+            "pixel_id": pixel_id,
+            "client_ids": [row.client_id for row in batch],
+            "meta_response": response,
+        },
+    )
+
+
+def _give_up(batch, error_key: str, message: str = "") -> None:
+    """Mark events FAILED and store the error key on their clients."""
+    from crm.models import Client
+
+    ids = [row.pk for row in batch]
+    with transaction.atomic():
+        client_ids = _current_client_ids(ids)
+        MetaConversionEvent.objects.filter(pk__in=ids).update(
+            status=MetaConversionEventStatus.FAILED,
+            claimed_by="",
+            claimed_until=None,
+            last_error=(message or error_key)[:1000],
+        )
+        Client.objects.filter(pk__in=client_ids).update(meta_qualification_error=error_key)
+
+
+def _retry_later(account: IntegrationAccount, pixel_id: str, batch, exc: Exception) -> None:
+    err_msg = str(exc)
+    now = timezone.now()
+    for row in batch:
+        row.attempts += 1
+        row.next_attempt_at = now + RETRY_BACKOFF * (2 ** (row.attempts - 1))
+        row.claimed_by = ""
+        row.claimed_until = None
+        row.last_error = err_msg[:1000]
+    MetaConversionEvent.objects.bulk_update(
+        batch, ["attempts", "next_attempt_at", "claimed_by", "claimed_until", "last_error"]
+    )
+    exhausted = [row for row in batch if row.attempts >= MAX_SEND_ATTEMPTS]
+    if exhausted:
+        _give_up(exhausted, "metaQualificationErrorSendFailed", err_msg)
+
+    logger.warning(
+        "Meta Conversion Leads batch of %d to pixel %s failed (%d given up): %s",
+        len(batch),
+        pixel_id,
+        len(exhausted),
+        err_msg,
+    )
+    IntegrationLog.objects.create(
+        account=account,
+        action="meta_conversion_lead_event",
+        status="error",
+        message=f"Failed {len(batch)} Meta Conversion Leads event(s) to pixel {pixel_id}",
+        error_details=err_msg,
+        response_data={
+            "pixel_id": pixel_id,
+            "client_ids": [row.client_id for row in batch],
+            "given_up_client_ids": [row.client_id for row in exhausted],
+        },
+    )
+
+
+def _send_or_split(account, pixel_id, access_token, rows, events, budget):
+    """
+    Send *rows* (with their built *events*) in one request. When Meta rejects the
+    request for an invalid event, send each half on its own, recursively, so the
+    valid events still go out; a rejected single event is queued for retry on its
+    own. *budget* is a one-item list of requests left for splitting.
+
+    Returns (events sent, failure); failure is None or (exception, rows to requeue):
+    a non-rejection error, or a rejected request the budget could not split, stops
+    the batch and leaves the rows not sent yet to the caller.
+    """
+    try:
+        response = _send_batch(pixel_id, access_token, events)
+    except Exception as exc:
+        if not _is_event_rejection(exc) or budget[0] < 2:
+            return 0, (exc, rows)
+        if len(rows) == 1:
+            _retry_later(account, pixel_id, rows, exc)
+            return 0, None
+        budget[0] -= 2
+        mid = len(rows) // 2
+        halves = ((rows[:mid], events[:mid]), (rows[mid:], events[mid:]))
+        sent = 0
+        for index, (half_rows, half_events) in enumerate(halves):
+            half_sent, failure = _send_or_split(
+                account, pixel_id, access_token, half_rows, half_events, budget
+            )
+            sent += half_sent
+            if failure is not None:
+                exc, unsent = failure
+                return sent, (exc, unsent + [row for later, _ in halves[index + 1:] for row in later])
+        return sent, None
+    _mark_sent(account, pixel_id, rows, response)
+    return len(rows), None
+
+
+def flush_pixel_queue(account_id: int, pixel_id: str) -> int:
+    """
+    Worker entry point: send the pixel's due events in batches. Returns how many
+    were accepted by Meta. Stops at the first batch that fails for a reason other
+    than invalid events; its unsent events wait for their backoff and the sweep.
+    """
+    account = IntegrationAccount.objects.filter(pk=account_id).first()
+    if account is None:
+        return 0
+
+    sent = 0
+    access_token = None
+    while True:
+        batch = _claim_batch(account_id, pixel_id)
+        if not batch:
+            return sent
+        if not conversion_leads_enabled(account):
+            _give_up(batch, "metaQualificationErrorNoPixelConfigured")
+            continue
+        if access_token is None:
+            access_token = _resolve_account_access_token(account)
+        if not access_token:
+            _give_up(batch, "metaQualificationErrorNoToken")
+            continue
+
+        events = [
+            build_conversion_lead_event(
+                client_id=row.client_id,
+                event_name=row.event_name,
+                leadgen_id=row.leadgen_id,
+                event_time=row.event_time,
+            )
+            for row in batch
+        ]
+        batch_sent, failure = _send_or_split(
+            account, pixel_id, access_token, batch, events, [MAX_SPLIT_REQUESTS]
+        )
+        sent += batch_sent
+        if failure is not None:
+            exc, unsent = failure
+            _retry_later(account, pixel_id, unsent, exc)
+            return sent
+
+
+def flush_stale_events(limit: int = 200) -> int:
+    """
+    Flush, inline, pixels with events no task is going to send: retries whose backoff
+    has passed, and fresh events older than ``SWEEP_GRACE`` (a lost task or a dead
+    worker). Returns events sent.
+    """
+    now = timezone.now()
+    due = (
+        MetaConversionEvent.objects.filter(
+            Q(attempts=0, created_at__lt=now - SWEEP_GRACE) | Q(attempts__gt=0),
+            status=MetaConversionEventStatus.PENDING,
+            next_attempt_at__lte=now,
+        )
+        .values_list("account_id", "pixel_id")
+        .distinct()
+        .order_by("account_id", "pixel_id")[:limit]
+    )
+    return sum(flush_pixel_queue(account_id, pixel_id) for account_id, pixel_id in list(due))
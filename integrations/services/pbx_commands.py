@@ -0,0 +1,170 @@
+"""
+Click-to-dial command channel between the CRM and the on-prem PBX connector.
+
+The connector used to poll for dial commands every few seconds per site. Each poll
+wrote ``connector_last_seen_at``, and claimed commands one ``save()`` at a time. So
+click-to-dial waited up to a poll interval, and an idle site sent ~30k requests a day.
+
+Now the connector long-polls:
+
+- ``wait_for_commands`` claims anything pending at once; otherwise it holds the
+  request until ``signal_new_command`` bumps the company's cache key (set by the dial
+  endpoint on commit) or the wait elapses. Waiting costs one cache GET per tick and no
+  DB queries; a final claim at the end catches a lost signal (cache restart).
+- ``claim_pending_commands`` moves pending commands to PROCESSING in a single
+  ``UPDATE … RETURNING``, so two overlapping polls can never take the same command.
+- ``touch_connector_last_seen`` writes the last-seen column at most once a minute.
+- ``record_connector_stats`` keeps the recording-transfer counters sent with each
+  heartbeat (backlog, throughput) for the integration settings page.
+
+Gunicorn runs a handful of gthread slots, and every held request occupies one. Each
+process therefore lets at most ``PBX_COMMAND_LONG_POLL_MAX_WAITERS`` requests wait at
+a time. Beyond that, polls answer immediately with ``long_poll: false``, and the
+connector falls back to its normal poll interval.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from integrations.models import PbxDialCommand, PbxDialCommandStatus, PbxSettings
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH_SIZE = 10
+WAIT_TICK_SECONDS = 0.25
+LAST_SEEN_WRITE_INTERVAL = timedelta(seconds=60)
+_SIGNAL_TTL_SECONDS = 3600
+
+
+def _signal_key(company_id: int) -> str:
+    return f"pbx:dial_signal:{company_id}"
+
+
+def signal_new_command(company_id: int) -> None:
+    """Wake any connector long-poll waiting for this company."""
+    cache.set(_signal_key(company_id), time.time_ns(), _SIGNAL_TTL_SECONDS)
+
+
+def claim_pending_commands(company_id: int, limit: int = CLAIM_BATCH_SIZE) -> list[dict]:
+    """Atomically move up to ``limit`` oldest pending commands to PROCESSING and return them."""
+    table = connection.ops.quote_name(PbxDialCommand._meta.db_table)
+    # status is re-checked in the outer WHERE so that, on Postgres, a poll that was
+    # blocked on the same rows skips the ones the other poll just claimed.
+    sql = (
+        f"UPDATE {table} SET status = %s "
+        f"WHERE status = %s AND id IN ("
+        f"SELECT id FROM {table} WHERE company_id = %s AND status = %s "
+        f"ORDER BY created_at, id LIMIT %s"
+        f") RETURNING id, phone_number, extension"
+    )
+    params = [
+        PbxDialCommandStatus.PROCESSING,
+        PbxDialCommandStatus.PENDING,
+        company_id,
+        PbxDialCommandStatus.PENDING,
+        limit,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {"id": pk, "phone_number": phone_number, "extension": extension}
+        for pk, phone_number, extension in sorted(rows)
+    ]
+
+
+def long_poll_max_seconds() -> float:
+    return float(getattr(django_settings, "PBX_COMMAND_LONG_POLL_SECONDS", 20))
+
+
+_waiters = threading.BoundedSemaphore(
+    int(getattr(django_settings, "PBX_COMMAND_LONG_POLL_MAX_WAITERS", 2))
+)
+
+
+def wait_for_commands(company_id: int, wait_seconds: float) -> tuple[list[dict], bool]:
+    """
+    Claim pending commands, waiting up to ``wait_seconds`` for one to be queued.
+
+    Returns ``(commands, long_polled)``. ``long_polled`` is False when the request
+    was answered without waiting (nothing asked for, or every wait slot busy).
+    """
+    key = _signal_key(company_id)
+    # Read the signal before claiming: a command queued in between then shows up as
+    # a changed signal instead of being missed until the wait runs out.
+    seen = cache.get(key)
+    commands = claim_pending_commands(company_id)
+    wait_seconds = min(max(wait_seconds, 0.0), long_poll_max_seconds())
+    if commands or wait_seconds <= 0:
+        return commands, False
+    if not _waiters.acquire(blocking=False):
+        return commands, False
+
+    try:
+        deadline = time.monotonic() + wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_TICK_SECONDS)
+            current = cache.get(key)
+            if current != seen:
+                seen = current
+                commands = claim_pending_commands(company_id)
+                if commands:
+                    return commands, True
+        return claim_pending_commands(company_id), True
+    finally:
+        _waiters.release()
+
+
+def touch_connector_last_seen(settings: PbxSettings, *, now: Optional[datetime] = None) -> None:
+    """Record that the connector checked in, writing at most once per LAST_SEEN_WRITE_INTERVAL."""
+    now = now or timezone.now()
+    last = settings.connector_last_seen_at
+    if last is not None and now - last < LAST_SEEN_WRITE_INTERVAL:
+        return
+    # Conditional, so concurrent polls from the same site write once.
+    PbxSettings.objects.filter(pk=settings.pk).filter(
+        Q(connector_last_seen_at__isnull=True)
+        | Q(connector_last_seen_at__lt=now - LAST_SEEN_WRITE_INTERVAL)
+    ).update(connector_last_seen_at=now)
+    settings.connector_last_seen_at = now
+
+
+_MAX_STATS_KEYS = 20
+
+
+def _clean_stats(raw, depth: int = 0) -> dict:
+    """Keep short, scalar-valued keys (one level of nesting) from connector input."""
+    clean: dict = {}
+    if not isinstance(raw, dict):
+        return clean
+    for key, value in list(raw.items())[:_MAX_STATS_KEYS]:
+        key = str(key)[:40]
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, (int, float)):
+            clean[key] = value
+        elif isinstance(value, str):
+            clean[key] = value[:64]
+        elif isinstance(value, dict) and depth == 0:
+            clean[key] = _clean_stats(value, depth + 1)
+    return clean
+
+
+def record_connector_stats(settings: PbxSettings, stats) -> None:
+    """Store the counters from a connector heartbeat (ignored when not a dict)."""
+    if not isinstance(stats, dict):
+        return
+    clean = _clean_stats(stats)
+    clean["reported_at"] = timezone.now().isoformat()
+    PbxSettings.objects.filter(pk=settings.pk).update(connector_stats=clean)
+    settings.connector_stats = clean
@@ -41,8 +41,17 @@ def build_connector_config(settings: PbxSettings, request) -> dict:
         "listen_host": "0.0.0.0",
         "listen_port": 8787,
         "poll_interval_sec": 3,
+        "command_wait_sec": 20,
+        "heartbeat_interval_sec": 60,
         "recording_poll_interval_sec": 5,
         "recording_fetch_timeout_sec": 60,
+        "recording_workers": 3,
+        "recording_chunk_mb": 8,
+        "recording_upload_timeout_sec": 120,
+        "event_spool_dir": "",
+        "event_spool_max_mb": 200,
+        "event_batch_size": 50,
+        "event_retry_max_sec": 60,
         "ftp_host": "",
         "ftp_port": 21,
         "ftp_user": "ftpuser",
@@ -92,7 +101,8 @@ def build_connector_zip(settings: PbxSettings, request) -> bytes:
             "   Run: python connector.py  (or run.bat / run.sh)\n"
             "5. ZYCOO Push Event URL (choose one):\n"
             "   A) Direct to CRM (recommended): paste Webhook URL from CRM PBX settings.\n"
-            "   B) Via this PC: http://<this-pc-ip>:8787 (connector forwards events).\n"
+            "   B) Via this PC: http://<this-pc-ip>:8787 (connector queues events in spool/\n"
+            "      and forwards them, so none are lost while the internet is down).\n"
             "6. Call recordings (FTP):\n"
             "   On ZYCOO: System → Storage → FTP Storage → FTP Server → Enable Service.\n"
             "   Leave FTP Uploading OFF (that is a different daily-push feature).\n"
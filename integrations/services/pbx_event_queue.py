@@ -0,0 +1,239 @@
+"""
+Per-call ordered queue for inbound PBX pushes.
+
+ZYCOO fires ring, answer and hangup for one call within milliseconds, often on
+separate connections. Applied inline, those requests race for the same
+``PbxCallRecord`` rows: on SQLite they collide on the write lock and spin in
+``_run_with_sqlite_retry`` while holding a request slot, and on any database the
+order they land in decides which fields win.
+
+With ``PBX_EVENT_QUEUE_ENABLED`` the webhook only stores the push as a
+``PbxQueuedEvent`` keyed by (company, linkedid or uniqueid) and returns. A cluster
+task then applies that call's events one at a time, in arrival order:
+
+- only the holder of the call's ``PbxCallLease`` drains it, so events of one call
+  are never applied concurrently; other calls drain in parallel on other workers;
+- a task that finds the lease taken exits, and the holder re-checks for events that
+  arrived while it was finishing before it lets go;
+- an event that fails is retried by the next drain, and after
+  ``MAX_ATTEMPTS`` it is marked FAILED and skipped so it cannot block the call;
+- the ``drain_pbx_event_queue`` sweep drains whatever a dead worker or an
+  unreachable broker left behind.
+
+Processing itself is ``process_pbx_payload``, unchanged; the push is logged there.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings as django_settings
+from django.db import IntegrityError, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from integrations.models import (
+    PbxCallLease,
+    PbxQueuedEvent,
+    PbxQueuedEventStatus,
+    PbxSettings,
+)
+from integrations.services.pbx_handler import process_pbx_payload
+from integrations.services.zycoo_parser import parse_zycoo_payload
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TASK_PATH = "integrations.services.pbx_event_queue.drain_call_queue"
+
+MAX_ATTEMPTS = 5
+# Long enough for a burst of events; renewed after each one. A worker that dies
+# holding it blocks its call for at most this long.
+LEASE_DURATION = timedelta(seconds=30)
+# The sweep leaves queues this young to the task that was queued for them.
+SWEEP_GRACE = timedelta(minutes=1)
+
+
+def pbx_event_queue_enabled() -> bool:
+    return bool(getattr(django_settings, "PBX_EVENT_QUEUE_ENABLED", False))
+
+
+def _call_key(raw_body: bytes, content_type: str) -> str:
+    try:
+        parsed = parse_zycoo_payload(raw_body, content_type)
+    except Exception:
+        return ""
+    return (parsed.linkedid or parsed.uniqueid)[:128]
+
+
+def enqueue_pbx_payload(
+    settings: PbxSettings,
+    raw_body: bytes,
+    content_type: str = "",
+    *,
+    source: str = "webhook",
+    webhook_token_prefix: str = "",
+) -> dict[str, Any]:
+    """
+    Store one push for its call's queue and schedule a drain on commit.
+
+    Pushes with no call id (unparseable, or agent login/logoff with nothing to key
+    on) are applied inline as before.
+    """
+    call_key = _call_key(raw_body, content_type)
+    if not call_key or call_key.startswith("unknown-"):
+        return process_pbx_payload(
+            settings,
+            raw_body,
+            content_type,
+            source=source,
+            webhook_token_prefix=webhook_token_prefix,
+        )
+
+    event = PbxQueuedEvent.objects.create(
+        company_id=settings.company_id,
+        call_key=call_key,
+        source=source,
+        content_type=(content_type or "")[:100],
+        raw_body=(raw_body or b"").decode("utf-8", errors="replace"),
+        webhook_token_prefix=(webhook_token_prefix or "")[:16],
+    )
+    transaction.on_commit(lambda: schedule_drain(settings.company_id, call_key))
+    return {"ok": True, "queued": True, "event_id": event.id}
+
+
+def schedule_drain(company_id: int, call_key: str) -> None:
+    """Queue a drain of one call; drains inline when the broker refuses it."""
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            DRAIN_TASK_PATH,
+            company_id,
+            call_key,
+            task_name=f"pbx-call:{company_id}:{call_key}"[:100],
+        )
+    except Exception as exc:
+        logger.warning(
+            "Could not enqueue PBX call drain company_id=%s key=%s (%s); draining inline",
+            company_id,
+            call_key,
+            exc,
+        )
+        drain_call_queue(company_id, call_key)
+
+
+def _acquire_lease(company_id: int, call_key: str) -> Optional[str]:
+    holder = uuid.uuid4().hex
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            lease, created = PbxCallLease.objects.get_or_create(
+                company_id=company_id,
+                call_key=call_key,
+                defaults={"holder": holder, "expires_at": now + LEASE_DURATION},
+            )
+    except IntegrityError:
+        return None
+    if created:
+        return holder
+    taken = PbxCallLease.objects.filter(pk=lease.pk, expires_at__lt=now).update(
+        holder=holder, expires_at=now + LEASE_DURATION
+    )
+    return holder if taken else None
+
+
+def _renew_lease(company_id: int, call_key: str, holder: str) -> bool:
+    return bool(
+        PbxCallLease.objects.filter(
+            company_id=company_id, call_key=call_key, holder=holder
+        ).update(expires_at=timezone.now() + LEASE_DURATION)
+    )
+
+
+def _release_lease(company_id: int, call_key: str, holder: str) -> None:
+    PbxCallLease.objects.filter(company_id=company_id, call_key=call_key, holder=holder).delete()
+
+
+def _pending(company_id: int, call_key: str):
+    return PbxQueuedEvent.objects.filter(
+        company_id=company_id,
+        call_key=call_key,
+        status=PbxQueuedEventStatus.PENDING,
+    ).order_by("id")
+
+
+def _apply(settings: PbxSettings, event: PbxQueuedEvent) -> bool:
+    """Apply one queued push; False when it failed and should be retried later."""
+    try:
+        process_pbx_payload(
+            settings,
+            event.raw_body.encode("utf-8"),
+            event.content_type,
+            source=event.source,
+            webhook_token_prefix=event.webhook_token_prefix,
+        )
+    except Exception as exc:
+        event.attempts += 1
+        event.last_error = str(exc)[:1000]
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = PbxQueuedEventStatus.FAILED
+            logger.exception(
+                "PBX queued event id=%s failed %s times; skipping it", event.id, event.attempts
+            )
+        else:
+            logger.warning(
+                "PBX queued event id=%s failed (attempt %s): %s", event.id, event.attempts, exc
+            )
+        event.save(update_fields=["attempts", "last_error", "status"])
+        return event.status == PbxQueuedEventStatus.FAILED
+    event.delete()
+    return True
+
+
+def drain_call_queue(company_id: int, call_key: str) -> int:
+    """
+    Worker entry point: apply one call's pending events in order. Returns how many
+    were applied (or skipped as failed). Exits at once if another worker holds the call.
+    """
+    settings = PbxSettings.objects.filter(company_id=company_id).select_related("company").first()
+    if settings is None:
+        _pending(company_id, call_key).delete()
+        return 0
+
+    done = 0
+    while True:
+        holder = _acquire_lease(company_id, call_key)
+        if holder is None:
+            return done
+        stalled = False
+        try:
+            for event in _pending(company_id, call_key):
+                if not _apply(settings, event):
+                    stalled = True  # keep order: leave the rest for the next drain
+                    break
+                done += 1
+                if not _renew_lease(company_id, call_key, holder):
+                    return done  # lease expired and was taken over
+        finally:
+            _release_lease(company_id, call_key, holder)
+        # An event stored while the lease was held had its drain task exit early.
+        if stalled or not _pending(company_id, call_key).exists():
+            return done
+
+
+def drain_stale_queues(limit: int = 200) -> int:
+    """
+    Drain, inline, calls whose oldest pending event is older than ``SWEEP_GRACE``
+    (a lost task, a dead worker, or a retry after a failure). Returns events applied.
+    """
+    cutoff = timezone.now() - SWEEP_GRACE
+    stale = (
+        PbxQueuedEvent.objects.filter(status=PbxQueuedEventStatus.PENDING)
+        .values("company_id", "call_key")
+        .annotate(oldest=Min("created_at"))
+        .filter(oldest__lt=cutoff)
+        .order_by("oldest")[:limit]
+    )
+    return sum(drain_call_queue(row["company_id"], row["call_key"]) for row in stale)
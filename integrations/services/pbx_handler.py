@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import time
+from functools import partial
 from typing import Any, Callable, Optional, TypeVar
 
 from django.db import IntegrityError, OperationalError, close_old_connections, transaction
@@ -18,12 +20,17 @@ from integrations.models import (
     PbxSettings,
     UserPbxExtension,
 )
-from integrations.services.phone_match import find_client_by_phone
+from integrations.services.phone_match import find_client_by_phone, find_clients_by_phones
 from integrations.services.pbx_recording_service import apply_recording_path_from_cdr
-from integrations.services.zycoo_parser import parse_zycoo_payload
+from integrations.services.pbx_reports import mark_rollup_stale
+from integrations.services.zycoo_parser import (
+    PbxEvent,
+    parse_zycoo_event,
+    parse_zycoo_payload,
+)
 from notifications.models import Notification, NotificationType
 from notifications.services import NotificationService
-from settings.models import CallMethod
+from settings.reference_cache import call_methods
 
 logger = logging.getLogger(__name__)
 
@@ -42,8 +49,16 @@ def log_incoming_zycoo_push(
     raw_body: bytes,
     content_type: str = "",
     webhook_token_prefix: str = "",
+    parsed: Optional[PbxEvent] = None,
 ) -> None:
-    """Log every PBX push (all event types), including ones we do not act on."""
+    """
+    Log every PBX push (all event types), including ones we do not act on.
+
+    Pass ``parsed`` when the caller has already parsed the body, so it is not parsed
+    a second time just for this line.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
     body = raw_body or b""
     preview = body.decode("utf-8", errors="replace")
     if len(preview) > _MAX_PUSH_LOG_BODY:
@@ -54,18 +69,9 @@ def log_incoming_zycoo_push(
 
     parsed_summary = ""
     try:
-        parsed = parse_zycoo_payload(body, content_type)
-        parsed_summary = (
-            f"raw_event={parsed.get('raw_event')!r} "
-            f"mapped_type={parsed.get('event_type')} "
-            f"uniqueid={parsed.get('uniqueid')} "
-            f"extension={parsed.get('extension')} "
-            f"caller={parsed.get('caller')} "
-            f"callee={parsed.get('callee')} "
-            f"direction={parsed.get('direction')} "
-            f"external_phone={parsed.get('external_phone')} "
-            f"disposition={parsed.get('disposition')}"
-        )
+        if parsed is None:
+            parsed = parse_zycoo_payload(body, content_type)
+        parsed_summary = parsed.summary()
     except Exception as exc:
         parsed_summary = f"parse_error={exc!r}"
 
@@ -118,10 +124,7 @@ def _resolve_agent(company, extension: str):
 
 
 def _default_call_method(company):
-    return (
-        CallMethod.objects.filter(company=company, is_active=True, is_default=True).first()
-        or CallMethod.objects.filter(company=company, is_active=True).first()
-    )
+    return call_methods(company).default()
 
 
 def _screen_pop_users(client, agent):
@@ -296,80 +299,80 @@ def _auto_log_client_call(settings: PbxSettings, record: PbxCallRecord, client,
 
 def _record_defaults(
     settings: PbxSettings,
-    parsed: dict[str, Any],
+    parsed: PbxEvent,
     *,
     client,
     agent,
 ) -> dict[str, Any]:
     return {
-        "linkedid": parsed["linkedid"],
-        "direction": parsed["direction"],
-        "caller": parsed["caller"],
-        "callee": parsed["callee"],
-        "extension": parsed["extension"],
-        "disposition": parsed["disposition"],
-        "started_at": parsed["started_at"],
-        "answered_at": parsed["answered_at"],
-        "ended_at": parsed["ended_at"],
-        "duration_sec": parsed["duration_sec"],
-        "billsec": parsed["billsec"],
-        "recording_path": parsed["recording_path"],
-        "recording_url": parsed["recording_url"] or "",
+        "linkedid": parsed.linkedid,
+        "direction": parsed.direction,
+        "caller": parsed.caller,
+        "callee": parsed.callee,
+        "extension": parsed.extension,
+        "disposition": parsed.disposition,
+        "started_at": parsed.started_at,
+        "answered_at": parsed.answered_at,
+        "ended_at": parsed.ended_at,
+        "duration_sec": parsed.duration_sec,
+        "billsec": parsed.billsec,
+        "recording_path": parsed.recording_path,
+        "recording_url": parsed.recording_url or "",
         "client": client,
         "agent": agent,
-        "raw_payload": parsed["raw_payload"],
+        "raw_payload": parsed.raw_payload,
     }
 
 
 def _record_updates(
     settings: PbxSettings,
     record: PbxCallRecord,
-    parsed: dict[str, Any],
+    parsed: PbxEvent,
     *,
     client,
     agent,
 ) -> dict[str, Any]:
     updates: dict[str, Any] = {}
-    if parsed["caller"]:
-        updates["caller"] = parsed["caller"]
-    if parsed["callee"]:
-        updates["callee"] = parsed["callee"]
-    if parsed["extension"]:
-        updates["extension"] = parsed["extension"]
-    if parsed["disposition"] != PbxCallDisposition.UNKNOWN:
-        updates["disposition"] = parsed["disposition"]
-    if parsed["duration_sec"]:
-        updates["duration_sec"] = parsed["duration_sec"]
-    if parsed["billsec"]:
-        updates["billsec"] = parsed["billsec"]
-    if parsed["recording_url"]:
-        updates["recording_url"] = parsed["recording_url"]
-    if parsed["recording_path"]:
-        updates["recording_path"] = parsed["recording_path"]
-    if parsed["answered_at"]:
-        updates["answered_at"] = parsed["answered_at"]
-    if parsed["ended_at"]:
-        updates["ended_at"] = parsed["ended_at"]
+    if parsed.caller:
+        updates["caller"] = parsed.caller
+    if parsed.callee:
+        updates["callee"] = parsed.callee
+    if parsed.extension:
+        updates["extension"] = parsed.extension
+    if parsed.disposition != PbxCallDisposition.UNKNOWN:
+        updates["disposition"] = parsed.disposition
+    if parsed.duration_sec:
+        updates["duration_sec"] = parsed.duration_sec
+    if parsed.billsec:
+        updates["billsec"] = parsed.billsec
+    if parsed.recording_url:
+        updates["recording_url"] = parsed.recording_url
+    if parsed.recording_path:
+        updates["recording_path"] = parsed.recording_path
+    if parsed.answered_at:
+        updates["answered_at"] = parsed.answered_at
+    if parsed.ended_at:
+        updates["ended_at"] = parsed.ended_at
     if client and not record.client_id:
         updates["client"] = client
     if agent and not record.agent_id:
         updates["agent"] = agent
-    if parsed["linkedid"] and not record.linkedid:
-        updates["linkedid"] = parsed["linkedid"]
+    if parsed.linkedid and not record.linkedid:
+        updates["linkedid"] = parsed.linkedid
     return updates
 
 
 def _persist_pbx_call_record(
     settings: PbxSettings,
-    parsed: dict[str, Any],
+    parsed: PbxEvent,
     *,
     client,
     agent,
 ) -> tuple[PbxCallRecord, bool]:
     """Upsert call record in a short transaction (no notifications)."""
     company = settings.company
-    uniqueid = parsed["uniqueid"]
-    event_type = parsed["event_type"]
+    uniqueid = parsed.uniqueid
+    event_type = parsed.event_type
     lookup = {
         "company": company,
         "uniqueid": uniqueid,
@@ -399,22 +402,23 @@ def _persist_pbx_call_record(
     return record, created
 
 
-def _apply_pbx_side_effects(
+def _pbx_notifier(
     settings: PbxSettings,
-    parsed: dict[str, Any],
+    parsed: PbxEvent,
     record: PbxCallRecord,
     *,
     client,
     agent,
     external_phone: str,
     created: bool,
-) -> Optional[ClientCall]:
-    event_type = parsed["event_type"]
+) -> Optional[Callable[[], None]]:
+    """The screen pop / missed-call notice this event calls for, if any (not yet sent)."""
+    event_type = parsed.event_type
 
-    if event_type == PbxEventType.RINGING and parsed["direction"] == PbxCallDirection.INBOUND:
+    if event_type == PbxEventType.RINGING and parsed.direction == PbxCallDirection.INBOUND:
         # Retries of the same RINGING row must not spam screen-pops.
         if created:
-            _send_screen_pop(settings, client, external_phone, record, agent)
+            return partial(_send_screen_pop, settings, client, external_phone, record, agent)
     elif created and (
         event_type == PbxEventType.MISSED
         or (
@@ -422,9 +426,33 @@ def _apply_pbx_side_effects(
             and record.disposition in (PbxCallDisposition.NO_ANSWER, PbxCallDisposition.BUSY)
         )
     ):
-        _send_missed_call(settings, client, external_phone, record, agent)
+        return partial(_send_missed_call, settings, client, external_phone, record, agent)
+    return None
+
+
+def _apply_pbx_side_effects(
+    settings: PbxSettings,
+    parsed: PbxEvent,
+    record: PbxCallRecord,
+    *,
+    client,
+    agent,
+    external_phone: str,
+    created: bool,
+) -> Optional[ClientCall]:
+    notify = _pbx_notifier(
+        settings,
+        parsed,
+        record,
+        client=client,
+        agent=agent,
+        external_phone=external_phone,
+        created=created,
+    )
+    if notify:
+        notify()
 
-    if event_type in (PbxEventType.HANGUP, PbxEventType.MISSED):
+    if parsed.event_type in (PbxEventType.HANGUP, PbxEventType.MISSED):
         return _run_with_sqlite_retry(
             lambda: _auto_log_client_call(settings, record, client, agent),
             company_id=settings.company_id,
@@ -433,6 +461,17 @@ def _apply_pbx_side_effects(
     return None
 
 
+def _queue_recording_on_commit(settings: PbxSettings, record_id: int, recording_path: str) -> None:
+    def _queue_recording() -> None:
+        try:
+            rec = PbxCallRecord.objects.get(pk=record_id)
+            apply_recording_path_from_cdr(rec, recording_path, settings=settings)
+        except PbxCallRecord.DoesNotExist:
+            pass
+
+    transaction.on_commit(_queue_recording)
+
+
 def process_pbx_payload(
     settings: PbxSettings,
     raw_body: bytes,
@@ -442,12 +481,17 @@ def process_pbx_payload(
     webhook_token_prefix: str = "",
 ) -> dict[str, Any]:
     """Parse and apply a PBX webhook/connector event."""
+    try:
+        parsed = parse_zycoo_payload(raw_body, content_type)
+    except Exception:
+        parsed = None
     log_incoming_zycoo_push(
         company_id=settings.company_id,
         source=source,
         raw_body=raw_body,
         content_type=content_type,
         webhook_token_prefix=webhook_token_prefix,
+        parsed=parsed,
     )
 
     if not settings.is_enabled:
@@ -458,10 +502,11 @@ def process_pbx_payload(
         )
         return {"ok": False, "reason": "pbx_disabled"}
 
-    parsed = parse_zycoo_payload(raw_body, content_type)
+    if parsed is None:
+        parsed = parse_zycoo_payload(raw_body, content_type)
     company = settings.company
-    agent = _resolve_agent(company, parsed["extension"])
-    external_phone = parsed["external_phone"] or ""
+    agent = _resolve_agent(company, parsed.extension)
+    external_phone = parsed.external_phone or ""
     client = find_client_by_phone(company, external_phone) if external_phone else None
 
     record, created = _run_with_sqlite_retry(
@@ -471,6 +516,8 @@ def process_pbx_payload(
         company_id=settings.company_id,
         label="persist",
     )
+    if parsed.event_type == PbxEventType.HANGUP:
+        mark_rollup_stale(settings.company_id, record.started_at)
 
     client_call = _apply_pbx_side_effects(
         settings,
@@ -482,24 +529,11 @@ def process_pbx_payload(
         created=created,
     )
 
-    if parsed.get("recording_path"):
-        recording_path = parsed["recording_path"]
-
-        def _queue_recording(
-            rid: int = record.id,
-            path: str = recording_path,
-            pbx_settings: PbxSettings = settings,
-        ) -> None:
-            try:
-                rec = PbxCallRecord.objects.get(pk=rid)
-                apply_recording_path_from_cdr(rec, path, settings=pbx_settings)
-            except PbxCallRecord.DoesNotExist:
-                pass
+    if parsed.recording_path:
+        _queue_recording_on_commit(settings, record.id, parsed.recording_path)
 
-        transaction.on_commit(_queue_recording)
-
-    event_type = parsed["event_type"]
-    uniqueid = parsed["uniqueid"]
+    event_type = parsed.event_type
+    uniqueid = parsed.uniqueid
     logger.info(
         "ZYCOO push processed company_id=%s source=%s event_type=%s uniqueid=%s "
         "record_id=%s created=%s client_id=%s",
@@ -520,3 +554,228 @@ def process_pbx_payload(
         "client_call_id": client_call.id if client_call else None,
         "event_type": event_type,
     }
+
+
+def _resolve_agents(company, extensions) -> dict[str, Any]:
+    extensions = {ext for ext in extensions if ext}
+    if not extensions:
+        return {}
+    return {
+        mapping.extension: mapping.user
+        for mapping in UserPbxExtension.objects.filter(
+            company=company, extension__in=extensions
+        ).select_related("user")
+    }
+
+
+def _persist_pbx_call_records(
+    settings: PbxSettings,
+    batch: list[tuple[PbxEvent, Any, Any]],
+) -> list[tuple[PbxCallRecord, bool]]:
+    """
+    Upsert a batch of call records: one lookup for existing rows, one INSERT for new
+    ones, an UPDATE per changed existing row. Must run inside a transaction.
+
+    An event repeated within the batch (connector replay) behaves as it would
+    one-at-a-time: the first occurrence creates the row, later ones update it.
+    """
+    company = settings.company
+    wanted = {(parsed.uniqueid, parsed.event_type) for parsed, _, _ in batch}
+    records = {
+        (record.uniqueid, record.event_type): record
+        for record in PbxCallRecord.objects.filter(
+            company=company, uniqueid__in={uniqueid for uniqueid, _ in wanted}
+        )
+        if (record.uniqueid, record.event_type) in wanted
+    }
+
+    outcomes: list[tuple[PbxCallRecord, bool]] = []
+    to_create: list[PbxCallRecord] = []
+    for parsed, client, agent in batch:
+        key = (parsed.uniqueid, parsed.event_type)
+        record = records.get(key)
+        if record is None:
+            record = PbxCallRecord(
+                company=company,
+                uniqueid=parsed.uniqueid,
+                event_type=parsed.event_type,
+                **_record_defaults(settings, parsed, client=client, agent=agent),
+            )
+            records[key] = record
+            to_create.append(record)
+            outcomes.append((record, True))
+            continue
+
+        updates = _record_updates(settings, record, parsed, client=client, agent=agent)
+        for field, value in updates.items():
+            setattr(record, field, value)
+        if updates and record.pk is not None:
+            record.save(update_fields=list(updates.keys()) + ["updated_at"])
+        outcomes.append((record, False))
+
+    PbxCallRecord.objects.bulk_create(to_create)
+    return outcomes
+
+
+def process_pbx_events(
+    settings: PbxSettings,
+    events: list[Any],
+    *,
+    source: str = "connector",
+) -> list[dict[str, Any]]:
+    """
+    Apply a batch of PBX events (the connector's ``events`` array) in one go.
+
+    The on-prem connector buffers events through WAN blips and replays hundreds at
+    once. Handling them one ``process_pbx_payload`` at a time meant a transaction, an
+    agent lookup and a full phone scan per event. Here every event is parsed once,
+    agents and client phones are resolved for the whole batch, and the call records
+    and auto-logged ClientCalls are written in one transaction. Screen pops and
+    missed-call notices fan out on commit, so a rolled-back batch notifies nobody.
+
+    Returns one result per event, in order, shaped like ``process_pbx_payload``'s.
+    """
+    results: list[Optional[dict[str, Any]]] = [None] * len(events)
+    parsed_events: list[tuple[int, PbxEvent]] = []
+    for index, event in enumerate(events):
+        if isinstance(event, dict):
+            # Already decoded by DRF; serialised again only for the push log line.
+            log_body = json.dumps(event).encode("utf-8") if logger.isEnabledFor(logging.INFO) else b""
+        else:
+            log_body = str(event).encode("utf-8")
+        try:
+            if isinstance(event, dict):
+                parsed = parse_zycoo_event(event)
+            else:
+                parsed = parse_zycoo_payload(log_body, "application/json")
+        except Exception as exc:
+            results[index] = {"ok": False, "error": str(exc)}
+            parsed = None
+        log_incoming_zycoo_push(
+            company_id=settings.company_id,
+            source=source,
+            raw_body=log_body,
+            content_type="application/json",
+            parsed=parsed,
+        )
+        if parsed is not None:
+            parsed_events.append((index, parsed))
+
+    if not settings.is_enabled:
+        logger.info(
+            "ZYCOO batch ignored (integration disabled) company_id=%s source=%s events=%s",
+            settings.company_id,
+            source,
+            len(events),
+        )
+        return [{"ok": False, "reason": "pbx_disabled"} for _ in events]
+    if not parsed_events:
+        return results
+
+    company = settings.company
+    agents = _resolve_agents(company, (parsed.extension for _, parsed in parsed_events))
+    clients = find_clients_by_phones(
+        company, {parsed.external_phone for _, parsed in parsed_events if parsed.external_phone}
+    )
+    batch = [
+        (
+            parsed,
+            clients.get(parsed.external_phone) if parsed.external_phone else None,
+            agents.get(parsed.extension) if parsed.extension else None,
+        )
+        for _, parsed in parsed_events
+    ]
+
+    def _apply_batch() -> list[dict[str, Any]]:
+        applied = []
+        notifiers = []
+        with transaction.atomic():
+            outcomes = _persist_pbx_call_records(settings, batch)
+            hangup_starts = []
+            for (parsed, client, agent), (record, created) in zip(batch, outcomes):
+                event_type = parsed.event_type
+                external_phone = parsed.external_phone or ""
+                result = {
+                    "ok": True,
+                    "created": created,
+                    "record_id": record.id,
+                    "client_id": client.id if client else None,
+                    "client_call_id": None,
+                    "event_type": event_type,
+                }
+                notify = _pbx_notifier(
+                    settings,
+                    parsed,
+                    record,
+                    client=client,
+                    agent=agent,
+                    external_phone=external_phone,
+                    created=created,
+                )
+                if notify:
+                    notifiers.append(notify)
+                if event_type == PbxEventType.HANGUP:
+                    hangup_starts.append(record.started_at)
+                if (
+                    event_type in (PbxEventType.HANGUP, PbxEventType.MISSED)
+                    and settings.auto_log_calls
+                    and client
+                ):
+                    # A savepoint per call: one bad timeline row must not roll back
+                    # the records of the whole batch.
+                    try:
+                        with transaction.atomic():
+                            client_call = _auto_log_client_call(settings, record, client, agent)
+                    except Exception as exc:
+                        if _is_sqlite_lock_error(exc):
+                            raise
+                        logger.exception(
+                            "PBX auto-log failed company_id=%s uniqueid=%s",
+                            settings.company_id,
+                            record.uniqueid,
+                        )
+                        result = {"ok": False, "record_id": record.id, "error": str(exc)}
+                    else:
+                        result["client_call_id"] = client_call.id if client_call else None
+                if parsed.recording_path:
+                    _queue_recording_on_commit(settings, record.id, parsed.recording_path)
+                applied.append(result)
+
+            starts = [started for started in hangup_starts if started is not None]
+            if starts:
+                mark_rollup_stale(settings.company_id, min(starts))
+            transaction.on_commit(partial(_fan_out_notifications, settings.company_id, notifiers))
+        return applied
+
+    for attempt in range(3):
+        try:
+            applied = _run_with_sqlite_retry(
+                _apply_batch, company_id=settings.company_id, label="persist_batch"
+            )
+            break
+        except IntegrityError:
+            # A webhook inserted one of these rows between our lookup and INSERT;
+            # the next attempt finds it and updates it instead.
+            if attempt == 2:
+                raise
+
+    for (index, _), result in zip(parsed_events, applied):
+        results[index] = result
+
+    logger.info(
+        "ZYCOO batch processed company_id=%s source=%s events=%s applied=%s created=%s",
+        settings.company_id,
+        source,
+        len(events),
+        len(applied),
+        sum(1 for r in applied if r.get("created")),
+    )
+    return results
+
+
+def _fan_out_notifications(company_id: int, notifiers: list[Callable[[], None]]) -> None:
+    for notify in notifiers:
+        try:
+            notify()
+        except Exception:
+            logger.exception("PBX notification failed company_id=%s", company_id)
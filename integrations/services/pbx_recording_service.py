@@ -1,19 +1,37 @@
-"""PBX call recordings: connector polls pending jobs, fetches via FTP, uploads to CRM storage."""
+"""
+PBX call recordings: connector polls pending jobs, fetches via FTP, uploads to CRM storage.
+
+Uploads are resumable. The connector asks for the offset the CRM already holds,
+restarts the FTP download there (REST) and sends the rest as ranged PUTs that are
+appended to an incoming ``.part`` file. The last range moves the file to storage. A
+dropped WAN link then costs at most one chunk instead of the whole recording.
+"""
 
 from __future__ import annotations
 
+import fcntl
 import logging
-from typing import Any
+import os
+from pathlib import Path
+from typing import Any, BinaryIO
 
+from django.conf import settings as django_settings
 from django.core import signing
 from django.db import transaction
 
 from integrations.models import PbxCallRecord, PbxRecordingStatus, PbxSettings
-from integrations.storage.recordings import open_recording, save_recording
+from integrations.services.recording_transcode import (
+    enqueue_transcode,
+    playback_key,
+    reset_transcode_fields,
+)
+from integrations.storage.recordings import recording_response, save_recording_stream
 
 logger = logging.getLogger(__name__)
 
 RECORDING_JOB_LIMIT = 10
+RECORDING_JOB_MAX_LIMIT = 50
+_CHUNK_READ_SIZE = 64 * 1024
 _PLAY_TOKEN_SALT = "pbx-recording-play"
 _PLAY_TOKEN_MAX_AGE = 60 * 60 * 24  # 24 hours
 _AUDIO_SUFFIXES = (".wav", ".WAV", ".gsm", ".GSM", ".mp3", ".MP3")
@@ -134,7 +152,9 @@ def apply_recording_path_from_cdr(
     return True
 
 
-def list_pending_recording_jobs(company_id: int) -> list[dict[str, Any]]:
+def list_pending_recording_jobs(
+    company_id: int, limit: int = RECORDING_JOB_LIMIT
+) -> list[dict[str, Any]]:
     qs = (
         PbxCallRecord.objects.filter(
             company_id=company_id,
@@ -144,7 +164,7 @@ def list_pending_recording_jobs(company_id: int) -> list[dict[str, Any]]:
             ),
         )
         .exclude(recording_path="")
-        .order_by("updated_at")[:RECORDING_JOB_LIMIT]
+        .order_by("updated_at")[: max(1, min(limit, RECORDING_JOB_MAX_LIMIT))]
     )
     jobs = []
     for rec in qs:
@@ -167,48 +187,67 @@ def list_pending_recording_jobs(company_id: int) -> list[dict[str, Any]]:
     return jobs
 
 
-@transaction.atomic
 def finalize_recording_upload(
     *,
     record_id: int,
     company_id: int,
-    file_bytes: bytes | None,
+    fileobj: BinaryIO | None,
     original_filename: str,
     storage_key: str = "",
     public_url: str = "",
 ) -> PbxCallRecord:
-    record = PbxCallRecord.objects.select_for_update().get(
-        pk=record_id, company_id=company_id
-    )
-
-    if file_bytes:
+    if fileobj is not None:
+        # Copied to storage before the row lock is taken: an hour-long recording can
+        # take a while to reach S3, and nothing else needs to wait on it.
+        record = PbxCallRecord.objects.only("linkedid", "uniqueid", "recording_path").get(
+            pk=record_id, company_id=company_id
+        )
         linked = record.linkedid or record.uniqueid
         name = original_filename or record.recording_path.split("/")[-1] or "recording.wav"
-        storage_key = save_recording(
+        storage_key = save_recording_stream(
             company_id=company_id,
             linkedid=linked,
-            file_bytes=file_bytes,
+            fileobj=fileobj,
             original_filename=name,
         )
+    return _mark_recording_stored(
+        record_id=record_id,
+        company_id=company_id,
+        storage_key=storage_key,
+        public_url=public_url,
+    )
+
+
+@transaction.atomic
+def _mark_recording_stored(
+    *, record_id: int, company_id: int, storage_key: str, public_url: str
+) -> PbxCallRecord:
+    record = PbxCallRecord.objects.select_for_update().get(
+        pk=record_id, company_id=company_id
+    )
 
     if not storage_key and not public_url:
         _set_status(record, PbxRecordingStatus.FAILED)
         return record
 
+    replaced = bool(storage_key) and storage_key != record.recording_storage_key
     record.recording_storage_key = storage_key or record.recording_storage_key
     record.recording_uploaded = True
     record.recording_status = PbxRecordingStatus.READY
     # Clear FTP path from recording_url; playback uses signed CRM URL / storage key.
     record.recording_url = public_url or ""
-    record.save(
-        update_fields=[
-            "recording_storage_key",
-            "recording_uploaded",
-            "recording_status",
-            "recording_url",
-            "updated_at",
-        ]
-    )
+    update_fields = [
+        "recording_storage_key",
+        "recording_uploaded",
+        "recording_status",
+        "recording_url",
+        "updated_at",
+    ]
+    if replaced:
+        update_fields += reset_transcode_fields(record)
+    record.save(update_fields=update_fields)
+    if replaced:
+        transaction.on_commit(lambda: enqueue_transcode("pbx", record.id))
     logger.info(
         "PBX recording ready record_id=%s company_id=%s key=%s",
         record.id,
@@ -218,12 +257,105 @@ def finalize_recording_upload(
     return record
 
 
+class RecordingOffsetMismatch(ValueError):
+    """A chunk did not start where the stored part ends; ``offset`` is where it does."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"upload is at offset {offset}")
+        self.offset = offset
+
+
+def _incoming_root() -> Path:
+    return Path(
+        getattr(
+            django_settings,
+            "RECORDING_INCOMING_ROOT",
+            Path(django_settings.BASE_DIR) / "private_data" / "recording_uploads",
+        )
+    )
+
+
+def _incoming_path(record: PbxCallRecord) -> Path:
+    # Staged on local disk whatever the storage backend: S3 cannot append. Never under
+    # MEDIA_ROOT, which is served without auth.
+    return _incoming_root() / str(record.company_id) / f"{record.id}.part"
+
+
+def recording_upload_offset(record: PbxCallRecord) -> int:
+    """Bytes of ``record``'s recording already received by a resumable upload."""
+    try:
+        return _incoming_path(record).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def append_recording_chunk(
+    record: PbxCallRecord,
+    *,
+    stream: BinaryIO,
+    start: int,
+    length: int,
+    total: int,
+    filename: str,
+) -> int:
+    """
+    Append ``length`` bytes read from ``stream`` at ``start`` of a ``total``-byte file.
+
+    ``start == 0`` restarts the upload. Any other start must equal the bytes already
+    held, else RecordingOffsetMismatch. A short body is rolled back. When the file is
+    complete it is stored and the record marked READY. Returns the new offset.
+    """
+    if start < 0 or length <= 0 or start + length > total:
+        raise ValueError("invalid range")
+    path = _incoming_path(record)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RecordingOffsetMismatch(recording_upload_offset(record)) from None
+        held = part.seek(0, os.SEEK_END)
+        if start == 0:
+            part.truncate(0)
+        elif start != held:
+            raise RecordingOffsetMismatch(held)
+        received = 0
+        while received < length:
+            data = stream.read(min(_CHUNK_READ_SIZE, length - received))
+            if not data:
+                break
+            part.write(data)
+            received += len(data)
+        if received != length:
+            part.truncate(start)
+            raise ValueError(f"incomplete chunk: got {received} of {length} bytes")
+        part.flush()
+        offset = start + length
+        if offset < total:
+            return offset
+
+        part.seek(0)
+        finalize_recording_upload(
+            record_id=record.id,
+            company_id=record.company_id,
+            fileobj=part,
+            original_filename=filename,
+        )
+    path.unlink(missing_ok=True)
+    return offset
+
+
+def discard_partial_upload(record: PbxCallRecord) -> None:
+    _incoming_path(record).unlink(missing_ok=True)
+
+
 def mark_recording_failed(record_id: int, *, company_id: int | None = None) -> None:
     qs = PbxCallRecord.objects.filter(pk=record_id)
     if company_id is not None:
         qs = qs.filter(company_id=company_id)
     record = qs.first()
     if record:
+        discard_partial_upload(record)
         _set_status(record, PbxRecordingStatus.FAILED)
 
 
@@ -247,10 +379,14 @@ def get_playback_url(record: PbxCallRecord, request=None) -> str | None:
     return path
 
 
-def stream_recording_for_user(record: PbxCallRecord):
-    """Open storage blob for authenticated playback."""
+def stream_recording_for_user(request, record: PbxCallRecord, *, original: bool = False):
+    """Range-aware playback response: the compressed rendition when ready, else the upload."""
     if record.recording_status != PbxRecordingStatus.READY:
         raise FileNotFoundError("recording not ready")
-    if not record.recording_storage_key:
+    key = playback_key(record, original=original)
+    if not key:
         raise FileNotFoundError("missing storage key")
-    return open_recording(record.recording_storage_key)
+    name = record.recording_path.split("/")[-1] if record.recording_path else "recording.wav"
+    if key != record.recording_storage_key:
+        name = name.rsplit(".", 1)[0] + ".ogg"
+    return recording_response(request, key, filename=name)
@@ -120,3 +120,68 @@ def find_client_by_phone(company, phone: str, prefer_assigned_to=None) -> Option
                 return client
 
     return matches[0]
+
+
+def find_clients_by_phones(company, phones) -> dict[str, Optional[Client]]:
+    """
+    Resolve many phones at once, with the same result per phone as
+    ``find_client_by_phone`` (without ``prefer_assigned_to``).
+
+    Exact ``phone_normalized`` hits come from one query; the remaining phones share a
+    single pass over the company's leads and extra numbers, instead of one full scan
+    per phone.
+    """
+    result: dict[str, Optional[Client]] = {}
+    pending: dict[str, str] = {}
+    for phone in set(phones):
+        if not phone or not company or not _is_dialable_phone(phone):
+            result[phone] = None
+        else:
+            pending[phone] = canonical_phone_key(phone)
+    if not pending:
+        return result
+
+    keys = {key for key in pending.values() if key}
+    if keys:
+        exact: dict[str, Client] = {}
+        for row in ClientPhoneNumber.objects.filter(
+            company=company, phone_normalized__in=keys
+        ).select_related("client"):
+            exact.setdefault(row.phone_normalized, row.client)
+        for phone, key in list(pending.items()):
+            if key in exact:
+                result[phone] = exact[key]
+                del pending[phone]
+    if not pending:
+        return result
+
+    # Index every lead / extra number by its keys, keeping the first in the same
+    # iteration order ``find_client_by_phone`` scans them.
+    by_canonical: dict[str, Client] = {}
+    by_lead_key: dict[str, tuple[int, Client]] = {}
+    for position, client in enumerate(
+        Client.objects.filter(company=company).only("id", "phone_number", "name", "assigned_to_id")
+    ):
+        by_canonical.setdefault(canonical_phone_key(client.phone_number or ""), client)
+        for key in phone_match_keys(client.phone_number or ""):
+            by_lead_key.setdefault(key, (position, client))
+    by_extra_key: dict[str, tuple[int, Client]] = {}
+    for position, row in enumerate(
+        ClientPhoneNumber.objects.filter(client__company=company).select_related("client")
+    ):
+        for key in phone_match_keys(row.phone_number or ""):
+            by_extra_key.setdefault(key, (position, row.client))
+
+    for phone, key in pending.items():
+        if key and key in by_canonical:
+            result[phone] = by_canonical[key]
+            continue
+        match = None
+        phone_keys = phone_match_keys(phone)
+        for index in (by_lead_key, by_extra_key):
+            hits = [index[k] for k in phone_keys if k in index]
+            if hits:
+                match = min(hits, key=lambda hit: hit[0])[1]
+                break
+        result[phone] = match
+    return result
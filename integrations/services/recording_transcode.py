@@ -0,0 +1,362 @@
+"""
+Compressed renditions of stored call recordings (Opus in OGG).
+
+PBX recordings arrive from the connector as 8 kHz PCM WAV (~128 kbit/s) and WhatsApp
+call recordings as browser webm. Speech at 16 kbit/s Opus is indistinguishable on a
+phone line, so once a recording is stored we queue a cluster task that:
+
+- copies the original to a temp file and runs ffmpeg once, writing the Opus file
+  and, on a second output, low-rate PCM that is scanned for duration and peaks;
+- stores the ``.ogg`` next to the original and records ``recording_duration_ms``
+  and ``recording_peaks`` (``RECORDING_WAVEFORM_PEAKS`` values, 0-100, scaled to the
+  loudest moment) so players can draw the waveform without decoding the audio.
+
+Playback serves the compressed rendition once it is READY and falls back to the
+original until then (or with ``?original=1``). The original is kept.
+
+Gated by ``RECORDING_TRANSCODE_ENABLED``: it needs a running cluster with ffmpeg on
+the worker hosts. A worker without ffmpeg leaves the recording PENDING rather than
+FAILED, so the ``transcode_recordings`` sweep picks it up once ffmpeg is installed.
+"""
+from __future__ import annotations
+
+import array
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from integrations.models import (
+    PbxCallRecord,
+    PbxRecordingStatus,
+    RecordingTranscodeStatus,
+    WhatsAppCall,
+    WhatsAppCallRecordingStatus,
+)
+from integrations.services.whatsapp_media import _resolve_ffmpeg_binary
+from integrations.storage.recordings import (
+    copy_recording_to,
+    delete_recording,
+    save_recording_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSCODE_TASK_PATH = "integrations.services.recording_transcode.transcode_recording"
+
+# Peaks are measured on an 8 kHz mono decode (the PBX's native rate) in 100 ms buckets.
+PEAK_SAMPLE_RATE = 8000
+_BUCKET_SAMPLES = PEAK_SAMPLE_RATE // 10
+_READ_SIZE = 64 * 1024
+# Enqueued rows the sweep leaves alone for this long, so it does not race the task.
+SWEEP_GRACE = timedelta(minutes=15)
+
+
+class TranscodeError(RuntimeError):
+    pass
+
+
+class FfmpegUnavailable(TranscodeError):
+    pass
+
+
+@dataclass(frozen=True)
+class _Kind:
+    model: type[Model]
+    ready: str
+    prefix: str
+    linkedid: Callable[[Model], str]
+
+
+_KINDS = {
+    "pbx": _Kind(
+        PbxCallRecord,
+        PbxRecordingStatus.READY,
+        "pbx",
+        lambda r: r.linkedid or r.uniqueid,
+    ),
+    "whatsapp": _Kind(
+        WhatsAppCall,
+        WhatsAppCallRecordingStatus.READY,
+        "whatsapp_calls",
+        lambda c: c.meta_call_id or str(c.id),
+    ),
+}
+
+
+def transcode_enabled() -> bool:
+    return bool(getattr(django_settings, "RECORDING_TRANSCODE_ENABLED", False))
+
+
+def _timeout_seconds() -> int:
+    return int(getattr(django_settings, "RECORDING_TRANSCODE_TIMEOUT_SECONDS", 100))
+
+
+def _delete_rendition(storage_key: str) -> None:
+    try:
+        delete_recording(storage_key)
+    except Exception:
+        logger.exception("Could not delete replaced rendition key=%s", storage_key)
+
+
+def reset_transcode_fields(obj) -> list[str]:
+    """
+    Forget the rendition of a replaced recording; returns the fields to save.
+
+    The old rendition's file is deleted once the caller's transaction commits, so a
+    rolled-back save still points at a file that exists.
+    """
+    old_key = obj.recording_compressed_key
+    if old_key:
+        transaction.on_commit(lambda: _delete_rendition(old_key))
+    obj.recording_compressed_key = ""
+    obj.recording_transcode_status = RecordingTranscodeStatus.NONE
+    obj.recording_duration_ms = None
+    obj.recording_peaks = []
+    return [
+        "recording_compressed_key",
+        "recording_transcode_status",
+        "recording_duration_ms",
+        "recording_peaks",
+    ]
+
+
+def playback_key(obj, *, original: bool = False) -> str:
+    """Storage key to serve: the compressed rendition when ready, else the original."""
+    if (
+        not original
+        and obj.recording_transcode_status == RecordingTranscodeStatus.READY
+        and obj.recording_compressed_key
+    ):
+        return obj.recording_compressed_key
+    return obj.recording_storage_key
+
+
+def recording_waveform(obj) -> Optional[dict]:
+    if obj.recording_transcode_status != RecordingTranscodeStatus.READY:
+        return None
+    return {"duration_ms": obj.recording_duration_ms, "peaks": obj.recording_peaks}
+
+
+def enqueue_transcode(kind: str, pk: int) -> bool:
+    """
+    Queue a transcode on the cluster; call on commit after a recording is stored.
+
+    Returns False when disabled or the broker refused it. Nothing is lost then: the
+    row stays NONE/PENDING and the ``transcode_recordings`` sweep retries it.
+    """
+    if not transcode_enabled():
+        return False
+    # update() skips auto_now; without the stamp the sweep's grace period would be
+    # measured from the last save, not from this enqueue.
+    _KINDS[kind].model.objects.filter(pk=pk).update(
+        recording_transcode_status=RecordingTranscodeStatus.PENDING,
+        updated_at=timezone.now(),
+    )
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            TRANSCODE_TASK_PATH,
+            kind,
+            pk,
+            task_name=f"transcode:{kind}:{pk}",
+            # Above the cluster default (60s), below its retry (120s) so the broker
+            # never hands a still-running transcode to a second worker.
+            timeout=_timeout_seconds() + 10,
+        )
+        return True
+    except Exception as exc:
+        logger.warning("Could not enqueue transcode %s id=%s (%s)", kind, pk, exc)
+        return False
+
+
+def _summarise_peaks(buckets: list[int], count: int) -> list[int]:
+    if not buckets:
+        return []
+    if len(buckets) > count:
+        step = len(buckets) / count
+        buckets = [
+            max(buckets[int(i * step) : max(int((i + 1) * step), int(i * step) + 1)])
+            for i in range(count)
+        ]
+    loudest = max(buckets) or 1
+    return [round(100 * b / loudest) for b in buckets]
+
+
+def _pcm(data: bytes) -> array.array:
+    pcm = array.array("h", data)
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    return pcm
+
+
+def transcode_to_opus(src_path: str, dest_path: str) -> tuple[int, list[int]]:
+    """
+    Write ``src_path`` to ``dest_path`` as mono Opus/OGG; returns ``(duration_ms, peaks)``.
+
+    Raises FfmpegUnavailable when there is no ffmpeg, TranscodeError when it fails.
+    """
+    ffmpeg = _resolve_ffmpeg_binary()
+    if not ffmpeg:
+        raise FfmpegUnavailable("ffmpeg not found")
+    bitrate = str(getattr(django_settings, "RECORDING_TRANSCODE_BITRATE", "16k"))
+    peak_count = int(getattr(django_settings, "RECORDING_WAVEFORM_PEAKS", 200))
+    command = [
+        ffmpeg, "-nostdin", "-v", "error", "-y", "-i", src_path,
+        "-map", "0:a:0", "-ac", "1", "-c:a", "libopus", "-b:a", bitrate,
+        "-application", "voip", "-f", "ogg", dest_path,
+        "-map", "0:a:0", "-ac", "1", "-ar", str(PEAK_SAMPLE_RATE), "-f", "s16le", "pipe:1",
+    ]
+
+    buckets: list[int] = []
+    samples = 0
+    pending = b""
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        # The PCM is read as it is produced, so the pipe never fills up; a hung ffmpeg
+        # is killed from the side instead of by a read timeout.
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(_timeout_seconds(), kill)
+        watchdog.start()
+        try:
+            while data := proc.stdout.read(_READ_SIZE):
+                pending += data
+                usable = len(pending) - len(pending) % (_BUCKET_SAMPLES * 2)
+                if not usable:
+                    continue
+                pcm = _pcm(pending[:usable])
+                pending = pending[usable:]
+                samples += len(pcm)
+                for start in range(0, len(pcm), _BUCKET_SAMPLES):
+                    window = pcm[start : start + _BUCKET_SAMPLES]
+                    buckets.append(max(max(window), -min(window)))
+            returncode = proc.wait()
+        finally:
+            watchdog.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        if returncode != 0:
+            stderr.seek(0)
+            detail = stderr.read(500).decode("utf-8", errors="replace")
+            reason = "timed out" if timed_out.is_set() else f"exit {returncode}"
+            raise TranscodeError(f"ffmpeg {reason}: {detail}".strip())
+
+    if len(pending) >= 2:
+        pcm = _pcm(pending[: len(pending) - len(pending) % 2])
+        samples += len(pcm)
+        buckets.append(max(max(pcm), -min(pcm)))
+    if not samples or not os.path.getsize(dest_path):
+        raise TranscodeError("ffmpeg produced no audio")
+    return samples * 1000 // PEAK_SAMPLE_RATE, _summarise_peaks(buckets, peak_count)
+
+
+def transcode_recording(kind: str, pk: int) -> bool:
+    """
+    Worker entry point: build the compressed rendition for one stored recording.
+
+    Returns True when a rendition was stored. Safe to run twice: a READY row is
+    skipped, and the result is only written if the original was not replaced meanwhile.
+    """
+    spec = _KINDS[kind]
+    obj = spec.model.objects.filter(pk=pk).first()
+    if obj is None or obj.recording_status != spec.ready or not obj.recording_storage_key:
+        return False
+    if obj.recording_transcode_status == RecordingTranscodeStatus.READY:
+        return False
+    if not _resolve_ffmpeg_binary():
+        # Left PENDING, not FAILED: nothing is wrong with the recording.
+        logger.warning("ffmpeg not found; leaving %s id=%s for a later sweep", kind, pk)
+        return False
+
+    source_key = obj.recording_storage_key
+    rows = spec.model.objects.filter(pk=pk, recording_storage_key=source_key)
+    with tempfile.TemporaryDirectory(prefix="rec-transcode-") as workdir:
+        src = Path(workdir) / ("source" + Path(source_key).suffix)
+        dest = Path(workdir) / "compressed.ogg"
+        try:
+            with src.open("wb") as fh:
+                copy_recording_to(source_key, fh)
+            duration_ms, peaks = transcode_to_opus(str(src), str(dest))
+        except FfmpegUnavailable:
+            return False
+        except (TranscodeError, FileNotFoundError) as exc:
+            logger.warning("Transcode failed %s id=%s: %s", kind, pk, exc)
+            rows.update(
+                recording_transcode_status=RecordingTranscodeStatus.FAILED,
+                updated_at=timezone.now(),
+            )
+            return False
+
+        with dest.open("rb") as fh:
+            compressed_key = save_recording_stream(
+                company_id=obj.company_id,
+                linkedid=spec.linkedid(obj),
+                fileobj=fh,
+                original_filename=Path(source_key).stem + ".ogg",
+                prefix=spec.prefix,
+            )
+        original_size = src.stat().st_size
+        compressed_size = dest.stat().st_size
+
+    rows.update(
+        recording_compressed_key=compressed_key,
+        recording_transcode_status=RecordingTranscodeStatus.READY,
+        recording_duration_ms=duration_ms,
+        recording_peaks=peaks,
+        updated_at=timezone.now(),
+    )
+    logger.info(
+        "Transcoded %s id=%s bytes=%s->%s duration_ms=%s",
+        kind,
+        pk,
+        original_size,
+        compressed_size,
+        duration_ms,
+    )
+    return True
+
+
+def transcode_backlog(limit: int = 50) -> int:
+    """
+    Transcode, inline, up to ``limit`` stored recordings that still have no rendition
+    (enqueue failed, cluster down, or recorded before this existed). Returns successes.
+    """
+    cutoff = timezone.now() - SWEEP_GRACE
+    todo: list[tuple[str, int]] = []
+    for kind, spec in _KINDS.items():
+        ids = (
+            spec.model.objects.filter(
+                recording_status=spec.ready,
+                recording_transcode_status__in=(
+                    RecordingTranscodeStatus.NONE,
+                    RecordingTranscodeStatus.PENDING,
+                ),
+                updated_at__lt=cutoff,
+            )
+            .exclude(recording_storage_key="")
+            .order_by("-updated_at")
+            .values_list("pk", flat=True)[: limit - len(todo)]
+        )
+        todo.extend((kind, pk) for pk in ids)
+        if len(todo) >= limit:
+            break
+    return sum(1 for kind, pk in todo if transcode_recording(kind, pk))
@@ -7,9 +7,11 @@ recordings are uploaded from the agent browser after hangup.
 
 from __future__ import annotations
 
+import io
 import logging
+import mimetypes
 from datetime import datetime, timezone as dt_timezone
-from typing import Any, Optional
+from typing import Any, BinaryIO, Optional
 
 import requests
 from django.core import signing
@@ -24,7 +26,13 @@ from integrations.models import (
     WhatsAppCallStatus,
 )
 from integrations.oauth_utils import META_GRAPH_API_BASE_URL
-from integrations.storage.recordings import open_recording, save_recording
+from integrations.services import graph_http
+from integrations.services.recording_transcode import (
+    enqueue_transcode,
+    playback_key,
+    reset_transcode_fields,
+)
+from integrations.storage.recordings import recording_response, save_recording_stream
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +57,7 @@ def _token(account: WhatsAppAccount) -> str:
 def _graph_post(account: WhatsAppAccount, path: str, payload: dict) -> dict:
     url = f"{META_GRAPH_API_BASE_URL}/{path.lstrip('/')}"
     try:
-        resp = requests.post(
+        resp = graph_http.post(
             url,
             headers={
                 "Authorization": f"Bearer {_token(account)}",
@@ -82,7 +90,7 @@ def _graph_post(account: WhatsAppAccount, path: str, payload: dict) -> dict:
 def _graph_get(account: WhatsAppAccount, path: str, params: dict | None = None) -> dict:
     url = f"{META_GRAPH_API_BASE_URL}/{path.lstrip('/')}"
     try:
-        resp = requests.get(
+        resp = graph_http.get(
             url,
             headers={"Authorization": f"Bearer {_token(account)}"},
             params=params or {},
@@ -725,15 +733,17 @@ def mark_call_rejected(call: WhatsAppCall, *, agent) -> WhatsAppCall:
 def store_call_recording(
     call: WhatsAppCall,
     *,
-    file_bytes: bytes,
     original_filename: str,
+    file_bytes: bytes | None = None,
+    fileobj: BinaryIO | None = None,
 ) -> WhatsAppCall:
+    """Store the browser-captured recording, given as bytes or a file (streamed to storage)."""
     if not call.answered_at:
         raise ValueError("Cannot store recording for a call that was never answered")
-    key = save_recording(
+    key = save_recording_stream(
         company_id=call.company_id,
         linkedid=call.meta_call_id or str(call.id),
-        file_bytes=file_bytes,
+        fileobj=fileobj if fileobj is not None else io.BytesIO(file_bytes or b""),
         original_filename=original_filename or "call.webm",
         prefix="whatsapp_calls",
     )
@@ -748,8 +758,10 @@ def store_call_recording(
             "offer_sdp",
             "answer_sdp",
             "updated_at",
+            *reset_transcode_fields(call),
         ]
     )
+    transaction.on_commit(lambda: enqueue_transcode("whatsapp", call.id))
     ensure_client_call_for_whatsapp_call(call)
     return call
 
@@ -778,9 +790,16 @@ def get_wa_playback_url(call: WhatsAppCall, request=None) -> str | None:
     return path
 
 
-def stream_wa_recording(call: WhatsAppCall):
+def stream_wa_recording(request, call: WhatsAppCall, *, original: bool = False):
+    """Range-aware playback response: the compressed rendition when ready, else the upload."""
     if call.recording_status != WhatsAppCallRecordingStatus.READY:
         raise FileNotFoundError("recording not ready")
-    if not call.recording_storage_key:
+    key = playback_key(call, original=original)
+    if not key:
         raise FileNotFoundError("missing storage key")
-    return open_recording(call.recording_storage_key)
+    return recording_response(
+        request,
+        key,
+        filename=key.rsplit("/", 1)[-1],
+        content_type=mimetypes.guess_type(key)[0] or "audio/webm",
+    )
@@ -9,9 +9,8 @@ from __future__ import annotations
 import logging
 from typing import Any, Optional
 
-import requests
-
 from integrations.oauth_utils import META_GRAPH_API_BASE_URL
+from integrations.services import graph_http
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +41,7 @@ def subscribe_waba_webhooks(access_token: str, waba_id: str) -> bool:
         return False
     url = f"{META_GRAPH_API_BASE_URL}/{waba_id}/subscribed_apps"
     try:
-        resp = requests.post(
+        resp = graph_http.post(
             url,
             headers={"Authorization": f"Bearer {token}"},
             timeout=30,
@@ -72,7 +71,7 @@ def fetch_waba_subscribed_apps(access_token: str, waba_id: str) -> dict[str, Any
         return out
     url = f"{META_GRAPH_API_BASE_URL}/{waba_id}/subscribed_apps"
     try:
-        resp = requests.get(
+        resp = graph_http.get(
             url,
             headers={"Authorization": f"Bearer {token}"},
             timeout=30,
@@ -96,7 +95,7 @@ def fetch_phone_registration_fields(access_token: str, phone_number_id: str) ->
     if not phone_number_id or not token:
         return None
     try:
-        resp = requests.get(
+        resp = graph_http.get(
             f"{META_GRAPH_API_BASE_URL}/{phone_number_id}",
             headers={"Authorization": f"Bearer {token}"},
             params={
@@ -154,7 +153,7 @@ def register_cloud_phone_number(
 
     url = f"{META_GRAPH_API_BASE_URL}/{phone_number_id}/register"
     try:
-        resp = requests.post(
+        resp = graph_http.post(
             url,
             headers={
                 "Authorization": f"Bearer {token}",
@@ -213,7 +212,7 @@ def initiate_smb_app_data_sync(access_token: str, phone_number_id: str) -> dict[
         ("history", "history"),
     ):
         try:
-            resp = requests.post(
+            resp = graph_http.post(
                 url,
                 headers=headers,
                 json={"messaging_product": "whatsapp", "sync_type": sync_type},
@@ -260,7 +259,7 @@ def verify_coexistence_phone(access_token: str, phone_number_id: str) -> Optiona
     if not phone_number_id or not token:
         return None
     try:
-        resp = requests.get(
+        resp = graph_http.get(
             f"{META_GRAPH_API_BASE_URL}/{phone_number_id}",
             params={
                 "access_token": token,
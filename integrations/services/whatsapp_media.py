@@ -14,11 +14,11 @@ import subprocess
 import tempfile
 from typing import Optional
 
-import requests
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import UploadedFile
 
 from integrations.oauth_utils import META_GRAPH_API_BASE_URL
+from integrations.services import graph_http
 
 logger = logging.getLogger(__name__)
 
@@ -346,7 +346,7 @@ def upload_media_to_meta(
     }
     form = {"messaging_product": "whatsapp", "type": mime}
     headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.post(url, headers=headers, data=form, files=files, timeout=60)
+    resp = graph_http.post(url, headers=headers, data=form, files=files, timeout=60)
     if resp.status_code >= 400:
         logger.warning("Meta media upload failed: status=%s body=%s", resp.status_code, resp.text[:500])
         raise ValueError("WhatsApp media upload failed.")
@@ -361,7 +361,7 @@ def download_media_from_meta(*, media_id: str, access_token: str) -> tuple[bytes
     """Download media bytes and mime type from Meta by media id."""
     headers = {"Authorization": f"Bearer {access_token}"}
     meta_url = f"{META_GRAPH_API_BASE_URL}/{media_id}"
-    r1 = requests.get(meta_url, headers=headers, timeout=30)
+    r1 = graph_http.get(meta_url, headers=headers, timeout=30)
     if r1.status_code >= 400:
         raise ValueError("Could not resolve WhatsApp media.")
     info = r1.json() if r1.content else {}
@@ -369,7 +369,7 @@ def download_media_from_meta(*, media_id: str, access_token: str) -> tuple[bytes
     mime = (info.get("mime_type") or "application/octet-stream").split(";")[0].strip()
     if not download_url:
         raise ValueError("WhatsApp media URL missing.")
-    r2 = requests.get(download_url, headers=headers, timeout=60)
+    r2 = graph_http.get(download_url, headers=headers, timeout=60)
     if r2.status_code >= 400:
         raise ValueError("Could not download WhatsApp media.")
     return r2.content, mime
@@ -11,12 +11,13 @@ import requests
 
 from integrations.models import LeadWhatsAppMessage, MessageSendSource, MessageTemplate
 from integrations.oauth_utils import META_GRAPH_API_BASE_URL
+from integrations.services import graph_http
 from integrations.services.message_placeholders import _user_display_name
 from integrations.views.templates_whatsapp import (
     build_whatsapp_template_components_for_client,
-    count_template_body_placeholders,
     meta_slug_template_name,
     template_body_parameter_values,
+    template_render_plan,
 )
 from integrations.whatsapp_account_sync import resolve_whatsapp_account_for_api
 
@@ -64,6 +65,13 @@ def template_outbound_log_body(template: MessageTemplate, param_values: Optional
     return f"[Template: {meta_name}]"
 
 
+def _body_parameter_texts(components: list) -> list[str]:
+    for component in components:
+        if component.get("type") == "body":
+            return [p.get("text", "") for p in component.get("parameters", [])]
+    return []
+
+
 def send_approved_whatsapp_template(
     *,
     company,
@@ -75,10 +83,15 @@ def send_approved_whatsapp_template(
     created_by=None,
     campaign_batch=None,
     persist_message: bool = True,
+    components: Optional[list] = None,
 ) -> tuple[bool, Optional[str], Optional[str], Optional[dict]]:
     """
     Send an APPROVED WhatsApp template via Graph API.
 
+    ``components`` may carry this client's entry from
+    build_whatsapp_template_components_for_clients, so batch senders skip the
+    per-client render.
+
     Returns (ok, wam_id, error_key, graph_data_or_error).
     Does not enforce plan quotas — callers must check usage before calling.
     """
@@ -94,17 +107,21 @@ def send_approved_whatsapp_template(
     if meta_st and meta_st != "APPROVED":
         return False, None, "whatsapp_template_not_approved", None
 
-    n_placeholders = count_template_body_placeholders(template.content or "")
-    header_needs = count_template_body_placeholders(getattr(template, "header_text", None) or "")
+    render_plan = template_render_plan(template)
+    n_placeholders = render_plan.body_count
+    header_needs = render_plan.header_count
     # { اسم الموظف } falls back to the sender when the lead has no assignee.
     sender_name = _user_display_name(created_by) if created_by is not None else None
     param_values: list[str] = []
     if n_placeholders > 0 or header_needs > 0:
         if client is None:
             return False, None, "client_required_for_placeholders", None
-        param_values = template_body_parameter_values(
-            template, client, sender_name=sender_name
-        )
+        if components is not None:
+            param_values = _body_parameter_texts(components)
+        else:
+            param_values = template_body_parameter_values(
+                template, client, sender_name=sender_name
+            )
         if n_placeholders > 0 and len(param_values) != n_placeholders:
             return False, None, "whatsapp_template_parameter_count", None
 
@@ -123,12 +140,13 @@ def send_approved_whatsapp_template(
         "language": {"code": language},
     }
     if client is not None:
-        components = build_whatsapp_template_components_for_client(
-            template,
-            client,
-            body_param_values=param_values if param_values else None,
-            sender_name=sender_name,
-        )
+        if components is None:
+            components = build_whatsapp_template_components_for_client(
+                template,
+                client,
+                body_param_values=param_values if param_values else None,
+                sender_name=sender_name,
+            )
         if components:
             template_block["components"] = components
     elif param_values:
@@ -150,7 +168,7 @@ def send_approved_whatsapp_template(
     }
 
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+        resp = graph_http.post(url, json=payload, headers=headers, timeout=15)
     except requests.RequestException as e:
         logger.warning(
             "WhatsApp template send request error: phone_number_id=%s to=%s error=%s",
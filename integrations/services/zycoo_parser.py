@@ -1,11 +1,20 @@
-"""Parse ZYCOO CooVox / Asterisk Push Event payloads."""
+"""
+Parse ZYCOO CooVox / Asterisk Push Event payloads.
+
+Each push is parsed once into a :class:`PbxEvent`, which the handler then passes
+through logging, persistence and side effects. Field names are matched without
+regard to case (ZYCOO firmware sends ``Uniqueid``, ``UniqueID`` and ``uniqueid``
+depending on the event), so the payload's keys are lower-cased once per event
+rather than probing every spelling.
+"""
 
 from __future__ import annotations
 
 import json
 import re
-from datetime import datetime, timezone as dt_timezone
-from typing import Any
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
 from urllib.parse import parse_qs
 
 from django.utils import timezone
@@ -17,11 +26,65 @@ from integrations.models import (
 )
 
 
-def _first(data: dict[str, Any], *keys: str, default: str = "") -> str:
+@dataclass(slots=True)
+class PbxEvent:
+    """One normalized PBX push."""
+
+    event_type: PbxEventType
+    raw_event: str
+    uniqueid: str
+    linkedid: str
+    direction: PbxCallDirection
+    caller: str
+    callee: str
+    extension: str
+    external_phone: str
+    disposition: PbxCallDisposition
+    duration_sec: int
+    billsec: int
+    recording_path: str
+    recording_url: str
+    started_at: datetime
+    answered_at: Optional[datetime]
+    ended_at: Optional[datetime]
+    raw_payload: dict[str, Any]
+
+    def summary(self) -> str:
+        """The fields the push log line shows."""
+        return (
+            f"raw_event={self.raw_event!r} "
+            f"mapped_type={self.event_type} "
+            f"uniqueid={self.uniqueid} "
+            f"extension={self.extension} "
+            f"caller={self.caller} "
+            f"callee={self.callee} "
+            f"direction={self.direction} "
+            f"external_phone={self.external_phone} "
+            f"disposition={self.disposition}"
+        )
+
+
+def _fold_keys(data: dict[str, Any]) -> dict[str, Any]:
+    """The payload keyed by lower-cased field name."""
+    folded = {str(key).lower(): value for key, value in data.items()}
+    if len(folded) < len(data):
+        # Two spellings of one field: keep the first non-blank one, as ZYCOO intends.
+        folded = {}
+        for key, value in data.items():
+            name = str(key).lower()
+            if folded.get(name) is None or not str(folded[name]).strip():
+                folded[name] = value
+    return folded
+
+
+def _first(fields: dict[str, Any], *keys: str, default: str = "") -> str:
+    """First non-blank value among ``keys`` (lower-case names) in a :func:`_fold_keys` dict."""
     for key in keys:
-        val = data.get(key)
-        if val is not None and str(val).strip() != "":
-            return str(val).strip()
+        val = fields.get(key)
+        if val is not None:
+            text = val.strip() if isinstance(val, str) else str(val).strip()
+            if text:
+                return text
     return default
 
 
@@ -87,8 +150,8 @@ def _map_disposition(raw: str) -> PbxCallDisposition:
     return PbxCallDisposition.UNKNOWN
 
 
-def _infer_direction(data: dict[str, Any], caller: str, callee: str, extension: str) -> PbxCallDirection:
-    explicit = _first(data, "Direction", "direction", "CallType", "call_type").lower()
+def _infer_direction(fields: dict[str, Any], caller: str, callee: str, extension: str) -> PbxCallDirection:
+    explicit = _first(fields, "direction", "calltype", "call_type").lower()
     if explicit in ("inbound", "incoming", "in"):
         return PbxCallDirection.INBOUND
     if explicit in ("outbound", "outgoing", "out"):
@@ -96,10 +159,9 @@ def _infer_direction(data: dict[str, Any], caller: str, callee: str, extension:
     if explicit == "internal":
         return PbxCallDirection.INTERNAL
     # Heuristic: external number on caller with local extension as callee → inbound
-    caller_digits = "".join(c for c in caller if c.isdigit())
-    if extension and callee == extension and len(caller_digits) >= 7:
+    if extension and callee == extension and _digit_count(caller) >= 7:
         return PbxCallDirection.INBOUND
-    if extension and caller == extension and len("".join(c for c in callee if c.isdigit())) >= 7:
+    if extension and caller == extension and _digit_count(callee) >= 7:
         return PbxCallDirection.OUTBOUND
     return PbxCallDirection.INBOUND
 
@@ -114,18 +176,24 @@ def _clean_caller_id(val: str) -> str:
     return cleaned
 
 
+_NON_DIGIT = re.compile(r"\D")
+
+
+def _digit_count(val: str) -> int:
+    return len(_NON_DIGIT.sub("", val))
+
+
 def _looks_like_extension(val: str) -> bool:
-    digits = re.sub(r"\D", "", val or "")
-    return bool(digits) and len(digits) <= 6
+    return 0 < _digit_count(val or "") <= 6
 
 
 def _resolve_extension(
-    data: dict[str, Any], caller: str, callee: str, exten: str
+    fields: dict[str, Any], caller: str, callee: str, exten: str
 ) -> str:
     """Prefer DestCallerIDNum / short numeric IDs over Asterisk placeholder Exten 's'."""
     candidates = (
-        _first(data, "DestCallerIDNum", "DestConnectedLineNum"),
-        _first(data, "DestExten", "DestExtension"),
+        _first(fields, "destcalleridnum", "destconnectedlinenum"),
+        _first(fields, "destexten", "destextension"),
         exten,
         callee,
         caller,
@@ -133,7 +201,7 @@ def _resolve_extension(
     for candidate in candidates:
         cleaned = _clean_caller_id(candidate)
         if cleaned and _looks_like_extension(cleaned):
-            return re.sub(r"\D", "", cleaned) or cleaned
+            return _NON_DIGIT.sub("", cleaned) or cleaned
     return exten
 
 
@@ -153,150 +221,93 @@ def _strip_quoted_phone(val: str) -> str:
     return _clean_caller_id(text.strip('"'))
 
 
-def _enrich_cdr_event(
-    data: dict[str, Any],
-    *,
-    caller: str,
-    callee: str,
-    extension: str,
-    disposition: PbxCallDisposition,
-    duration_sec: int,
-    billsec: int,
-    recording_path: str,
-) -> dict[str, Any]:
-    """Map ZYCOO Cdr push fields (see recording_filename in CDR body)."""
-    src = _strip_quoted_phone(_first(data, "Source", "CallSrcNum"))
-    dest = _clean_caller_id(_first(data, "Destination", "CallDestNum", "Destination"))
-    ext = _clean_caller_id(_first(data, "CallDestNum", "Destination"))
+_RECORDING_KEYS = ("recording_filename", "recordingfile", "recording")
+
+
+def _external_phone(direction: PbxCallDirection, caller: str, callee: str) -> str:
+    return caller if direction == PbxCallDirection.INBOUND else callee
+
+
+def _enrich_cdr_event(fields: dict[str, Any], event: PbxEvent) -> None:
+    """Map ZYCOO Cdr push fields (see recording_filename in CDR body) onto ``event``."""
+    src = _strip_quoted_phone(_first(fields, "source", "callsrcnum"))
+    dest = _clean_caller_id(_first(fields, "destination", "calldestnum"))
+    ext = _clean_caller_id(_first(fields, "calldestnum", "destination"))
     if ext and _looks_like_extension(ext):
-        extension = re.sub(r"\D", "", ext) or ext
+        event.extension = _NON_DIGIT.sub("", ext) or ext
     if src:
-        caller = src
+        event.caller = src
     if dest and not _looks_like_extension(dest):
-        callee = dest
-    disp_raw = _first(data, "Disposition", "disposition")
+        event.callee = dest
+    disp_raw = _first(fields, "disposition")
     if disp_raw:
-        disposition = _map_disposition(disp_raw)
-    dur = _parse_int(_first(data, "Duration", "duration"))
+        event.disposition = _map_disposition(disp_raw)
+    dur = _parse_int(_first(fields, "duration"))
     if dur:
-        duration_sec = dur
-    talk = _parse_int(_first(data, "BillableSeconds", "billsec", "Billsec"))
+        event.duration_sec = dur
+    talk = _parse_int(_first(fields, "billableseconds", "billsec"))
     if talk:
-        billsec = talk
-    rec = _first(
-        data,
-        "recording_filename",
-        "RecordingFile",
-        "recordingfile",
-        "Recording",
-        "recording",
-    )
+        event.billsec = talk
+    rec = _first(fields, *_RECORDING_KEYS)
     if rec:
-        recording_path = rec
-    return {
-        "caller": caller,
-        "callee": callee,
-        "extension": extension,
-        "disposition": disposition,
-        "duration_sec": duration_sec,
-        "billsec": billsec,
-        "recording_path": recording_path,
-    }
-
-
-def parse_zycoo_payload(raw_body: bytes, content_type: str = "") -> dict[str, Any]:
-    """Return normalized PBX event dict from raw webhook body."""
-    data = _parse_body(raw_body, content_type)
-    raw_event = _first(data, "Event", "event", "Action", "action", "type", "Type")
+        event.recording_path = rec
+    event.direction = _infer_direction(fields, event.caller, event.callee, event.extension)
+    event.external_phone = _external_phone(event.direction, event.caller, event.callee)
+
+
+def parse_zycoo_payload(raw_body: bytes, content_type: str = "") -> PbxEvent:
+    """Return the normalized PBX event from a raw webhook body."""
+    return parse_zycoo_event(_parse_body(raw_body, content_type))
+
+
+def parse_zycoo_event(data: dict[str, Any]) -> PbxEvent:
+    """Normalize an already-decoded event (e.g. one entry of a connector batch)."""
+    fields = _fold_keys(data)
+    raw_event = _first(fields, "event", "action", "type")
     event_type = _map_event(raw_event)
 
-    uniqueid = _first(data, "Uniqueid", "uniqueid", "UniqueID", "CallID", "call_id", "id")
-    linkedid = _first(data, "Linkedid", "linkedid", "LinkedID")
+    uniqueid = _first(fields, "uniqueid", "callid", "call_id", "id")
+    linkedid = _first(fields, "linkedid")
     if not uniqueid:
         uniqueid = linkedid or f"unknown-{timezone.now().timestamp()}"
     if not linkedid:
         linkedid = uniqueid
 
-    caller = _clean_caller_id(
-        _first(data, "CallerIDNum", "calleridnum", "Caller", "caller", "From", "from", "src")
-    )
+    caller = _clean_caller_id(_first(fields, "calleridnum", "caller", "from", "src"))
     callee = _clean_caller_id(
-        _first(
-            data,
-            "ConnectedLineNum",
-            "connectedlinenum",
-            "Callee",
-            "callee",
-            "To",
-            "to",
-            "dst",
-            "DialString",
-        )
+        _first(fields, "connectedlinenum", "callee", "to", "dst", "dialstring")
     )
-    exten_raw = _first(data, "Exten", "exten", "Extension", "extension", "Agent", "agent")
-    extension = _resolve_extension(data, caller, callee, exten_raw)
+    exten_raw = _first(fields, "exten", "extension", "agent")
+    extension = _resolve_extension(fields, caller, callee, exten_raw)
 
-    direction = _infer_direction(data, caller, callee, extension)
-    external_phone = caller if direction == PbxCallDirection.INBOUND else callee
+    direction = _infer_direction(fields, caller, callee, extension)
+    external_phone = _external_phone(direction, caller, callee)
     if external_phone.lower() in _PLACEHOLDER_CID:
         external_phone = ""
     if direction == PbxCallDirection.OUTBOUND and not external_phone:
         external_phone = callee
 
-    disposition = _map_disposition(_first(data, "Disposition", "disposition", "Status", "status"))
-    duration_sec = _parse_int(_first(data, "Duration", "duration"))
-    billsec = _parse_int(_first(data, "Billsec", "billsec", "TalkTime", "talk_time"))
-    recording_path = _first(
-        data,
-        "recording_filename",
-        "RecordingFile",
-        "recordingfile",
-        "Recording",
-        "recording",
-    )
-    recording_url = _first(data, "RecordingUrl", "recording_url", "RecordingURL")
-
-    if (raw_event or "").lower() == "cdr":
-        cdr = _enrich_cdr_event(
-            data,
-            caller=caller,
-            callee=callee,
-            extension=extension,
-            disposition=disposition,
-            duration_sec=duration_sec,
-            billsec=billsec,
-            recording_path=recording_path,
-        )
-        caller = cdr["caller"]
-        callee = cdr["callee"]
-        extension = cdr["extension"]
-        disposition = cdr["disposition"]
-        duration_sec = cdr["duration_sec"]
-        billsec = cdr["billsec"]
-        recording_path = cdr["recording_path"]
-        direction = _infer_direction(data, caller, callee, extension)
-        external_phone = caller if direction == PbxCallDirection.INBOUND else callee
-        if direction == PbxCallDirection.OUTBOUND and not external_phone:
-            external_phone = callee
-
     now = timezone.now()
-    return {
-        "event_type": event_type,
-        "raw_event": raw_event,
-        "uniqueid": uniqueid,
-        "linkedid": linkedid,
-        "direction": direction,
-        "caller": caller,
-        "callee": callee,
-        "extension": extension,
-        "external_phone": external_phone,
-        "disposition": disposition,
-        "duration_sec": duration_sec,
-        "billsec": billsec,
-        "recording_path": recording_path,
-        "recording_url": recording_url,
-        "started_at": now,
-        "answered_at": now if event_type == PbxEventType.ANSWERED else None,
-        "ended_at": now if event_type in (PbxEventType.HANGUP, PbxEventType.MISSED) else None,
-        "raw_payload": data,
-    }
+    event = PbxEvent(
+        event_type=event_type,
+        raw_event=raw_event,
+        uniqueid=uniqueid,
+        linkedid=linkedid,
+        direction=direction,
+        caller=caller,
+        callee=callee,
+        extension=extension,
+        external_phone=external_phone,
+        disposition=_map_disposition(_first(fields, "disposition", "status")),
+        duration_sec=_parse_int(_first(fields, "duration")),
+        billsec=_parse_int(_first(fields, "billsec", "talktime", "talk_time")),
+        recording_path=_first(fields, *_RECORDING_KEYS),
+        recording_url=_first(fields, "recordingurl", "recording_url"),
+        started_at=now,
+        answered_at=now if event_type == PbxEventType.ANSWERED else None,
+        ended_at=now if event_type in (PbxEventType.HANGUP, PbxEventType.MISSED) else None,
+        raw_payload=data,
+    )
+    if raw_event.lower() == "cdr":
+        _enrich_cdr_event(fields, event)
+    return event
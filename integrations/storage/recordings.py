@@ -1,15 +1,35 @@
-"""PBX call recording object storage (local dev, S3/R2 prod)."""
+"""
+PBX call recording object storage (local dev, S3/R2 prod).
+
+Recordings run to an hour or more, so neither direction holds a whole file in memory:
+uploads are copied to storage in chunks (a ``.part`` file renamed into place locally,
+a multipart upload on S3/R2), and playback goes through ``recording_response``, which
+streams only the byte range the player asked for.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import io
 import logging
+import os
 import uuid
 from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
 
 from django.conf import settings
 
+from crm_saas_api.file_responses import (
+    STREAM_CHUNK_SIZE,
+    ranged_file_response,
+    ranged_stream_response,
+)
+
 logger = logging.getLogger(__name__)
 
+# S3 rejects multipart parts under 5 MiB (except the last one).
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
 
 def _s3_client():
     """Lazy boto3 import — only required when RECORDING_STORAGE_BACKEND is s3 or r2."""
@@ -56,39 +76,108 @@ def save_recording(
     prefix: str = "pbx",
 ) -> str:
     """Persist recording bytes; returns opaque storage key."""
+    return save_recording_stream(
+        company_id=company_id,
+        linkedid=linkedid,
+        fileobj=io.BytesIO(file_bytes),
+        original_filename=original_filename,
+        prefix=prefix,
+    )
+
+
+def save_recording_stream(
+    *,
+    company_id: int,
+    linkedid: str,
+    fileobj: BinaryIO,
+    original_filename: str,
+    prefix: str = "pbx",
+) -> str:
+    """Copy a readable binary file (e.g. an UploadedFile) to storage in chunks; returns the key."""
     key = build_storage_key(
         company_id, linkedid, original_filename, prefix=prefix
     )
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
     backend = _backend_name()
 
     if backend in ("s3", "r2"):
-        return _save_s3(key, file_bytes)
+        return _save_s3(key, fileobj)
 
-    return _save_local(key, file_bytes)
+    return _save_local(key, fileobj)
 
 
-def _save_local(key: str, file_bytes: bytes) -> str:
-    root = Path(settings.MEDIA_ROOT) / "pbx_recordings"
-    dest = root / key
+def _local_path(key: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / "pbx_recordings" / key
+
+
+def _save_local(key: str, fileobj: BinaryIO) -> str:
+    dest = _local_path(key)
     dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_bytes(file_bytes)
-    logger.info("Saved PBX recording locally key=%s bytes=%s", key, len(file_bytes))
+    # Written under a temporary name so a failed copy never leaves a truncated
+    # recording at the final key.
+    partial = dest.with_name(dest.name + ".part")
+    size = 0
+    try:
+        with partial.open("wb") as out:
+            while chunk := fileobj.read(STREAM_CHUNK_SIZE):
+                out.write(chunk)
+                size += len(chunk)
+        os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    logger.info("Saved PBX recording locally key=%s bytes=%s", key, size)
     return key
 
 
-def _save_s3(key: str, file_bytes: bytes) -> str:
+def _bucket() -> str:
     bucket = (getattr(settings, "RECORDING_S3_BUCKET", "") or "").strip()
     if not bucket:
         raise RuntimeError("RECORDING_S3_BUCKET is not configured")
+    return bucket
 
+
+def _save_s3(key: str, fileobj: BinaryIO) -> str:
+    bucket = _bucket()
     client = _s3_client()
-    client.put_object(
-        Bucket=bucket,
-        Key=key,
-        Body=file_bytes,
-        ContentType=_guess_content_type(key),
+    content_type = _guess_content_type(key)
+
+    first = fileobj.read(MULTIPART_PART_SIZE)
+    if len(first) < MULTIPART_PART_SIZE:
+        # Fits in one part: a plain PUT is one request instead of three.
+        client.put_object(Bucket=bucket, Key=key, Body=first, ContentType=content_type)
+        logger.info("Saved PBX recording to S3 key=%s bytes=%s", key, len(first))
+        return key
+
+    upload_id = client.create_multipart_upload(
+        Bucket=bucket, Key=key, ContentType=content_type
+    )["UploadId"]
+    parts = []
+    size = 0
+    try:
+        chunk = first
+        while chunk:
+            number = len(parts) + 1
+            result = client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=chunk
+            )
+            parts.append({"PartNumber": number, "ETag": result["ETag"]})
+            size += len(chunk)
+            chunk = fileobj.read(MULTIPART_PART_SIZE)
+        client.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except BaseException:
+        # Uploaded parts are billed until the upload is aborted.
+        try:
+            client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception:
+            logger.exception("Failed to abort multipart upload key=%s", key)
+        raise
+    logger.info(
+        "Saved PBX recording to S3 key=%s bytes=%s parts=%s", key, size, len(parts)
     )
-    logger.info("Saved PBX recording to S3 key=%s bytes=%s", key, len(file_bytes))
     return key
 
 
@@ -102,19 +191,109 @@ def open_recording(storage_key: str):
     return _open_local(storage_key)
 
 
+def copy_recording_to(storage_key: str, dest: BinaryIO) -> int:
+    """Copy a stored recording into ``dest`` in chunks; returns the byte count."""
+    src = open_recording(storage_key)
+    size = 0
+    try:
+        while chunk := src.read(STREAM_CHUNK_SIZE):
+            dest.write(chunk)
+            size += len(chunk)
+    finally:
+        src.close()
+    return size
+
+
+def delete_recording(storage_key: str) -> None:
+    """Remove a stored recording; a key that is already gone is not an error."""
+    if not storage_key:
+        return
+    backend = _backend_name()
+    if backend in ("s3", "r2"):
+        _s3_client().delete_object(Bucket=_bucket(), Key=storage_key)
+    else:
+        _local_path(storage_key).unlink(missing_ok=True)
+    logger.info("Deleted recording key=%s", storage_key)
+
+
 def _open_local(storage_key: str):
-    path = Path(settings.MEDIA_ROOT) / "pbx_recordings" / storage_key
+    path = _local_path(storage_key)
     if not path.is_file():
         raise FileNotFoundError(str(path))
     return path.open("rb")
 
 
 def _open_s3(storage_key: str):
-    bucket = (getattr(settings, "RECORDING_S3_BUCKET", "") or "").strip()
-    if not bucket:
-        raise RuntimeError("RECORDING_S3_BUCKET is not configured")
     client = _s3_client()
-    return client.get_object(Bucket=bucket, Key=storage_key)["Body"]
+    return client.get_object(Bucket=_bucket(), Key=storage_key)["Body"]
+
+
+def recording_response(
+    request,
+    storage_key: str,
+    *,
+    filename: str,
+    content_type: Optional[str] = None,
+):
+    """
+    Inline playback response for a stored recording, honouring HTTP Range.
+
+    Seeking in an audio player then fetches only the requested bytes (206) instead of
+    re-downloading from the start. Raises FileNotFoundError when the blob is missing.
+    """
+    if not storage_key:
+        raise FileNotFoundError("empty storage key")
+    content_type = content_type or _guess_content_type(storage_key)
+    if _backend_name() in ("s3", "r2"):
+        return _s3_recording_response(
+            request, storage_key, filename=filename, content_type=content_type
+        )
+
+    path = _local_path(storage_key)
+    if not path.is_file():
+        raise FileNotFoundError(str(path))
+    # Keys embed a fresh uuid per upload, so the key itself identifies the content.
+    etag = '"%s"' % hashlib.sha1(storage_key.encode()).hexdigest()[:20]
+    return ranged_file_response(
+        request,
+        path,
+        filename=filename,
+        content_type=content_type,
+        as_attachment=False,
+        etag=etag,
+    )
+
+
+def _s3_recording_response(request, storage_key: str, *, filename: str, content_type: str):
+    bucket = _bucket()
+    client = _s3_client()
+    try:
+        head = client.head_object(Bucket=bucket, Key=storage_key)
+    except client.exceptions.ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            raise FileNotFoundError(storage_key) from exc
+        raise
+
+    def read_range(start: int, length: int) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        body = client.get_object(
+            Bucket=bucket, Key=storage_key, Range=f"bytes={start}-{start + length - 1}"
+        )["Body"]
+        try:
+            yield from body.iter_chunks(STREAM_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    return ranged_stream_response(
+        request,
+        size=int(head["ContentLength"]),
+        read_range=read_range,
+        filename=filename,
+        content_type=content_type,
+        as_attachment=False,
+        etag=head.get("ETag"),
+    )
 
 
 def _guess_content_type(key: str) -> str:
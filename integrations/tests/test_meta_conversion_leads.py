@@ -1,18 +1,27 @@
 """Tests for Meta Conversion Leads CAPI integration."""
 
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
+import requests
 from django.utils import timezone
 
 from crm.models import Client
 from crm.serializers import ClientSerializer
-from integrations.models import IntegrationAccount
+from integrations.models import (
+    IntegrationAccount,
+    IntegrationLog,
+    MetaConversionEvent,
+    MetaConversionEventStatus,
+)
 from integrations.serializers import IntegrationAccountUpdateSerializer
 from integrations.services.meta_conversion_leads import (
     EVENT_RAW_LEAD,
+    EVENT_UNQUALIFIED,
+    MAX_SEND_ATTEMPTS,
     apply_qualification_status_change,
     build_conversion_lead_event,
+    flush_pixel_queue,
     send_conversion_lead_event,
 )
 
@@ -209,3 +218,171 @@ def test_pixel_id_validation_strips_whitespace(company):
     account.refresh_from_db()
 
     assert account.metadata["pixel_id"] == "1234567890"
+
+
+def _http_error(status_code):
+    return requests.exceptions.HTTPError(
+        f"Facebook API: HTTP {status_code}", response=Mock(status_code=status_code)
+    )
+
+
+@pytest.fixture
+def conversion_queue(settings):
+    settings.META_CONVERSION_QUEUE_ENABLED = True
+    settings.META_CONVERSION_BATCH_SIZE = 2
+    with patch("django_q.tasks.async_task") as enqueue:
+        yield enqueue
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_queued_events_are_sent_in_batches_per_pixel(mock_send, conversion_queue, company):
+    mock_send.return_value = {"events_received": 2}
+    account = _create_meta_account(company)
+    clients = [
+        _create_meta_client(company, account, meta_leadgen_id=f"55500{i}") for i in range(3)
+    ]
+
+    for client in clients:
+        apply_qualification_status_change(client, "qualified", None)
+
+    mock_send.assert_not_called()
+    assert MetaConversionEvent.objects.filter(account=account).count() == 3
+    assert conversion_queue.call_count == 3
+    assert conversion_queue.call_args.args[1:] == (account.id, "1234567890123")
+
+    assert flush_pixel_queue(account.id, "1234567890123") == 3
+
+    assert [len(call.args[2]) for call in mock_send.call_args_list] == [2, 1]
+    assert {call.args[1] for call in mock_send.call_args_list} == {"test-access-token"}
+    assert not MetaConversionEvent.objects.exists()
+    for client in clients:
+        client.refresh_from_db()
+        assert client.meta_qualification_sent_at is not None
+        assert client.meta_qualification_error is None
+    assert IntegrationLog.objects.filter(
+        account=account, action="meta_conversion_lead_event", status="success"
+    ).count() == 2
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_newer_change_replaces_pending_event(mock_send, conversion_queue, company):
+    account = _create_meta_account(company)
+    client = _create_meta_client(company, account)
+
+    apply_qualification_status_change(client, "qualified", None)
+    apply_qualification_status_change(client, "unqualified", "qualified")
+
+    assert list(MetaConversionEvent.objects.values_list("event_name", flat=True)) == [
+        EVENT_UNQUALIFIED
+    ]
+
+    apply_qualification_status_change(client, None, "unqualified")
+    assert not MetaConversionEvent.objects.exists()
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.time.sleep")
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_transient_failures_back_off_then_give_up(mock_send, mock_sleep, conversion_queue, company):
+    mock_send.side_effect = _http_error(503)
+    account = _create_meta_account(company)
+    client = _create_meta_client(company, account)
+    apply_qualification_status_change(client, "qualified", None)
+
+    assert flush_pixel_queue(account.id, "1234567890123") == 0
+
+    # Retried in place before the batch went back to the queue.
+    assert mock_send.call_count == 3
+    assert mock_sleep.call_count == 2
+    event = MetaConversionEvent.objects.get()
+    assert event.status == MetaConversionEventStatus.PENDING
+    assert event.attempts == 1 and event.next_attempt_at > timezone.now()
+    client.refresh_from_db()
+    assert client.meta_qualification_error is None
+
+    MetaConversionEvent.objects.update(attempts=MAX_SEND_ATTEMPTS - 1, next_attempt_at=timezone.now())
+    flush_pixel_queue(account.id, "1234567890123")
+
+    event.refresh_from_db()
+    client.refresh_from_db()
+    assert event.status == MetaConversionEventStatus.FAILED
+    assert client.meta_qualification_sent_at is None
+    assert client.meta_qualification_error == "metaQualificationErrorSendFailed"
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.time.sleep")
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_client_errors_are_not_retried_in_place(mock_send, mock_sleep, conversion_queue, company):
+    mock_send.side_effect = _http_error(400)
+    account = _create_meta_account(company)
+    client = _create_meta_client(company, account)
+    apply_qualification_status_change(client, "qualified", None)
+
+    flush_pixel_queue(account.id, "1234567890123")
+
+    mock_send.assert_called_once()
+    mock_sleep.assert_not_called()
+    assert MetaConversionEvent.objects.get().attempts == 1
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.time.sleep")
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_invalid_event_does_not_sink_its_batch(
+    mock_send, mock_sleep, conversion_queue, company, settings,
+):
+    settings.META_CONVERSION_BATCH_SIZE = 4
+    bad_lead_id = 666000
+
+    def send(pixel_id, access_token, events):
+        # Like the Conversions API: one invalid event rejects the whole request.
+        if any(event["user_data"]["lead_id"] == bad_lead_id for event in events):
+            raise _http_error(400)
+        return {"events_received": len(events)}
+
+    mock_send.side_effect = send
+    account = _create_meta_account(company)
+    clients = [
+        _create_meta_client(company, account, meta_leadgen_id=f"55500{i}") for i in range(3)
+    ]
+    bad = _create_meta_client(company, account, meta_leadgen_id=str(bad_lead_id))
+    for client in [*clients[:2], bad, clients[2]]:
+        apply_qualification_status_change(client, "qualified", None)
+
+    assert flush_pixel_queue(account.id, "1234567890123") == 3
+
+    mock_sleep.assert_not_called()
+    for client in clients:
+        client.refresh_from_db()
+        assert client.meta_qualification_sent_at is not None
+    event = MetaConversionEvent.objects.get()
+    assert event.client_id == bad.pk
+    assert event.status == MetaConversionEventStatus.PENDING and event.attempts == 1
+
+    # Only the invalid event keeps failing, and only it is eventually given up.
+    MetaConversionEvent.objects.update(attempts=MAX_SEND_ATTEMPTS - 1, next_attempt_at=timezone.now())
+    flush_pixel_queue(account.id, "1234567890123")
+    event.refresh_from_db()
+    bad.refresh_from_db()
+    assert event.status == MetaConversionEventStatus.FAILED
+    assert bad.meta_qualification_error == "metaQualificationErrorSendFailed"
+    for client in clients:
+        client.refresh_from_db()
+        assert client.meta_qualification_error is None
+
+
+@pytest.mark.django_db
+@patch("integrations.services.meta_conversion_leads.MetaOAuth.send_conversion_leads_events")
+def test_queue_rejects_leads_without_pixel(mock_send, conversion_queue, company):
+    account = _create_meta_account(company, metadata={})
+    client = _create_meta_client(company, account)
+
+    apply_qualification_status_change(client, "qualified", None)
+    client.refresh_from_db()
+
+    assert not MetaConversionEvent.objects.exists()
+    conversion_queue.assert_not_called()
+    assert client.meta_qualification_error == "metaQualificationErrorNoPixelConfigured"
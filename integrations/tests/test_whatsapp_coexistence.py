@@ -335,7 +335,7 @@ def test_partner_removed_disconnects(whatsapp_setup):
 
 
 @pytest.mark.django_db
-@patch("integrations.services.whatsapp_coexistence.requests.post")
+@patch("integrations.services.whatsapp_coexistence.graph_http.post")
 def test_initiate_smb_app_data_sync_calls_both(mock_post, settings):
     from integrations.services.whatsapp_coexistence import initiate_smb_app_data_sync
 
@@ -355,7 +355,7 @@ def test_initiate_smb_app_data_sync_calls_both(mock_post, settings):
     assert sync_types == ["smb_app_state_sync", "history"]
 
 
-@patch("integrations.services.whatsapp_coexistence.requests.post")
+@patch("integrations.services.whatsapp_coexistence.graph_http.post")
 def test_register_cloud_phone_number_ok(mock_post):
     from integrations.services.whatsapp_coexistence import register_cloud_phone_number
 
@@ -375,7 +375,7 @@ def test_register_cloud_phone_number_ok(mock_post):
     }
 
 
-@patch("integrations.services.whatsapp_coexistence.requests.post")
+@patch("integrations.services.whatsapp_coexistence.graph_http.post")
 def test_subscribe_waba_webhooks_uses_bearer(mock_post):
     from integrations.services.whatsapp_coexistence import subscribe_waba_webhooks
 
@@ -117,7 +117,7 @@ def test_inbound_location_webhook_stores_coords(whatsapp_setup, company):
 
 
 @pytest.mark.django_db
-@patch("integrations.views.webhooks_messaging.requests.post")
+@patch("integrations.views.webhooks_messaging.graph_http.post")
 def test_send_location_happy_path(mock_post, whatsapp_setup, company, admin_user, subscription):
     _account, wa = whatsapp_setup
     lead = Client.objects.create(
@@ -76,6 +76,7 @@ from .views import (
 from .whatsapp_webhook import whatsapp_webhook
 from .views.lead_api import (
     inbound_lead_view,
+    inbound_lead_batch_view,
     LeadApiConfigView,
     LeadApiKeyCreateView,
     LeadApiKeyRotateView,
@@ -98,6 +99,7 @@ urlpatterns = [
     path('accounts/lead-api-keys/<int:key_id>/', LeadApiKeyRevokeView.as_view(), name='lead_api_key_revoke'),
     path('accounts/mujeb-config/', MujebConfigView.as_view(), name='mujeb_config'),
     path('leads/inbound/', inbound_lead_view, name='inbound_lead'),
+    path('leads/inbound/batch/', inbound_lead_batch_view, name='inbound_lead_batch'),
     path('leads/mujeb/check/', mujeb_check_lead_view, name='mujeb_check_lead'),
     path('leads/mujeb/', mujeb_inbound_lead_view, name='mujeb_inbound_lead'),
     path('', include(router.urls)),
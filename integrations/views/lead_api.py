@@ -19,7 +19,11 @@ from integrations.decorators import rate_limit_webhook
 from integrations.lead_api_keys import extract_lead_api_key_from_request, resolve_active_api_key
 from integrations.models import CompanyLeadApiKey, IntegrationAccount
 from integrations.serializers_lead_api import InboundLeadSerializer
-from integrations.services.inbound_lead import create_inbound_lead, get_or_create_lead_api_account
+from integrations.services.inbound_lead import (
+    create_inbound_lead,
+    create_inbound_leads_batch,
+    get_or_create_lead_api_account,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,58 @@ def _inbound_endpoint_url() -> str:
     return "/api/v1/integrations/leads/inbound/"
 
 
+def _authenticate_and_parse(request):
+    """Resolve the Lead API key and JSON body: (key_row, body, error_response or None)."""
+    raw_key = extract_lead_api_key_from_request(request)
+    if not raw_key:
+        return None, None, error_response(
+            "API key is required. Use Authorization: Bearer <key> or X-Lead-Api-Key.",
+            code="missing_api_key",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    key_row = resolve_active_api_key(raw_key)
+    if not key_row:
+        return None, None, error_response(
+            "Invalid or inactive API key.",
+            code="invalid_api_key",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    try:
+        body = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return key_row, None, error_response(
+            "Invalid JSON body.",
+            code="invalid_json",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return key_row, body, None
+
+
+def _lead_create_error_response(exc, company):
+    from rest_framework.exceptions import ValidationError as DRFValidationError
+
+    if isinstance(exc, DRFValidationError):
+        detail = exc.detail
+        if isinstance(detail, dict):
+            code = detail.get("code") or detail.get("error_key") or "validation_error"
+            message = detail.get("error") or detail.get("message") or str(detail)
+            status_code = getattr(exc, "status_code", status.HTTP_400_BAD_REQUEST)
+            if code == "plan_quota_max_clients_exceeded" or detail.get("error_key") == "plan_quota_max_clients_exceeded":
+                status_code = status.HTTP_403_FORBIDDEN
+            if detail.get("code") == "integration_disabled":
+                status_code = status.HTTP_403_FORBIDDEN
+            return error_response(str(message), code=str(code), status_code=status_code, details=detail)
+        return validation_error_response(detail)
+    logger.exception("Lead API inbound error company_id=%s", company.id)
+    return error_response(
+        "Failed to create lead.",
+        code="lead_create_failed",
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    )
+
+
 @extend_schema(
     tags=["Lead API"],
     request=InboundLeadSerializer,
@@ -58,32 +114,11 @@ def inbound_lead_view(request):
     POST /api/v1/integrations/leads/inbound/
     Auth: Authorization: Bearer <company_lead_api_key> or X-Lead-Api-Key header.
     """
-    raw_key = extract_lead_api_key_from_request(request)
-    if not raw_key:
-        return error_response(
-            "API key is required. Use Authorization: Bearer <key> or X-Lead-Api-Key.",
-            code="missing_api_key",
-            status_code=status.HTTP_401_UNAUTHORIZED,
-        )
-
-    key_row = resolve_active_api_key(raw_key)
-    if not key_row:
-        return error_response(
-            "Invalid or inactive API key.",
-            code="invalid_api_key",
-            status_code=status.HTTP_401_UNAUTHORIZED,
-        )
+    key_row, body, denied = _authenticate_and_parse(request)
+    if denied:
+        return denied
 
     company = key_row.company
-    try:
-        body = json.loads(request.body) if request.body else {}
-    except json.JSONDecodeError:
-        return error_response(
-            "Invalid JSON body.",
-            code="invalid_json",
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
     serializer = InboundLeadSerializer(data=body, company=company)
     if not serializer.is_valid():
         return validation_error_response(serializer.errors)
@@ -96,32 +131,101 @@ def inbound_lead_view(request):
             payload=serializer.validated_data,
         )
     except Exception as exc:
-        from rest_framework.exceptions import ValidationError as DRFValidationError
-
-        if isinstance(exc, DRFValidationError):
-            detail = exc.detail
-            if isinstance(detail, dict):
-                code = detail.get("code") or detail.get("error_key") or "validation_error"
-                message = detail.get("error") or detail.get("message") or str(detail)
-                status_code = getattr(exc, "status_code", status.HTTP_400_BAD_REQUEST)
-                if code == "plan_quota_max_clients_exceeded" or detail.get("error_key") == "plan_quota_max_clients_exceeded":
-                    status_code = status.HTTP_403_FORBIDDEN
-                if detail.get("code") == "integration_disabled":
-                    status_code = status.HTTP_403_FORBIDDEN
-                return error_response(str(message), code=str(code), status_code=status_code, details=detail)
-            return validation_error_response(detail)
-        logger.exception("Lead API inbound error company_id=%s", company.id)
-        return error_response(
-            "Failed to create lead.",
-            code="lead_create_failed",
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+        return _lead_create_error_response(exc, company)
 
     if created:
         return success_response(data=data, status_code=status.HTTP_201_CREATED)
     return success_response(data=data, status_code=status.HTTP_200_OK)
 
 
+@extend_schema(
+    tags=["Lead API"],
+    request=inline_serializer(
+        name="InboundLeadBatch",
+        fields={"leads": InboundLeadSerializer(many=True)},
+    ),
+    responses={
+        200: inline_serializer(
+            name="InboundLeadBatchResult",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "data": drf_serializers.DictField(),
+            },
+        ),
+    },
+    auth=[],
+)
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@rate_limit_webhook(max_requests=30, window=60)
+def inbound_lead_batch_view(request):
+    """
+    POST /api/v1/integrations/leads/inbound/batch/
+    Body: {"leads": [<lead>, ...]} with up to LEAD_API_BATCH_MAX_LEADS items, each with
+    the fields of inbound_lead_view. Auth as inbound_lead_view; the key, gate and
+    integration account are resolved once for the whole batch. Returns one result per
+    lead, in order: ``status`` is created, duplicate (``external_id`` / phone already
+    known, including repeats inside the batch) or invalid (with ``errors``).
+    """
+    key_row, body, denied = _authenticate_and_parse(request)
+    if denied:
+        return denied
+
+    company = key_row.company
+    items = body.get("leads") if isinstance(body, dict) else None
+    max_leads = int(getattr(settings, "LEAD_API_BATCH_MAX_LEADS", 500))
+    if not isinstance(items, list) or not items:
+        return error_response(
+            '"leads" must be a non-empty array.',
+            code="invalid_batch",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(items) > max_leads:
+        return error_response(
+            f"A batch can hold at most {max_leads} leads.",
+            code="batch_too_large",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    reference_ids = InboundLeadSerializer.load_reference_ids(company)
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = InboundLeadSerializer(
+            data=item if isinstance(item, dict) else {},
+            company=company,
+            reference_ids=reference_ids,
+        )
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {"index": index, "status": "invalid", "errors": serializer.errors}
+
+    if valid:
+        account = get_or_create_lead_api_account(company)
+        try:
+            created = create_inbound_leads_batch(
+                company=company,
+                account=account,
+                payloads=[payload for _, payload in valid],
+            )
+        except Exception as exc:
+            return _lead_create_error_response(exc, company)
+        for (index, _), data in zip(valid, created):
+            results[index] = {
+                "index": index,
+                "status": "duplicate" if data["duplicate"] else "created",
+                **data,
+            }
+
+    summary = {
+        state: sum(1 for result in results if result["status"] == state)
+        for state in ("created", "duplicate", "invalid")
+    }
+    return success_response(data={"results": results, **summary})
+
+
 def _require_company_admin(user):
     if not user or not getattr(user, "is_admin", lambda: False)():
         return error_response(
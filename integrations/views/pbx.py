@@ -4,13 +4,13 @@ from __future__ import annotations
 
 import hashlib
 import hmac
-import json
 import logging
+import re
 import secrets
 
 from django.core import signing
-from django.db import OperationalError
-from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.db import OperationalError, transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -36,11 +36,30 @@ from integrations.serializers_pbx import (
     PbxSettingsSerializer,
     UserPbxExtensionSerializer,
 )
-from integrations.services.pbx_handler import log_incoming_zycoo_push, process_pbx_payload
+from integrations.services.pbx_commands import (
+    signal_new_command,
+    record_connector_stats,
+    touch_connector_last_seen,
+    wait_for_commands,
+)
+from integrations.services.pbx_handler import (
+    log_incoming_zycoo_push,
+    process_pbx_events,
+    process_pbx_payload,
+)
+from integrations.services.pbx_event_queue import (
+    enqueue_pbx_payload,
+    pbx_event_queue_enabled,
+)
+from integrations.services.pbx_reports import build_pbx_report
 from integrations.services.pbx_recording_service import (
+    RECORDING_JOB_LIMIT,
+    RecordingOffsetMismatch,
+    append_recording_chunk,
     finalize_recording_upload,
     list_pending_recording_jobs,
     mark_recording_failed,
+    recording_upload_offset,
     stream_recording_for_user,
     verify_playback_token,
 )
@@ -143,8 +162,9 @@ def pbx_webhook(request, webhook_token: str):
         )
         logger.warning("ZYCOO webhook signature rejected company_id=%s", settings.company_id)
         return HttpResponse(status=403)
+    apply = enqueue_pbx_payload if pbx_event_queue_enabled() else process_pbx_payload
     try:
-        result = process_pbx_payload(
+        result = apply(
             settings,
             request.body,
             request.content_type or "",
@@ -307,6 +327,7 @@ def pbx_dial_view(request):
         extension=extension,
         status=PbxDialCommandStatus.PENDING,
     )
+    transaction.on_commit(lambda: signal_new_command(company.id))
     return success_response(PbxDialCommandSerializer(cmd).data, status_code=201)
 
 
@@ -427,8 +448,9 @@ def pbx_connector_heartbeat_view(request):
             code="invalid_connector_key",
             status_code=401,
         )
-    settings.connector_last_seen_at = timezone.now()
-    settings.save(update_fields=["connector_last_seen_at", "updated_at"])
+    touch_connector_last_seen(settings)
+    if isinstance(request.data, dict) and "stats" in request.data:
+        record_connector_stats(settings, request.data["stats"])
     return success_response({"ok": True})
 
 
@@ -447,8 +469,9 @@ def pbx_connector_events_view(request):
     events = request.data.get("events") if isinstance(request.data, dict) else None
     if events is None:
         # single event as raw body
+        apply = enqueue_pbx_payload if pbx_event_queue_enabled() else process_pbx_payload
         try:
-            result = process_pbx_payload(
+            result = apply(
                 settings,
                 request.body,
                 request.content_type or "",
@@ -459,15 +482,14 @@ def pbx_connector_events_view(request):
             logger.exception("Connector event failed")
             return error_response("Processing failed.", status_code=500)
 
-    results = []
-    for ev in events:
-        body = json.dumps(ev).encode("utf-8") if isinstance(ev, dict) else str(ev).encode("utf-8")
-        try:
-            results.append(
-                process_pbx_payload(settings, body, "application/json", source="connector")
-            )
-        except Exception as exc:
-            results.append({"ok": False, "error": str(exc)})
+    if not isinstance(events, list):
+        return error_response("events must be a list.", code="invalid_events", status_code=400)
+    try:
+        results = process_pbx_events(settings, events, source="connector")
+    except Exception:
+        # Nothing was committed; the connector keeps the batch and replays it.
+        logger.exception("Connector event batch failed")
+        return error_response("Processing failed.", status_code=500)
     return success_response({"results": results})
 
 
@@ -483,28 +505,16 @@ def pbx_connector_commands_view(request):
             status_code=401,
         )
 
-    settings.connector_last_seen_at = timezone.now()
-    settings.save(update_fields=["connector_last_seen_at", "updated_at"])
+    touch_connector_last_seen(settings)
 
-    pending = (
-        PbxDialCommand.objects.filter(
-            company=settings.company,
-            status=PbxDialCommandStatus.PENDING,
-        )
-        .order_by("created_at")[:10]
-    )
-    data = []
-    for cmd in pending:
-        cmd.status = PbxDialCommandStatus.PROCESSING
-        cmd.save(update_fields=["status"])
-        data.append(
-            {
-                "id": cmd.id,
-                "phone_number": cmd.phone_number,
-                "extension": cmd.extension,
-            }
-        )
-    return success_response({"commands": data})
+    # ?wait=N: long-poll up to N seconds for a command (connector 1.4+). Without it
+    # the view answers at once, as older connectors expect.
+    try:
+        wait = float(request.query_params.get("wait") or 0)
+    except ValueError:
+        wait = 0.0
+    commands, long_polled = wait_for_commands(settings.company_id, wait)
+    return success_response({"commands": commands, "long_poll": long_polled})
 
 
 @api_view(["POST"])
@@ -546,16 +556,28 @@ def pbx_connector_recording_jobs_view(request):
             code="invalid_connector_key",
             status_code=401,
         )
-    settings.connector_last_seen_at = timezone.now()
-    settings.save(update_fields=["connector_last_seen_at", "updated_at"])
-    jobs = list_pending_recording_jobs(settings.company_id)
+    touch_connector_last_seen(settings)
+    try:
+        limit = int(request.query_params.get("limit") or RECORDING_JOB_LIMIT)
+    except ValueError:
+        limit = RECORDING_JOB_LIMIT
+    jobs = list_pending_recording_jobs(settings.company_id, limit=limit)
     return success_response({"jobs": jobs})
 
 
-@api_view(["POST"])
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+@api_view(["GET", "POST", "PUT"])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def pbx_connector_recording_upload_view(request, record_id: int):
+    """
+    GET: bytes already received for a resumable upload (``{"offset": n}``).
+    PUT: append one range, raw body with ``Content-Range: bytes a-b/total`` and
+    ``X-Recording-Filename``; 409 with the held offset when ``a`` does not match.
+    POST: whole file as multipart ``file`` (connectors before 1.5).
+    """
     settings = _get_settings_by_connector_key(_extract_connector_key(request))
     if not settings:
         return error_response(
@@ -568,8 +590,15 @@ def pbx_connector_recording_upload_view(request, record_id: int):
     except PbxCallRecord.DoesNotExist:
         return error_response("Not found.", status_code=404)
 
+    if request.method == "GET":
+        return success_response(
+            {"offset": recording_upload_offset(record), "status": record.recording_status}
+        )
+    if request.method == "PUT":
+        return _append_recording_range(request, record)
+
     upload = request.FILES.get("file")
-    if not upload:
+    if not upload or not upload.size:
         mark_recording_failed(record_id, company_id=settings.company_id)
         return error_response("Missing file.", code="missing_file", status_code=400)
 
@@ -577,7 +606,7 @@ def pbx_connector_recording_upload_view(request, record_id: int):
         finalize_recording_upload(
             record_id=record.id,
             company_id=settings.company_id,
-            file_bytes=upload.read(),
+            fileobj=upload,
             original_filename=upload.name or "recording.wav",
         )
     except Exception:
@@ -588,6 +617,55 @@ def pbx_connector_recording_upload_view(request, record_id: int):
     return success_response({"ok": True, "record_id": record.id, "status": "ready"})
 
 
+def _append_recording_range(request, record: PbxCallRecord):
+    match = _CONTENT_RANGE_RE.match(request.headers.get("Content-Range") or "")
+    if not match:
+        return error_response(
+            "Content-Range: bytes start-end/total is required.",
+            code="invalid_range",
+            status_code=400,
+        )
+    start, end, total = (int(v) for v in match.groups())
+    length = end - start + 1
+    if request.headers.get("Content-Length") != str(length):
+        return error_response(
+            "Content-Length must match Content-Range.", code="invalid_range", status_code=400
+        )
+    filename = (request.headers.get("X-Recording-Filename") or "").strip() or "recording.wav"
+    try:
+        offset = append_recording_chunk(
+            record,
+            stream=request.stream,
+            start=start,
+            length=length,
+            total=total,
+            filename=filename[:200],
+        )
+    except RecordingOffsetMismatch as exc:
+        return error_response(
+            "Upload offset mismatch.",
+            code="offset_mismatch",
+            status_code=409,
+            details={"offset": exc.offset},
+        )
+    except ValueError as exc:
+        return error_response(str(exc), code="invalid_range", status_code=400)
+    except Exception:
+        logger.exception("Recording chunk upload failed record_id=%s", record.id)
+        mark_recording_failed(record.id, company_id=record.company_id)
+        return error_response("Upload failed.", status_code=500)
+
+    done = offset == total
+    return success_response(
+        {
+            "ok": True,
+            "record_id": record.id,
+            "offset": offset,
+            "status": "ready" if done else "partial",
+        }
+    )
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def pbx_recording_play_view(request, record_id: int):
@@ -618,96 +696,36 @@ def pbx_recording_play_view(request, record_id: int):
         return error_response("Recording not ready.", code="not_ready", status_code=404)
 
     try:
-        blob = stream_recording_for_user(record)
+        return stream_recording_for_user(
+            request, record, original=request.query_params.get("original") in ("1", "true")
+        )
     except FileNotFoundError:
         return error_response("Recording file missing.", code="missing_file", status_code=404)
 
-    filename = record.recording_path.split("/")[-1] if record.recording_path else "recording.wav"
-    response = FileResponse(blob, content_type="audio/wav")
-    response["Content-Disposition"] = f'inline; filename="{filename}"'
-    return response
-
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, HasActiveSubscription])
 def pbx_reports_summary_view(request):
-    from django.db.models import Avg, Count, Q
-    from integrations.models import PbxCallRecord, PbxCallDisposition, PbxCallDirection
-
     company = request.user.company
     gate = _integration_gate(company, "pbx")
     if gate:
         return gate
 
-    qs = PbxCallRecord.objects.filter(company=company, event_type="hangup")
-    date_from = request.query_params.get("from")
-    date_to = request.query_params.get("to")
-    if date_from:
-        qs = qs.filter(started_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(started_at__date__lte=date_to)
-
-    total = qs.count()
-    inbound = qs.filter(direction=PbxCallDirection.INBOUND).count()
-    outbound = qs.filter(direction=PbxCallDirection.OUTBOUND).count()
-    answered = qs.filter(disposition=PbxCallDisposition.ANSWERED).count()
-    missed = qs.filter(
-        disposition__in=[PbxCallDisposition.NO_ANSWER, PbxCallDisposition.BUSY]
-    ).count()
-    avg_duration = qs.aggregate(avg=Avg("billsec"))["avg"] or 0
-
-    return success_response(
-        {
-            "total": total,
-            "inbound": inbound,
-            "outbound": outbound,
-            "answered": answered,
-            "missed": missed,
-            "avg_duration_sec": round(avg_duration, 1),
-        }
+    report = build_pbx_report(
+        company, request.query_params.get("from"), request.query_params.get("to")
     )
+    return success_response(report["summary"])
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, HasActiveSubscription])
 def pbx_reports_agents_view(request):
-    from django.db.models import Avg
-    from integrations.models import PbxCallRecord, PbxCallDisposition
-
     company = request.user.company
     gate = _integration_gate(company, "pbx")
     if gate:
         return gate
 
-    qs = PbxCallRecord.objects.filter(company=company, event_type="hangup")
-    date_from = request.query_params.get("from")
-    date_to = request.query_params.get("to")
-    if date_from:
-        qs = qs.filter(started_at__date__gte=date_from)
-    if date_to:
-        qs = qs.filter(started_at__date__lte=date_to)
-
-    agents = []
-    for ext in qs.values_list("extension", flat=True).distinct():
-        if not ext:
-            continue
-        ext_qs = qs.filter(extension=ext)
-        mapping = (
-            UserPbxExtension.objects.filter(company=company, extension=ext)
-            .select_related("user")
-            .first()
-        )
-        agents.append(
-            {
-                "extension": ext,
-                "user_id": mapping.user_id if mapping else None,
-                "username": mapping.user.username if mapping else None,
-                "total": ext_qs.count(),
-                "answered": ext_qs.filter(disposition=PbxCallDisposition.ANSWERED).count(),
-                "missed": ext_qs.filter(
-                    disposition__in=[PbxCallDisposition.NO_ANSWER, PbxCallDisposition.BUSY]
-                ).count(),
-                "avg_duration_sec": round(ext_qs.aggregate(avg=Avg("billsec"))["avg"] or 0, 1),
-            }
-        )
-    return success_response({"agents": agents})
+    report = build_pbx_report(
+        company, request.query_params.get("from"), request.query_params.get("to")
+    )
+    return success_response({"agents": report["agents"]})
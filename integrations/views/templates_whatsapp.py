@@ -3,7 +3,10 @@ import hmac
 import json
 import logging
 import re
+import threading
+from collections import OrderedDict
 from datetime import timedelta
+from functools import lru_cache
 
 import requests
 from django.conf import settings
@@ -29,6 +32,7 @@ from ..models import (
     LeadSMSMessage, LeadWhatsAppMessage, MessageTemplate,
 )
 from ..oauth_utils import get_oauth_handler, MetaOAuth, META_GRAPH_API_BASE_URL
+from ..services import graph_http
 from ..whatsapp_account_sync import resolve_whatsapp_account_for_api
 from ..whatsapp_access import user_can_access_whatsapp_chats
 from ..serializers import (
@@ -384,18 +388,19 @@ def _company_placeholder_value(client) -> str:
     return _tenant_company_name(client) or _client_lead_company_name(client)
 
 
-def values_for_canonicals(canonicals, client, sender_name=None) -> list:
+def values_for_canonicals(canonicals, client, sender_name=None, values=None) -> list:
     """Parameter strings for an explicit canonical variable order (Meta {{1}}, {{2}}, …).
 
     sender_name: whoever is sending. { اسم الموظف } signs the message with them in
     preference to the lead's assignee — in a shared inbox the customer expects the
     name of the person actually writing. Falls back to the assignee when absent.
+    values: placeholder values already built for this client (see TemplateRenderPlan).
     """
     from integrations.services.message_placeholders import build_message_placeholder_values
 
     if not canonicals:
         return []
-    vals = build_message_placeholder_values(client)
+    vals = values if values is not None else build_message_placeholder_values(client, keys=canonicals)
     sender = str(sender_name or '').strip()
     out = []
     for canonical in canonicals:
@@ -413,35 +418,49 @@ def values_for_canonicals(canonicals, client, sender_name=None) -> list:
     return out
 
 
-def _positional_parameter_values_for_client(content: str, client) -> list:
+# Guessed order of {{1}}..{{n}} when a body has neither named markers nor a stored map.
+_POSITIONAL_GUESS_ORDER = (
+    "customer_name",
+    "company_name",
+    "phone",
+    "employee_name",
+    "current_date",
+    "current_time",
+    "status",
+    "stage",
+    "channel",
+    "visit_type",
+    "profession",
+    "lead_company_name",
+    "amount",
+    "invoice_number",
+)
+
+
+def _positional_guess_keys(n: int) -> frozenset:
+    if n <= 0:
+        return frozenset()
+    return frozenset(_POSITIONAL_GUESS_ORDER[:n]) | {"customer_name", "company_name"}
+
+
+def _positional_parameter_values_for_client(content: str, client, values=None) -> list:
     """Fill {{1}}..{{n}} for Meta-imported bodies with no named markers and no stored variable map.
 
     Last-resort guess: customer, company, phone, employee, date, time, status, stage, …
     Prefer `MessageTemplate.meta_variable_map` (recorded at submit / recovered on sync)
     whenever the template object is available — see `template_body_parameter_values`.
     """
+    return _positional_guess_values(_positional_variable_count(content), client, values)
+
+
+def _positional_guess_values(n: int, client, vals=None) -> list:
     from integrations.services.message_placeholders import build_message_placeholder_values
 
-    n = _positional_variable_count(content)
     if n <= 0:
         return []
-    vals = build_message_placeholder_values(client)
-    pool = [
-        vals.get("customer_name") or "",
-        vals.get("company_name") or "",
-        vals.get("phone") or "",
-        vals.get("employee_name") or "",
-        vals.get("current_date") or "",
-        vals.get("current_time") or "",
-        vals.get("status") or "",
-        vals.get("stage") or "",
-        vals.get("channel") or "",
-        vals.get("visit_type") or "",
-        vals.get("profession") or "",
-        vals.get("lead_company_name") or "",
-        vals.get("amount") or "",
-        vals.get("invoice_number") or "",
-    ]
+    if vals is None:
+        vals = build_message_placeholder_values(client, keys=_positional_guess_keys(n))
+    pool = [vals.get(key) or "" for key in _POSITIONAL_GUESS_ORDER]
     values = []
     for i in range(n):
         v = pool[i] if i < len(pool) else ""
@@ -483,66 +502,226 @@ def build_whatsapp_template_components_for_client(
     """
     Build Meta template `components` array: header (text vars), body, dynamic URL buttons.
     """
-    components = []
-    header_type = (getattr(template, 'header_type', None) or '').strip().lower()
-    header_text = (getattr(template, 'header_text', None) or '').strip()
-    if header_type == 'text' and header_text:
-        header_vals = template_header_parameter_values(template, client, sender_name)
-        if header_vals:
+    return template_render_plan(template).components(
+        client, body_param_values=body_param_values, sender_name=sender_name
+    )
+
+
+def build_whatsapp_template_components_for_clients(template, clients, sender_name=None) -> dict:
+    """
+    `components` for many recipients of one template -> {client_id: components}.
+
+    The template is parsed once and the clients (rows or ids) are re-read in one query
+    with only the fields its placeholders read; ids that no longer exist are left out.
+    """
+    from integrations.services.message_placeholders import load_placeholder_clients
+
+    plan = template_render_plan(template)
+    client_ids = [getattr(client, 'pk', client) for client in clients]
+    loaded = load_placeholder_clients(client_ids, plan.keys)
+    return {
+        client_id: plan.components(loaded[client_id], sender_name=sender_name)
+        for client_id in client_ids
+        if client_id in loaded
+    }
+
+
+def _parameter_spec(content: str, canonicals=None) -> tuple:
+    """How one text's {{n}} parameters are filled: ('named', canonicals, count) or ('positional', count)."""
+    if canonicals:
+        n = _positional_variable_count(content)
+        if not n:
+            n = len(_find_placeholders_in_order(content)) or len(canonicals)
+        # Meta gained variables the map doesn't cover (edited at Meta): pad rather than
+        # guess — a placeholder dash beats sending someone else's field in that slot.
+        return ('named', tuple(list(canonicals)[:n]), n)
+    if not content:
+        return ('named', (), 0)
+    matches = _find_placeholders_in_order(content)
+    if matches:
+        names = tuple(canonical for _start, _end, canonical, _sample, _getter in matches)
+        return ('named', names, len(names))
+    return ('positional', _positional_variable_count(content))
+
+
+def _parameter_spec_keys(spec) -> frozenset:
+    if spec[0] == 'positional':
+        return _positional_guess_keys(spec[1])
+    return frozenset(spec[1])
+
+
+def _parameter_spec_values(spec, client, sender_name=None, values=None) -> list:
+    if spec[0] == 'positional':
+        return _positional_guess_values(spec[1], client, values)
+    _kind, canonicals, count = spec
+    out = values_for_canonicals(list(canonicals), client, sender_name, values=values)
+    while len(out) < count:
+        out.append('-')
+    return out
+
+
+def _template_plan_source(template) -> tuple:
+    return (
+        getattr(template, 'content', None) or '',
+        getattr(template, 'header_type', None) or '',
+        getattr(template, 'header_text', None) or '',
+        json.dumps(getattr(template, 'buttons', None) or [], sort_keys=True, default=str),
+        json.dumps(template_variable_map(template), sort_keys=True, default=str),
+    )
+
+
+class TemplateRenderPlan:
+    """
+    A template's placeholders resolved once: the parameter order of its body, text
+    header and dynamic URL buttons, and the placeholder values they read. Rendering
+    for a client then builds just those values, once, for all components.
+    """
+
+    def __init__(self, template, source=None):
+        self.source = source if source is not None else _template_plan_source(template)
+        content = getattr(template, 'content', None) or ''
+        header_text = getattr(template, 'header_text', None) or ''
+        variable_map = template_variable_map(template)
+
+        self.body_count = count_template_body_placeholders(content)
+        self.header_count = count_template_body_placeholders(header_text)
+        self.body = _parameter_spec(content, variable_map.get('body'))
+        self.header = _parameter_spec(header_text, variable_map.get('header'))
+        header_type = (getattr(template, 'header_type', None) or '').strip().lower()
+        self.has_text_header = header_type == 'text' and bool(header_text.strip())
+        self.buttons = []
+        buttons = getattr(template, 'buttons', None) or []
+        for idx, btn in enumerate(buttons if isinstance(buttons, list) else []):
+            if not isinstance(btn, dict) or (btn.get('type') or '').lower() != 'url':
+                continue
+            url = btn.get('url') or ''
+            n = _positional_variable_count(url)
+            if n > 0:
+                self.buttons.append((idx, _parameter_spec(url), n))
+
+        keys = _parameter_spec_keys(self.body) | _parameter_spec_keys(self.header)
+        for _idx, spec, _n in self.buttons:
+            keys |= _parameter_spec_keys(spec)
+        self.keys = keys
+
+    def values_for(self, client) -> dict:
+        from integrations.services.message_placeholders import build_message_placeholder_values
+
+        return build_message_placeholder_values(client, keys=self.keys)
+
+    def body_values(self, client, sender_name=None, values=None) -> list:
+        return _parameter_spec_values(self.body, client, sender_name, values)
+
+    def header_values(self, client, sender_name=None, values=None) -> list:
+        return _parameter_spec_values(self.header, client, sender_name, values)
+
+    def button_values(self, client, values=None) -> list:
+        out = []
+        for idx, spec, n in self.buttons:
+            vals = _parameter_spec_values(spec, client, None, values)
+            # Meta expects a single suffix param for dynamic URL buttons typically
+            if vals:
+                out.append((idx, vals[:n]))
+        return out
+
+    def components(self, client, body_param_values=None, sender_name=None, values=None) -> list:
+        if values is None:
+            values = self.values_for(client)
+        components = []
+        if self.has_text_header:
+            header_vals = self.header_values(client, sender_name, values)
+            if header_vals:
+                components.append(
+                    {
+                        'type': 'header',
+                        'parameters': [{'type': 'text', 'text': p[:1024]} for p in header_vals],
+                    }
+                )
+
+        body_vals = body_param_values
+        if body_vals is None:
+            body_vals = self.body_values(client, sender_name, values)
+        if body_vals:
             components.append(
                 {
-                    'type': 'header',
-                    'parameters': [{'type': 'text', 'text': p[:1024]} for p in header_vals],
+                    'type': 'body',
+                    'parameters': [{'type': 'text', 'text': p[:1024]} for p in body_vals],
                 }
             )
 
-    body_vals = body_param_values
-    if body_vals is None:
-        body_vals = template_body_parameter_values(template, client, sender_name)
-    if body_vals:
-        components.append(
-            {
-                'type': 'body',
-                'parameters': [{'type': 'text', 'text': p[:1024]} for p in body_vals],
-            }
-        )
+        for btn_index, vals in self.button_values(client, values):
+            components.append(
+                {
+                    'type': 'button',
+                    'sub_type': 'url',
+                    'index': str(btn_index),
+                    'parameters': [{'type': 'text', 'text': p[:1024]} for p in vals],
+                }
+            )
+        return components
 
-    for btn_index, vals in whatsapp_template_button_url_parameter_values(
-        getattr(template, 'buttons', None) or [], client
-    ):
-        components.append(
-            {
-                'type': 'button',
-                'sub_type': 'url',
-                'index': str(btn_index),
-                'parameters': [{'type': 'text', 'text': p[:1024]} for p in vals],
-            }
-        )
-    return components
+
+# (template id, updated_at) -> TemplateRenderPlan, most recently used last.
+_RENDER_PLANS: OrderedDict = OrderedDict()
+_RENDER_PLANS_MAX = 256
+_render_plans_lock = threading.Lock()
+
+
+def template_render_plan(template) -> TemplateRenderPlan:
+    """
+    The template's render plan, cached per process by (id, updated_at).
+
+    The cached plan is also checked against the template's current text, so a row
+    changed through queryset.update() (which leaves updated_at alone) is re-parsed.
+    Unsaved templates are parsed every time.
+    """
+    pk = getattr(template, 'pk', None)
+    source = _template_plan_source(template)
+    if pk is None:
+        return TemplateRenderPlan(template, source)
+
+    key = (pk, getattr(template, 'updated_at', None))
+    with _render_plans_lock:
+        plan = _RENDER_PLANS.get(key)
+        if plan is not None and plan.source == source:
+            _RENDER_PLANS.move_to_end(key)
+            return plan
+    plan = TemplateRenderPlan(template, source)
+    with _render_plans_lock:
+        _RENDER_PLANS[key] = plan
+        _RENDER_PLANS.move_to_end(key)
+        while len(_RENDER_PLANS) > _RENDER_PLANS_MAX:
+            _RENDER_PLANS.popitem(last=False)
+    return plan
 
 
 _PLACEHOLDER_DEFS = None  # lazy — see _get_placeholder_defs()
 
 
 def _get_placeholder_defs():
-    """Named CRM placeholders ([alias] / { alias }) used for Meta {{n}} conversion."""
+    """Named CRM placeholders ([alias] / { alias }) used for Meta {{n}} conversion, regexes compiled."""
     global _PLACEHOLDER_DEFS
     if _PLACEHOLDER_DEFS is None:
         from integrations.services.message_placeholders import META_PLACEHOLDER_DEFS
 
-        _PLACEHOLDER_DEFS = META_PLACEHOLDER_DEFS
+        _PLACEHOLDER_DEFS = [
+            (re.compile(pattern, re.IGNORECASE), canonical, sample, getter)
+            for pattern, canonical, sample, getter in META_PLACEHOLDER_DEFS
+        ]
     return _PLACEHOLDER_DEFS
 
 
+@lru_cache(maxsize=512)
 def _find_placeholders_in_order(content: str):
     """Bracket/curly placeholders in left-to-right order (Meta requires {{1}}, {{2}}, ... by appearance).
 
-    Each entry is (start, end, canonical, sample, getter).
+    Each entry is (start, end, canonical, sample, getter). Cached per distinct content,
+    so the result is a tuple and must not be modified.
     """
     matches = []
     seen_spans = set()
     for pattern, canonical, sample, getter in _get_placeholder_defs():
-        for m in re.finditer(pattern, content or '', re.IGNORECASE):
+        for m in pattern.finditer(content or ''):
             span = (m.start(), m.end())
             if span in seen_spans:
                 continue
@@ -552,7 +731,7 @@ def _find_placeholders_in_order(content: str):
             seen_spans.add(span)
             matches.append((m.start(), m.end(), canonical, sample, getter))
     matches.sort(key=lambda x: x[0])
-    return matches
+    return tuple(matches)
 
 
 def content_placeholder_canonicals(content: str) -> list:
@@ -727,26 +906,7 @@ def whatsapp_template_body_parameter_values_for_client(
     wins over re-deriving from `content`, which may since have been rewritten to positional
     {{n}} by sync or reordered by an edit.
     """
-    if canonicals:
-        n = _positional_variable_count(content)
-        if not n:
-            n = len(_find_placeholders_in_order(content)) or len(canonicals)
-        values = values_for_canonicals(list(canonicals)[:n], client, sender_name)
-        # Meta gained variables the map doesn't cover (edited at Meta): pad rather than
-        # guess — a placeholder dash beats sending someone else's field in that slot.
-        while len(values) < n:
-            values.append('-')
-        return values
-    if not content:
-        return []
-    matches = _find_placeholders_in_order(content)
-    if matches:
-        return values_for_canonicals(
-            [canonical for _start, _end, canonical, _sample, _getter in matches],
-            client,
-            sender_name,
-        )
-    return _positional_parameter_values_for_client(content, client)
+    return _parameter_spec_values(_parameter_spec(content, canonicals), client, sender_name)
 
 
 def template_variable_map(template) -> dict:
@@ -769,22 +929,12 @@ def build_template_variable_map(template) -> dict:
 
 def template_body_parameter_values(template, client, sender_name=None) -> list:
     """Body params for a stored template — stored variable map first, content second."""
-    return whatsapp_template_body_parameter_values_for_client(
-        getattr(template, 'content', None) or '',
-        client,
-        canonicals=template_variable_map(template).get('body'),
-        sender_name=sender_name,
-    )
+    return template_render_plan(template).body_values(client, sender_name)
 
 
 def template_header_parameter_values(template, client, sender_name=None) -> list:
     """Text-header params for a stored template — stored variable map first, header text second."""
-    return whatsapp_template_body_parameter_values_for_client(
-        getattr(template, 'header_text', None) or '',
-        client,
-        canonicals=template_variable_map(template).get('header'),
-        sender_name=sender_name,
-    )
+    return template_render_plan(template).header_values(client, sender_name)
 
 
 def count_template_body_placeholders(content: str) -> int:
@@ -920,7 +1070,7 @@ def _fetch_all_meta_message_templates(waba_id: str, token: str):
     headers = {'Authorization': f'Bearer {token}'}
     all_items = []
     while url:
-        resp = requests.get(url, headers=headers, timeout=30)
+        resp = graph_http.get(url, headers=headers, timeout=30)
         data = resp.json() if resp.content else {}
         if resp.status_code != 200:
             err_payload = data.get('error', data) if isinstance(data, dict) else {'error': resp.text}
@@ -1092,7 +1242,7 @@ class MessageTemplateViewSet(viewsets.ModelViewSet):
         url = f'{META_GRAPH_API_BASE_URL}/{wa.waba_id}/message_templates'
         headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=30)
+            resp = graph_http.post(url, json=payload, headers=headers, timeout=30)
             data = resp.json() if resp.content else {}
             if resp.status_code not in (200, 201):
                 meta_msg = None
@@ -1429,7 +1579,7 @@ def whatsapp_limits(request):
     url = f'{META_GRAPH_API_BASE_URL}/{wa.phone_number_id}?fields=messaging_limit_tier,quality_rating'
     headers = {'Authorization': f'Bearer {token}'}
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = graph_http.get(url, headers=headers, timeout=10)
         data = resp.json() if resp.content else {}
         if resp.status_code != 200:
             err_payload = data.get('error', data) if isinstance(data, dict) else {'error': resp.text}
@@ -34,13 +34,14 @@ from ..policy import (
 )
 from settings.models import SystemSettings
 from ..oauth_utils import MetaOAuth, META_GRAPH_API_BASE_URL
+from ..services import graph_http
 from ..whatsapp_account_sync import resolve_whatsapp_account_for_api
 from ..whatsapp_access import user_can_access_whatsapp_chats
 from .templates_whatsapp import (
     build_whatsapp_template_components_for_client,
-    count_template_body_placeholders,
     meta_slug_template_name,
     template_body_parameter_values,
+    template_render_plan,
 )
 from integrations.services.message_placeholders import _user_display_name
 from ..serializers import (
@@ -291,7 +292,7 @@ def whatsapp_send_message(request):
     }
     redacted_to = _redact_phone_e164(to)
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+        resp = graph_http.post(url, json=payload, headers=headers, timeout=15)
     except requests.RequestException as e:
         logger.warning(
             "WhatsApp send request error: phone_number_id=%s to=%s error=%s",
@@ -542,7 +543,7 @@ def whatsapp_send_media(request):
     }
     redacted_to = _redact_phone_e164(to)
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        resp = graph_http.post(url, json=payload, headers=headers, timeout=30)
     except requests.RequestException as e:
         logger.warning(
             "WhatsApp send-media request error: phone_number_id=%s to=%s error=%s",
@@ -759,7 +760,7 @@ def whatsapp_send_location(request):
     }
     redacted_to = _redact_phone_e164(to)
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+        resp = graph_http.post(url, json=payload, headers=headers, timeout=15)
     except requests.RequestException as e:
         logger.warning(
             "WhatsApp send-location request error: phone_number_id=%s to=%s error=%s",
@@ -1161,8 +1162,9 @@ def whatsapp_send_template(request):
         if fill_client:
             fill_client = company.clients.select_related('company').get(pk=fill_client.pk)
 
-    n_placeholders = count_template_body_placeholders(template.content or '')
-    header_needs = count_template_body_placeholders(getattr(template, 'header_text', None) or '')
+    render_plan = template_render_plan(template)
+    n_placeholders = render_plan.body_count
+    header_needs = render_plan.header_count
     body_parameters = request.data.get('body_parameters')
     if body_parameters is not None:
         if not isinstance(body_parameters, list) or not all(
@@ -1256,7 +1258,7 @@ def whatsapp_send_template(request):
     }
     redacted_to = _redact_phone_e164(to)
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+        resp = graph_http.post(url, json=payload, headers=headers, timeout=15)
     except requests.RequestException as e:
         logger.warning(
             "WhatsApp template send request error: phone_number_id=%s waba_id=%s to=%s error=%s",
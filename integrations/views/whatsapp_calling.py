@@ -3,9 +3,8 @@
 from __future__ import annotations
 
 import logging
-import mimetypes
 
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -30,6 +29,7 @@ from integrations.services.whatsapp_call_availability import (
     sync_call_hours_to_meta,
     user_is_whatsapp_call_away,
 )
+from integrations.services.recording_transcode import recording_waveform
 from integrations.services.whatsapp_calling import (
     WhatsAppCallingError,
     call_permission_allows_start,
@@ -170,6 +170,7 @@ def _serialize_call(call: WhatsAppCall, request=None) -> dict:
         "notes": call.notes or "",
         "recording_status": call.recording_status,
         "recording_url": get_wa_playback_url(call, request),
+        "recording_waveform": recording_waveform(call),
         "client_call": call.client_call_id,
         "error_message": call.error_message or "",
         "created_at": call.created_at.isoformat() if call.created_at else None,
@@ -1014,11 +1015,10 @@ def whatsapp_call_recording_upload(request, pk: int):
     if notes:
         call.notes = notes
         call.save(update_fields=["notes", "updated_at"])
-    data = upload.read()
-    if not data:
+    if not upload.size:
         return validation_error_response({"file": ["Empty file"]})
     try:
-        store_call_recording(call, file_bytes=data, original_filename=upload.name or "call.webm")
+        store_call_recording(call, fileobj=upload, original_filename=upload.name or "call.webm")
     except ValueError as exc:
         return error_response(str(exc), code="whatsapp_call_not_answered", status_code=400)
     call.refresh_from_db()
@@ -1050,11 +1050,11 @@ def whatsapp_call_recording_play(request, pk: int):
     if not call:
         return error_response("Not found", status_code=404)
     try:
-        fh = stream_wa_recording(call)
+        return stream_wa_recording(
+            request, call, original=request.query_params.get("original") in ("1", "true")
+        )
     except FileNotFoundError:
         raise Http404("Recording not found")
-    content_type = mimetypes.guess_type(call.recording_storage_key)[0] or "audio/webm"
-    return FileResponse(fh, content_type=content_type, as_attachment=False)
 
 
 @api_view(["GET", "POST"])
@@ -13,11 +13,11 @@ import logging
 import re
 from typing import Optional
 
-import requests
 from django.db.models import Q
 
 from .models import IntegrationAccount, WhatsAppAccount
 from .oauth_utils import get_oauth_handler, META_GRAPH_API_BASE_URL
+from .services import graph_http
 
 logger = logging.getLogger(__name__)
 
@@ -131,7 +131,7 @@ def _fetch_phone_profile(access_token: str, phone_number_id: str) -> dict:
         'name_status': None,
     }
     try:
-        resp = requests.get(
+        resp = graph_http.get(
             f'{META_GRAPH_API_BASE_URL}/{phone_number_id}',
             params={
                 'access_token': access_token,
@@ -6,8 +6,10 @@ The pattern every scheduled notification job should follow:
 1. Compute a *deterministic due instant* for each entity from data on the entity itself
    (e.g. ``last_contacted_at + 10h``), instead of notifying everything that matches a
    filter at whatever moment the cron happens to run.
-2. Claim that (user, entity, due instant) pair via :func:`claim_dispatch`.
-3. Only send when the claim succeeds.
+2. Claim that (user, entity, due instant) pair via :func:`claim_dispatch` — or, for a
+   sweep over many entities, claim the whole batch at once via :func:`claim_dispatches`.
+3. Only send when the claim succeeds, then record the outcome with :func:`mark_dispatched`
+   (or, for a batch, with :class:`OutcomeRecorder`, which writes it every few sends).
 
 Because the due instant is derived from the entity, any real activity moves it forward and
 the job re-arms by itself — no "already notified" bookkeeping on the entity is needed.
@@ -17,12 +19,12 @@ replaces the old "sweep everything at a fixed hour" approach that produced burst
 simultaneous pushes.
 """
 import logging
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta
 from datetime import timezone as dt_timezone
-from typing import Optional
+from typing import Any, Iterable, List, Optional, Sequence
 
 from django.contrib.contenttypes.models import ContentType
-from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from notifications.models import ReminderDispatchLog
@@ -39,6 +41,52 @@ except ImportError:  # pragma: no cover - fallback for older runtimes
 logger = logging.getLogger(__name__)
 
 
+# Claims are inserted and re-read this many at a time; keeps the ``IN (...)`` lists of the
+# read-back query well under SQLite's bound-parameter limit.
+DISPATCH_BATCH_SIZE = 500
+
+# Send loops write outcomes this many rows at a time (see OutcomeRecorder): a worker that
+# dies mid-batch leaves at most this many sent-but-unmarked claims to be sent again.
+OUTCOME_FLUSH_EVERY = 10
+
+_OUTCOME_FIELDS = ["push_sent", "email_sent", "last_error", "updated_at"]
+
+
+@dataclass(frozen=True)
+class DispatchClaim:
+    """
+    One (user, object, due instant) pair to claim via :func:`claim_dispatches`.
+
+    ``context`` is opaque to the dispatch helpers; callers use it to carry whatever the
+    send loop needs (the lead, the visit, the computed payload) alongside the claim.
+    """
+
+    user: Any
+    notification_type: str
+    obj: Any
+    scheduled_for: datetime
+    minutes_before: int = 0
+    dedupe_key: str = ""
+    expect_email: bool = False
+    context: Any = None
+
+
+def _is_satisfied(log_row: ReminderDispatchLog, expect_email: bool) -> bool:
+    return bool(log_row.push_sent and (log_row.email_sent or not expect_email))
+
+
+def _claim_key(user_id, notification_type, content_type_id, object_id, scheduled_for, minutes_before, dedupe_key):
+    return (
+        user_id,
+        str(notification_type),
+        content_type_id,
+        str(object_id),
+        scheduled_for,
+        minutes_before,
+        dedupe_key or "",
+    )
+
+
 def claim_dispatch(
     *,
     user,
@@ -63,37 +111,113 @@ def claim_dispatch(
     The row is created regardless of the recipient's notification preferences, so a muted
     recipient can never cause an unbounded retry loop.
     """
-    if user is None or obj is None or scheduled_for is None:
-        return None
+    return claim_dispatches(
+        [
+            DispatchClaim(
+                user=user,
+                notification_type=notification_type,
+                obj=obj,
+                scheduled_for=scheduled_for,
+                minutes_before=minutes_before,
+                dedupe_key=dedupe_key,
+                expect_email=expect_email,
+            )
+        ]
+    )[0]
 
-    content_type = ContentType.objects.get_for_model(obj.__class__)
 
-    lookup = {
-        "user": user,
-        "notification_type": notification_type,
-        "content_type": content_type,
-        "object_id": str(obj.pk),
-        "scheduled_for": scheduled_for,
-        "minutes_before": minutes_before,
-        "dedupe_key": dedupe_key or "",
-    }
+def claim_dispatches(
+    claims: Sequence[DispatchClaim],
+    *,
+    batch_size: int = DISPATCH_BATCH_SIZE,
+) -> List[Optional[ReminderDispatchLog]]:
+    """
+    Batch form of :func:`claim_dispatch`.
 
-    try:
-        with transaction.atomic():
-            log_row, _created = ReminderDispatchLog.objects.get_or_create(
-                defaults={"push_sent": False, "email_sent": False},
-                **lookup,
-            )
-    except IntegrityError:
-        # Concurrent worker won the race; re-read and let the satisfied-check below decide.
-        log_row = ReminderDispatchLog.objects.filter(**lookup).first()
-        if log_row is None:
-            return None
+    Returns a list aligned with ``claims``: the :class:`ReminderDispatchLog` row to fill in
+    for every claim this run won, ``None`` for claims that are already satisfied, invalid
+    (missing user / object / instant) or repeated earlier in the same batch.
 
-    if log_row.push_sent and (log_row.email_sent or not expect_email):
-        return None
+    Each chunk of ``batch_size`` claims costs two queries: an ``INSERT ... ON CONFLICT DO
+    NOTHING`` for the whole chunk, then one read-back of the matching rows. Rows left over
+    from a failed earlier attempt are returned again, exactly like the single-claim helper.
+    """
+    results: List[Optional[ReminderDispatchLog]] = [None] * len(claims)
+
+    pending = []  # (index, key)
+    seen_keys = set()
+    for index, claim in enumerate(claims):
+        if claim.user is None or claim.obj is None or claim.scheduled_for is None:
+            continue
+        # get_for_model is served from ContentType's per-process cache after the first hit.
+        content_type = ContentType.objects.get_for_model(claim.obj.__class__)
+        key = _claim_key(
+            claim.user.pk,
+            claim.notification_type,
+            content_type.pk,
+            claim.obj.pk,
+            claim.scheduled_for,
+            claim.minutes_before,
+            claim.dedupe_key,
+        )
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        pending.append((index, key))
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        ReminderDispatchLog.objects.bulk_create(
+            [
+                ReminderDispatchLog(
+                    user_id=key[0],
+                    notification_type=key[1],
+                    content_type_id=key[2],
+                    object_id=key[3],
+                    scheduled_for=key[4],
+                    minutes_before=key[5],
+                    dedupe_key=key[6],
+                    push_sent=False,
+                    email_sent=False,
+                )
+                for _index, key in chunk
+            ],
+            ignore_conflicts=True,
+        )
 
-    return log_row
+        # Superset read-back: every column of the unique key is constrained with IN, then
+        # the exact tuple is matched in Python.
+        rows = ReminderDispatchLog.objects.filter(
+            user_id__in={key[0] for _index, key in chunk},
+            notification_type__in={key[1] for _index, key in chunk},
+            content_type_id__in={key[2] for _index, key in chunk},
+            object_id__in={key[3] for _index, key in chunk},
+            scheduled_for__in={key[4] for _index, key in chunk},
+        )
+        by_key = {
+            _claim_key(
+                row.user_id,
+                row.notification_type,
+                row.content_type_id,
+                row.object_id,
+                row.scheduled_for,
+                row.minutes_before,
+                row.dedupe_key,
+            ): row
+            for row in rows
+        }
+
+        for index, key in chunk:
+            log_row = by_key.get(key)
+            if log_row is None:
+                # Should not happen after the insert; treat like a lost race and skip.
+                logger.warning("Dispatch claim row missing after insert: %s", key)
+                continue
+            if _is_satisfied(log_row, claims[index].expect_email):
+                continue
+            results[index] = log_row
+
+    return results
 
 
 def mark_dispatched(
@@ -112,7 +236,87 @@ def mark_dispatched(
         log_row.email_sent = email_sent
     if error is not None:
         log_row.last_error = error
-    log_row.save(update_fields=["push_sent", "email_sent", "last_error", "updated_at"])
+    log_row.save(update_fields=_OUTCOME_FIELDS)
+
+
+def mark_dispatched_many(
+    log_rows: Iterable[Optional[ReminderDispatchLog]],
+    *,
+    batch_size: int = DISPATCH_BATCH_SIZE,
+) -> int:
+    """
+    Persist the outcomes already set on claimed rows in a single bulk UPDATE.
+
+    Callers set ``push_sent`` / ``email_sent`` / ``last_error`` on each row as they send,
+    then hand the whole batch here. ``None`` entries are ignored. Returns the row count.
+    """
+    rows = [row for row in log_rows if row is not None]
+    if not rows:
+        return 0
+    # bulk_update bypasses auto_now, so stamp updated_at explicitly.
+    now = timezone.now()
+    for row in rows:
+        row.updated_at = now
+    return ReminderDispatchLog.objects.bulk_update(rows, _OUTCOME_FIELDS, batch_size=batch_size)
+
+
+class OutcomeRecorder:
+    """
+    Writes the outcomes of a send loop as it goes, ``flush_every`` rows at a time.
+
+    Wrap the loop's ``(claim, log_row)`` pairs in :meth:`track`; a row is queued once the
+    loop body has finished with it, and whatever is left (including the row in hand when
+    the body raised) is written when the ``with`` block exits::
+
+        with OutcomeRecorder() as outcomes:
+            for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                ...
+    """
+
+    def __init__(self, flush_every: int = OUTCOME_FLUSH_EVERY):
+        self.flush_every = flush_every
+        self._pending: List[ReminderDispatchLog] = []
+        self._current: Optional[ReminderDispatchLog] = None
+
+    def __enter__(self) -> "OutcomeRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._current is not None:
+            self._pending.append(self._current)
+            self._current = None
+        self.flush()
+
+    def track(self, pairs: Iterable):
+        for claim, log_row in pairs:
+            self._current = log_row
+            yield claim, log_row
+            self._current = None
+            self.add(log_row)
+
+    def add(self, log_row: Optional[ReminderDispatchLog]) -> None:
+        if log_row is None:
+            return
+        self._pending.append(log_row)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            mark_dispatched_many(self._pending)
+            self._pending = []
+
+
+def iter_batches(items: Iterable, size: int = DISPATCH_BATCH_SIZE):
+    """Yield lists of up to ``size`` items; lets sweeps claim and record per batch."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 def company_timezone(company) -> "ZoneInfo":
@@ -15,7 +15,12 @@ from django.utils import timezone
 from accounts.event_emails import send_followup_reminder_email
 from accounts.models import Role, User
 from crm.models import ClientCall, ClientFieldVisit, ClientVisit
-from notifications.dispatch import claim_dispatch
+from notifications.dispatch import (
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatches,
+    iter_batches,
+)
 from notifications.models import NotificationType
 from notifications.services import NotificationService
 
@@ -45,200 +50,158 @@ def _process_upcoming_visit_reminders(
     sent_count = 0
     skipped_count = 0
     dedup_skipped = 0
+    # company_id -> active reception users; resolved once per company, not once per visit.
+    reception_by_company = {}
 
-    for visit in visits:
-        lead = visit.client
-        scheduled_for = visit.upcoming_visit_date
+    for batch in iter_batches(visits):
+        claims = []
+        for visit in batch:
+            lead = visit.client
+            scheduled_for = visit.upcoming_visit_date
 
-        if lead.assigned_to:
-            user = lead.assigned_to
+            if lead.assigned_to:
+                user = lead.assigned_to
 
-            if dry_run:
-                # Claiming would write to the dispatch log, so never claim during a dry run.
-                stdout.write(
-                    style.SUCCESS(
-                        f"[DRY RUN] Would send reminder to {user.username} "
-                        f"for {visit_label} {visit.id} - Reminder at "
-                        f"{visit.upcoming_visit_date}"
+                if dry_run:
+                    # Claiming would write to the dispatch log, so never claim during a dry run.
+                    stdout.write(
+                        style.SUCCESS(
+                            f"[DRY RUN] Would send reminder to {user.username} "
+                            f"for {visit_label} {visit.id} - Reminder at "
+                            f"{visit.upcoming_visit_date}"
+                        )
                     )
-                )
-                sent_count += 1
-            else:
-                log_row = claim_dispatch(
-                    user=user,
-                    notification_type=assignee_notification_type,
-                    obj=visit,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    expect_email=True,
-                )
-                if log_row is None:
-                    dedup_skipped += 1
+                    sent_count += 1
                 else:
-                    try:
-                        minutes_remaining = int(
-                            (visit.upcoming_visit_date - now).total_seconds() / 60
-                        )
-                        user_lang = getattr(user, "language", "ar") or "ar"
-
-                        NotificationService.send_notification(
+                    claims.append(
+                        DispatchClaim(
                             user=user,
                             notification_type=assignee_notification_type,
-                            data={
-                                visit_id_data_key: visit.id,
-                                "lead_id": lead.id,
-                                "lead_name": lead.name,
-                                "minutes_remaining": minutes_remaining,
-                                "minutes_before": minutes_before,
-                                "reminder_kind": reminder_kind_assignee,
-                                "reminder_time": (
-                                    scheduled_for.isoformat() if scheduled_for else None
-                                ),
-                            },
-                            lead_source=getattr(lead, "source", None),
-                        )
-                        log_row.push_sent = True
-
-                        email_ok = send_followup_reminder_email(
-                            user,
-                            reminder_kind=assignee_email_kind,
-                            title=assignee_email_title.format(lead_name=lead.name),
-                            lead_name=lead.name,
+                            obj=visit,
                             scheduled_for=scheduled_for,
                             minutes_before=minutes_before,
-                            language=user_lang,
+                            expect_email=True,
+                            context="assignee",
                         )
-                        if email_ok:
-                            log_row.email_sent = True
-                        sent_count += 1
-                        stdout.write(
-                            style.SUCCESS(
-                                f"Sent reminder to {user.username} for "
-                                f"{visit_label} {visit.id}"
-                            )
-                        )
-                    except Exception as e:
-                        logger.error(
-                            "Error sending reminder for %s %s: %s",
-                            visit_label,
-                            visit.id,
-                            e,
+                    )
+            elif getattr(lead.company, "specialization", None) != "medical":
+                skipped_count += 1
+
+            company = getattr(lead, "company", None)
+            if company and getattr(company, "specialization", None) == "medical":
+                if company.id not in reception_by_company:
+                    reception_by_company[company.id] = list(
+                        User.objects.filter(
+                            company=company,
+                            role=Role.RECEPTION.value,
+                            is_active=True,
                         )
+                    )
+                for rec_user in reception_by_company[company.id]:
+                    if dry_run:
+                        # Claiming would write to the dispatch log, so never claim during a dry run.
                         stdout.write(
-                            style.ERROR(
-                                f"Error sending reminder for {visit_label} "
-                                f"{visit.id}: {e}"
+                            style.SUCCESS(
+                                f"[DRY RUN] Would send reception {visit_label} reminder to "
+                                f"{rec_user.username} for {visit_label} {visit.id}"
                             )
                         )
-                        log_row.last_error = str(e)
-                        skipped_count += 1
-                    finally:
-                        log_row.save(
-                            update_fields=[
-                                "push_sent",
-                                "email_sent",
-                                "last_error",
-                                "updated_at",
-                            ]
-                        )
-        elif getattr(lead.company, "specialization", None) != "medical":
-            skipped_count += 1
-
-        company = getattr(lead, "company", None)
-        if company and getattr(company, "specialization", None) == "medical":
-            for rec_user in User.objects.filter(
-                company=company,
-                role=Role.RECEPTION.value,
-                is_active=True,
-            ):
-                if dry_run:
-                    # Claiming would write to the dispatch log, so never claim during a dry run.
-                    stdout.write(
-                        style.SUCCESS(
-                            f"[DRY RUN] Would send reception {visit_label} reminder to "
-                            f"{rec_user.username} for {visit_label} {visit.id}"
+                        sent_count += 1
+                        continue
+
+                    claims.append(
+                        DispatchClaim(
+                            user=rec_user,
+                            notification_type=reception_notification_type,
+                            obj=visit,
+                            scheduled_for=scheduled_for,
+                            minutes_before=minutes_before,
+                            expect_email=True,
+                            context="reception",
                         )
                     )
-                    sent_count += 1
-                    continue
 
-                rlog = claim_dispatch(
-                    user=rec_user,
-                    notification_type=reception_notification_type,
-                    obj=visit,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    expect_email=True,
-                )
-                if rlog is None:
+        log_rows = claim_dispatches(claims)
+        with OutcomeRecorder() as outcomes:
+            for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                if log_row is None:
                     dedup_skipped += 1
                     continue
 
+                visit = claim.obj
+                lead = visit.client
+                user = claim.user
+                scheduled_for = claim.scheduled_for
+                is_reception = claim.context == "reception"
+                if is_reception:
+                    reminder_kind = reminder_kind_reception
+                    email_kind = reception_email_kind
+                    email_title = reception_email_title
+                    label = f"reception {visit_label} reminder"
+                else:
+                    reminder_kind = reminder_kind_assignee
+                    email_kind = assignee_email_kind
+                    email_title = assignee_email_title
+                    label = "reminder"
+
                 try:
                     minutes_remaining = int(
                         (visit.upcoming_visit_date - now).total_seconds() / 60
                     )
-                    user_lang = getattr(rec_user, "language", "ar") or "ar"
+                    user_lang = getattr(user, "language", "ar") or "ar"
+
                     NotificationService.send_notification(
-                        user=rec_user,
-                        notification_type=reception_notification_type,
+                        user=user,
+                        notification_type=claim.notification_type,
                         data={
                             visit_id_data_key: visit.id,
                             "lead_id": lead.id,
                             "lead_name": lead.name,
                             "minutes_remaining": minutes_remaining,
                             "minutes_before": minutes_before,
-                            "reminder_kind": reminder_kind_reception,
+                            "reminder_kind": reminder_kind,
                             "reminder_time": (
                                 scheduled_for.isoformat() if scheduled_for else None
                             ),
                         },
                         lead_source=getattr(lead, "source", None),
                     )
-                    rlog.push_sent = True
+                    log_row.push_sent = True
+
                     email_ok = send_followup_reminder_email(
-                        rec_user,
-                        reminder_kind=reception_email_kind,
-                        title=reception_email_title.format(lead_name=lead.name),
+                        user,
+                        reminder_kind=email_kind,
+                        title=email_title.format(lead_name=lead.name),
                         lead_name=lead.name,
                         scheduled_for=scheduled_for,
                         minutes_before=minutes_before,
                         language=user_lang,
                     )
                     if email_ok:
-                        rlog.email_sent = True
+                        log_row.email_sent = True
                     sent_count += 1
                     stdout.write(
                         style.SUCCESS(
-                            f"Sent reception {visit_label} reminder to "
-                            f"{rec_user.username} for {visit_label} {visit.id}"
+                            f"Sent {label} to {user.username} for "
+                            f"{visit_label} {visit.id}"
                         )
                     )
                 except Exception as e:
                     logger.error(
-                        "Error sending reception %s reminder for %s %s: %s",
-                        visit_label,
+                        "Error sending %s for %s %s: %s",
+                        label,
                         visit_label,
                         visit.id,
                         e,
                     )
                     stdout.write(
                         style.ERROR(
-                            f"Error sending reception {visit_label} reminder for "
-                            f"{visit_label} {visit.id}: {e}"
+                            f"Error sending {label} for {visit_label} "
+                            f"{visit.id}: {e}"
                         )
                     )
-                    rlog.last_error = str(e)
+                    log_row.last_error = str(e)
                     skipped_count += 1
-                finally:
-                    rlog.save(
-                        update_fields=[
-                            "push_sent",
-                            "email_sent",
-                            "last_error",
-                            "updated_at",
-                        ]
-                    )
 
     return sent_count, skipped_count, dedup_skipped
 
@@ -313,90 +276,92 @@ class Command(BaseCommand):
         skipped_count = 0
         dedup_skipped = 0
 
-        for call in calls:
-            lead = call.client
-            if not lead.assigned_to:
-                skipped_count += 1
-                continue
-            user = lead.assigned_to
-            scheduled_for = call.follow_up_date
-
-            if dry_run:
-                # Claiming would write to the dispatch log, so never claim during a dry run.
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"[DRY RUN] Would send reminder to {user.username} "
-                        f"for call {call.id} - Reminder at {call.follow_up_date}"
-                    )
-                )
-                sent_count += 1
-                continue
-
-            log_row = claim_dispatch(
-                user=user,
-                notification_type=NotificationType.CALL_REMINDER,
-                obj=call,
-                scheduled_for=scheduled_for,
-                minutes_before=minutes_before,
-                expect_email=True,
-            )
-            if log_row is None:
-                dedup_skipped += 1
-                continue
+        for batch in iter_batches(calls):
+            claims = []
+            for call in batch:
+                lead = call.client
+                if not lead.assigned_to:
+                    skipped_count += 1
+                    continue
+                user = lead.assigned_to
 
-            try:
-                minutes_remaining = int(
-                    (call.follow_up_date - now).total_seconds() / 60
-                )
-                NotificationService.send_notification(
-                    user=user,
-                    notification_type=NotificationType.CALL_REMINDER,
-                    data={
-                        "call_id": call.id,
-                        "lead_id": lead.id,
-                        "lead_name": lead.name,
-                        "minutes_remaining": minutes_remaining,
-                        "minutes_before": minutes_before,
-                    },
-                    lead_source=getattr(lead, "source", None),
-                )
-                log_row.push_sent = True
-
-                email_ok = send_followup_reminder_email(
-                    user,
-                    reminder_kind="call",
-                    title=f"Call follow-up: {lead.name}",
-                    lead_name=lead.name,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    language=getattr(user, "language", "ar") or "ar",
-                )
-                if email_ok:
-                    log_row.email_sent = True
-                sent_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Sent reminder to {user.username} for call {call.id}"
+                if dry_run:
+                    # Claiming would write to the dispatch log, so never claim during a dry run.
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"[DRY RUN] Would send reminder to {user.username} "
+                            f"for call {call.id} - Reminder at {call.follow_up_date}"
+                        )
                     )
-                )
-            except Exception as e:
-                logger.error("Error sending reminder for call %s: %s", call.id, e)
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Error sending reminder for call {call.id}: {e}"
+                    sent_count += 1
+                    continue
+
+                claims.append(
+                    DispatchClaim(
+                        user=user,
+                        notification_type=NotificationType.CALL_REMINDER,
+                        obj=call,
+                        scheduled_for=call.follow_up_date,
+                        minutes_before=minutes_before,
+                        expect_email=True,
                     )
                 )
-                log_row.last_error = str(e)
-                skipped_count += 1
-            finally:
-                log_row.save(
-                    update_fields=[
-                        "push_sent",
-                        "email_sent",
-                        "last_error",
-                        "updated_at",
-                    ]
-                )
+
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        dedup_skipped += 1
+                        continue
+
+                    call = claim.obj
+                    lead = call.client
+                    user = claim.user
+                    scheduled_for = claim.scheduled_for
+                    try:
+                        minutes_remaining = int(
+                            (call.follow_up_date - now).total_seconds() / 60
+                        )
+                        NotificationService.send_notification(
+                            user=user,
+                            notification_type=NotificationType.CALL_REMINDER,
+                            data={
+                                "call_id": call.id,
+                                "lead_id": lead.id,
+                                "lead_name": lead.name,
+                                "minutes_remaining": minutes_remaining,
+                                "minutes_before": minutes_before,
+                            },
+                            lead_source=getattr(lead, "source", None),
+                        )
+                        log_row.push_sent = True
+
+                        email_ok = send_followup_reminder_email(
+                            user,
+                            reminder_kind="call",
+                            title=f"Call follow-up: {lead.name}",
+                            lead_name=lead.name,
+                            scheduled_for=scheduled_for,
+                            minutes_before=minutes_before,
+                            language=getattr(user, "language", "ar") or "ar",
+                        )
+                        if email_ok:
+                            log_row.email_sent = True
+                        sent_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"Sent reminder to {user.username} for call {call.id}"
+                            )
+                        )
+                    except Exception as e:
+                        logger.error("Error sending reminder for call %s: %s", call.id, e)
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"Error sending reminder for call {call.id}: {e}"
+                            )
+                        )
+                        log_row.last_error = str(e)
+                        skipped_count += 1
 
         visit_kwargs = dict(
             dry_run=dry_run,
@@ -10,7 +10,12 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from crm.models import Deal
-from notifications.dispatch import claim_dispatch
+from notifications.dispatch import (
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatches,
+    iter_batches,
+)
 from notifications.services import NotificationService
 from notifications.models import NotificationType
 from accounts.event_emails import send_followup_reminder_email
@@ -68,74 +73,83 @@ class Command(BaseCommand):
         skipped_count = 0
         dedup_skipped = 0
 
-        for deal in deals:
-            if not deal.employee:
-                skipped_count += 1
-                continue
-            user = deal.employee
-            scheduled_for = deal.reminder_date
-
-            if dry_run:
-                # Claiming would write to the dispatch log, so never claim during a dry run.
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'[DRY RUN] Would send reminder to {user.username} '
-                        f'for deal {deal.id} ({deal.client.name})'
+        for batch in iter_batches(deals):
+            claims = []
+            for deal in batch:
+                if not deal.employee:
+                    skipped_count += 1
+                    continue
+                user = deal.employee
+
+                if dry_run:
+                    # Claiming would write to the dispatch log, so never claim during a dry run.
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'[DRY RUN] Would send reminder to {user.username} '
+                            f'for deal {deal.id} ({deal.client.name})'
+                        )
                     )
-                )
-                sent_count += 1
-            else:
-                log_row = claim_dispatch(
-                    user=user,
-                    notification_type=NotificationType.DEAL_REMINDER,
-                    obj=deal,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    expect_email=True,
-                )
-                if log_row is None:
-                    dedup_skipped += 1
+                    sent_count += 1
                     continue
 
-                try:
-                    NotificationService.send_notification(
+                claims.append(
+                    DispatchClaim(
                         user=user,
                         notification_type=NotificationType.DEAL_REMINDER,
-                        data={
-                            'deal_id': deal.id,
-                            'deal_title': f'{deal.client.name} - {deal.value or 0}',
-                            'minutes_before': minutes_before,
-                        },
-                        skip_settings_check=False,  # Respect user settings
-                    )
-                    log_row.push_sent = True
-
-                    email_ok = send_followup_reminder_email(
-                        user,
-                        reminder_kind="deal",
-                        title=f"Deal follow-up: {deal.client.name}",
-                        lead_name=deal.client.name,
-                        scheduled_for=scheduled_for,
+                        obj=deal,
+                        scheduled_for=deal.reminder_date,
                         minutes_before=minutes_before,
-                        language=getattr(user, "language", "ar") or "ar",
+                        expect_email=True,
                     )
-                    if email_ok:
-                        log_row.email_sent = True
-                    sent_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Sent reminder to {user.username} for deal {deal.id}'
+                )
+
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        dedup_skipped += 1
+                        continue
+
+                    deal = claim.obj
+                    user = claim.user
+                    scheduled_for = claim.scheduled_for
+                    try:
+                        NotificationService.send_notification(
+                            user=user,
+                            notification_type=NotificationType.DEAL_REMINDER,
+                            data={
+                                'deal_id': deal.id,
+                                'deal_title': f'{deal.client.name} - {deal.value or 0}',
+                                'minutes_before': minutes_before,
+                            },
+                            skip_settings_check=False,  # Respect user settings
                         )
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending reminder for deal {deal.id}: {e}")
-                    self.stdout.write(
-                        self.style.ERROR(f'Error sending reminder for deal {deal.id}: {e}')
-                    )
-                    log_row.last_error = str(e)
-                    skipped_count += 1
-                finally:
-                    log_row.save(update_fields=["push_sent", "email_sent", "last_error", "updated_at"])
+                        log_row.push_sent = True
+
+                        email_ok = send_followup_reminder_email(
+                            user,
+                            reminder_kind="deal",
+                            title=f"Deal follow-up: {deal.client.name}",
+                            lead_name=deal.client.name,
+                            scheduled_for=scheduled_for,
+                            minutes_before=minutes_before,
+                            language=getattr(user, "language", "ar") or "ar",
+                        )
+                        if email_ok:
+                            log_row.email_sent = True
+                        sent_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'Sent reminder to {user.username} for deal {deal.id}'
+                            )
+                        )
+                    except Exception as e:
+                        logger.error(f"Error sending reminder for deal {deal.id}: {e}")
+                        self.stdout.write(
+                            self.style.ERROR(f'Error sending reminder for deal {deal.id}: {e}')
+                        )
+                        log_row.last_error = str(e)
+                        skipped_count += 1
 
         if dry_run:
             self.stdout.write(
@@ -17,7 +17,7 @@ from django.utils import timezone
 
 from crm.arrivals import arrival_escalation_recipients
 from crm.models import LeadArrival
-from notifications.dispatch import claim_dispatch, mark_dispatched
+from notifications.dispatch import DispatchClaim, OutcomeRecorder, claim_dispatches
 from notifications.models import NotificationType
 from notifications.services import NotificationService
 
@@ -61,6 +61,8 @@ class Command(BaseCommand):
         escalated_count = 0
         notified_count = 0
 
+        claims = []
+        due_arrivals = []
         for arrival in arrivals:
             already_notified_ids = {u.id for u in arrival.notified_users.all()}
             recipients = arrival_escalation_recipients(
@@ -76,18 +78,27 @@ class Command(BaseCommand):
                 )
                 continue
 
+            due_arrivals.append(arrival)
             for recipient in recipients:
-                log_row = claim_dispatch(
-                    user=recipient,
-                    notification_type=NotificationType.CUSTOMER_ARRIVAL_ESCALATED,
-                    obj=arrival,
-                    scheduled_for=arrival.escalation_due_at,
-                    minutes_before=0,
-                    dedupe_key="arrival_escalation",
-                    expect_email=False,
+                claims.append(
+                    DispatchClaim(
+                        user=recipient,
+                        notification_type=NotificationType.CUSTOMER_ARRIVAL_ESCALATED,
+                        obj=arrival,
+                        scheduled_for=arrival.escalation_due_at,
+                        minutes_before=0,
+                        dedupe_key="arrival_escalation",
+                        expect_email=False,
+                    )
                 )
+
+        log_rows = claim_dispatches(claims)
+        with OutcomeRecorder() as outcomes:
+            for claim, log_row in outcomes.track(zip(claims, log_rows)):
                 if log_row is None:
                     continue
+                arrival = claim.obj
+                recipient = claim.user
                 try:
                     NotificationService.send_notification(
                         user=recipient,
@@ -103,19 +114,20 @@ class Command(BaseCommand):
                         },
                         skip_settings_check=True,
                     )
-                    mark_dispatched(log_row, push_sent=True)
+                    log_row.push_sent = True
                     notified_count += 1
                 except Exception as e:
                     logger.error(
                         "Error escalating arrival %s to %s: %s", arrival.id, recipient.username, e
                     )
-                    mark_dispatched(log_row, push_sent=False, error=str(e))
+                    log_row.push_sent = False
+                    log_row.last_error = str(e)
 
-            updated = LeadArrival.objects.filter(
-                pk=arrival.pk, escalated_at__isnull=True
+        if due_arrivals:
+            escalated_count = LeadArrival.objects.filter(
+                pk__in=[arrival.pk for arrival in due_arrivals],
+                escalated_at__isnull=True,
             ).update(escalated_at=now)
-            if updated:
-                escalated_count += 1
 
         if dry_run:
             self.stdout.write(self.style.SUCCESS(f"[DRY RUN] {arrivals.count()} arrival(s) would escalate."))
@@ -29,9 +29,14 @@ from django.utils import timezone
 
 from crm.models import Client
 from notifications.dispatch import (
+    DISPATCH_BATCH_SIZE,
+    DispatchClaim,
+    OutcomeRecorder,
     claim_dispatch,
+    claim_dispatches,
     due_local_slot,
     escalation_step,
+    iter_batches,
     mark_dispatched,
 )
 from notifications.models import NotificationType
@@ -102,80 +107,91 @@ class Command(BaseCommand):
             .select_related('assigned_to', 'company', 'company__owner', 'status')
         )
 
-        for lead in leads.iterator(chunk_size=500):
-            company = lead.company
-
-            if company.id not in subscription_ok:
-                subscription_ok[company.id] = get_active_subscription(company) is not None
-            if not subscription_ok[company.id]:
-                skipped_count += 1
-                continue
-
-            sla_hours = hours_override or company.no_follow_up_hours or 10
-            reference = lead.last_contacted_at or lead.assigned_at or lead.created_at
-
-            due = escalation_step(reference, sla_hours, MAX_ESCALATIONS, now=now)
-            if due is None:
-                skipped_count += 1
-                continue
-            step, due_at, overdue_hours = due
-
-            # Count toward the owner digest whenever the lead is currently overdue,
-            # independently of whether this particular rung still needs sending.
-            bucket = overdue_by_company[company.id]
-            bucket["company"] = company
-            bucket["leads"] += 1
-            bucket["employees"].add(lead.assigned_to_id)
-
-            if dry_run:
-                self._echo(
-                    self.style.SUCCESS(
-                        f'[DRY RUN] Lead {lead.id} ({lead.name}) -> {lead.assigned_to.username}: '
-                        f'step {step}/{MAX_ESCALATIONS}, {overdue_hours}h overdue, due at {due_at.isoformat()}'
+        for batch in iter_batches(leads.iterator(chunk_size=DISPATCH_BATCH_SIZE)):
+            claims = []
+            for lead in batch:
+                company = lead.company
+
+                if company.id not in subscription_ok:
+                    subscription_ok[company.id] = get_active_subscription(company) is not None
+                if not subscription_ok[company.id]:
+                    skipped_count += 1
+                    continue
+
+                sla_hours = hours_override or company.no_follow_up_hours or 10
+                reference = lead.last_contacted_at or lead.assigned_at or lead.created_at
+
+                due = escalation_step(reference, sla_hours, MAX_ESCALATIONS, now=now)
+                if due is None:
+                    skipped_count += 1
+                    continue
+                step, due_at, overdue_hours = due
+
+                # Count toward the owner digest whenever the lead is currently overdue,
+                # independently of whether this particular rung still needs sending.
+                bucket = overdue_by_company[company.id]
+                bucket["company"] = company
+                bucket["leads"] += 1
+                bucket["employees"].add(lead.assigned_to_id)
+
+                if dry_run:
+                    self._echo(
+                        self.style.SUCCESS(
+                            f'[DRY RUN] Lead {lead.id} ({lead.name}) -> {lead.assigned_to.username}: '
+                            f'step {step}/{MAX_ESCALATIONS}, {overdue_hours}h overdue, due at {due_at.isoformat()}'
+                        )
+                    )
+                    sent_count += 1
+                    continue
+
+                claims.append(
+                    DispatchClaim(
+                        user=lead.assigned_to,
+                        notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+                        obj=lead,
+                        scheduled_for=due_at,
+                        context=(step, overdue_hours),
                     )
                 )
-                sent_count += 1
-                continue
-
-            log_row = claim_dispatch(
-                user=lead.assigned_to,
-                notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
-                obj=lead,
-                scheduled_for=due_at,
-            )
-            if log_row is None:
-                skipped_count += 1
-                continue
-
-            try:
-                NotificationService.send_notification(
-                    user=lead.assigned_to,
-                    notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
-                    data={
-                        'lead_id': lead.id,
-                        'lead_name': lead.name,
-                        'hours': overdue_hours,
-                        'escalation_step': step,
-                    },
-                    lead_source=getattr(lead, 'source', None),
-                )
-                mark_dispatched(log_row, push_sent=True)
-                sent_count += 1
-            except Exception as e:
-                logger.error("Error sending no-follow-up notification for lead %s: %s", lead.id, e)
-                self._echo(self.style.ERROR(f'Error sending notification for lead {lead.id}: {e}'))
-                mark_dispatched(log_row, error=str(e))
-                skipped_count += 1
-                continue
 
-            # Reported outside the try: a console encoding failure must never be
-            # recorded as a failed send.
-            self._echo(
-                self.style.SUCCESS(
-                    f'Sent no-follow-up alert to {lead.assigned_to.username} for lead '
-                    f'{lead.id} ({lead.name}) - {overdue_hours}h overdue (step {step})'
-                )
-            )
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        skipped_count += 1
+                        continue
+
+                    lead = claim.obj
+                    step, overdue_hours = claim.context
+                    try:
+                        NotificationService.send_notification(
+                            user=lead.assigned_to,
+                            notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+                            data={
+                                'lead_id': lead.id,
+                                'lead_name': lead.name,
+                                'hours': overdue_hours,
+                                'escalation_step': step,
+                            },
+                            lead_source=getattr(lead, 'source', None),
+                        )
+                        log_row.push_sent = True
+                        sent_count += 1
+                    except Exception as e:
+                        logger.error("Error sending no-follow-up notification for lead %s: %s", lead.id, e)
+                        self._echo(self.style.ERROR(f'Error sending notification for lead {lead.id}: {e}'))
+                        log_row.last_error = str(e)
+                        skipped_count += 1
+                        continue
+
+                    # Reported outside the try: a console encoding failure must never be
+                    # recorded as a failed send.
+                    self._echo(
+                        self.style.SUCCESS(
+                            f'Sent no-follow-up alert to {lead.assigned_to.username} for lead '
+                            f'{lead.id} ({lead.name}) - {overdue_hours}h overdue (step {step})'
+                        )
+                    )
 
         digests = self._send_owner_digests(overdue_by_company, dry_run=dry_run)
 
@@ -10,7 +10,12 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from crm.models import ClientTask
-from notifications.dispatch import claim_dispatch
+from notifications.dispatch import (
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatches,
+    iter_batches,
+)
 from notifications.services import NotificationService
 from notifications.models import NotificationType
 from accounts.event_emails import send_followup_reminder_email
@@ -70,77 +75,86 @@ class Command(BaseCommand):
         skipped_count = 0
         dedup_skipped = 0
 
-        for task in tasks:
-            lead = task.client
-            if not lead.assigned_to:
-                skipped_count += 1
-                continue
-            user = lead.assigned_to
-            scheduled_for = task.reminder_date
-
-            if dry_run:
-                # Claiming would write to the dispatch log, so never claim during a dry run.
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'[DRY RUN] Would send reminder to {user.username} '
-                        f'for lead {lead.id} ({lead.name}) - Reminder at {task.reminder_date}'
+        for batch in iter_batches(tasks):
+            claims = []
+            for task in batch:
+                lead = task.client
+                if not lead.assigned_to:
+                    skipped_count += 1
+                    continue
+                user = lead.assigned_to
+
+                if dry_run:
+                    # Claiming would write to the dispatch log, so never claim during a dry run.
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'[DRY RUN] Would send reminder to {user.username} '
+                            f'for lead {lead.id} ({lead.name}) - Reminder at {task.reminder_date}'
+                        )
                     )
-                )
-                sent_count += 1
-            else:
-                log_row = claim_dispatch(
-                    user=user,
-                    notification_type=NotificationType.LEAD_REMINDER,
-                    obj=task,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    expect_email=True,
-                )
-                if log_row is None:
-                    dedup_skipped += 1
+                    sent_count += 1
                     continue
 
-                try:
-                    NotificationService.send_notification(
+                claims.append(
+                    DispatchClaim(
                         user=user,
                         notification_type=NotificationType.LEAD_REMINDER,
-                        data={
-                            "lead_id": lead.id,
-                            "lead_name": lead.name,
-                            "reminder_time": scheduled_for.isoformat() if scheduled_for else None,
-                            "minutes_before": minutes_before,
-                        },
-                        lead_source=getattr(lead, "source", None),
-                    )
-                    log_row.push_sent = True
-
-                    # Email (best-effort; respects outbound email enabled)
-                    email_ok = send_followup_reminder_email(
-                        user,
-                        reminder_kind="lead",
-                        title=f"Follow up: {lead.name}",
-                        lead_name=lead.name,
-                        scheduled_for=scheduled_for,
+                        obj=task,
+                        scheduled_for=task.reminder_date,
                         minutes_before=minutes_before,
-                        language=getattr(user, "language", "ar") or "ar",
+                        expect_email=True,
                     )
-                    if email_ok:
-                        log_row.email_sent = True
-                    sent_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Sent reminder to {user.username} for lead {lead.id} ({lead.name})'
+                )
+
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        dedup_skipped += 1
+                        continue
+
+                    lead = claim.obj.client
+                    user = claim.user
+                    scheduled_for = claim.scheduled_for
+                    try:
+                        NotificationService.send_notification(
+                            user=user,
+                            notification_type=NotificationType.LEAD_REMINDER,
+                            data={
+                                "lead_id": lead.id,
+                                "lead_name": lead.name,
+                                "reminder_time": scheduled_for.isoformat() if scheduled_for else None,
+                                "minutes_before": minutes_before,
+                            },
+                            lead_source=getattr(lead, "source", None),
                         )
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending reminder for lead {lead.id}: {e}")
-                    self.stdout.write(
-                        self.style.ERROR(f'Error sending reminder for lead {lead.id}: {e}')
-                    )
-                    log_row.last_error = str(e)
-                    skipped_count += 1
-                finally:
-                    log_row.save(update_fields=["push_sent", "email_sent", "last_error", "updated_at"])
+                        log_row.push_sent = True
+
+                        # Email (best-effort; respects outbound email enabled)
+                        email_ok = send_followup_reminder_email(
+                            user,
+                            reminder_kind="lead",
+                            title=f"Follow up: {lead.name}",
+                            lead_name=lead.name,
+                            scheduled_for=scheduled_for,
+                            minutes_before=minutes_before,
+                            language=getattr(user, "language", "ar") or "ar",
+                        )
+                        if email_ok:
+                            log_row.email_sent = True
+                        sent_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'Sent reminder to {user.username} for lead {lead.id} ({lead.name})'
+                            )
+                        )
+                    except Exception as e:
+                        logger.error(f"Error sending reminder for lead {lead.id}: {e}")
+                        self.stdout.write(
+                            self.style.ERROR(f'Error sending reminder for lead {lead.id}: {e}')
+                        )
+                        log_row.last_error = str(e)
+                        skipped_count += 1
 
         if dry_run:
             self.stdout.write(
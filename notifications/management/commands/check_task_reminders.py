@@ -10,7 +10,12 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from crm.models import Task
-from notifications.dispatch import claim_dispatch
+from notifications.dispatch import (
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatches,
+    iter_batches,
+)
 from notifications.services import NotificationService
 from notifications.models import NotificationType
 from accounts.event_emails import send_followup_reminder_email
@@ -56,7 +61,7 @@ class Command(BaseCommand):
             reminder_date__lt=reminder_end,
             completed_at__isnull=True,
             deal__employee__isnull=False,
-        ).select_related('deal', 'deal__employee')
+        ).select_related('deal', 'deal__employee', 'deal__client')
 
         if not tasks.exists():
             self.stdout.write(
@@ -68,76 +73,84 @@ class Command(BaseCommand):
         skipped_count = 0
         dedup_skipped = 0
 
-        for task in tasks:
-            employee = task.deal.employee
-            if not employee:
-                skipped_count += 1
-                continue
-
-            scheduled_for = task.reminder_date
+        for batch in iter_batches(tasks):
+            claims = []
+            for task in batch:
+                employee = task.deal.employee
+                if not employee:
+                    skipped_count += 1
+                    continue
 
-            if dry_run:
-                # Claiming would write to the dispatch log, so never claim during a dry run.
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'[DRY RUN] Would send reminder to {employee.username} '
-                        f'for task {task.id} - Reminder at {task.reminder_date}'
+                if dry_run:
+                    # Claiming would write to the dispatch log, so never claim during a dry run.
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'[DRY RUN] Would send reminder to {employee.username} '
+                            f'for task {task.id} - Reminder at {task.reminder_date}'
+                        )
                     )
-                )
-                sent_count += 1
-            else:
-                log_row = claim_dispatch(
-                    user=employee,
-                    notification_type=NotificationType.TASK_REMINDER,
-                    obj=task,
-                    scheduled_for=scheduled_for,
-                    minutes_before=minutes_before,
-                    expect_email=True,
-                )
-                if log_row is None:
-                    dedup_skipped += 1
+                    sent_count += 1
                     continue
 
-                try:
-                    NotificationService.send_notification(
+                claims.append(
+                    DispatchClaim(
                         user=employee,
                         notification_type=NotificationType.TASK_REMINDER,
-                        data={
-                            'task_id': task.id,
-                            'task_title': task.notes or f'Task for {task.deal.client.name}',
-                            'minutes_remaining': int((task.reminder_date - now).total_seconds() / 60),
-                            'minutes_before': minutes_before,
-                        },
-                        skip_settings_check=False,  # Respect user settings
-                    )
-                    log_row.push_sent = True
-
-                    email_ok = send_followup_reminder_email(
-                        employee,
-                        reminder_kind="task",
-                        title=task.notes or f"Task for {task.deal.client.name}",
-                        lead_name=task.deal.client.name,
-                        scheduled_for=scheduled_for,
+                        obj=task,
+                        scheduled_for=task.reminder_date,
                         minutes_before=minutes_before,
-                        language=getattr(employee, "language", "ar") or "ar",
+                        expect_email=True,
                     )
-                    if email_ok:
-                        log_row.email_sent = True
-                    sent_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Sent reminder to {employee.username} for task {task.id}'
+                )
+
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        dedup_skipped += 1
+                        continue
+
+                    task = claim.obj
+                    employee = claim.user
+                    scheduled_for = claim.scheduled_for
+                    try:
+                        NotificationService.send_notification(
+                            user=employee,
+                            notification_type=NotificationType.TASK_REMINDER,
+                            data={
+                                'task_id': task.id,
+                                'task_title': task.notes or f'Task for {task.deal.client.name}',
+                                'minutes_remaining': int((task.reminder_date - now).total_seconds() / 60),
+                                'minutes_before': minutes_before,
+                            },
+                            skip_settings_check=False,  # Respect user settings
                         )
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending reminder for task {task.id}: {e}")
-                    self.stdout.write(
-                        self.style.ERROR(f'Error sending reminder for task {task.id}: {e}')
-                    )
-                    log_row.last_error = str(e)
-                    skipped_count += 1
-                finally:
-                    log_row.save(update_fields=["push_sent", "email_sent", "last_error", "updated_at"])
+                        log_row.push_sent = True
+
+                        email_ok = send_followup_reminder_email(
+                            employee,
+                            reminder_kind="task",
+                            title=task.notes or f"Task for {task.deal.client.name}",
+                            lead_name=task.deal.client.name,
+                            scheduled_for=scheduled_for,
+                            minutes_before=minutes_before,
+                            language=getattr(employee, "language", "ar") or "ar",
+                        )
+                        if email_ok:
+                            log_row.email_sent = True
+                        sent_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'Sent reminder to {employee.username} for task {task.id}'
+                            )
+                        )
+                    except Exception as e:
+                        logger.error(f"Error sending reminder for task {task.id}: {e}")
+                        self.stdout.write(
+                            self.style.ERROR(f'Error sending reminder for task {task.id}: {e}')
+                        )
+                        log_row.last_error = str(e)
+                        skipped_count += 1
 
         if dry_run:
             self.stdout.write(
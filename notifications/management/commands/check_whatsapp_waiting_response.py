@@ -21,7 +21,13 @@ from django.utils import timezone
 from datetime import timedelta
 
 from crm.models import Client
-from notifications.dispatch import claim_dispatch, mark_dispatched
+from notifications.dispatch import (
+    DISPATCH_BATCH_SIZE,
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatches,
+    iter_batches,
+)
 from notifications.models import NotificationType
 from notifications.services import NotificationService
 
@@ -62,60 +68,70 @@ class Command(BaseCommand):
         sent_count = 0
         skipped_count = 0
 
-        for lead in leads.iterator(chunk_size=500):
-            if not lead.assigned_to:
-                skipped_count += 1
-                continue
-
-            reference = lead.last_contacted_at
-            due_at = reference + timedelta(hours=hours)
-            elapsed_hours = max(1, math.ceil((now - reference).total_seconds() / 3600))
-
-            if dry_run:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'[DRY RUN] Would notify {lead.assigned_to.username} for lead '
-                        f'{lead.id} ({lead.name}) - waiting {elapsed_hours}h, due at {due_at.isoformat()}'
+        for batch in iter_batches(leads.iterator(chunk_size=DISPATCH_BATCH_SIZE)):
+            claims = []
+            for lead in batch:
+                if not lead.assigned_to:
+                    skipped_count += 1
+                    continue
+
+                reference = lead.last_contacted_at
+                due_at = reference + timedelta(hours=hours)
+                elapsed_hours = max(1, math.ceil((now - reference).total_seconds() / 3600))
+
+                if dry_run:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'[DRY RUN] Would notify {lead.assigned_to.username} for lead '
+                            f'{lead.id} ({lead.name}) - waiting {elapsed_hours}h, due at {due_at.isoformat()}'
+                        )
                     )
-                )
-                sent_count += 1
-                continue
-
-            log_row = claim_dispatch(
-                user=lead.assigned_to,
-                notification_type=NotificationType.WHATSAPP_WAITING_RESPONSE,
-                obj=lead,
-                scheduled_for=due_at,
-            )
-            if log_row is None:
-                skipped_count += 1
-                continue
-
-            try:
-                NotificationService.send_notification(
-                    user=lead.assigned_to,
-                    notification_type=NotificationType.WHATSAPP_WAITING_RESPONSE,
-                    data={
-                        'lead_id': lead.id,
-                        'lead_name': lead.name,
-                        'hours': elapsed_hours,
-                    },
-                    lead_source=getattr(lead, 'source', None),
-                )
-                mark_dispatched(log_row, push_sent=True)
-                sent_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Sent notification to {lead.assigned_to.username} for lead {lead.id} ({lead.name})'
+                    sent_count += 1
+                    continue
+
+                claims.append(
+                    DispatchClaim(
+                        user=lead.assigned_to,
+                        notification_type=NotificationType.WHATSAPP_WAITING_RESPONSE,
+                        obj=lead,
+                        scheduled_for=due_at,
+                        context=elapsed_hours,
                     )
                 )
-            except Exception as e:
-                logger.error("Error sending notification for lead %s: %s", lead.id, e)
-                self.stdout.write(
-                    self.style.ERROR(f'Error sending notification for lead {lead.id}: {e}')
-                )
-                mark_dispatched(log_row, error=str(e))
-                skipped_count += 1
+
+            log_rows = claim_dispatches(claims)
+            with OutcomeRecorder() as outcomes:
+                for claim, log_row in outcomes.track(zip(claims, log_rows)):
+                    if log_row is None:
+                        skipped_count += 1
+                        continue
+
+                    lead = claim.obj
+                    try:
+                        NotificationService.send_notification(
+                            user=lead.assigned_to,
+                            notification_type=NotificationType.WHATSAPP_WAITING_RESPONSE,
+                            data={
+                                'lead_id': lead.id,
+                                'lead_name': lead.name,
+                                'hours': claim.context,
+                            },
+                            lead_source=getattr(lead, 'source', None),
+                        )
+                        log_row.push_sent = True
+                        sent_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'Sent notification to {lead.assigned_to.username} for lead {lead.id} ({lead.name})'
+                            )
+                        )
+                    except Exception as e:
+                        logger.error("Error sending notification for lead %s: %s", lead.id, e)
+                        self.stdout.write(
+                            self.style.ERROR(f'Error sending notification for lead {lead.id}: {e}')
+                        )
+                        log_row.last_error = str(e)
+                        skipped_count += 1
 
         prefix = '[DRY RUN] Would send' if dry_run else 'Sent'
         self.stdout.write(
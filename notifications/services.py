@@ -9,7 +9,7 @@ from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.db.models import Q
 from .models import Notification, NotificationType, NotificationSettings
-from .tasks import enqueue_push, push_queue_enabled
+from .tasks import enqueue_push, enqueue_push_many, push_queue_enabled
 from .translations import get_notification_text, normalize_notification_language
 from .fcm_android_channels import (
     android_notification_channel_id,
@@ -34,6 +34,9 @@ except ImportError:
     FIREBASE_AVAILABLE = False
     logger.warning("Firebase Admin SDK not installed. Install it with: pip install firebase-admin")
 
+# FCM rejects multicasts with more than 500 registration tokens.
+FCM_MULTICAST_MAX_TOKENS = 500
+
 
 class NotificationService:
     """Service for sending push notifications"""
@@ -265,127 +268,14 @@ class NotificationService:
             return False
 
         try:
-            # Prepare notification payload
-            notification_payload = messaging.Notification(
+            multicast = cls._build_multicast(
+                user_tokens,
+                notification_type=notification_type,
                 title=title,
                 body=body,
-                image=image_url,
+                data=data,
+                image_url=image_url,
             )
-
-            # Prepare data payload
-            message_data = {
-                'type': notification_type,
-                'title': title,
-                'body': body,
-            }
-
-            if data:
-                # Add data fields (convert to strings for FCM)
-                for key, value in data.items():
-                    message_data[key] = str(value)
-
-            if image_url:
-                message_data['image_url'] = image_url
-
-            # Team chat: Android data-only so Flutter merges lines in one tray item.
-            # iOS uses APNs alert + custom sound (Point pattern) — background data-only
-            # pushes are unreliable on iOS and never play custom sounds from local handlers.
-            tenant_chat_data_only = (data or {}).get("kind") == "tenant_chat"
-
-            # The payload is identical for every one of this user's devices — only the
-            # token differed. So it is built once and sent as a single multicast.
-            # Building it per token and calling messaging.send() in a loop cost one
-            # blocking HTTPS round-trip per device, inside the request; a team-wide
-            # fan-out could hold a Gunicorn worker for seconds.
-            if tenant_chat_data_only:
-                conversation_id = (data or {}).get("conversation_id")
-                collapse_id = tenant_chat_apns_collapse_id(conversation_id)
-                apns_headers: Dict[str, str] = {
-                    "apns-push-type": "alert",
-                    "apns-priority": "10",
-                }
-                if collapse_id:
-                    apns_headers["apns-collapse-id"] = collapse_id
-                apns_aps_kwargs: Dict[str, Any] = {
-                    "alert": messaging.ApsAlert(title=title, body=body),
-                    "sound": tenant_chat_ios_sound_filename(),
-                }
-                thread_id = (
-                    str(conversation_id).strip()
-                    if conversation_id is not None
-                    and str(conversation_id).strip()
-                    else None
-                )
-                if thread_id:
-                    apns_aps_kwargs["thread_id"] = thread_id
-                multicast = messaging.MulticastMessage(
-                    tokens=user_tokens,
-                    data=message_data,
-                    android=messaging.AndroidConfig(priority="high"),
-                    apns=messaging.APNSConfig(
-                        headers=apns_headers,
-                        payload=messaging.APNSPayload(
-                            aps=messaging.Aps(**apns_aps_kwargs),
-                        ),
-                    ),
-                )
-                logger.info(
-                    "FCM tenant_chat android=data-only ios_sound=%s collapse=%s",
-                    tenant_chat_ios_sound_filename(),
-                    collapse_id or "(none)",
-                )
-            else:
-                # Android 8+: system-displayed FCM uses the *channel* sound, not the
-                # legacy per-notification sound, when posting to the default FCM channel.
-                # So we must send channel_id matching flutter_local_notifications channels
-                # (created on first app open). If those channels do not exist yet, Android
-                # may drop the notification — user must open the app once after install.
-                # team_activity reuses category channels/sounds based on data.action.
-                action = (data or {}).get("action")
-                action_str = str(action) if action is not None else None
-                channel_id = android_notification_channel_id(
-                    notification_type, action=action_str
-                )
-                sound_base = android_notification_raw_sound_basename(
-                    notification_type, action=action_str
-                )
-                ios_sound = ios_notification_sound_filename(
-                    notification_type, action=action_str
-                )
-                android_notif_kwargs: Dict[str, Any] = {
-                    "channel_id": channel_id,
-                }
-                if sound_base:
-                    android_notif_kwargs["sound"] = sound_base
-                apns_aps_kwargs: Dict[str, Any] = {}
-                if ios_sound:
-                    apns_aps_kwargs["sound"] = ios_sound
-                multicast = messaging.MulticastMessage(
-                    tokens=user_tokens,
-                    notification=notification_payload,
-                    data=message_data,
-                    android=messaging.AndroidConfig(
-                        priority="high",
-                        notification=messaging.AndroidNotification(
-                            **android_notif_kwargs,
-                        ),
-                    ),
-                    apns=messaging.APNSConfig(
-                        headers={"apns-push-type": "alert", "apns-priority": "10"},
-                        payload=messaging.APNSPayload(
-                            aps=messaging.Aps(**apns_aps_kwargs),
-                        ),
-                    ),
-                )
-                logger.info(
-                    "FCM android channel_id=%s android_sound=%s ios_sound=%s type=%s action=%s",
-                    channel_id,
-                    sound_base or "(default)",
-                    ios_sound or "(default)",
-                    notification_type,
-                    action_str or "(none)",
-                )
-
             batch = messaging.send_each_for_multicast(multicast)
 
             # Responses are positionally aligned with the tokens we passed in.
@@ -403,15 +293,7 @@ class NotificationService:
                         resp.exception,
                     )
 
-            if stale_tokens:
-                for token in stale_tokens:
-                    user.remove_fcm_token(token)
-                user.save(update_fields=["fcm_token", "fcm_tokens"])
-                logger.warning(
-                    "Removed %d invalid FCM token(s) for %s",
-                    len(stale_tokens),
-                    user.username,
-                )
+            cls._remove_stale_tokens(user, stale_tokens)
 
             logger.info(
                 "FCM multicast to %s: %d/%d delivered",
@@ -426,6 +308,246 @@ class NotificationService:
             # Inbox already saved; push failure must not undo that.
             return False
 
+    @classmethod
+    def deliver_push_many(
+        cls,
+        users: List["AbstractUser"],
+        notification_type: str,
+        title: Optional[str] = None,
+        body: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+        image_url: Optional[str] = None,
+    ) -> set:
+        """
+        Send one identical push to many users as grouped FCM multicasts.
+
+        Every recipient must share the same rendered title/body (callers group by
+        language). All devices of all users go into multicasts of up to
+        FCM_MULTICAST_MAX_TOKENS tokens, so a company-wide alert costs one HTTPS
+        round-trip per few hundred devices instead of one per user.
+
+        Returns the ids of users with at least one successfully delivered device.
+        """
+        delivered_user_ids = set()
+        if not users:
+            return delivered_user_ids
+
+        if not cls.initialize():
+            logger.warning(
+                "Firebase not initialized. Inbox saved; push not sent to %d user(s).",
+                len(users),
+            )
+            return delivered_user_ids
+
+        # Flattened (token, user) pairs; responses are mapped back by position.
+        targets = []
+        for user in users:
+            for token in user.iter_fcm_tokens_for_push():
+                targets.append((token, user))
+        if not targets:
+            return delivered_user_ids
+
+        stale_by_user: Dict[int, List[str]] = {}
+        users_by_id = {}
+        for start in range(0, len(targets), FCM_MULTICAST_MAX_TOKENS):
+            chunk = targets[start:start + FCM_MULTICAST_MAX_TOKENS]
+            tokens = [token for token, _user in chunk]
+            try:
+                multicast = cls._build_multicast(
+                    tokens,
+                    notification_type=notification_type,
+                    title=title,
+                    body=body,
+                    data=data,
+                    image_url=image_url,
+                )
+                batch = messaging.send_each_for_multicast(multicast)
+            except Exception as e:
+                logger.error(
+                    "Error sending %s multicast to %d device(s): %s",
+                    notification_type,
+                    len(tokens),
+                    e,
+                )
+                continue
+
+            for (token, user), resp in zip(chunk, batch.responses):
+                if resp.success:
+                    delivered_user_ids.add(user.pk)
+                    continue
+                if isinstance(resp.exception, messaging.UnregisteredError):
+                    stale_by_user.setdefault(user.pk, []).append(token)
+                    users_by_id[user.pk] = user
+                else:
+                    logger.warning(
+                        "FCM send failed for %s token=%s...: %s",
+                        user.username,
+                        token[:12],
+                        resp.exception,
+                    )
+
+        for user_id, stale_tokens in stale_by_user.items():
+            try:
+                cls._remove_stale_tokens(users_by_id[user_id], stale_tokens)
+            except Exception as e:
+                logger.warning("Could not prune FCM tokens for user id=%s: %s", user_id, e)
+
+        logger.info(
+            "FCM grouped multicast %s: %d/%d user(s) delivered across %d device(s)",
+            notification_type,
+            len(delivered_user_ids),
+            len(users),
+            len(targets),
+        )
+        return delivered_user_ids
+
+    @classmethod
+    def _remove_stale_tokens(cls, user: "AbstractUser", stale_tokens: List[str]) -> None:
+        if not stale_tokens:
+            return
+        for token in stale_tokens:
+            user.remove_fcm_token(token)
+        user.save(update_fields=["fcm_token", "fcm_tokens"])
+        logger.warning(
+            "Removed %d invalid FCM token(s) for %s",
+            len(stale_tokens),
+            user.username,
+        )
+
+    @classmethod
+    def _build_multicast(
+        cls,
+        tokens: List[str],
+        notification_type: str,
+        title: Optional[str] = None,
+        body: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+        image_url: Optional[str] = None,
+    ):
+        """Build the FCM MulticastMessage for ``tokens``; the payload is token-independent."""
+        # Prepare notification payload
+        notification_payload = messaging.Notification(
+            title=title,
+            body=body,
+            image=image_url,
+        )
+
+        # Prepare data payload
+        message_data = {
+            'type': notification_type,
+            'title': title,
+            'body': body,
+        }
+
+        if data:
+            # Add data fields (convert to strings for FCM)
+            for key, value in data.items():
+                message_data[key] = str(value)
+
+        if image_url:
+            message_data['image_url'] = image_url
+
+        # Team chat: Android data-only so Flutter merges lines in one tray item.
+        # iOS uses APNs alert + custom sound (Point pattern) — background data-only
+        # pushes are unreliable on iOS and never play custom sounds from local handlers.
+        tenant_chat_data_only = (data or {}).get("kind") == "tenant_chat"
+
+        # The payload is identical for every one of this user's devices — only the
+        # token differed. So it is built once and sent as a single multicast.
+        # Building it per token and calling messaging.send() in a loop cost one
+        # blocking HTTPS round-trip per device, inside the request; a team-wide
+        # fan-out could hold a Gunicorn worker for seconds.
+        if tenant_chat_data_only:
+            conversation_id = (data or {}).get("conversation_id")
+            collapse_id = tenant_chat_apns_collapse_id(conversation_id)
+            apns_headers: Dict[str, str] = {
+                "apns-push-type": "alert",
+                "apns-priority": "10",
+            }
+            if collapse_id:
+                apns_headers["apns-collapse-id"] = collapse_id
+            apns_aps_kwargs: Dict[str, Any] = {
+                "alert": messaging.ApsAlert(title=title, body=body),
+                "sound": tenant_chat_ios_sound_filename(),
+            }
+            thread_id = (
+                str(conversation_id).strip()
+                if conversation_id is not None
+                and str(conversation_id).strip()
+                else None
+            )
+            if thread_id:
+                apns_aps_kwargs["thread_id"] = thread_id
+            multicast = messaging.MulticastMessage(
+                tokens=tokens,
+                data=message_data,
+                android=messaging.AndroidConfig(priority="high"),
+                apns=messaging.APNSConfig(
+                    headers=apns_headers,
+                    payload=messaging.APNSPayload(
+                        aps=messaging.Aps(**apns_aps_kwargs),
+                    ),
+                ),
+            )
+            logger.info(
+                "FCM tenant_chat android=data-only ios_sound=%s collapse=%s",
+                tenant_chat_ios_sound_filename(),
+                collapse_id or "(none)",
+            )
+            return multicast
+
+        # Android 8+: system-displayed FCM uses the *channel* sound, not the
+        # legacy per-notification sound, when posting to the default FCM channel.
+        # So we must send channel_id matching flutter_local_notifications channels
+        # (created on first app open). If those channels do not exist yet, Android
+        # may drop the notification — user must open the app once after install.
+        # team_activity reuses category channels/sounds based on data.action.
+        action = (data or {}).get("action")
+        action_str = str(action) if action is not None else None
+        channel_id = android_notification_channel_id(
+            notification_type, action=action_str
+        )
+        sound_base = android_notification_raw_sound_basename(
+            notification_type, action=action_str
+        )
+        ios_sound = ios_notification_sound_filename(
+            notification_type, action=action_str
+        )
+        android_notif_kwargs: Dict[str, Any] = {
+            "channel_id": channel_id,
+        }
+        if sound_base:
+            android_notif_kwargs["sound"] = sound_base
+        apns_aps_kwargs: Dict[str, Any] = {}
+        if ios_sound:
+            apns_aps_kwargs["sound"] = ios_sound
+        multicast = messaging.MulticastMessage(
+            tokens=tokens,
+            notification=notification_payload,
+            data=message_data,
+            android=messaging.AndroidConfig(
+                priority="high",
+                notification=messaging.AndroidNotification(
+                    **android_notif_kwargs,
+                ),
+            ),
+            apns=messaging.APNSConfig(
+                headers={"apns-push-type": "alert", "apns-priority": "10"},
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(**apns_aps_kwargs),
+                ),
+            ),
+        )
+        logger.info(
+            "FCM android channel_id=%s android_sound=%s ios_sound=%s type=%s action=%s",
+            channel_id,
+            sound_base or "(default)",
+            ios_sound or "(default)",
+            notification_type,
+            action_str or "(none)",
+        )
+        return multicast
+
     @classmethod
     def send_notification_on_commit(cls, user: "AbstractUser", **kwargs) -> None:
         """Dispatch send_notification after the surrounding DB transaction commits."""
@@ -454,21 +576,169 @@ class NotificationService:
         image_url: Optional[str] = None,
     ) -> Dict[str, int]:
         """
-        Send notification to multiple users
-        
+        Send one notification to many users in a fixed number of queries.
+
+        Applies the same per-recipient rules as send_notification — explicit mute
+        skips inbox and push, quiet hours / day restrictions only skip push, the
+        language comes from the DB — but loads every recipient's settings and
+        language up front, renders each translation once per language, writes the
+        inbox rows with one bulk INSERT and sends pushes as grouped multicasts
+        (one queued task per language when PUSH_QUEUE_ENABLED is on).
+
         Returns:
             Dict with 'success' and 'failed' counts
         """
         results = {'success': 0, 'failed': 0}
-        
-        for user in users:
-            if cls.send_notification(user, notification_type, title, body, data, image_url):
-                results['success'] += 1
+
+        recipients = list({u.pk: u for u in users if getattr(u, "pk", None)}.values())
+        if not recipients:
+            return results
+        user_ids = [u.pk for u in recipients]
+
+        settings_by_user = cls._settings_for_users(user_ids)
+        try:
+            languages = dict(
+                User.objects.filter(pk__in=user_ids).values_list("pk", "language")
+            )
+        except Exception:
+            languages = {}
+
+        rendered: Dict[str, tuple] = {}
+        inbox_rows = []
+        push_by_language: Dict[str, List["AbstractUser"]] = {}
+        for user in recipients:
+            settings_obj = settings_by_user.get(user.pk)
+            if settings_obj is not None:
+                try:
+                    # Explicit mute: skip both inbox and push.
+                    if not settings_obj.is_notification_enabled(notification_type):
+                        results['failed'] += 1
+                        continue
+                except Exception as e:
+                    logger.warning(
+                        f"Error checking notification settings for user {user.username}: {e}"
+                    )
+                    settings_obj = None  # fail open for mute + push
+
+            user_language = normalize_notification_language(
+                languages.get(user.pk) or getattr(user, "language", None)
+            )
+            if user_language not in rendered:
+                if title is None or body is None:
+                    translated = get_notification_text(
+                        notification_type=notification_type,
+                        language=user_language,
+                        **(data or {})
+                    )
+                    rendered[user_language] = (
+                        title or translated['title'],
+                        body or translated['body'],
+                    )
+                else:
+                    rendered[user_language] = (title, body)
+            user_title, user_body = rendered[user_language]
+
+            inbox_rows.append(
+                Notification(
+                    user=user,
+                    type=notification_type,
+                    title=user_title,
+                    body=user_body,
+                    data=data or {},
+                    image_url=image_url,
+                )
+            )
+
+            allow_push = True
+            if settings_obj is not None:
+                try:
+                    allow_push = settings_obj.should_send_notification(
+                        notification_type=notification_type,
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Error checking push settings for user {user.username}: {e}"
+                    )
+                    allow_push = True  # fail open for push
+            if allow_push:
+                push_by_language.setdefault(user_language, []).append(user)
             else:
                 results['failed'] += 1
-        
+
+        # Inbox first — never gated on push eligibility or delivery.
+        try:
+            Notification.objects.bulk_create(inbox_rows)
+        except Exception as e:
+            logger.error(
+                f"Error saving {notification_type} notifications for {len(inbox_rows)} user(s): {e}"
+            )
+            results['failed'] += sum(len(group) for group in push_by_language.values())
+            return results
+
+        for user_language, group in push_by_language.items():
+            user_title, user_body = rendered[user_language]
+            if push_queue_enabled() and enqueue_push_many(
+                user_ids=[u.pk for u in group],
+                notification_type=notification_type,
+                title=user_title,
+                body=user_body,
+                data=data,
+                image_url=image_url,
+            ):
+                results['success'] += len(group)
+                continue
+            # Queue off or broker unreachable: deliver inline rather than drop.
+            delivered = cls.deliver_push_many(
+                group,
+                notification_type=notification_type,
+                title=user_title,
+                body=user_body,
+                data=data,
+                image_url=image_url,
+            )
+            results['success'] += len(delivered)
+            results['failed'] += len(group) - len(delivered)
+
         return results
-    
+
+    @classmethod
+    def _settings_for_users(cls, user_ids: List[int]) -> Dict[int, NotificationSettings]:
+        """
+        NotificationSettings for every id, creating defaults for users that have none.
+
+        Bulk equivalent of NotificationSettings.get_or_create_for_user. Returns an
+        empty mapping on error so callers fail open, like send_notification does.
+        """
+        try:
+            by_user = {
+                s.user_id: s
+                for s in NotificationSettings.objects.filter(user_id__in=user_ids)
+            }
+            missing = [uid for uid in user_ids if uid not in by_user]
+            if missing:
+                NotificationSettings.objects.bulk_create(
+                    [
+                        NotificationSettings(
+                            user_id=uid,
+                            enabled=True,
+                            notification_types={},
+                            enabled_days=[True] * 7,  # All days enabled by default
+                        )
+                        for uid in missing
+                    ],
+                    ignore_conflicts=True,
+                )
+                by_user.update(
+                    {
+                        s.user_id: s
+                        for s in NotificationSettings.objects.filter(user_id__in=missing)
+                    }
+                )
+            return by_user
+        except Exception as e:
+            logger.warning(f"Error loading notification settings for {len(user_ids)} user(s): {e}")
+            return {}
+
     @classmethod
     def send_notification_to_company(
         cls,
@@ -18,7 +18,7 @@ the cluster misbehaves.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -30,6 +30,7 @@ User = get_user_model()
 # Dotted path rather than the function object: django-q stores the reference in the
 # broker and re-imports it in the worker, so it must be resolvable by name there.
 PUSH_TASK_PATH = "notifications.tasks.deliver_push_task"
+PUSH_MANY_TASK_PATH = "notifications.tasks.deliver_push_many_task"
 
 
 def push_queue_enabled() -> bool:
@@ -114,3 +115,73 @@ def enqueue_push(
             exc,
         )
         return False
+
+
+def deliver_push_many_task(
+    user_ids: List[int],
+    notification_type: str,
+    title: Optional[str] = None,
+    body: Optional[str] = None,
+    data: Optional[Dict[str, Any]] = None,
+    image_url: Optional[str] = None,
+) -> int:
+    """
+    Worker entry point for a fan-out: one identical push to many users.
+
+    Re-reads the users for the same reason deliver_push_task does. Returns the
+    number of users with at least one delivered device.
+    """
+    from .services import NotificationService
+
+    users = list(User.objects.filter(pk__in=user_ids))
+    if not users:
+        logger.info("Skipping queued fan-out push; no users left of %d", len(user_ids))
+        return 0
+
+    return len(
+        NotificationService.deliver_push_many(
+            users,
+            notification_type=notification_type,
+            title=title,
+            body=body,
+            data=data,
+            image_url=image_url,
+        )
+    )
+
+
+def enqueue_push_many(
+    user_ids: List[int],
+    notification_type: str,
+    title: Optional[str] = None,
+    body: Optional[str] = None,
+    data: Optional[Dict[str, Any]] = None,
+    image_url: Optional[str] = None,
+) -> bool:
+    """
+    Hand a whole fan-out to the cluster as a single task.
+
+    Same contract as enqueue_push: False instead of raising, so the caller can
+    deliver inline.
+    """
+    try:
+        from django_q.tasks import async_task
+
+        async_task(
+            PUSH_MANY_TASK_PATH,
+            list(user_ids),
+            notification_type,
+            title=title,
+            body=body,
+            data=data,
+            image_url=image_url,
+            task_name=f"push-many:{notification_type}:{len(user_ids)}"[:100],
+        )
+        return True
+    except Exception as exc:
+        logger.warning(
+            "Could not enqueue fan-out push for %d user(s) (%s); delivering inline instead",
+            len(user_ids),
+            exc,
+        )
+        return False
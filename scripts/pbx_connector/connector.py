@@ -7,14 +7,16 @@ Run on a machine on the same network as the PBX.
 from __future__ import annotations
 
 import ftplib
-import io
 import json
 import logging
+import os
 import socket
 import ssl
 import sys
 import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 from typing import Any
@@ -157,7 +159,9 @@ def _log_http_error(method: str, url: str, err: HTTPError) -> None:
             )
 
 
-def api_request(cfg: dict, method: str, path: str, body: dict | None = None) -> dict:
+def api_request(
+    cfg: dict, method: str, path: str, body: dict | None = None, *, timeout: float = 30
+) -> dict:
     url = build_api_url(cfg, path)
     headers = _request_headers(cfg)
     data = None
@@ -166,7 +170,7 @@ def api_request(cfg: dict, method: str, path: str, body: dict | None = None) ->
         data = json.dumps(body).encode("utf-8")
     req = urlrequest.Request(url, data=data, headers=headers, method=method)
     try:
-        with _urlopen(cfg, req, timeout=30) as resp:
+        with _urlopen(cfg, req, timeout=timeout) as resp:
             raw = json.loads(resp.read().decode("utf-8"))
             if isinstance(raw, dict) and "data" in raw:
                 return raw["data"] if raw["data"] is not None else raw
@@ -350,87 +354,435 @@ class AmiClient:
             self.close()
 
 
-def forward_event(cfg: dict, raw_body: bytes, content_type: str) -> None:
-    url = build_api_url(cfg, "/integrations/pbx/connector/events/")
-    headers = _request_headers(
+def _spool_event(raw_body: bytes, content_type: str) -> Any:
+    """
+    One PBX push as an entry of the CRM ``events`` batch: the decoded object for a
+    JSON push, else the body text (form or ``Key: value`` lines), which the CRM
+    parses the same way it parses a single raw push.
+    """
+    text = raw_body.decode("utf-8", errors="replace").strip()
+    if "json" in (content_type or "").lower() or text.startswith("{"):
+        try:
+            decoded = json.loads(text)
+        except ValueError:
+            decoded = None
+        if isinstance(decoded, dict):
+            return decoded
+    return text
+
+
+class EventSpool:
+    """
+    Append-only on-disk queue of PBX events, drained in order by one forwarder.
+
+    Events are JSON lines in numbered segment files under ``event_spool_dir``; a
+    segment is closed at ``SEGMENT_BYTES`` and deleted once fully delivered. The
+    ``cursor`` file holds the segment and byte offset of the first undelivered event,
+    so a restart resumes after the last batch the CRM accepted. A batch the CRM never
+    acknowledged is sent again, which is safe: events are upserted by call id.
+    """
+
+    SEGMENT_BYTES = 1024 * 1024
+
+    def __init__(self, directory: Path, *, max_bytes: int) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._cursor_path = self._dir / "cursor"
+        self.forwarded = 0
+        self.dropped = 0
+        self.last_error = ""
+
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 1
+        self._cursor = self._load_cursor(segments)
+        self._writer = (self._segment_path(self._segment)).open("ab")
+        if self._writer.tell():
+            # A crash mid-append leaves a partial line; end it so new events start clean.
+            with self._segment_path(self._segment).open("rb") as fh:
+                fh.seek(-1, 2)
+                if fh.read(1) != b"\n":
+                    self._writer.write(b"\n")
+                    self._writer.flush()
+        self.pending = self._count_pending()
+        self._size = sum(self._segment_path(s).stat().st_size for s in self._segments())
+
+    def _segment_path(self, number: int) -> Path:
+        return self._dir / f"{number:012d}.jsonl"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(p.stem) for p in self._dir.glob("*.jsonl") if p.stem.isdigit())
+
+    def _load_cursor(self, segments: list[int]) -> tuple[int, int]:
+        try:
+            segment, offset = (int(v) for v in self._cursor_path.read_text().split())
+        except (OSError, ValueError):
+            return (segments[0] if segments else self._segment, 0)
+        if segment not in segments:
+            return (segments[0] if segments else self._segment, 0)
+        return segment, offset
+
+    def _count_pending(self) -> int:
+        count = 0
+        segment, offset = self._cursor
+        for number in self._segments():
+            if number < segment:
+                continue
+            with self._segment_path(number).open("rb") as fh:
+                if number == segment:
+                    fh.seek(offset)
+                count += sum(1 for line in fh if line.strip())
+        return count
+
+    def append(self, event: Any) -> bool:
+        """Queue one event; False (and nothing written) when the spool is full."""
+        line = json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._size + len(line) > self._max_bytes:
+                self.dropped += 1
+                return False
+            if self._writer.tell() >= self.SEGMENT_BYTES:
+                self._writer.close()
+                self._segment += 1
+                self._writer = self._segment_path(self._segment).open("ab")
+            self._writer.write(line)
+            self._writer.flush()
+            self._size += len(line)
+            self.pending += 1
+            self._ready.notify()
+        return True
+
+    def next_batch(
+        self, limit: int, timeout: float
+    ) -> tuple[list[Any], tuple[int, int], int]:
+        """
+        Up to ``limit`` of the oldest undelivered events, the cursor just past them
+        and the number of lines read. Blocks up to ``timeout`` seconds while empty.
+        """
+        with self._lock:
+            if not self.pending:
+                self._ready.wait(timeout)
+            segment, offset = self._cursor
+            current = self._segment
+        events: list[Any] = []
+        consumed = 0
+        while len(events) < limit:
+            path = self._segment_path(segment)
+            try:
+                fh = path.open("rb")
+            except FileNotFoundError:
+                break
+            with fh:
+                fh.seek(offset)
+                for line in iter(fh.readline, b""):
+                    if not line.endswith(b"\n"):
+                        break  # still being written
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    consumed += 1
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Skipping unreadable spooled event in %s", path.name)
+                    if len(events) >= limit:
+                        break
+            if len(events) >= limit or segment >= current:
+                break
+            segment, offset = segment + 1, 0
+        return events, (segment, offset), consumed
+
+    def commit(self, cursor: tuple[int, int], consumed: int) -> None:
+        """Mark everything before ``cursor`` delivered and drop finished segments."""
+        if cursor == self._cursor:
+            return
+        tmp = self._cursor_path.with_suffix(".tmp")
+        tmp.write_text(f"{cursor[0]} {cursor[1]}")
+        os.replace(tmp, self._cursor_path)
+        with self._lock:
+            self._cursor = cursor
+            self.pending = max(0, self.pending - consumed)
+            self.forwarded += consumed
+            self.last_error = ""
+            for number in self._segments():
+                if number >= cursor[0]:
+                    break
+                path = self._segment_path(number)
+                self._size -= path.stat().st_size
+                path.unlink()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "forwarded": self.forwarded,
+                "dropped": self.dropped,
+                "spool_bytes": self._size,
+                "last_error": self.last_error[:200],
+            }
+
+
+EVENT_SPOOL: EventSpool | None = None
+
+
+def forward_events(cfg: dict, events: list[Any]) -> None:
+    """POST one batch to the CRM; raises unless the CRM stored all of it."""
+    api_request(
         cfg,
-        {"Content-Type": content_type or "application/json"},
+        "POST",
+        "/integrations/pbx/connector/events/",
+        {"events": events},
     )
-    req = urlrequest.Request(url, data=raw_body, headers=headers, method="POST")
-    try:
-        with _urlopen(cfg, req, timeout=30) as resp:
-            logger.info("Forwarded event: %s", resp.read().decode()[:200])
-    except HTTPError as e:
-        _log_http_error("POST", url, e)
-        raise
 
 
-def fetch_recording_via_ftp(cfg: dict, ftp_path: str) -> bytes:
-    """Download a recording WAV from the PBX internal FTP server."""
+def run_event_forwarder(cfg: dict, spool: EventSpool) -> None:
+    """
+    Drain the spool to the CRM in order, ``event_batch_size`` events per request.
+
+    A failed batch is retried, with backoff up to ``event_retry_max_sec``, before
+    anything after it is sent, so the CRM sees events in the order the PBX sent them.
+    """
+    batch_size = max(1, int(cfg.get("event_batch_size", 50)))
+    max_backoff = float(cfg.get("event_retry_max_sec", 60))
+    backoff = 1.0
+    while True:
+        try:
+            events, cursor, consumed = spool.next_batch(batch_size, timeout=5)
+            if events:
+                forward_events(cfg, events)
+            spool.commit(cursor, consumed)
+            if not events:
+                continue
+            logger.info("Forwarded %s event(s), %s pending", len(events), spool.pending)
+            backoff = 1.0
+        except Exception as exc:
+            spool.last_error = str(exc)
+            logger.warning(
+                "Event forward failed (%s); %s event(s) kept in spool, retrying in %.0fs",
+                exc,
+                spool.pending,
+                backoff,
+            )
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+
+def start_event_forwarder(cfg: dict) -> EventSpool:
+    global EVENT_SPOOL
+    directory = (cfg.get("event_spool_dir") or "").strip() or Path(__file__).resolve().parent / "spool"
+    EVENT_SPOOL = EventSpool(
+        Path(directory), max_bytes=int(float(cfg.get("event_spool_max_mb", 200)) * 1024 * 1024)
+    )
+    if EVENT_SPOOL.pending:
+        logger.info("Event spool has %s undelivered event(s); resending", EVENT_SPOOL.pending)
+    threading.Thread(
+        target=run_event_forwarder, args=(cfg, EVENT_SPOOL), daemon=True, name="event-forwarder"
+    ).start()
+    return EVENT_SPOOL
+
+
+class TransferStats:
+    """
+    Recording-transfer counters, sent with every heartbeat so the CRM can show the
+    backlog and throughput of each site.
+    """
+
+    WINDOW_SEC = 300
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._recent: deque[tuple[float, int]] = deque()
+        self.completed = 0
+        self.failed = 0
+        self.bytes_total = 0
+        self.in_flight = 0
+        self.backlog = 0
+
+    def add_bytes(self, count: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.bytes_total += count
+            self._recent.append((now, count))
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._recent and now - self._recent[0][0] > self.WINDOW_SEC:
+            self._recent.popleft()
+
+    def finished(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            recent = sum(count for _, count in self._recent)
+            return {
+                "in_flight": self.in_flight,
+                "backlog": self.backlog,
+                "completed": self.completed,
+                "failed": self.failed,
+                "bytes_total": self.bytes_total,
+                "throughput_bps": int(recent / self.WINDOW_SEC),
+            }
+
+
+TRANSFER_STATS = TransferStats()
+
+
+def send_heartbeat(cfg: dict) -> None:
+    api_request(
+        cfg,
+        "POST",
+        "/api/integrations/pbx/connector/heartbeat/",
+        {
+            "version": CONNECTOR_VERSION,
+            "stats": {
+                "version": CONNECTOR_VERSION,
+                "recordings": TRANSFER_STATS.snapshot(),
+                "events": EVENT_SPOOL.snapshot() if EVENT_SPOOL else {},
+            },
+        },
+    )
+
+
+def _open_ftp(cfg: dict) -> ftplib.FTP:
     host = (cfg.get("ftp_host") or cfg.get("pbx_host") or "").strip()
     if not host:
         raise ValueError("ftp_host / pbx_host is empty — cannot fetch recording")
     user = (cfg.get("ftp_user") or "").strip()
     if not user:
         raise ValueError("ftp_user is empty — cannot fetch recording")
-    password = cfg.get("ftp_password") or ""
-    port = int(cfg.get("ftp_port", 21))
+    ftp = ftplib.FTP()
     timeout = int(cfg.get("recording_fetch_timeout_sec", 60))
-    passive = cfg.get("ftp_passive", True)
+    ftp.connect(host, int(cfg.get("ftp_port", 21)), timeout=timeout)
+    ftp.login(user, cfg.get("ftp_password") or "")
+    ftp.set_pasv(bool(cfg.get("ftp_passive", True)))
+    # Binary mode, so SIZE reports the byte count and REST offsets are exact.
+    ftp.voidcmd("TYPE I")
+    return ftp
 
-    ftp = ftplib.FTP()
+
+def _close_ftp(ftp: ftplib.FTP) -> None:
     try:
-        ftp.connect(host, port, timeout=timeout)
-        ftp.login(user, password)
-        ftp.set_pasv(bool(passive))
-        buf = io.BytesIO()
-        ftp.retrbinary(f"RETR {ftp_path}", buf.write)
-        return buf.getvalue()
-    finally:
+        ftp.quit()
+    except Exception:
         try:
-            ftp.quit()
+            ftp.close()
         except Exception:
-            try:
-                ftp.close()
-            except Exception:
-                pass
+            pass
 
 
-def upload_recording_bytes(
-    cfg: dict, record_id: int, file_bytes: bytes, filename: str
-) -> None:
-    """Upload recording bytes to CRM storage."""
-    url = build_api_url(cfg, f"/integrations/pbx/connector/recordings/{record_id}/upload/")
-    boundary = f"----LoopPbx{int(time.time() * 1000)}"
-    body = b"".join(
-        [
-            f"--{boundary}\r\n".encode(),
-            (
-                f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
-                "Content-Type: audio/wav\r\n\r\n"
-            ).encode(),
-            file_bytes,
-            f"\r\n--{boundary}--\r\n".encode(),
-        ]
-    )
+def _upload_url(cfg: dict, record_id: int) -> str:
+    return build_api_url(cfg, f"/integrations/pbx/connector/recordings/{record_id}/upload/")
+
+
+def get_upload_offset(cfg: dict, record_id: int) -> int:
+    """Bytes of this recording the CRM already holds from an interrupted upload."""
+    resp = api_request(cfg, "GET", f"/integrations/pbx/connector/recordings/{record_id}/upload/")
+    return int(resp.get("offset") or 0)
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"CRM holds {offset} bytes")
+        self.offset = offset
+
+
+def _read_exactly(sock: socket.socket, length: int):
+    """Yield exactly ``length`` bytes from the FTP data socket, in small blocks."""
+    remaining = length
+    while remaining > 0:
+        data = sock.recv(min(64 * 1024, remaining))
+        if not data:
+            raise ConnectionError(f"FTP data connection closed with {remaining} bytes left")
+        remaining -= len(data)
+        yield data
+
+
+def put_recording_range(
+    cfg: dict, record_id: int, filename: str, sock: socket.socket, start: int, length: int, total: int
+) -> int:
+    """
+    Stream ``length`` bytes from the FTP socket to the CRM as one ranged PUT.
+
+    Nothing beyond one small block is held in memory. Returns the CRM's new offset.
+    """
+    url = _upload_url(cfg, record_id)
     headers = _request_headers(
         cfg,
         {
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(length),
+            "Content-Range": f"bytes {start}-{start + length - 1}/{total}",
+            "X-Recording-Filename": filename,
         },
     )
-    req = urlrequest.Request(url, data=body, headers=headers, method="POST")
+    req = urlrequest.Request(url, data=_read_exactly(sock, length), headers=headers, method="PUT")
     try:
-        with _urlopen(cfg, req, timeout=120) as resp:
-            logger.info(
-                "Uploaded recording record_id=%s (%s bytes): %s",
-                record_id,
-                len(file_bytes),
-                resp.read().decode()[:200],
-            )
+        with _urlopen(cfg, req, timeout=int(cfg.get("recording_upload_timeout_sec", 120))) as resp:
+            raw = json.loads(resp.read().decode("utf-8"))
     except HTTPError as e:
-        _log_http_error("POST", url, e)
+        if e.code == 409:
+            try:
+                details = json.loads(e.read().decode("utf-8"))["error"]["details"]
+                raise OffsetMismatch(int(details["offset"])) from None
+            except (ValueError, KeyError, TypeError):
+                pass
+        _log_http_error("PUT", url, e)
         raise
+    return int((raw.get("data") or raw).get("offset", start + length))
+
+
+def transfer_recording(cfg: dict, record_id: int, ftp_path: str, filename: str) -> int:
+    """
+    Copy one recording from the PBX FTP server to the CRM, resuming where a previous
+    attempt stopped. Returns the number of bytes sent by this attempt.
+    """
+    chunk_size = int(float(cfg.get("recording_chunk_mb", 8)) * 1024 * 1024)
+    offset = get_upload_offset(cfg, record_id)
+    ftp = _open_ftp(cfg)
+    try:
+        total = ftp.size(ftp_path)
+        if not total:
+            logger.warning(
+                "Recording is empty on FTP record_id=%s path=%s", record_id, ftp_path[:120]
+            )
+            return 0
+        if offset >= total:
+            # The file on the PBX changed (or was replaced); start over.
+            offset = 0
+        if offset:
+            logger.info(
+                "Resuming recording record_id=%s at %s/%s bytes", record_id, offset, total
+            )
+        sent = 0
+        sock = ftp.transfercmd(f"RETR {ftp_path}", rest=offset or None)
+        try:
+            while offset < total:
+                length = min(chunk_size, total - offset)
+                new_offset = put_recording_range(
+                    cfg, record_id, filename, sock, offset, length, total
+                )
+                TRANSFER_STATS.add_bytes(length)
+                sent += length
+                offset += length
+                if new_offset != offset:
+                    # The data socket is already past this point; restart next poll.
+                    raise OffsetMismatch(new_offset)
+        finally:
+            sock.close()
+        ftp.voidresp()
+        logger.info("Uploaded recording record_id=%s (%s bytes)", record_id, total)
+        return sent
+    finally:
+        _close_ftp(ftp)
 
 
 def _recording_filename_from_job(job: dict[str, Any]) -> str:
@@ -445,22 +797,16 @@ def _recording_filename_from_job(job: dict[str, Any]) -> str:
     return "recording.wav"
 
 
-def process_recording_job(cfg: dict, job: dict[str, Any]) -> None:
+def process_recording_job(cfg: dict, job: dict[str, Any]) -> bool:
+    """Transfer one job; False on failure (it stays listed and is resumed next poll)."""
     record_id = job.get("record_id")
     ftp_path = (job.get("ftp_path") or "").strip()
     if not record_id or not ftp_path:
-        return
+        return False
     filename = _recording_filename_from_job(job)
     try:
-        file_bytes = fetch_recording_via_ftp(cfg, ftp_path)
-        if not file_bytes:
-            logger.warning(
-                "Recording FTP fetch returned empty body record_id=%s path=%s",
-                record_id,
-                ftp_path[:120],
-            )
-            return
-        upload_recording_bytes(cfg, int(record_id), file_bytes, filename)
+        transfer_recording(cfg, int(record_id), ftp_path, filename)
+        return True
     except ftplib.error_perm as exc:
         # 550 = file not found / not ready yet — retry on next poll.
         msg = str(exc)
@@ -471,36 +817,91 @@ def process_recording_job(cfg: dict, job: dict[str, Any]) -> None:
                 ftp_path[:120],
                 msg[:80],
             )
-            return
+            return False
         logger.exception(
             "Recording FTP permission error record_id=%s path=%s",
             record_id,
             ftp_path[:120],
         )
+    except OffsetMismatch as exc:
+        logger.info(
+            "Recording record_id=%s is at offset %s on the CRM; resuming next poll",
+            record_id,
+            exc.offset,
+        )
     except Exception:
         logger.exception("Recording FTP fetch/upload failed record_id=%s", record_id)
+    return False
 
 
 def poll_recordings(cfg: dict) -> None:
+    """
+    Drain recording jobs with up to ``recording_workers`` transfers in parallel.
+
+    A job stays listed by the CRM until its upload completes, so jobs already being
+    transferred are skipped when they come back in the next poll.
+    """
     interval = float(cfg.get("recording_poll_interval_sec", 5))
-    while True:
-        try:
-            resp = api_request(cfg, "GET", "/integrations/pbx/connector/recording-jobs/")
-            data = resp.get("data") or resp
-            for job in data.get("jobs") or []:
-                process_recording_job(cfg, job)
-        except Exception:
-            logger.exception("Recording poll error")
-        time.sleep(interval)
+    workers = max(1, int(cfg.get("recording_workers", 3)))
+    running: dict[Any, Future] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recording") as pool:
+        while True:
+            try:
+                for record_id in [r for r, f in running.items() if f.done()]:
+                    TRANSFER_STATS.finished(bool(running.pop(record_id).result()))
+                TRANSFER_STATS.in_flight = len(running)
+                if len(running) >= workers:
+                    wait(running.values(), timeout=interval, return_when=FIRST_COMPLETED)
+                    continue
+
+                resp = api_request(
+                    cfg,
+                    "GET",
+                    f"/integrations/pbx/connector/recording-jobs/?limit={workers * 4}",
+                )
+                data = resp.get("data") or resp
+                jobs = [j for j in data.get("jobs") or [] if j.get("record_id") not in running]
+                TRANSFER_STATS.backlog = len(jobs)
+                for job in jobs[: workers - len(running)]:
+                    running[job.get("record_id")] = pool.submit(process_recording_job, cfg, job)
+                TRANSFER_STATS.in_flight = len(running)
+                if not jobs:
+                    time.sleep(interval)
+                else:
+                    wait(running.values(), timeout=interval, return_when=FIRST_COMPLETED)
+            except Exception:
+                logger.exception("Recording poll error")
+                time.sleep(interval)
 
 
 def poll_commands(cfg: dict, ami: AmiClient) -> None:
+    """
+    Long-poll the CRM for click-to-dial commands.
+
+    The CRM holds each request up to ``command_wait_sec`` and answers as soon as a
+    command is queued, so the next poll starts immediately. When the CRM answers
+    without holding (``long_poll: false`` — older CRM, or its wait slots are busy),
+    fall back to sleeping ``poll_interval_sec`` between polls.
+    """
+    wait = float(cfg.get("command_wait_sec", 20))
+    heartbeat_every = float(cfg.get("heartbeat_interval_sec", 60))
+    last_heartbeat = 0.0
     while True:
+        long_polled = False
         try:
-            api_request(cfg, "POST", "/api/integrations/pbx/connector/heartbeat/", {})
-            resp = api_request(cfg, "GET", "/api/integrations/pbx/connector/commands/", None)
+            if time.monotonic() - last_heartbeat >= heartbeat_every:
+                send_heartbeat(cfg)
+                last_heartbeat = time.monotonic()
+            resp = api_request(
+                cfg,
+                "GET",
+                f"/api/integrations/pbx/connector/commands/?wait={wait:g}",
+                None,
+                timeout=wait + 30,
+            )
             data = resp.get("data") or resp
             commands = data.get("commands") or []
+            long_polled = bool(data.get("long_poll")) or bool(commands)
             for cmd in commands:
                 cmd_id = cmd["id"]
                 ext = cmd["extension"]
@@ -524,28 +925,42 @@ def poll_commands(cfg: dict, ami: AmiClient) -> None:
                     logger.exception("Dial failed")
         except Exception:
             logger.exception("Command poll error")
-        time.sleep(float(cfg.get("poll_interval_sec", 3)))
+        if not long_polled:
+            time.sleep(float(cfg.get("poll_interval_sec", 3)))
 
 
-def make_webhook_handler(cfg: dict):
+def make_webhook_handler(cfg: dict, spool: EventSpool):
+    """
+    PBX Push Event receiver. Events are spooled and acknowledged at once; the
+    forwarder thread delivers them, so a slow or unreachable CRM never holds up
+    the PBX (or the events behind this one).
+    """
+
     class WebhookHandler(BaseHTTPRequestHandler):
         def log_message(self, format, *args):
             logger.debug(format, *args)
 
+        def _reply(self, status: int, body: dict) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+
         def do_POST(self):
             length = int(self.headers.get("Content-Length", 0))
             body = self.rfile.read(length)
             content_type = self.headers.get("Content-Type", "")
             try:
-                forward_event(cfg, body, content_type)
-                self.send_response(200)
-                self.end_headers()
-                self.wfile.write(b'{"ok":true}')
+                queued = spool.append(_spool_event(body, content_type))
             except Exception as exc:
-                logger.exception("Connector POST failed")
-                self.send_response(500)
-                self.end_headers()
-                self.wfile.write(json.dumps({"ok": False, "error": str(exc)}).encode())
+                logger.exception("Could not spool PBX event")
+                self._reply(500, {"ok": False, "error": str(exc)})
+                return
+            if not queued:
+                logger.error("Event spool is full (event_spool_max_mb); PBX event dropped")
+                self._reply(503, {"ok": False, "error": "spool full"})
+                return
+            self._reply(200, {"ok": True, "queued": True})
 
         def do_GET(self):
             self.send_response(200)
@@ -612,7 +1027,7 @@ def main() -> None:
     logger.info("Auth: X-Connector-Key (key length %s)", len(cfg["connector_api_key"]))
 
     try:
-        api_request(cfg, "POST", "/api/integrations/pbx/connector/heartbeat/", {})
+        send_heartbeat(cfg)
         logger.info("CRM heartbeat OK — connector authenticated")
     except Exception:
         logger.error(
@@ -637,6 +1052,7 @@ def main() -> None:
             "Check transport, TLS (ami_use_tls), and port."
         )
 
+    spool = start_event_forwarder(cfg)
     poll_thread = threading.Thread(target=poll_commands, args=(cfg, ami), daemon=True)
     poll_thread.start()
     recording_thread = threading.Thread(target=poll_recordings, args=(cfg,), daemon=True)
@@ -645,7 +1061,7 @@ def main() -> None:
     host = cfg.get("listen_host", "0.0.0.0")
     port = int(cfg.get("listen_port", 8787))
     try:
-        server = ReuseAddrHTTPServer((host, port), make_webhook_handler(cfg))
+        server = ReuseAddrHTTPServer((host, port), make_webhook_handler(cfg, spool))
     except OSError as exc:
         if getattr(exc, "errno", None) in (48, 98) or "already in use" in str(exc).lower():
             logger.error(
@@ -7,4 +7,5 @@ class SettingsConfig(AppConfig):
     verbose_name = 'App Settings'
     label = 'settings'
 
-
+    def ready(self):
+        import settings.signals  # noqa: F401
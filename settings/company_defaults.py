@@ -14,6 +14,7 @@ from companies.models import Company, Specialization
 from crm_saas_api.db_sequences import reset_pk_sequences
 
 from .lead_status_automation import VISITED_AUTOMATION_KEY
+from .reference_cache import invalidate_reference_data
 from .models import (
     CallMethod,
     Channel,
@@ -514,6 +515,8 @@ def _seed_company_settings_rows(company: Company, spec: str) -> None:
         Specialization.SERVICES.value,
     ):
         _ensure_single_default_visit_type(company)
+    # The is_default fix-ups above are queryset updates, which send no signals.
+    invalidate_reference_data(company)
 
 
 def seed_company_settings(company: Company) -> None:
@@ -36,10 +36,9 @@ def get_visited_lead_status(company):
     """Return the active Visited status for this company, or None."""
     if not company:
         return None
-    from .models import LeadStatus
+    from .reference_cache import lead_statuses
 
-    return LeadStatus.objects.filter(
-        company=company,
-        automation_key=VISITED_AUTOMATION_KEY,
-        is_active=True,
-    ).first()
+    for status in lead_statuses(company):
+        if status.automation_key == VISITED_AUTOMATION_KEY and status.is_active:
+            return status
+    return None
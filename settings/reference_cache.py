@@ -0,0 +1,167 @@
+"""
+Per-company cache of the small CRM reference tables (statuses, channels, stages,
+call methods, visit types, tags).
+
+These rows change a few times a month but are read on nearly every lead write, so
+each (company, model) table is cached whole and handed out as id -> row and
+name -> row maps. Rows keep the model's ``Meta.ordering`` (id breaks ties), so
+"first match" lookups pick the same row the equivalent ``.first()`` query did.
+
+Invalidation is versioned rather than key-by-key: every company has a version token,
+and the cached tables live under keys that include it. Any save or delete of a
+reference row (see settings.signals) replaces the company's token, which orphans all
+of its tables at once; queryset ``update()`` calls skip signals, so code that uses
+them must call ``invalidate_reference_data`` itself. A global epoch token does the
+same for every company (database restore).
+
+Tokens are random rather than counters: with a counter, a cache entry written under
+version N before a bump could be read back after the counter is re-created at N
+(cache eviction, or a test database reusing company ids).
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.db import transaction
+
+REFERENCE_CACHE_PREFIX = "settings_reference_v2"
+# Tables are dropped by version bumps; the TTL only bounds memory for idle tenants.
+REFERENCE_CACHE_TTL = 6 * 60 * 60
+
+_EPOCH_KEY = f"{REFERENCE_CACHE_PREFIX}:epoch"
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    """One company's rows of a reference model, in the model's default ordering."""
+
+    rows: tuple
+    by_id: dict = field(init=False, repr=False, compare=False)
+    by_name: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "by_id", {row.pk: row for row in self.rows})
+        object.__setattr__(self, "by_name", {row.name: row for row in self.rows})
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, pk):
+        try:
+            return self.by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def active(self) -> list:
+        return [row for row in self.rows if row.is_active]
+
+    def default(self):
+        """First active row flagged is_default, else the first active row (model ordering)."""
+        active = self.active()
+        for row in active:
+            if getattr(row, "is_default", False):
+                return row
+        return active[0] if active else None
+
+
+def _company_id(company) -> int | None:
+    if company is None:
+        return None
+    return getattr(company, "pk", company)
+
+
+def _version_key(company_id: int) -> str:
+    return f"{REFERENCE_CACHE_PREFIX}:version:{company_id}"
+
+
+def _new_token() -> str:
+    return uuid.uuid4().hex
+
+
+def _token(key: str) -> str:
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, _new_token(), None)
+        token = cache.get(key) or _new_token()
+    return token
+
+
+def reference_table(model, company) -> ReferenceTable:
+    """Return the company's rows of *model* (one of the reference models), cached."""
+    company_id = _company_id(company)
+    if not company_id:
+        return ReferenceTable(rows=())
+
+    table_key = (
+        f"{REFERENCE_CACHE_PREFIX}:{model._meta.label_lower}:{company_id}:"
+        f"{_token(_EPOCH_KEY)}:{_token(_version_key(company_id))}"
+    )
+    rows = cache.get(table_key)
+    if rows is None:
+        ordering = [*(model._meta.ordering or ()), "id"]
+        rows = list(model.objects.filter(company_id=company_id).order_by(*ordering))
+        cache.set(table_key, rows, REFERENCE_CACHE_TTL)
+    return ReferenceTable(rows=tuple(rows))
+
+
+def lead_statuses(company) -> ReferenceTable:
+    from .models import LeadStatus
+
+    return reference_table(LeadStatus, company)
+
+
+def channels(company) -> ReferenceTable:
+    from .models import Channel
+
+    return reference_table(Channel, company)
+
+
+def lead_stages(company) -> ReferenceTable:
+    from .models import LeadStage
+
+    return reference_table(LeadStage, company)
+
+
+def call_methods(company) -> ReferenceTable:
+    from .models import CallMethod
+
+    return reference_table(CallMethod, company)
+
+
+def visit_types(company) -> ReferenceTable:
+    from .models import VisitType
+
+    return reference_table(VisitType, company)
+
+
+def tags(company) -> ReferenceTable:
+    from .models import Tag
+
+    return reference_table(Tag, company)
+
+
+def invalidate_reference_data(company) -> None:
+    """
+    Drop every cached reference table of the company.
+
+    The token is replaced now, so the writing transaction reads its own changes, and
+    again on commit: another request may have cached the pre-commit rows under the
+    first new token in between.
+    """
+    company_id = _company_id(company)
+    if not company_id:
+        return
+    key = _version_key(company_id)
+    cache.set(key, _new_token(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_token(), None))
+
+
+def invalidate_all_reference_data() -> None:
+    """Drop the cached reference tables of every company."""
+    cache.set(_EPOCH_KEY, _new_token(), None)
@@ -1,7 +1,25 @@
+"""
+System backups of the SQLite database.
+
+Backups are taken with SQLite's online backup API from a dedicated connection that
+pins one read snapshot for the whole copy. The database runs in WAL mode (see
+integrations.apps), so that snapshot never blocks writers: PBX webhooks and API
+requests keep committing while the copy proceeds, and the copy is transactionally
+consistent. The copy is stepped a few thousand pages at a time with a short pause
+between steps so it does not monopolise disk I/O.
+
+The finished copy is gzip-compressed in a streaming pass and its SHA-256 is stored
+in ``SystemBackup.metadata``; restore verifies it before touching the live file.
+Restore copies into the live file with the same API rather than swapping the file, so
+connections other workers hold open see the restored data without a restart.
+"""
 from __future__ import annotations
 
+import gzip
+import hashlib
 import os
 import shutil
+import sqlite3
 from pathlib import Path
 from typing import Optional
 
@@ -11,6 +29,13 @@ from django.db import connections
 from django.utils import timezone
 
 from .models import SystemBackup, SystemAuditLog
+from .reference_cache import invalidate_all_reference_data
+
+# 4096 pages is 16 MB at SQLite's default page size.
+BACKUP_PAGES_PER_STEP = 4096
+BACKUP_STEP_SLEEP_SECONDS = 0.01
+COPY_CHUNK_SIZE = 1024 * 1024
+COMPRESSED_SUFFIX = ".gz"
 
 
 def get_backup_root() -> Path:
@@ -30,6 +55,11 @@ def _clean_old_pre_restore_snapshots(keep_last: int = 2) -> None:
             pass
 
 
+def backup_file_path(backup: SystemBackup) -> Path:
+    """Where ``create_database_backup`` wrote this backup's file."""
+    return get_backup_root() / Path(backup.file.name).name
+
+
 def log_system_action(action: str, user=None, message: str = "", metadata: Optional[dict] = None, ip_address: Optional[str] = None) -> SystemAuditLog:
     return SystemAuditLog.objects.create(
         action=action,
@@ -48,13 +78,88 @@ def _ensure_sqlite_backend():
     return Path(db_config["NAME"]), engine
 
 
+def online_sqlite_backup(source_path: Path, dest_path: Path) -> int:
+    """Copy ``source_path`` to ``dest_path`` with the online backup API; returns pages copied."""
+    pages_copied = 0
+
+    def _progress(status, remaining, total):
+        nonlocal pages_copied
+        pages_copied = total
+
+    source = sqlite3.connect(str(source_path), timeout=30)
+    dest = sqlite3.connect(str(dest_path))
+    try:
+        # Pin one snapshot for the whole copy. Without it, every commit from another
+        # connection would restart the backup from page one.
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(
+            dest,
+            pages=BACKUP_PAGES_PER_STEP,
+            progress=_progress,
+            sleep=BACKUP_STEP_SLEEP_SECONDS,
+        )
+        source.rollback()
+    finally:
+        dest.close()
+        source.close()
+    return pages_copied
+
+
+def _restore_into_live(staging_path: Path, db_path: Path) -> None:
+    """
+    Copy ``staging_path`` over the live database with the backup API, as one write.
+
+    The live file keeps its inode, so connections other workers hold open (CONN_MAX_AGE)
+    read the restored pages on their next query. Swapping the file with a rename would
+    leave them reading, and writing, the old unlinked one until they reconnect.
+    """
+    source = sqlite3.connect(str(staging_path))
+    dest = sqlite3.connect(str(db_path), timeout=30)
+    try:
+        source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+
+
+def _gzip_with_checksum(raw_path: Path, dest_path: Path) -> str:
+    """Stream-compress ``raw_path`` into ``dest_path``; returns the SHA-256 of the output."""
+    digest = hashlib.sha256()
+
+    class _HashingWriter:
+        def __init__(self, fh):
+            self._fh = fh
+
+        def write(self, data):
+            digest.update(data)
+            return self._fh.write(data)
+
+        def flush(self):
+            self._fh.flush()
+
+    with open(raw_path, "rb") as src, open(dest_path, "wb") as out:
+        stored_name = dest_path.name.removesuffix(COMPRESSED_SUFFIX)
+        with gzip.GzipFile(filename=stored_name, mode="wb", fileobj=_HashingWriter(out), compresslevel=6) as gz:
+            shutil.copyfileobj(src, gz, COPY_CHUNK_SIZE)
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def create_database_backup(initiator: str = SystemBackup.Initiator.MANUAL, user=None, notes: str = "") -> SystemBackup:
     db_path, engine = _ensure_sqlite_backend()
     if not db_path.exists():
         raise FileNotFoundError(f"Database file not found at {db_path}")
 
     timestamp = timezone.now().strftime("%Y%m%d%H%M%S")
-    filename = f"{db_path.stem}-{timestamp}.sqlite3"
+    filename = f"{db_path.stem}-{timestamp}.sqlite3{COMPRESSED_SUFFIX}"
 
     backup = SystemBackup.objects.create(
         initiator=initiator,
@@ -64,22 +169,30 @@ def create_database_backup(initiator: str = SystemBackup.Initiator.MANUAL, user=
     )
 
     dest_path = None
+    raw_path = None
     try:
         # Write file to the same location we use for read/delete: MEDIA_ROOT/backups/
         backup_root = get_backup_root()
         dest_path = backup_root / filename
-        shutil.copy2(db_path, dest_path)
+        raw_path = backup_root / f".{filename}.partial"
+        pages = online_sqlite_backup(db_path, raw_path)
+        raw_size = raw_path.stat().st_size
+        checksum = _gzip_with_checksum(raw_path, dest_path)
+        raw_path.unlink()
         # Store path relative to MEDIA_ROOT (assign string so DB persists it; file already on disk)
         backup.file = "backups/" + filename
         backup.file_size = dest_path.stat().st_size
         backup.save(update_fields=["file", "file_size"])
         backup.mark_completed(
             file_size=backup.file_size,
-            metadata={"filename": backup.file.name},
+            metadata={
+                "filename": backup.file.name,
+                "compression": "gzip",
+                "sha256": checksum,
+                "raw_size": raw_size,
+                "pages": pages,
+            },
         )
-        # Re-copy DB so the backup file contains this completed record (with file path).
-        # Otherwise restore would load a snapshot where the record was still in_progress/no file.
-        shutil.copy2(db_path, dest_path)
         log_system_action(
             "audit.log.backupManual",
             user=user,
@@ -88,11 +201,12 @@ def create_database_backup(initiator: str = SystemBackup.Initiator.MANUAL, user=
         return backup
     except Exception as exc:  # pragma: no cover - defensive logging
         backup.mark_failed(str(exc))
-        if dest_path is not None and dest_path.exists():
-            try:
-                dest_path.unlink()
-            except OSError:
-                pass
+        for leftover in (raw_path, dest_path):
+            if leftover is not None and leftover.exists():
+                try:
+                    leftover.unlink()
+                except OSError:
+                    pass
         log_system_action(
             "audit.log.backupFailed",
             user=user,
@@ -109,20 +223,40 @@ def restore_database_backup(backup: SystemBackup, user=None) -> Path:
         raise ValueError("Selected backup does not contain a file.")
 
     db_path, engine = _ensure_sqlite_backend()
-    # Same path as create/delete: MEDIA_ROOT + file.name
-    media_root = Path(project_settings.MEDIA_ROOT)
-    backup_path = media_root / backup.file.name
+    backup_path = backup_file_path(backup)
     if not backup_path.exists():
         raise FileNotFoundError(f"Backup file missing on disk: {backup_path}")
 
-    connections.close_all()
+    expected = (backup.metadata or {}).get("sha256")
+    if expected and file_sha256(backup_path) != expected:
+        raise ValueError("Backup file failed its checksum; refusing to restore it.")
+
     backup_root = get_backup_root()
 
     snapshot_path = backup_root / f"pre-restore-{timezone.now().strftime('%Y%m%d%H%M%S')}.sqlite3"
     if db_path.exists():
-        shutil.copy2(db_path, snapshot_path)
+        online_sqlite_backup(db_path, snapshot_path)
+
+    # Expand next to the live file first, then copy it in as a single write transaction.
+    staging_path = db_path.with_name(f".{db_path.name}.restore")
+    if backup_path.name.endswith(COMPRESSED_SUFFIX):
+        with gzip.open(backup_path, "rb") as src, open(staging_path, "wb") as out:
+            shutil.copyfileobj(src, out, COPY_CHUNK_SIZE)
+    else:
+        shutil.copyfile(backup_path, staging_path)
+
+    # Nothing in this process may hold a read transaction open across the copy.
+    connections.close_all()
+    try:
+        _restore_into_live(staging_path, db_path)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            staging_path.with_name(staging_path.name + suffix).unlink(missing_ok=True)
+    invalidate_all_reference_data()
 
-    shutil.copy2(backup_path, db_path)
+    # The snapshot was taken while this backup's row was still in progress; write the
+    # completed row back so the restored database lists it correctly.
+    backup.save()
 
     log_system_action(
         "audit.log.backupRestored",
@@ -142,6 +276,7 @@ def delete_backup(backup: SystemBackup, user=None):
     file_name = backup.file.name if backup.file else None
     paths_to_remove = []
     if backup.file and backup.file.name:
+        paths_to_remove.append(str(backup_file_path(backup)))
         try:
             paths_to_remove.append(default_storage.path(backup.file.name))
         except Exception:
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import CallMethod, Channel, LeadStage, LeadStatus, Tag, VisitType
+from .reference_cache import invalidate_reference_data
+
+
+def invalidate_reference_cache(sender, instance, **kwargs):
+    """Any change to a reference row drops the company's cached reference tables."""
+    invalidate_reference_data(instance.company_id)
+
+
+for _model in (LeadStatus, Channel, LeadStage, CallMethod, VisitType, Tag):
+    post_save.connect(
+        invalidate_reference_cache,
+        sender=_model,
+        dispatch_uid=f"reference_cache_save_{_model._meta.model_name}",
+    )
+    post_delete.connect(
+        invalidate_reference_cache,
+        sender=_model,
+        dispatch_uid=f"reference_cache_delete_{_model._meta.model_name}",
+    )
@@ -1,4 +1,3 @@
-from io import BytesIO
 from pathlib import Path
 
 from rest_framework import viewsets, filters, status
@@ -6,8 +5,8 @@ from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from crm_saas_api.file_responses import ranged_file_response
 from crm_saas_api.responses import error_response, success_response
-from django.http import FileResponse
 from django.db import models
 from accounts.permissions import (
     HasActiveSubscription,
@@ -52,7 +51,7 @@ from .serializers import (
     SystemSettingsSerializer,
     BillingSettingsSerializer,
 )
-from .services import create_database_backup, restore_database_backup, delete_backup
+from .services import backup_file_path, create_database_backup, restore_database_backup, delete_backup
 
 
 class ChannelViewSet(viewsets.ModelViewSet):
@@ -401,22 +400,24 @@ class SystemBackupViewSet(viewsets.ModelViewSet):
                 code="not_found",
                 status_code=status.HTTP_404_NOT_FOUND,
             )
-        try:
-            with backup.file.open("rb") as f:
-                content = f.read()
-        except (OSError, FileNotFoundError):
+        path = backup_file_path(backup)
+        if not path.is_file():
             return error_response(
                 "Backup file not found on disk.",
                 code="not_found",
                 status_code=status.HTTP_404_NOT_FOUND,
             )
-        filename = Path(backup.file.name).name
-        response = FileResponse(
-            BytesIO(content),
-            as_attachment=True,
-            filename=filename,
+        # Streamed from disk in chunks, never read into memory; Range lets an
+        # interrupted multi-GB download resume instead of starting over.
+        checksum = (backup.metadata or {}).get("sha256")
+        compressed = path.name.endswith(".gz")
+        return ranged_file_response(
+            request,
+            path,
+            filename=path.name,
+            content_type="application/gzip" if compressed else "application/octet-stream",
+            etag=f'"{checksum}"' if checksum else None,
         )
-        return response
 
 
 class SystemAuditLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -1,10 +1,9 @@
-from datetime import timedelta
-
 from django.urls import reverse
-from django.utils import timezone
 from rest_framework import serializers
 
+from accounts import presence
 from accounts.models import User
+from accounts.serializers import PresenceFieldsMixin, PresenceListSerializer
 from .attachments import media_preview_label
 from .authorization import eligible_company_users_queryset
 from .models import ChatConversation, ChatConversationReadState, ChatMessage, ChatPinnedMessage
@@ -40,14 +39,14 @@ def _message_has_attachment_payload(m: ChatMessage | None) -> bool:
     return bool(att and getattr(att, "name", None))
 
 
-class ChatPeerSerializer(serializers.ModelSerializer):
+class ChatPeerSerializer(PresenceFieldsMixin, serializers.ModelSerializer):
     """Minimal user info shown in chat lists."""
 
     profile_photo = serializers.ImageField(read_only=True)
-    is_online = serializers.SerializerMethodField()
 
     class Meta:
         model = User
+        list_serializer_class = PresenceListSerializer
         fields = (
             "id",
             "username",
@@ -62,10 +61,24 @@ class ChatPeerSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    def get_is_online(self, obj):
-        if not obj.last_seen_at:
-            return False
-        return (timezone.now() - obj.last_seen_at) <= timedelta(seconds=90)
+
+class ChatMessageListSerializer(serializers.ListSerializer):
+    """Prefetches the presence of every sender on the page (quotes included) at once."""
+
+    def to_representation(self, data):
+        messages = list(data.all() if hasattr(data, "all") else data)
+        sender_ids = set()
+        for message in messages:
+            sender_ids.add(message.sender_id)
+            # Quotes render their sender too; loading them here is the same query
+            # get_reply_to / get_forwarded_from would make.
+            if message.reply_to_id and message.reply_to is not None:
+                sender_ids.add(message.reply_to.sender_id)
+            if message.forwarded_from_id and message.forwarded_from is not None:
+                sender_ids.add(message.forwarded_from.sender_id)
+        beats = self.context.setdefault(presence.CONTEXT_KEY, {})
+        beats.update(presence.prefetch_beats(sender_ids - set(beats)))
+        return super().to_representation(messages)
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -77,6 +90,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatMessage
+        list_serializer_class = ChatMessageListSerializer
         fields = (
             "id",
             "sender",
@@ -175,10 +189,12 @@ class ChatConversationSerializer(serializers.ModelSerializer):
     def get_online_count(self, obj):
         if obj.kind != ChatConversation.Kind.COMPANY_GROUP:
             return None
-        threshold = timezone.now() - timedelta(seconds=90)
+        online_ids = presence.online_user_ids(obj.company_id)
+        if not online_ids:
+            return 0
         return (
             eligible_company_users_queryset(
-                User.objects.filter(company_id=obj.company_id, last_seen_at__gte=threshold)
+                User.objects.filter(company_id=obj.company_id, pk__in=online_ids)
             ).count()
         )
 
@@ -0,0 +1,100 @@
+"""
+In-memory stand-in for the slice of the boto3 S3 client used by recording storage.
+
+It keeps the rules that matter for streaming code — multipart parts below
+``min_part_size`` are rejected unless last, ranges are inclusive, aborted uploads
+leave nothing behind — and records every call so tests can assert on request shape.
+"""
+import hashlib
+import io
+import re
+
+from botocore.exceptions import ClientError
+
+
+class _Exceptions:
+    ClientError = ClientError
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+        self.closed = False
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def iter_chunks(self, chunk_size=1024):
+        while chunk := self._stream.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class S3StandIn:
+    exceptions = _Exceptions
+
+    def __init__(self, min_part_size: int = 5 * 1024 * 1024):
+        self.min_part_size = min_part_size
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.calls: list[tuple[str, dict]] = []
+        self.fail_on_part: int | None = None
+
+    def _log(self, name, **kwargs):
+        self.calls.append((name, {k: v for k, v in kwargs.items() if k != "Body"}))
+
+    def put_object(self, *, Bucket, Key, Body, **kwargs):
+        self._log("put_object", Bucket=Bucket, Key=Key)
+        self.objects[(Bucket, Key)] = bytes(Body)
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def create_multipart_upload(self, *, Bucket, Key, **kwargs):
+        self._log("create_multipart_upload", Bucket=Bucket, Key=Key)
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, *, Bucket, Key, UploadId, PartNumber, Body):
+        self._log("upload_part", Key=Key, PartNumber=PartNumber, size=len(Body))
+        if self.fail_on_part == PartNumber:
+            raise _error("InternalError", "UploadPart")
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {"ETag": f'"part-{PartNumber}"'}
+
+    def complete_multipart_upload(self, *, Bucket, Key, UploadId, MultipartUpload):
+        self._log("complete_multipart_upload", Key=Key)
+        stored = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        for number in numbers[:-1]:
+            if len(stored[number]) < self.min_part_size:
+                raise _error("EntityTooSmall", "CompleteMultipartUpload")
+        self.objects[(Bucket, Key)] = b"".join(stored[n] for n in numbers)
+        return {}
+
+    def abort_multipart_upload(self, *, Bucket, Key, UploadId):
+        self._log("abort_multipart_upload", Key=Key)
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def head_object(self, *, Bucket, Key):
+        self._log("head_object", Key=Key)
+        if (Bucket, Key) not in self.objects:
+            raise _error("404", "HeadObject")
+        data = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(data), "ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def get_object(self, *, Bucket, Key, Range=None):
+        self._log("get_object", Key=Key, Range=Range)
+        if (Bucket, Key) not in self.objects:
+            raise _error("NoSuchKey", "GetObject")
+        data = self.objects[(Bucket, Key)]
+        if Range:
+            start, end = map(int, re.match(r"bytes=(\d+)-(\d+)$", Range).groups())
+            data = data[start : end + 1]
+        return {"Body": _Body(data), "ContentLength": len(data)}
@@ -0,0 +1,180 @@
+"""
+Scheduled AI lead analysis runner (integrations.services.ai_lead_analysis).
+
+The OpenAI side is a local stub: an httpx.MockTransport that answers the chat
+completions endpoint, handed to the runner as its pooled HTTP client. Nothing here
+reaches the network.
+"""
+import json
+from datetime import timedelta
+
+import httpx
+import pytest
+from django.utils import timezone
+
+from crm.models import Client, ClientTask
+from integrations.models import AIInsightStatus, ClientAIInsight, OpenAISettings
+from integrations.services import ai_lead_analysis
+from integrations.services.ai_lead_analysis import (
+    _build_activity_snapshots,
+    run_companies_analysis,
+)
+
+
+class OpenAIStub:
+    """Answers every chat completion with a high-priority insight per submitted lead."""
+
+    def __init__(self, *, fail_for_key=None, tokens_per_request=100):
+        self.requests = []
+        self.fail_for_key = fail_for_key
+        self.tokens_per_request = tokens_per_request
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        api_key = request.headers["authorization"].removeprefix("Bearer ")
+        body = json.loads(request.content)
+        leads = json.loads(body["messages"][1]["content"])["leads"]
+        self.requests.append((api_key, [lead["client_id"] for lead in leads]))
+        if api_key == self.fail_for_key:
+            return httpx.Response(
+                401,
+                json={"error": {"message": "bad key", "type": "invalid_request_error", "code": "invalid_api_key"}},
+            )
+        content = {
+            "leads": [
+                {
+                    "client_id": lead["client_id"],
+                    "ai_score": 80,
+                    "priority_level": "high",
+                    "summary_en": "Follow up",
+                    "summary_ar": "متابعة",
+                    "suggested_task_notes_en": "Call back",
+                    "suggested_task_notes_ar": "اتصل",
+                }
+                for lead in leads
+            ]
+        }
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": json.dumps(content)},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": self.tokens_per_request,
+                    "completion_tokens": 0,
+                    "total_tokens": self.tokens_per_request,
+                },
+            },
+        )
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self))
+
+
+def enable_ai(company, key, **extra):
+    settings = OpenAISettings.objects.create(company=company, is_enabled=True, **extra)
+    settings.set_api_key(key)
+    settings.save()
+    return settings
+
+
+def make_leads(company, count, prefix="Lead"):
+    return [
+        Client.objects.create(name=f"{prefix} {i}", company=company, priority="high", type="fresh")
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_snapshots_take_latest_five_per_lead_in_fixed_queries(company, django_assert_num_queries):
+    first, second = make_leads(company, 2)
+    now = timezone.now()
+    for i in range(7):
+        task = ClientTask.objects.create(client=first, notes=f"task {i}")
+        ClientTask.objects.filter(pk=task.pk).update(created_at=now - timedelta(hours=i))
+    ClientTask.objects.create(client=second, notes="only one")
+
+    with django_assert_num_queries(3):
+        snapshots = _build_activity_snapshots([first, second])
+
+    assert [t["notes"] for t in snapshots[first.id]["tasks"]] == [f"task {i}" for i in range(5)]
+    assert [t["notes"] for t in snapshots[second.id]["tasks"]] == ["only one"]
+
+
+@pytest.mark.django_db
+def test_runs_tenants_concurrently_against_stub(company, other_company):
+    make_leads(company, 3)
+    make_leads(other_company, 2, prefix="Other")
+    enable_ai(company, "sk-one")
+    enable_ai(other_company, "sk-two")
+    stub = OpenAIStub()
+
+    results = run_companies_analysis([company, other_company], http_client=stub.client())
+
+    assert results[company.id]["created"] == 3
+    assert results[other_company.id]["created"] == 2
+    assert sorted(key for key, _ in stub.requests) == ["sk-one", "sk-two"]
+    assert ClientAIInsight.objects.filter(status=AIInsightStatus.PENDING).count() == 5
+
+
+@pytest.mark.django_db
+def test_unchanged_leads_are_not_resent(company):
+    make_leads(company, 2)
+    enable_ai(company, "sk-one")
+    stub = OpenAIStub()
+
+    run_companies_analysis([company], http_client=stub.client())
+    results = run_companies_analysis([company], http_client=stub.client())
+
+    assert len(stub.requests) == 1
+    assert results[company.id] == {"analyzed": 0, "created": 0, "unchanged": 2}
+
+
+@pytest.mark.django_db
+def test_leads_are_chunked_into_bounded_prompts(company):
+    make_leads(company, ai_lead_analysis.CHUNK_MAX_LEADS + 3)
+    enable_ai(company, "sk-one", max_leads_per_run=50)
+    stub = OpenAIStub()
+
+    results = run_companies_analysis([company], http_client=stub.client())
+
+    assert [len(ids) for _, ids in stub.requests] == [ai_lead_analysis.CHUNK_MAX_LEADS, 3]
+    assert results[company.id]["created"] == ai_lead_analysis.CHUNK_MAX_LEADS + 3
+
+
+@pytest.mark.django_db
+def test_tenant_token_budget_defers_remaining_chunks(settings, company):
+    make_leads(company, ai_lead_analysis.CHUNK_MAX_LEADS + 3)
+    enable_ai(company, "sk-one", max_leads_per_run=50)
+    stub = OpenAIStub(tokens_per_request=10_000)
+    settings.AI_ANALYSIS_TENANT_TOKEN_BUDGET = 10_500
+
+    results = run_companies_analysis([company], http_client=stub.client())
+
+    assert len(stub.requests) == 1
+    assert results[company.id]["deferred_over_budget"] == 3
+    assert results[company.id]["created"] == ai_lead_analysis.CHUNK_MAX_LEADS
+
+
+@pytest.mark.django_db
+def test_one_tenant_failing_does_not_affect_others(company, other_company):
+    make_leads(company, 1)
+    make_leads(other_company, 1, prefix="Other")
+    broken = enable_ai(company, "sk-revoked")
+    enable_ai(other_company, "sk-two")
+    stub = OpenAIStub(fail_for_key="sk-revoked")
+
+    results = run_companies_analysis([company, other_company], http_client=stub.client())
+
+    assert results[company.id]["code"] == "openai_invalid_api_key"
+    assert results[other_company.id]["created"] == 1
+    broken.refresh_from_db()
+    assert broken.auto_analyze_enabled is False
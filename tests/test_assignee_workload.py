@@ -0,0 +1,147 @@
+"""
+AssigneeWorkload counters follow assignment and status-category changes, and the
+least-busy picker reads them instead of aggregating the client table.
+"""
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from crm.assignment import get_least_busy_employee
+from crm.models import AssigneeWorkload, Client
+from crm.services import bulk_assign_clients
+from crm.workload import expected_workloads, reconcile_workloads
+from settings.models import LeadStatus, StatusCategory
+
+User = get_user_model()
+
+
+def _counts(user):
+    row = AssigneeWorkload.objects.filter(user=user).first()
+    return (row.active_count, row.inactive_count) if row else (0, 0)
+
+
+@pytest.fixture
+def statuses(company, db):
+    return {
+        category: LeadStatus.objects.create(
+            name=f"Workload {category}", company=company, category=category,
+        )
+        for category in (
+            StatusCategory.ACTIVE.value,
+            StatusCategory.INACTIVE.value,
+            StatusCategory.CLOSED.value,
+        )
+    }
+
+
+@pytest.fixture
+def employees(company, db):
+    return [
+        User.objects.create_user(
+            username=f"wl{i}", email=f"wl{i}@test.com", role="employee",
+            company=company, is_active=True,
+        )
+        for i in range(2)
+    ]
+
+
+@pytest.mark.django_db
+def test_counters_follow_save_and_delete(company, employees, statuses):
+    emp1, emp2 = employees
+    lead = Client.objects.create(
+        name="wl", company=company, assigned_to=emp1,
+        status=statuses[StatusCategory.ACTIVE.value],
+    )
+    assert _counts(emp1) == (1, 0)
+
+    lead.status = statuses[StatusCategory.INACTIVE.value]
+    lead.save()
+    assert _counts(emp1) == (0, 1)
+
+    lead.assigned_to = emp2
+    lead.save(update_fields=["assigned_to"])
+    assert _counts(emp1) == (0, 0)
+    assert _counts(emp2) == (0, 1)
+
+    lead.status = statuses[StatusCategory.CLOSED.value]
+    lead.save()
+    assert _counts(emp2) == (0, 0)
+
+    lead.status = None
+    lead.save()
+    assert _counts(emp2) == (1, 0)
+
+    lead.delete()
+    assert _counts(emp2) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_bulk_assign_moves_counters(company, admin_user, employees, statuses):
+    emp1, emp2 = employees
+    leads = [
+        Client.objects.create(
+            name=f"bulk {i}", company=company, assigned_to=emp1,
+            status=statuses[StatusCategory.ACTIVE.value],
+        )
+        for i in range(3)
+    ]
+
+    bulk_assign_clients([lead.id for lead in leads], company, emp2, admin_user)
+
+    assert _counts(emp1) == (0, 0)
+    assert _counts(emp2) == (3, 0)
+
+
+@pytest.mark.django_db
+def test_status_category_edit_and_delete_rebucket_leads(company, employees, statuses):
+    emp1, _ = employees
+    status = statuses[StatusCategory.ACTIVE.value]
+    for i in range(2):
+        Client.objects.create(name=f"cat {i}", company=company, assigned_to=emp1, status=status)
+    assert _counts(emp1) == (2, 0)
+
+    status.category = StatusCategory.INACTIVE.value
+    status.save()
+    assert _counts(emp1) == (0, 2)
+
+    status.delete()
+    assert _counts(emp1) == (2, 0)
+    assert expected_workloads(company.id)[emp1.id] == (2, 0)
+
+
+@pytest.mark.django_db
+def test_reconcile_fixes_drift(company, employees, statuses):
+    emp1, _ = employees
+    lead = Client.objects.create(
+        name="drift", company=company, assigned_to=emp1,
+        status=statuses[StatusCategory.ACTIVE.value],
+    )
+    Client.objects.filter(pk=lead.pk).update(status=statuses[StatusCategory.INACTIVE.value])
+    assert _counts(emp1) == (1, 0)
+
+    assert reconcile_workloads(company.id, dry_run=True) == {emp1.id: ((1, 0), (0, 1))}
+    assert _counts(emp1) == (1, 0)
+
+    call_command("reconcile_assignee_workload", company_id=company.id, stdout=StringIO())
+    assert _counts(emp1) == (0, 1)
+    assert reconcile_workloads(company.id) == {}
+
+
+@pytest.mark.django_db
+def test_least_busy_reads_counters_not_clients(company, employees, statuses):
+    emp1, emp2 = employees
+    Client.objects.create(
+        name="busy", company=company, assigned_to=emp1,
+        status=statuses[StatusCategory.ACTIVE.value],
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        picked = get_least_busy_employee(company)
+
+    assert picked == emp2
+    client_table = f'"{Client._meta.db_table}"'
+    assert not any(client_table in q["sql"] for q in ctx.captured_queries)
@@ -13,6 +13,7 @@ from django.core.cache import cache
 from companies.models import Company
 from subscriptions.models import Plan, Subscription, BillingCycle
 from accounts.models import OwnerTrustedDevice
+from accounts.presence import flush_last_seen
 from accounts.two_factor_policy import OWNER_TRUST_COOKIE_NAME, hash_device_token, hash_user_agent
 from tests.platform_auth_settings_helpers import (
     reset_platform_auth_settings,
@@ -447,6 +448,8 @@ def test_presence_heartbeat_updates_user_presence(api_client):
     response = api_client.post(url, {"source": "mobile"}, format="json")
     assert response.status_code == status.HTTP_200_OK
 
+    # Heartbeats are buffered in the cache and reach the users table on flush.
+    flush_last_seen()
     user.refresh_from_db()
     assert user.last_seen_at is not None
     assert user.last_seen_source == "mobile"
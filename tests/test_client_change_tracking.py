@@ -0,0 +1,110 @@
+"""
+Client keeps a snapshot of status/assignee so save() and the pre_save signals detect
+changes without re-reading the row.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from crm.models import Client
+from notifications.models import Notification, NotificationType
+from settings.models import LeadStatus
+
+
+@pytest.fixture
+def lead_statuses(company, db):
+    s1, _ = LeadStatus.objects.get_or_create(
+        company=company,
+        name="Tracking New",
+        defaults={"is_active": True, "is_default": True},
+    )
+    s2, _ = LeadStatus.objects.get_or_create(
+        company=company,
+        name="Tracking Contacted",
+        defaults={"is_active": True},
+    )
+    return s1, s2
+
+
+def _make_lead(company, status, **extra):
+    return Client.objects.create(
+        name="Tracked Lead",
+        company=company,
+        priority="medium",
+        type="fresh",
+        status=status,
+        **extra,
+    )
+
+
+def _client_selects(queries):
+    table = Client._meta.db_table
+    return [
+        q["sql"] for q in queries
+        if q["sql"].lstrip().upper().startswith("SELECT") and f'FROM "{table}"' in q["sql"]
+    ]
+
+
+@pytest.mark.django_db
+def test_loaded_client_snapshots_tracked_fields(company, employee_user, lead_statuses):
+    status_new, _ = lead_statuses
+    lead = _make_lead(company, status_new, assigned_to=employee_user)
+
+    loaded = Client.objects.get(pk=lead.pk)
+    assert loaded.tracked_originals() == {
+        "status_id": status_new.pk,
+        "assigned_to_id": employee_user.pk,
+    }
+
+
+@pytest.mark.django_db
+def test_status_and_assignee_change_do_not_reselect_client(
+    company, employee_user, lead_statuses,
+):
+    status_new, status_contacted = lead_statuses
+    lead = _make_lead(company, status_new)
+    lead = Client.objects.get(pk=lead.pk)
+
+    lead.status = status_contacted
+    lead.assigned_to = employee_user
+    with CaptureQueriesContext(connection) as ctx:
+        lead.save()
+
+    assert _client_selects(ctx.captured_queries) == []
+    lead.refresh_from_db()
+    assert lead.status_id == status_contacted.pk
+    assert lead.status_entered_at is not None
+    assert Notification.objects.filter(
+        user=employee_user, type=NotificationType.LEAD_ASSIGNED,
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_snapshot_follows_saves(company, employee_user, lead_statuses):
+    status_new, status_contacted = lead_statuses
+    lead = _make_lead(company, status_new)
+
+    before = Client.objects.values_list("status_entered_at", flat=True).get(pk=lead.pk)
+    lead.status = status_contacted
+    lead.save(update_fields=["status"])
+    assert lead.tracked_originals()["status_id"] == status_contacted.pk
+
+    # A partial save of the status still persists the status_entered_at stamp ...
+    entered_at = Client.objects.values_list("status_entered_at", flat=True).get(pk=lead.pk)
+    assert entered_at == lead.status_entered_at
+    assert entered_at != before
+    # ... and a later save without a status change leaves it alone.
+    lead.save()
+    assert (
+        Client.objects.values_list("status_entered_at", flat=True).get(pk=lead.pk)
+        == entered_at
+    )
+
+
+@pytest.mark.django_db
+def test_deferred_tracked_field_is_fetched_on_demand(company, lead_statuses):
+    status_new, _ = lead_statuses
+    lead = _make_lead(company, status_new)
+
+    partial = Client.objects.only("id", "name").get(pk=lead.pk)
+    assert partial.tracked_originals() == {"status_id": status_new.pk, "assigned_to_id": None}
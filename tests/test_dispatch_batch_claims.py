@@ -0,0 +1,193 @@
+"""
+Batch claim API for the ReminderDispatchLog ledger (notifications.dispatch).
+
+claim_dispatches must keep exactly the semantics of claim_dispatch — one row per dispatch
+key, satisfied rows never returned again, unsatisfied rows retried — while costing a fixed
+number of queries per batch instead of a round trip per entity.
+"""
+import pytest
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from crm.models import Client
+from notifications.dispatch import (
+    DispatchClaim,
+    OutcomeRecorder,
+    claim_dispatch,
+    claim_dispatches,
+    mark_dispatched_many,
+)
+from notifications.models import NotificationType, ReminderDispatchLog
+
+
+def make_leads(company, employee, count):
+    return [
+        Client.objects.create(
+            name=f"Lead {i}",
+            company=company,
+            priority="high",
+            type="fresh",
+            assigned_to=employee,
+        )
+        for i in range(count)
+    ]
+
+
+def claims_for(leads, user, due_at, **kwargs):
+    return [
+        DispatchClaim(
+            user=user,
+            notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+            obj=lead,
+            scheduled_for=due_at,
+            **kwargs,
+        )
+        for lead in leads
+    ]
+
+
+@pytest.mark.django_db
+def test_claims_whole_batch_in_two_queries(company, employee_user, django_assert_num_queries):
+    leads = make_leads(company, employee_user, 5)
+    due_at = timezone.now() - timedelta(minutes=1)
+    claims = claims_for(leads, employee_user, due_at)
+    # Warm ContentType's cache so the count reflects only the claim itself.
+    ContentType.objects.get_for_model(Client)
+
+    with django_assert_num_queries(2):
+        rows = claim_dispatches(claims)
+
+    assert all(row is not None for row in rows)
+    assert [row.object_id for row in rows] == [str(lead.pk) for lead in leads]
+    assert ReminderDispatchLog.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_satisfied_claims_are_not_returned_again(company, employee_user):
+    leads = make_leads(company, employee_user, 3)
+    due_at = timezone.now() - timedelta(minutes=1)
+
+    rows = claim_dispatches(claims_for(leads, employee_user, due_at))
+    rows[0].push_sent = True
+    rows[1].push_sent = True
+    rows[2].last_error = "FCM unavailable"
+    assert mark_dispatched_many(rows) == 3
+
+    again = claim_dispatches(claims_for(leads, employee_user, due_at))
+
+    assert again[0] is None
+    assert again[1] is None
+    # The failed one is handed back for a retry, with its recorded error.
+    assert again[2] is not None
+    assert again[2].last_error == "FCM unavailable"
+    assert ReminderDispatchLog.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_expect_email_keeps_push_only_rows_open(company, employee_user):
+    (lead,) = make_leads(company, employee_user, 1)
+    due_at = timezone.now() - timedelta(minutes=1)
+
+    (row,) = claim_dispatches(claims_for([lead], employee_user, due_at, expect_email=True))
+    row.push_sent = True
+    mark_dispatched_many([row])
+
+    (retry,) = claim_dispatches(claims_for([lead], employee_user, due_at, expect_email=True))
+    assert retry is not None
+    assert retry.pk == row.pk
+
+
+@pytest.mark.django_db
+def test_duplicate_keys_within_a_batch_are_claimed_once(company, employee_user):
+    (lead,) = make_leads(company, employee_user, 1)
+    due_at = timezone.now() - timedelta(minutes=1)
+
+    rows = claim_dispatches(claims_for([lead, lead], employee_user, due_at))
+
+    assert rows[0] is not None
+    assert rows[1] is None
+    assert ReminderDispatchLog.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_single_claim_shares_the_ledger_with_batch_claims(company, employee_user):
+    (lead,) = make_leads(company, employee_user, 1)
+    due_at = timezone.now() - timedelta(minutes=1)
+
+    (row,) = claim_dispatches(claims_for([lead], employee_user, due_at))
+    row.push_sent = True
+    mark_dispatched_many([row])
+
+    assert (
+        claim_dispatch(
+            user=employee_user,
+            notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+            obj=lead,
+            scheduled_for=due_at,
+        )
+        is None
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_claims_are_skipped(company, employee_user):
+    (lead,) = make_leads(company, employee_user, 1)
+
+    rows = claim_dispatches(
+        [
+            DispatchClaim(
+                user=None,
+                notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+                obj=lead,
+                scheduled_for=timezone.now(),
+            ),
+            DispatchClaim(
+                user=employee_user,
+                notification_type=NotificationType.LEAD_NO_FOLLOW_UP,
+                obj=lead,
+                scheduled_for=None,
+            ),
+        ]
+    )
+
+    assert rows == [None, None]
+    assert not ReminderDispatchLog.objects.exists()
+
+
+@pytest.mark.django_db
+def test_outcomes_are_written_while_the_loop_runs(company, employee_user):
+    leads = make_leads(company, employee_user, 7)
+    due_at = timezone.now() - timedelta(minutes=1)
+    claims = claims_for(leads, employee_user, due_at)
+    rows = claim_dispatches(claims)
+    written_during_loop = []
+
+    with OutcomeRecorder(flush_every=3) as outcomes:
+        for _claim, row in outcomes.track(zip(claims, rows)):
+            written_during_loop.append(ReminderDispatchLog.objects.filter(push_sent=True).count())
+            row.push_sent = True
+
+    assert written_during_loop == [0, 0, 0, 3, 3, 3, 6]
+    assert ReminderDispatchLog.objects.filter(push_sent=True).count() == 7
+
+
+@pytest.mark.django_db
+def test_crash_mid_batch_keeps_the_sends_already_made(company, employee_user):
+    leads = make_leads(company, employee_user, 6)
+    due_at = timezone.now() - timedelta(minutes=1)
+    claims = claims_for(leads, employee_user, due_at)
+    rows = claim_dispatches(claims)
+
+    with pytest.raises(RuntimeError):
+        with OutcomeRecorder(flush_every=4) as outcomes:
+            for index, (_claim, row) in enumerate(outcomes.track(zip(claims, rows))):
+                row.push_sent = True
+                if index == 4:
+                    raise RuntimeError("worker died after sending")
+
+    # The five rows the loop touched (including the one in hand) are recorded; a re-run
+    # only claims the untouched sixth.
+    assert ReminderDispatchLog.objects.filter(push_sent=True).count() == 5
+    assert [row for row in claim_dispatches(claims) if row is not None] == [rows[5]]
@@ -0,0 +1,140 @@
+"""
+Server-side lead/deal/activity exports: inline CSV/XLSX streaming and background jobs.
+"""
+import csv
+import io
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from crm.exports import iter_csv, run_export_job
+from crm.models import Client, ExportJob, ExportJobStatus
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.fixture
+def leads(company, admin_user, employee_user):
+    return [
+        Client.objects.create(
+            name=f"Export {i}",
+            company=company,
+            priority="high" if i % 2 else "low",
+            type="fresh",
+            phone_number=f"+96470000000{i}",
+            assigned_to=employee_user if i < 2 else None,
+            created_by=admin_user,
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_csv_export_streams_filtered_leads(authenticated_admin, leads):
+    response = authenticated_admin.get("/api/v1/clients/export/", {"priority": "high"})
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    assert "attachment" in response["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(_body(response).decode("utf-8-sig"))))
+    assert rows[0][:2] == ["ID", "Name"]
+    assert sorted(row[1] for row in rows[1:]) == ["Export 1", "Export 3"]
+
+
+@pytest.mark.django_db
+def test_xlsx_export_is_a_valid_workbook(authenticated_admin, leads):
+    response = authenticated_admin.get("/api/v1/clients/export/", {"export_format": "xlsx"})
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(_body(response)))
+    assert "xl/workbook.xml" in archive.namelist()
+    sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    assert sheet.count("<row>") == len(leads) + 1
+    assert "Export 4" in sheet
+
+
+@pytest.mark.django_db
+def test_unknown_export_format_is_rejected(authenticated_admin, leads):
+    response = authenticated_admin.get("/api/v1/clients/export/", {"export_format": "pdf"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_large_export_runs_as_job_with_requester_scope(
+    api_client, employee_user, subscription, leads, settings, tmp_path,
+):
+    settings.EXPORT_ROOT = tmp_path
+    settings.EXPORT_INLINE_MAX_ROWS = 1
+    api_client.force_authenticate(user=employee_user)
+
+    with patch("django_q.tasks.async_task") as enqueue:
+        response = api_client.get("/api/v1/clients/export/")
+    assert response.status_code == 202
+    enqueue.assert_called_once()
+    job = ExportJob.objects.get(pk=response.data["id"])
+    assert job.status == ExportJobStatus.PENDING
+
+    run_export_job(job.pk)
+    job.refresh_from_db()
+    assert job.status == ExportJobStatus.READY
+    # The employee only sees the two leads assigned to them.
+    assert job.row_count == 2
+
+    download = api_client.get(f"/api/v1/exports/{job.pk}/download/")
+    assert download.status_code == 200
+    rows = list(csv.reader(io.StringIO(_body(download).decode("utf-8-sig"))))
+    assert len(rows) == 3
+
+    # A second delivery of the same task does nothing.
+    assert run_export_job(job.pk) is None
+
+
+@pytest.mark.django_db
+def test_export_jobs_are_private_to_the_requester(authenticated_admin, employee_user, company):
+    job = ExportJob.objects.create(
+        company=company, requested_by=employee_user, dataset="leads", file_format="csv",
+    )
+    response = authenticated_admin.get(f"/api/v1/exports/{job.pk}/")
+    assert response.status_code == 404
+
+
+def test_csv_cells_that_look_like_formulas_are_quoted():
+    rows = [
+        ["Name", "Notes", "Budget"],
+        ["=HYPERLINK(\"http://x\")", "+1 call back", -5],
+        ["@SUM(A1)", "\tcmd", None],
+        ["Plain - name", "ok", 10],
+    ]
+    out = list(csv.reader(io.StringIO(b"".join(iter_csv(rows)).decode("utf-8-sig"))))
+
+    assert out[1] == ["'=HYPERLINK(\"http://x\")", "'+1 call back", "-5"]
+    assert out[2] == ["'@SUM(A1)", "'\tcmd", ""]
+    assert out[3] == ["Plain - name", "ok", "10"]
+
+
+@pytest.mark.django_db
+def test_background_export_applies_the_list_search(
+    api_client, admin_user, subscription, leads, settings, tmp_path,
+):
+    settings.EXPORT_ROOT = tmp_path
+    api_client.force_authenticate(user=admin_user)
+
+    with patch("django_q.tasks.async_task"):
+        response = api_client.get("/api/v1/clients/export/", {"async": "1", "search": "Export 3"})
+    assert response.status_code == 202
+
+    run_export_job(response.data["id"])
+    job = ExportJob.objects.get(pk=response.data["id"])
+    assert job.status == ExportJobStatus.READY
+    assert job.row_count == 1
+
+
+def test_export_files_are_not_written_under_media_root(settings):
+    # /media/ is served publicly; exports must only leave through the download action.
+    root = Path(settings.EXPORT_ROOT).resolve()
+    assert not root.is_relative_to(Path(settings.MEDIA_ROOT).resolve())
@@ -0,0 +1,132 @@
+"""
+Shared Meta HTTP client (integrations.services.graph_http) and the decrypted-token cache.
+
+The client runs on an httpx.MockTransport; nothing here reaches Meta.
+"""
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+
+from integrations import encryption
+from integrations.services import graph_http
+
+GRAPH = "https://graph.facebook.com/v25.0"
+
+
+@pytest.fixture
+def transport():
+    calls = []
+    replies = []
+
+    def handler(request):
+        calls.append(request)
+        reply = replies.pop(0) if replies else httpx.Response(200, json={"ok": True})
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    client = graph_http.GraphClient(transport=httpx.MockTransport(handler))
+    graph_http.set_client(client)
+    graph_http.reset_latency_stats()
+    with patch.object(graph_http.time, "sleep") as sleep:
+        yield calls, replies, sleep
+    graph_http.set_client(None)
+    client.close()
+
+
+def test_module_functions_share_one_pooled_client():
+    graph_http.set_client(None)
+    try:
+        assert graph_http.get_client() is graph_http.get_client()
+    finally:
+        graph_http.get_client().close()
+        graph_http.set_client(None)
+
+
+def test_response_keeps_the_requests_surface(transport):
+    calls, replies, _sleep = transport
+    replies.append(httpx.Response(400, json={"error": {"message": "bad"}}))
+
+    resp = graph_http.get(f"{GRAPH}/123/phone_numbers", params={"fields": "id", "after": None})
+
+    assert str(calls[0].url) == f"{GRAPH}/123/phone_numbers?fields=id"
+    assert resp.ok is False
+    assert resp.json()["error"]["message"] == "bad"
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        resp.raise_for_status()
+    assert excinfo.value.response.status_code == 400
+
+
+def test_get_retries_5xx_and_honours_retry_after(transport):
+    calls, replies, sleep = transport
+    replies.extend([
+        httpx.Response(503),
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"data": []}),
+    ])
+
+    resp = graph_http.get(f"{GRAPH}/123/message_templates")
+
+    assert resp.status_code == 200
+    assert len(calls) == 3
+    assert sleep.call_args_list[-1].args == (2.0,)
+
+
+def test_post_is_not_retried_after_meta_may_have_acted(transport):
+    calls, replies, _sleep = transport
+    replies.append(httpx.Response(502))
+
+    resp = graph_http.post(f"{GRAPH}/123/messages", json={"to": "1"})
+
+    assert resp.status_code == 502
+    assert len(calls) == 1
+
+
+def test_post_is_retried_on_rate_limit_and_unopened_connection(transport):
+    calls, replies, _sleep = transport
+    replies.extend([
+        httpx.Response(429),
+        httpx.ConnectError("refused"),
+        httpx.Response(200, json={"messages": [{"id": "wamid.x"}]}),
+    ])
+
+    resp = graph_http.post(f"{GRAPH}/123/messages", json={"to": "1"})
+
+    assert resp.json()["messages"][0]["id"] == "wamid.x"
+    assert len(calls) == 3
+
+
+def test_transport_errors_surface_as_requests_exceptions(transport):
+    _calls, replies, _sleep = transport
+    replies.extend([httpx.ReadTimeout("slow")] * graph_http.MAX_ATTEMPTS)
+
+    with pytest.raises(requests.exceptions.Timeout):
+        graph_http.get(f"{GRAPH}/me")
+
+
+def test_latency_is_tracked_per_endpoint_with_ids_collapsed(transport):
+    graph_http.post(f"{GRAPH}/111/messages", json={})
+    graph_http.post(f"{GRAPH}/222/messages", json={})
+    graph_http.get(f"{GRAPH}/wamid.HBgL123=/")
+
+    stats = graph_http.latency_snapshot()
+
+    assert stats["POST graph.facebook.com/{id}/messages"]["calls"] == 2
+    assert stats["GET graph.facebook.com/{id}"]["calls"] == 1
+
+
+def test_decrypted_token_cache_is_keyed_by_ciphertext():
+    encryption.clear_decrypted_token_cache()
+    first = encryption.encrypt_token("token-one")
+    rotated = encryption.encrypt_token("token-two")
+
+    with patch.object(encryption, "decrypt_token", wraps=encryption.decrypt_token) as decrypt:
+        assert encryption.decrypt_token_cached(("wa", 1), first) == "token-one"
+        assert encryption.decrypt_token_cached(("wa", 1), first) == "token-one"
+        assert decrypt.call_count == 1
+
+        # A re-saved token has a new ciphertext and is decrypted afresh.
+        assert encryption.decrypt_token_cached(("wa", 1), rotated) == "token-two"
+        assert decrypt.call_count == 2
@@ -213,3 +213,107 @@ class TestLeadApiKeyManagement:
         assert response.status_code == status.HTTP_200_OK
         row.refresh_from_db()
         assert row.is_active is False
+
+
+@pytest.mark.django_db
+class TestInboundLeadBatchAPI:
+    url = "/api/v1/integrations/leads/inbound/batch/"
+
+    def _post(self, api_client, key, leads):
+        return api_client.post(
+            self.url,
+            data=json.dumps({"leads": leads}),
+            content_type="application/json",
+            **_auth_headers(key),
+        )
+
+    def test_batch_reports_per_item_results(self, api_client, company, lead_api_key):
+        from crm.models import Client, ClientPhoneNumber
+
+        Client.objects.create(
+            name="Known", company=company, priority="low", type="fresh", external_lead_id="b-0",
+        )
+        leads = [
+            {"name": "Known again", "external_id": "b-0"},
+            {"name": "One", "phone": "+9647700000011", "external_id": "b-1"},
+            {"name": "One replay", "external_id": "b-1"},
+            {"name": "Same phone", "phone": "07700000011"},
+            {"phone": "+9647700000012"},
+            {"name": "Two", "phone": "+9647700000013", "priority": "high"},
+        ]
+        response = self._post(api_client, lead_api_key, leads)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = api_body(response)
+        assert [r["status"] for r in data["results"]] == [
+            "duplicate", "created", "duplicate", "duplicate", "invalid", "created",
+        ]
+        assert (data["created"], data["duplicate"], data["invalid"]) == (2, 3, 1)
+        one, two = data["results"][1], data["results"][5]
+        assert data["results"][2]["client_id"] == one["client_id"]
+        assert data["results"][3]["client_id"] == one["client_id"]
+        assert "name" in data["results"][4]["errors"]
+        assert two["patient_file_number"] == one["patient_file_number"] + 1
+
+        created = Client.objects.get(id=two["client_id"])
+        assert created.source == "api" and created.priority == "high"
+        assert ClientPhoneNumber.objects.filter(
+            client=created, phone_normalized="9647700000013", is_primary=True
+        ).exists()
+
+        # Replaying the batch creates nothing new.
+        replay = api_body(self._post(api_client, lead_api_key, leads))
+        assert replay["created"] == 0
+        assert replay["results"][1]["client_id"] == one["client_id"]
+
+    def test_batch_matches_single_lead_side_effects(self, api_client, company, lead_api_key):
+        from django.contrib.auth import get_user_model
+
+        from crm.models import AssigneeWorkload, Client, ClientEvent
+        from integrations.models import IntegrationLog
+
+        company.auto_assign_enabled = True
+        company.save(update_fields=["auto_assign_enabled"])
+        employee = get_user_model().objects.create_user(
+            username="batch_emp", email="batch_emp@test.com", role="employee",
+            company=company, is_active=True,
+        )
+        leads = [{"name": f"Batch {i}", "external_id": f"s-{i}"} for i in range(3)]
+        data = api_body(self._post(api_client, lead_api_key, leads))
+
+        ids = [r["client_id"] for r in data["results"]]
+        assert set(Client.objects.filter(id__in=ids).values_list("assigned_to_id", flat=True)) == {employee.id}
+        assert AssigneeWorkload.objects.get(user=employee).active_count == 3
+        assert ClientEvent.objects.filter(client_id__in=ids, event_type="created").count() == 3
+        assert ClientEvent.objects.filter(client_id__in=ids, event_type="assignment").count() == 3
+        assert IntegrationLog.objects.filter(action="api_lead_received").count() == 3
+
+    def test_batch_validates_references_without_per_item_queries(
+        self, api_client, company, other_company, lead_api_key
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from crm.models import Campaign
+
+        foreign = Campaign.objects.create(code="OTHER", name="Other", company=other_company)
+        leads = [
+            {"name": f"Ref {i}", "campaign_id": foreign.id, "external_id": f"r-{i}"}
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            data = api_body(self._post(api_client, lead_api_key, leads))
+
+        assert data["invalid"] == 20
+        assert len(ctx.captured_queries) < 20
+
+    def test_batch_size_is_limited(self, api_client, lead_api_key, settings):
+        settings.LEAD_API_BATCH_MAX_LEADS = 2
+        response = self._post(api_client, lead_api_key, [{"name": "x"}] * 3)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_requires_api_key(self, api_client):
+        response = api_client.post(
+            self.url, data=json.dumps({"leads": [{"name": "x"}]}), content_type="application/json",
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -12,6 +12,7 @@ from integrations.services.lead_created_sms import (
     resolve_client_sms_phone,
     schedule_lead_created_welcome_sms,
     send_lead_created_welcome_sms,
+    send_lead_created_welcome_sms_batch,
 )
 
 
@@ -253,6 +254,39 @@ def test_send_after_phones_like_post_commit_order(company):
     assert "Pat" in (rec.body or "")
 
 
+@pytest.mark.django_db
+def test_batch_renders_each_lead_and_skips_missing_ids(company):
+    tw = TwilioSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        account_sid="ACtest",
+        twilio_number="+15551230001",
+        lead_created_sms_enabled=True,
+        lead_created_sms_template="Hello [first_name]",
+    )
+    tw.set_auth_token("secret")
+    tw.save(update_fields=["auth_token"])
+
+    clients = [
+        Client.objects.create(
+            name=name,
+            company=company,
+            priority="low",
+            type="fresh",
+            phone_number=phone,
+        )
+        for name, phone in (("Sam Smith", "07901112233"), ("Rana Ali", "07904445566"))
+    ]
+
+    with patch("twilio.rest.Client") as mock_client_cls:
+        mock_client_cls.return_value.messages.create.return_value = SimpleNamespace(sid="SMbatch")
+        send_lead_created_welcome_sms_batch([c.pk for c in clients] + [0])
+        assert mock_client_cls.return_value.messages.create.call_count == 2
+
+    bodies = dict(LeadSMSMessage.objects.values_list("client_id", "body"))
+    assert bodies == {clients[0].pk: "Hello Sam", clients[1].pk: "Hello Rana"}
+
+
 def test_schedule_registers_transaction_on_commit(monkeypatch):
     on_commit = MagicMock()
     monkeypatch.setattr(
@@ -14,6 +14,7 @@ from integrations.models import (
 from integrations.services.lead_created_whatsapp import (
     schedule_lead_created_welcome_whatsapp,
     send_lead_created_welcome_whatsapp,
+    send_lead_created_welcome_whatsapp_batch,
 )
 
 
@@ -126,7 +127,7 @@ def test_send_skips_non_approved_template(company):
         "integrations.services.whatsapp_template_send.resolve_whatsapp_account_for_api",
         return_value=(mock_wa, None),
     ), patch(
-        "integrations.services.whatsapp_template_send.requests.post"
+        "integrations.services.whatsapp_template_send.graph_http.post"
     ) as mock_post, patch(
         "integrations.services.lead_created_whatsapp.increment_monthly_usage"
     ) as mock_inc:
@@ -197,7 +198,7 @@ def test_send_creates_message_and_calls_graph(company):
         "integrations.services.whatsapp_template_send.resolve_whatsapp_account_for_api",
         return_value=(mock_wa, None),
     ), patch(
-        "integrations.services.whatsapp_template_send.requests.post",
+        "integrations.services.whatsapp_template_send.graph_http.post",
         return_value=mock_resp,
     ) as mock_post:
         send_lead_created_welcome_whatsapp(client.pk)
@@ -212,6 +213,44 @@ def test_send_creates_message_and_calls_graph(company):
     assert "Sam" in (rec.body or "") or "Hello" in (rec.body or "")
 
 
+@pytest.mark.django_db
+def test_batch_sends_prebuilt_components_per_lead(company):
+    tpl = _approved_template(company)
+    _enable_whatsapp_welcome(company, tpl)
+    clients = [
+        Client.objects.create(
+            name=name,
+            company=company,
+            priority="low",
+            type="fresh",
+            phone_number=phone,
+        )
+        for name, phone in (("Sam Smith", "+15550001111"), ("Rana Ali", "+15550002222"))
+    ]
+
+    with patch(
+        "integrations.services.lead_created_whatsapp.is_integration_allowed",
+        return_value=True,
+    ), patch(
+        "integrations.services.lead_created_whatsapp.require_monthly_usage",
+    ), patch(
+        "integrations.services.lead_created_whatsapp.increment_monthly_usage"
+    ) as mock_inc, patch(
+        "integrations.services.lead_created_whatsapp.send_approved_whatsapp_template",
+        return_value=(True, "wamid.x", None, None),
+    ) as mock_send:
+        send_lead_created_welcome_whatsapp_batch([c.pk for c in clients])
+
+    assert mock_inc.call_count == 2
+    sent = {
+        call.kwargs["client"].pk: call.kwargs["components"] for call in mock_send.call_args_list
+    }
+    assert sent == {
+        clients[0].pk: [{"type": "body", "parameters": [{"type": "text", "text": "Sam Smith"}]}],
+        clients[1].pk: [{"type": "body", "parameters": [{"type": "text", "text": "Rana Ali"}]}],
+    }
+
+
 def test_schedule_registers_transaction_on_commit(monkeypatch):
     on_commit = MagicMock()
     monkeypatch.setattr(
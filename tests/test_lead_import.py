@@ -0,0 +1,157 @@
+"""
+Bulk lead import jobs: CSV / JSON upload, batched dedup, file numbers and assignment.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from crm.imports import run_lead_import_job
+from crm_saas_api import settings as project_settings
+from crm.models import (
+    AssigneeWorkload,
+    Client,
+    ClientEvent,
+    ClientPhoneNumber,
+    LeadImportJob,
+    LeadImportJobStatus,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _import_root(settings, tmp_path):
+    settings.IMPORT_ROOT = tmp_path
+
+
+def _start_import(client, **kwargs):
+    with patch("django_q.tasks.async_task") as enqueue:
+        response = client.post("/api/v1/lead-imports/", **kwargs)
+    assert response.status_code == 202, response.content
+    enqueue.assert_called_once()
+    return LeadImportJob.objects.get(pk=response.data["id"])
+
+
+@pytest.mark.django_db
+def test_csv_import_dedups_phones_and_numbers_leads(authenticated_admin, company, admin_user):
+    Client.objects.create(
+        name="Existing", company=company, priority="low", type="fresh",
+        phone_number="+9647701111111", created_by=admin_user,
+    )
+    before = Client.objects.filter(company=company).count()
+    content = (
+        "Name,Phone,Extra Phones,Priority,Email\n"
+        "Ali,07702222222,07703333333;07704444444,high,ali@example.com\n"
+        "Existing again,07701111111,,,\n"
+        "Ali twin,+9647703333333,,,\n"
+        "Bad priority,07705555555,,urgent,\n"
+        ",07706666666,,,\n"
+        "Sara,07707777777,,,\n"
+    ).encode("utf-8")
+    upload = SimpleUploadedFile("leads.csv", content, content_type="text/csv")
+
+    job = _start_import(authenticated_admin, data={"file": upload}, format="multipart")
+    assert job.total_rows == 6
+    assert run_lead_import_job(job.pk) == 2
+
+    job.refresh_from_db()
+    assert job.status == LeadImportJobStatus.COMPLETED
+    assert (job.processed_rows, job.created_count, job.duplicate_count, job.error_count) == (6, 2, 2, 2)
+    assert {(row["row"], row["code"]) for row in job.errors} == {
+        (2, "duplicate_lead_phone"),
+        (3, "duplicate_lead_phone"),
+        (4, "invalid_row"),
+        (5, "invalid_row"),
+    }
+
+    ali = Client.objects.get(company=company, name="Ali")
+    sara = Client.objects.get(company=company, name="Sara")
+    assert Client.objects.filter(company=company).count() == before + 2
+    assert ali.priority == "high" and ali.type == "fresh"
+    assert "ali@example.com" in ali.notes
+    assert ali.patient_file_number + 1 == sara.patient_file_number
+    assert set(
+        ClientPhoneNumber.objects.filter(client=ali).values_list("phone_normalized", "is_primary")
+    ) == {("9647702222222", True), ("9647703333333", False), ("9647704444444", False)}
+    assert ClientEvent.objects.filter(client=ali, event_type="created").exists()
+
+    # The next single-lead create continues the file-number sequence.
+    later = Client.objects.create(name="Later", company=company, priority="low", type="fresh")
+    assert later.patient_file_number == sara.patient_file_number + 1
+
+
+@pytest.mark.django_db
+def test_json_import_auto_assigns_and_notifies_in_batch(authenticated_admin, company, admin_user):
+    from notifications.models import Notification, NotificationType
+
+    company.auto_assign_enabled = True
+    company.save(update_fields=["auto_assign_enabled"])
+    employees = [
+        User.objects.create_user(
+            username=f"imp{i}", email=f"imp{i}@test.com", role="employee",
+            company=company, is_active=True,
+        )
+        for i in range(2)
+    ]
+    leads = [{"name": f"Lead {i}", "phone": f"+96478000000{i:02d}"} for i in range(4)]
+
+    job = _start_import(authenticated_admin, data={"leads": leads}, format="json")
+    run_lead_import_job(job.pk)
+
+    imported = Client.objects.filter(company=company, name__startswith="Lead ")
+    assert imported.count() == 4
+    owners = sorted(imported.values_list("assigned_to_id", flat=True))
+    assert owners == sorted([employees[0].id, employees[0].id, employees[1].id, employees[1].id])
+    for employee in employees:
+        assert AssigneeWorkload.objects.get(user=employee).active_count == 2
+        assert Notification.objects.filter(
+            user=employee, type=NotificationType.LEAD_ASSIGNED
+        ).count() == 2
+    assert ClientEvent.objects.filter(client__in=imported, event_type="assignment").count() == 4
+
+
+@pytest.mark.django_db
+def test_import_skips_known_external_ids_and_runs_once(authenticated_admin, company):
+    Client.objects.create(
+        name="Known", company=company, priority="low", type="fresh", external_lead_id="crm-1",
+    )
+    leads = [
+        {"name": "Known again", "external_id": "crm-1"},
+        {"name": "New", "external_id": "crm-2", "status": "no such status"},
+        {"name": "New 2", "external_id": "crm-3"},
+    ]
+
+    job = _start_import(authenticated_admin, data=leads, format="json")
+    run_lead_import_job(job.pk)
+    assert run_lead_import_job(job.pk) is None
+
+    job.refresh_from_db()
+    assert (job.created_count, job.duplicate_count, job.error_count) == (1, 1, 1)
+    assert Client.objects.filter(company=company, external_lead_id="crm-3").exists()
+
+
+@pytest.mark.django_db
+def test_csv_without_name_column_is_rejected(authenticated_admin):
+    upload = SimpleUploadedFile("leads.csv", b"phone\n07701234567\n", content_type="text/csv")
+    response = authenticated_admin.post("/api/v1/lead-imports/", {"file": upload}, format="multipart")
+
+    assert response.status_code == 400
+    assert not LeadImportJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_employees_cannot_start_imports(authenticated_employee):
+    response = authenticated_employee.post(
+        "/api/v1/lead-imports/", {"leads": [{"name": "x"}]}, format="json"
+    )
+    assert response.status_code == 403
+
+
+def test_import_files_are_not_written_under_media_root():
+    # /media/ is served publicly; uploads hold a tenant's lead names, phones and emails.
+    # Read the settings module itself: the autouse fixture points IMPORT_ROOT at tmp_path.
+    root = Path(project_settings.IMPORT_ROOT).resolve()
+    assert not root.is_relative_to(Path(project_settings.MEDIA_ROOT).resolve())
@@ -1,10 +1,23 @@
 """Tests for shared message placeholders (curly + bracket forms)."""
 
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from integrations.services.message_placeholders import (
     build_message_placeholder_values,
     render_message_placeholders,
+    render_message_placeholders_for_client,
+    render_message_placeholders_for_clients,
+    text_placeholder_keys,
+)
+from integrations.views.templates_whatsapp import (
+    _content_to_meta_body,
+    _find_placeholders_in_order,
+    build_whatsapp_template_components_for_client,
+    build_whatsapp_template_components_for_clients,
+    template_render_plan,
 )
-from integrations.views.templates_whatsapp import _content_to_meta_body, _find_placeholders_in_order
 
 
 class FakeCompany:
@@ -99,3 +112,86 @@ def test_legacy_bracket_still_works():
     values = build_message_placeholder_values(FakeClient())
     out = render_message_placeholders("Hi [Customer Name] / [name]", values)
     assert out == "Hi Sara Ahmed / Sara Ahmed"
+
+
+def test_text_placeholder_keys_resolve_aliases():
+    text = "Hi [Customer Name] { الحالة } [name] {{1}} [not a placeholder]"
+    assert text_placeholder_keys(text) == {"customer_name", "status", "name"}
+    assert text_placeholder_keys("") == frozenset()
+
+
+def test_values_are_built_only_for_requested_keys():
+    values = build_message_placeholder_values(FakeClient(), keys={"customer_name", "status"})
+    assert values == {"customer_name": "Sara Ahmed", "status": "جديد"}
+
+
+def test_render_for_client_matches_full_value_render():
+    client = FakeClient()
+    text = "{ اسم العميل } / [Company] / { اسم الموظف } / [budget]"
+    expected = render_message_placeholders(text, build_message_placeholder_values(client))
+    assert render_message_placeholders_for_client(text, client) == expected
+
+
+def _client(company, name, **kwargs):
+    from crm.models import Client
+
+    return Client.objects.create(name=name, company=company, priority="low", type="fresh", **kwargs)
+
+
+@pytest.mark.django_db
+def test_render_for_many_clients_reads_them_in_one_query(company):
+    clients = [_client(company, f"Lead {i}", phone_number=f"+96477000000{i}") for i in range(3)]
+    text = "Hi { اسم العميل } ({ رقم الهاتف }) from { اسم الشركة } — { المرحلة }"
+
+    with CaptureQueriesContext(connection) as ctx:
+        rendered = render_message_placeholders_for_clients(text, [c.pk for c in clients] + [0])
+
+    assert len(ctx.captured_queries) == 1
+    assert set(rendered) == {c.pk for c in clients}
+    for c in clients:
+        assert rendered[c.pk] == render_message_placeholders_for_client(text, c)
+
+
+@pytest.mark.django_db
+def test_template_components_for_many_clients_match_single_render(company):
+    from integrations.models import MessageTemplate
+
+    template = MessageTemplate.objects.create(
+        company=company,
+        name="welcome_batch",
+        channel_type=MessageTemplate.CHANNEL_WHATSAPP_API,
+        content="Hello { اسم العميل }, welcome to { اسم الشركة }",
+    )
+    clients = [_client(company, f"Batch {i}") for i in range(3)]
+
+    with CaptureQueriesContext(connection) as ctx:
+        batch = build_whatsapp_template_components_for_clients(template, clients, sender_name="Mona")
+
+    assert len(ctx.captured_queries) == 1
+    for c in clients:
+        assert batch[c.pk] == build_whatsapp_template_components_for_client(
+            template, c, sender_name="Mona"
+        )
+    assert batch[clients[0].pk][0]["parameters"][0]["text"] == "Batch 0"
+
+
+@pytest.mark.django_db
+def test_template_render_plan_is_cached_until_the_template_changes(company):
+    from integrations.models import MessageTemplate
+
+    template = MessageTemplate.objects.create(
+        company=company,
+        name="plan_cache",
+        channel_type=MessageTemplate.CHANNEL_WHATSAPP_API,
+        content="Hi { اسم العميل }",
+    )
+    plan = template_render_plan(template)
+    assert template_render_plan(MessageTemplate.objects.get(pk=template.pk)) is plan
+    assert plan.keys == {"customer_name"}
+
+    # queryset.update() keeps updated_at, so the plan's source check must catch it.
+    MessageTemplate.objects.filter(pk=template.pk).update(content="Hi { اسم العميل } { الحالة }")
+    fresh = template_render_plan(MessageTemplate.objects.get(pk=template.pk))
+    assert fresh is not plan
+    assert fresh.keys == {"customer_name", "status"}
+    assert fresh.body_count == 2
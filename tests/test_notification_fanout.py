@@ -0,0 +1,168 @@
+"""
+Bulk fan-out in NotificationService.send_notification_to_multiple.
+
+A company-wide alert must cost a fixed number of queries and one push hand-off per
+language, while keeping the per-recipient rules of send_notification: mute skips the
+inbox, quiet hours only skip push, and each user reads their own language.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from accounts.models import User
+from notifications.models import Notification, NotificationSettings, NotificationType
+from notifications.services import NotificationService
+
+
+def make_users(company, count, *, language="ar", prefix="fan"):
+    return [
+        User.objects.create(
+            username=f"{prefix}_{language}_{i}",
+            email=f"{prefix}_{language}_{i}@test.com",
+            company=company,
+            role="employee",
+            language=language,
+            fcm_tokens=[f"tok-{prefix}-{language}-{i}"],
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestSendToMultiple:
+    def test_writes_one_inbox_row_per_user_in_their_language(self, company):
+        arabic = make_users(company, 2, language="ar")
+        english = make_users(company, 2, language="en")
+
+        with patch.object(
+            NotificationService, "deliver_push_many", side_effect=lambda users, **kw: {u.pk for u in users}
+        ):
+            results = NotificationService.send_notification_to_multiple(
+                arabic + english,
+                NotificationType.PBX_CALL_MISSED,
+                data={"phone": "100"},
+            )
+
+        assert results == {"success": 4, "failed": 0}
+        rows = Notification.objects.filter(type=NotificationType.PBX_CALL_MISSED)
+        assert rows.count() == 4
+        titles = {row.user.language: row.title for row in rows.select_related("user")}
+        assert titles["ar"] != titles["en"]
+
+    def test_query_count_does_not_grow_with_recipients(self, company, django_assert_max_num_queries):
+        users = make_users(company, 12)
+        # Settings rows exist already, as they do for any user who opened the app.
+        for user in users:
+            NotificationSettings.get_or_create_for_user(user)
+
+        with patch.object(NotificationService, "deliver_push_many", return_value=set()):
+            with django_assert_max_num_queries(3):
+                NotificationService.send_notification_to_multiple(
+                    users,
+                    NotificationType.PBX_CALL_MISSED,
+                    data={"phone": "100"},
+                )
+
+    def test_muted_user_gets_neither_inbox_nor_push(self, company):
+        muted, listening = make_users(company, 2)
+        settings_obj = NotificationSettings.get_or_create_for_user(muted)
+        settings_obj.enabled = False
+        settings_obj.save(update_fields=["enabled"])
+
+        with patch.object(
+            NotificationService, "deliver_push_many", side_effect=lambda users, **kw: {u.pk for u in users}
+        ) as deliver:
+            results = NotificationService.send_notification_to_multiple(
+                [muted, listening],
+                NotificationType.PBX_CALL_MISSED,
+                data={"phone": "100"},
+            )
+
+        assert results == {"success": 1, "failed": 1}
+        assert not Notification.objects.filter(user=muted).exists()
+        assert Notification.objects.filter(user=listening).exists()
+        assert [u.pk for u in deliver.call_args.args[0]] == [listening.pk]
+
+    def test_queue_enabled_enqueues_one_task_per_language(self, settings, company):
+        settings.PUSH_QUEUE_ENABLED = True
+        arabic = make_users(company, 3, language="ar")
+        english = make_users(company, 2, language="en")
+
+        with (
+            patch("notifications.services.enqueue_push_many", return_value=True) as enqueued,
+            patch.object(NotificationService, "deliver_push_many") as inline,
+        ):
+            results = NotificationService.send_notification_to_multiple(
+                arabic + english,
+                NotificationType.PBX_CALL_MISSED,
+                data={"phone": "100"},
+            )
+
+        assert results == {"success": 5, "failed": 0}
+        assert enqueued.call_count == 2
+        queued_ids = sorted(
+            uid for call in enqueued.call_args_list for uid in call.kwargs["user_ids"]
+        )
+        assert queued_ids == sorted(u.pk for u in arabic + english)
+        inline.assert_not_called()
+
+    def test_broker_failure_falls_back_to_inline(self, settings, company):
+        settings.PUSH_QUEUE_ENABLED = True
+        users = make_users(company, 2)
+
+        with (
+            patch("notifications.services.enqueue_push_many", return_value=False),
+            patch.object(
+                NotificationService, "deliver_push_many", return_value={users[0].pk}
+            ) as inline,
+        ):
+            results = NotificationService.send_notification_to_multiple(
+                users,
+                NotificationType.PBX_CALL_MISSED,
+                data={"phone": "100"},
+            )
+
+        inline.assert_called_once()
+        assert results == {"success": 1, "failed": 1}
+
+
+@pytest.mark.django_db
+def test_deliver_push_many_groups_devices_and_prunes_stale_tokens(company):
+    from firebase_admin import messaging
+
+    first, second = make_users(company, 2)
+    second.fcm_tokens = ["tok-second-a", "tok-second-b"]
+    second.save(update_fields=["fcm_tokens"])
+
+    def fake_send(multicast):
+        responses = []
+        for token in multicast.tokens:
+            if token == "tok-second-b":
+                responses.append(
+                    SimpleNamespace(success=False, exception=messaging.UnregisteredError("gone"))
+                )
+            else:
+                responses.append(SimpleNamespace(success=True, exception=None))
+        return SimpleNamespace(
+            responses=responses,
+            success_count=sum(1 for r in responses if r.success),
+        )
+
+    with (
+        patch.object(NotificationService, "initialize", return_value=True),
+        patch("notifications.services.messaging.send_each_for_multicast", side_effect=fake_send) as send,
+    ):
+        delivered = NotificationService.deliver_push_many(
+            [first, second],
+            notification_type=NotificationType.PBX_CALL_MISSED,
+            title="T",
+            body="B",
+            data={"phone": "100"},
+        )
+
+    # Three devices across two users: one multicast, not one per user.
+    send.assert_called_once()
+    assert delivered == {first.pk, second.pk}
+    second.refresh_from_db()
+    assert second.fcm_tokens == ["tok-second-a"]
@@ -0,0 +1,81 @@
+"""
+Patient file number allocation: strict per-insert counter vs. per-process blocks.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from companies.models import CompanyPatientCounter
+from companies.patient_numbers import allocate_patient_file_numbers, forget_reserved_numbers
+from crm.models import Client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_blocks():
+    forget_reserved_numbers()
+    yield
+    forget_reserved_numbers()
+
+
+def _new_client(company, name):
+    return Client.objects.create(name=name, company=company, priority="low", type="fresh")
+
+
+def _counter_queries(ctx):
+    table = CompanyPatientCounter._meta.db_table
+    return [q for q in ctx.captured_queries if table in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_strict_company_numbers_are_contiguous(company):
+    numbers = [_new_client(company, f"strict {i}").patient_file_number for i in range(3)]
+
+    assert numbers == [numbers[0], numbers[0] + 1, numbers[0] + 2]
+    assert CompanyPatientCounter.objects.get(company=company).next_number == numbers[-1] + 1
+
+
+@pytest.mark.django_db
+def test_block_allocation_touches_the_counter_once_per_block(company):
+    company.patient_number_block_size = 5
+    company.save(update_fields=["patient_number_block_size"])
+
+    with CaptureQueriesContext(connection) as ctx:
+        numbers = [_new_client(company, f"block {i}").patient_file_number for i in range(5)]
+
+    assert numbers == list(range(numbers[0], numbers[0] + 5))
+    # get_or_create + lock read + bump, all for the single reservation.
+    assert len(_counter_queries(ctx)) <= 3
+    assert CompanyPatientCounter.objects.get(company=company).next_number == numbers[0] + 5
+
+    sixth = _new_client(company, "block 5").patient_file_number
+    assert sixth == numbers[0] + 5
+    assert CompanyPatientCounter.objects.get(company=company).next_number == sixth + 5
+
+
+@pytest.mark.django_db
+def test_reserved_numbers_never_overlap_across_processes(company):
+    first = allocate_patient_file_numbers(company.id, block_size=10)
+    # Another process starts with an empty cache and reserves the next block.
+    forget_reserved_numbers()
+    other = allocate_patient_file_numbers(company.id, block_size=10)
+    assert other == first + 10
+
+    bulk = allocate_patient_file_numbers(company.id, 25, block_size=10)
+    # The cached block is too small for 25, so a fresh range is reserved after it.
+    assert bulk == other + 10
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.real_on_commit
+def test_rolled_back_reservation_is_not_reused(company):
+    from django.db import transaction
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            allocate_patient_file_numbers(company.id, block_size=10)
+            raise RuntimeError("insert failed")
+
+    first = allocate_patient_file_numbers(company.id, block_size=10)
+    second = allocate_patient_file_numbers(company.id, block_size=10)
+    assert second == first + 1
+    assert CompanyPatientCounter.objects.get(company=company).next_number == first + 10
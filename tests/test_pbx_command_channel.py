@@ -0,0 +1,109 @@
+"""PBX connector command channel (integrations.services.pbx_commands): claim, long-poll, last-seen."""
+
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from integrations.models import PbxDialCommand, PbxDialCommandStatus, PbxSettings
+from integrations.services import pbx_commands
+
+COMMANDS_URL = "/api/integrations/pbx/connector/commands/"
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+def queue(company, phone, extension="104"):
+    return PbxDialCommand.objects.create(
+        company=company,
+        phone_number=phone,
+        extension=extension,
+        status=PbxDialCommandStatus.PENDING,
+    )
+
+
+@pytest.mark.django_db
+def test_claim_takes_pending_commands_once(company, other_company, django_assert_num_queries):
+    first = queue(company, "07801111111")
+    second = queue(company, "07802222222")
+    queue(other_company, "07803333333")
+
+    with django_assert_num_queries(1):
+        claimed = pbx_commands.claim_pending_commands(company.id)
+
+    assert [c["id"] for c in claimed] == [first.id, second.id]
+    assert claimed[0] == {"id": first.id, "phone_number": "07801111111", "extension": "104"}
+    assert set(
+        PbxDialCommand.objects.filter(company=company).values_list("status", flat=True)
+    ) == {PbxDialCommandStatus.PROCESSING}
+    assert pbx_commands.claim_pending_commands(company.id) == []
+
+
+@pytest.mark.django_db
+def test_poll_without_wait_answers_at_once(api_client, company, pbx):
+    cmd = queue(company, "07801111111")
+
+    response = api_client.get(COMMANDS_URL, HTTP_X_CONNECTOR_KEY=pbx.connector_api_key)
+
+    data = response.json()["data"]
+    assert data["long_poll"] is False
+    assert [c["id"] for c in data["commands"]] == [cmd.id]
+
+
+def test_long_poll_wakes_when_a_command_is_signalled(monkeypatch):
+    store = []
+
+    def claim(company_id):
+        claimed, store[:] = store[:], []
+        return claimed
+
+    monkeypatch.setattr(pbx_commands, "WAIT_TICK_SECONDS", 0.01)
+    monkeypatch.setattr(pbx_commands, "claim_pending_commands", claim)
+
+    def dial_later():
+        time.sleep(0.2)
+        store.append({"id": 1, "phone_number": "07801111111", "extension": "104"})
+        pbx_commands.signal_new_command(4242)
+
+    threading.Thread(target=dial_later).start()
+    started = time.monotonic()
+    commands, long_polled = pbx_commands.wait_for_commands(4242, 10)
+
+    assert long_polled is True
+    assert [c["id"] for c in commands] == [1]
+    assert time.monotonic() - started < 5
+
+
+def test_long_poll_answers_at_once_when_wait_slots_are_busy(monkeypatch):
+    monkeypatch.setattr(pbx_commands, "_waiters", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(pbx_commands, "claim_pending_commands", lambda company_id: [])
+    pbx_commands._waiters.acquire()
+
+    started = time.monotonic()
+    assert pbx_commands.wait_for_commands(4243, 10) == ([], False)
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.django_db
+def test_last_seen_is_written_at_most_once_a_minute(pbx, django_assert_num_queries):
+    now = timezone.now()
+    with django_assert_num_queries(1):
+        pbx_commands.touch_connector_last_seen(pbx, now=now)
+        pbx_commands.touch_connector_last_seen(pbx, now=now + timedelta(seconds=30))
+
+    with django_assert_num_queries(1):
+        pbx_commands.touch_connector_last_seen(pbx, now=now + timedelta(seconds=61))
+
+    pbx.refresh_from_db()
+    assert pbx.connector_last_seen_at == now + timedelta(seconds=61)
@@ -0,0 +1,142 @@
+"""Batched PBX connector events (integrations.services.pbx_handler.process_pbx_events)."""
+
+import secrets
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from crm.models import Client, ClientCall, ClientPhoneNumber
+from integrations.models import PbxCallRecord, PbxEventType, PbxSettings, UserPbxExtension
+from integrations.services.pbx_handler import process_pbx_events
+from integrations.services.phone_match import find_client_by_phone, find_clients_by_phones
+from notifications.models import Notification, NotificationType
+
+EVENTS_URL = "/api/integrations/pbx/connector/events/"
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+def ringing(uniqueid, phone, extension="104"):
+    return {
+        "Event": "Newchannel",
+        "Uniqueid": uniqueid,
+        "CallerIDNum": phone,
+        "Exten": extension,
+        "Direction": "inbound",
+    }
+
+
+def hangup(uniqueid, phone, extension="104", disposition="ANSWERED", billsec="30"):
+    return {
+        "Event": "Hangup",
+        "Uniqueid": uniqueid,
+        "CallerIDNum": phone,
+        "Exten": extension,
+        "Direction": "inbound",
+        "Disposition": disposition,
+        "Billsec": billsec,
+    }
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_applies_events_in_order(
+    api_client, company, pbx, owner_user, django_capture_on_commit_callbacks
+):
+    lead = Client.objects.create(company=company, name="Caller", phone_number="+9647801234567")
+    UserPbxExtension.objects.create(company=company, user=owner_user, extension="104")
+    events = [
+        ringing("1700.1", "07801234567"),
+        hangup("1700.1", "07801234567"),
+        "not json at all",
+        hangup("1700.1", "07801234567", billsec="45"),  # replayed with a later value
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            EVENTS_URL,
+            {"events": events},
+            format="json",
+            HTTP_X_CONNECTOR_KEY=pbx.connector_api_key,
+        )
+
+    assert response.status_code == 200
+    results = response.json()["data"]["results"]
+    assert [r.get("event_type") for r in results] == [
+        PbxEventType.RINGING,
+        PbxEventType.HANGUP,
+        PbxEventType.OTHER,
+        PbxEventType.HANGUP,
+    ]
+    assert [r.get("created") for r in results] == [True, True, True, False]
+    assert results[1]["record_id"] == results[3]["record_id"]
+    assert results[0]["client_id"] == lead.id
+
+    record = PbxCallRecord.objects.get(pk=results[1]["record_id"])
+    assert (record.agent_id, record.client_id, record.billsec) == (owner_user.id, lead.id, 45)
+    assert ClientCall.objects.filter(client=lead, pbx_call_record=record).count() == 1
+    pop = Notification.objects.get(user=owner_user, type=NotificationType.PBX_INCOMING_CALL)
+    assert pop.data["client_id"] == lead.id
+
+
+@pytest.mark.django_db
+def test_batch_cost_does_not_grow_with_event_count(company, pbx):
+    Client.objects.create(company=company, name="Someone else", phone_number="+9647700000000")
+
+    def run(prefix, count):
+        events = [hangup(f"{prefix}.{i}", f"0781000{i:04d}") for i in range(count)]
+        with CaptureQueriesContext(connection) as ctx:
+            results = process_pbx_events(pbx, events)
+        assert all(r["ok"] and r["created"] for r in results)
+        return len(ctx.captured_queries)
+
+    # 30 stays inside one SQLite bulk INSERT (999 parameters / 29 columns); Postgres
+    # has no such split.
+    assert run("small", 5) == run("large", 30)
+
+
+@pytest.mark.django_db
+def test_disabled_integration_ignores_batch(company, pbx):
+    pbx.is_enabled = False
+    pbx.save(update_fields=["is_enabled"])
+
+    results = process_pbx_events(pbx, [hangup("1.1", "07801234567")])
+
+    assert results == [{"ok": False, "reason": "pbx_disabled"}]
+    assert not PbxCallRecord.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bulk_phone_match_agrees_with_single_lookup(company, other_company):
+    primary = Client.objects.create(company=company, name="Primary", phone_number="+9647801111111")
+    legacy = Client.objects.create(company=company, name="Legacy", phone_number="07802222222")
+    extra_owner = Client.objects.create(company=company, name="Extra", phone_number="")
+    ClientPhoneNumber.objects.create(client=extra_owner, phone_number="+9647803333333")
+    Client.objects.create(company=other_company, name="Elsewhere", phone_number="+9647804444444")
+
+    phones = [
+        "+9647801111111",
+        "07801111111",
+        "9647802222222",
+        "07803333333",
+        "07804444444",
+        "104",
+        "anonymous",
+    ]
+    bulk = find_clients_by_phones(company, phones)
+
+    assert {p: c and c.id for p, c in bulk.items()} == {
+        p: (c and c.id) for p, c in ((p, find_client_by_phone(company, p)) for p in phones)
+    }
+    assert bulk["07801111111"] == primary
+    assert bulk["9647802222222"] == legacy
+    assert bulk["07803333333"] == extra_owner
+    assert bulk["07804444444"] is None
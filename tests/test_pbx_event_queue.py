@@ -0,0 +1,153 @@
+"""Per-call ordered PBX push queue (integrations.services.pbx_event_queue)."""
+
+import io
+import secrets
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from integrations.models import (
+    PbxCallLease,
+    PbxCallRecord,
+    PbxEventType,
+    PbxQueuedEvent,
+    PbxQueuedEventStatus,
+    PbxSettings,
+)
+from integrations.services import pbx_event_queue
+
+PUSHES = (
+    "Event=Newchannel&Uniqueid=77.1&Linkedid=77.1&CallerIDNum=07701234567&Exten=104",
+    "Event=BridgeEnter&Uniqueid=77.1&Linkedid=77.1&CallerIDNum=07701234567&Exten=104",
+    "Event=Hangup&Uniqueid=77.1&Linkedid=77.1&CallerIDNum=07701234567&Exten=104",
+)
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+@pytest.fixture
+def queued(settings, monkeypatch):
+    settings.PBX_EVENT_QUEUE_ENABLED = True
+    tasks = []
+    monkeypatch.setattr(
+        "django_q.tasks.async_task", lambda path, *args, **kwargs: tasks.append((path, args))
+    )
+    return tasks
+
+
+def push_all(api_client, pbx, bodies=PUSHES):
+    for body in bodies:
+        response = api_client.post(
+            f"/api/integrations/webhooks/pbx/{pbx.webhook_token}/",
+            body,
+            content_type="application/x-www-form-urlencoded",
+        )
+        assert response.status_code == 200
+        assert response.json()["queued"] is True
+
+
+@pytest.mark.django_db
+def test_pushes_are_stored_then_applied_in_order(api_client, pbx, queued):
+    push_all(api_client, pbx)
+
+    assert not PbxCallRecord.objects.exists()
+    assert queued == [(pbx_event_queue.DRAIN_TASK_PATH, (pbx.company_id, "77.1"))] * 3
+
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 3
+    assert list(PbxCallRecord.objects.order_by("id").values_list("event_type", flat=True)) == [
+        PbxEventType.RINGING,
+        PbxEventType.ANSWERED,
+        PbxEventType.HANGUP,
+    ]
+    assert not PbxQueuedEvent.objects.exists()
+    assert not PbxCallLease.objects.exists()
+    # The other two tasks find nothing left to do.
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 0
+
+
+@pytest.mark.django_db
+def test_a_held_call_is_left_to_its_holder(api_client, pbx, queued):
+    push_all(api_client, pbx)
+    lease = PbxCallLease.objects.create(
+        company=pbx.company,
+        call_key="77.1",
+        holder="other-worker",
+        expires_at=timezone.now() + timedelta(seconds=30),
+    )
+
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 0
+    assert PbxQueuedEvent.objects.count() == 3
+
+    # The holder died: once its lease runs out the call is taken over.
+    PbxCallLease.objects.filter(pk=lease.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 3
+
+
+@pytest.mark.django_db
+def test_a_failing_push_holds_back_later_ones_until_it_is_given_up(
+    api_client, pbx, queued, monkeypatch
+):
+    push_all(api_client, pbx)
+    real = pbx_event_queue.process_pbx_payload
+
+    def flaky(settings, raw_body, *args, **kwargs):
+        if b"BridgeEnter" in raw_body:
+            raise RuntimeError("deadlock detected")
+        return real(settings, raw_body, *args, **kwargs)
+
+    monkeypatch.setattr(pbx_event_queue, "process_pbx_payload", flaky)
+
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 1
+    assert PbxCallRecord.objects.count() == 1
+    for _ in range(pbx_event_queue.MAX_ATTEMPTS - 2):
+        assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 0
+
+    assert pbx_event_queue.drain_call_queue(pbx.company_id, "77.1") == 2
+    failed = PbxQueuedEvent.objects.get()
+    assert failed.status == PbxQueuedEventStatus.FAILED
+    assert failed.attempts == pbx_event_queue.MAX_ATTEMPTS
+    assert failed.last_error == "deadlock detected"
+    assert list(PbxCallRecord.objects.order_by("id").values_list("event_type", flat=True)) == [
+        PbxEventType.RINGING,
+        PbxEventType.HANGUP,
+    ]
+
+
+@pytest.mark.django_db
+def test_sweep_drains_only_queues_whose_task_was_lost(api_client, pbx, queued):
+    push_all(api_client, pbx)
+    push_all(api_client, pbx, [PUSHES[0].replace("77.1", "78.1")])
+    PbxQueuedEvent.objects.filter(call_key="77.1").update(
+        created_at=timezone.now() - timedelta(minutes=5)
+    )
+
+    out = io.StringIO()
+    call_command("drain_pbx_event_queue", stdout=out)
+
+    assert "PBX events applied: 3" in out.getvalue()
+    assert list(PbxQueuedEvent.objects.values_list("call_key", flat=True)) == ["78.1"]
+
+
+@pytest.mark.django_db
+def test_flag_off_processes_inline(api_client, pbx, settings):
+    settings.PBX_EVENT_QUEUE_ENABLED = False
+    response = api_client.post(
+        f"/api/integrations/webhooks/pbx/{pbx.webhook_token}/",
+        PUSHES[0],
+        content_type="application/x-www-form-urlencoded",
+    )
+
+    assert response.status_code == 200
+    assert "queued" not in response.json()
+    assert PbxCallRecord.objects.filter(uniqueid="77.1").exists()
+    assert not PbxQueuedEvent.objects.exists()
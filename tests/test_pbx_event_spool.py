@@ -0,0 +1,146 @@
+"""PBX connector event spool: immediate ack, ordered batched delivery, restart safety."""
+
+import importlib.util
+import json
+import secrets
+import threading
+from pathlib import Path
+from urllib import request as urlrequest
+
+import pytest
+from rest_framework.test import APIClient
+
+from integrations.models import PbxCallRecord, PbxSettings
+
+CONNECTOR_PATH = Path(__file__).resolve().parent.parent / "scripts" / "pbx_connector" / "connector.py"
+
+
+@pytest.fixture
+def connector():
+    spec = importlib.util.spec_from_file_location("pbx_connector_under_test", CONNECTOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def spool_at(connector, path, max_bytes=10 * 1024 * 1024):
+    return connector.EventSpool(path, max_bytes=max_bytes)
+
+
+def drain(spool, limit=100):
+    events, cursor, consumed = spool.next_batch(limit, timeout=0)
+    spool.commit(cursor, consumed)
+    return events
+
+
+def test_undelivered_events_survive_a_restart_in_order(connector, tmp_path):
+    spool = spool_at(connector, tmp_path)
+    for n in range(5):
+        spool.append({"n": n})
+
+    events, cursor, consumed = spool.next_batch(3, timeout=0)
+    assert [e["n"] for e in events] == [0, 1, 2]
+    # The CRM never acknowledged the batch: a restart sends it again.
+    spool = spool_at(connector, tmp_path)
+    assert spool.pending == 5
+    events, cursor, consumed = spool.next_batch(3, timeout=0)
+    assert [e["n"] for e in events] == [0, 1, 2]
+    spool.commit(cursor, consumed)
+
+    spool = spool_at(connector, tmp_path)
+    assert spool.pending == 2
+    assert [e["n"] for e in drain(spool)] == [3, 4]
+
+
+def test_segments_roll_over_and_are_removed_once_delivered(connector, tmp_path, monkeypatch):
+    monkeypatch.setattr(connector.EventSpool, "SEGMENT_BYTES", 64)
+    spool = spool_at(connector, tmp_path)
+    for n in range(20):
+        spool.append({"n": n, "pad": "x" * 10})
+    assert len(list(tmp_path.glob("*.jsonl"))) > 3
+
+    delivered = []
+    while batch := drain(spool, limit=7):
+        delivered.extend(e["n"] for e in batch)
+
+    assert delivered == list(range(20))
+    assert spool.snapshot()["pending"] == 0
+    assert len(list(tmp_path.glob("*.jsonl"))) == 1
+
+
+def test_partial_line_from_a_crash_is_skipped(connector, tmp_path):
+    spool = spool_at(connector, tmp_path)
+    spool.append({"n": 1})
+    with (tmp_path / "000000000001.jsonl").open("ab") as fh:
+        fh.write(b'{"n": 2, "tru')
+
+    spool = spool_at(connector, tmp_path)
+    spool.append({"n": 3})
+    assert [e["n"] for e in drain(spool)] == [1, 3]
+    assert spool.pending == 0
+
+
+def test_full_spool_refuses_new_events(connector, tmp_path):
+    spool = spool_at(connector, tmp_path, max_bytes=40)
+    assert spool.append({"n": 1, "pad": "x" * 10})
+    assert not spool.append({"n": 2, "pad": "x" * 10})
+    assert spool.snapshot()["dropped"] == 1
+
+
+@pytest.mark.django_db
+def test_pushes_are_acknowledged_then_forwarded_as_one_batch(connector, company, tmp_path, monkeypatch):
+    pbx = PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+    spool = spool_at(connector, tmp_path)
+    server = connector.ReuseAddrHTTPServer(("127.0.0.1", 0), connector.make_webhook_handler({}, spool))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        for body, content_type in (
+            (json.dumps({"Event": "Newchannel", "Uniqueid": "1.1", "CallerIDNum": "0501"}), "application/json"),
+            ("Event=Hangup&Uniqueid=1.1&CallerIDNum=0501", "application/x-www-form-urlencoded"),
+        ):
+            req = urlrequest.Request(
+                url, data=body.encode(), headers={"Content-Type": content_type}, method="POST"
+            )
+            with urlrequest.urlopen(req, timeout=5) as resp:
+                assert json.loads(resp.read()) == {"ok": True, "queued": True}
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not PbxCallRecord.objects.exists()
+
+    client = APIClient()
+    posts = []
+
+    def api_request(cfg, method, path, body=None, **kwargs):
+        posts.append(body)
+        response = client.post(
+            "/api" + path, body, format="json", HTTP_X_CONNECTOR_KEY=pbx.connector_api_key
+        )
+        assert response.status_code == 200
+        return response.json()["data"]
+
+    def unreachable(cfg, method, path, body=None, **kwargs):
+        raise OSError("network is unreachable")
+
+    cfg = {"connector_api_key": pbx.connector_api_key}
+    monkeypatch.setattr(connector, "api_request", unreachable)
+    events, cursor, consumed = spool.next_batch(50, timeout=0)
+    with pytest.raises(OSError):
+        connector.forward_events(cfg, events)
+
+    monkeypatch.setattr(connector, "api_request", api_request)
+    events, cursor, consumed = spool.next_batch(50, timeout=0)
+    connector.forward_events(cfg, events)
+    spool.commit(cursor, consumed)
+
+    assert len(posts) == 1
+    assert posts[0]["events"][0]["Event"] == "Newchannel"
+    assert posts[0]["events"][1] == "Event=Hangup&Uniqueid=1.1&CallerIDNum=0501"
+    assert set(PbxCallRecord.objects.values_list("uniqueid", flat=True)) == {"1.1"}
+    assert spool.pending == 0
@@ -0,0 +1,247 @@
+"""Resumable PBX recording uploads: CRM range endpoint and the connector's transfer loop."""
+
+import importlib.util
+import io
+import secrets
+import socket
+import threading
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+
+import pytest
+from rest_framework.test import APIClient
+
+from integrations.models import PbxCallRecord, PbxRecordingStatus, PbxSettings
+from integrations.services.pbx_recording_service import (
+    _incoming_path,
+    append_recording_chunk,
+    recording_upload_offset,
+)
+from integrations.storage.recordings import open_recording
+
+AUDIO = bytes(range(256)) * 20  # 5 KiB
+
+CONNECTOR_PATH = Path(__file__).resolve().parent.parent / "scripts" / "pbx_connector" / "connector.py"
+
+
+@pytest.fixture
+def pbx(company, settings, tmp_path):
+    settings.RECORDING_STORAGE_BACKEND = "local"
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.RECORDING_INCOMING_ROOT = tmp_path / "private_data" / "recording_uploads"
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+@pytest.fixture
+def record(pbx):
+    return PbxCallRecord.objects.create(
+        company=pbx.company,
+        uniqueid="1780515827.110",
+        recording_path="/recording/20260603/104/call.wav",
+        recording_status=PbxRecordingStatus.PROCESSING,
+    )
+
+
+def upload_url(record):
+    return f"/api/integrations/pbx/connector/recordings/{record.id}/upload/"
+
+
+def put_range(api_client, pbx, record, start, data, total=len(AUDIO)):
+    return api_client.put(
+        upload_url(record),
+        data=data,
+        content_type="application/octet-stream",
+        HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(data) - 1}/{total}",
+        HTTP_X_RECORDING_FILENAME="call.wav",
+        HTTP_X_CONNECTOR_KEY=pbx.connector_api_key,
+    )
+
+
+@pytest.mark.django_db
+def test_ranges_are_appended_until_the_recording_is_complete(api_client, pbx, record):
+    key = {"HTTP_X_CONNECTOR_KEY": pbx.connector_api_key}
+    assert api_client.get(upload_url(record), **key).json()["data"]["offset"] == 0
+
+    assert put_range(api_client, pbx, record, 0, AUDIO[:2000]).json()["data"]["offset"] == 2000
+    assert api_client.get(upload_url(record), **key).json()["data"]["offset"] == 2000
+
+    stale = put_range(api_client, pbx, record, 1000, AUDIO[1000:3000])
+    assert stale.status_code == 409
+    assert stale.json()["error"]["details"] == {"offset": 2000}
+
+    done = put_range(api_client, pbx, record, 2000, AUDIO[2000:])
+    assert done.json()["data"] == {
+        "ok": True,
+        "record_id": record.id,
+        "offset": len(AUDIO),
+        "status": "ready",
+    }
+    record.refresh_from_db()
+    assert record.recording_status == PbxRecordingStatus.READY
+    assert open_recording(record.recording_storage_key).read() == AUDIO
+    assert api_client.get(upload_url(record), **key).json()["data"]["offset"] == 0
+
+
+@pytest.mark.django_db
+def test_short_chunk_is_rolled_back(record):
+    append_recording_chunk(
+        record, stream=io.BytesIO(AUDIO[:100]), start=0, length=100, total=len(AUDIO), filename="a.wav"
+    )
+
+    with pytest.raises(ValueError, match="incomplete"):
+        append_recording_chunk(
+            record,
+            stream=io.BytesIO(AUDIO[100:150]),
+            start=100,
+            length=400,
+            total=len(AUDIO),
+            filename="a.wav",
+        )
+
+    assert recording_upload_offset(record) == 100
+
+
+def test_default_staging_dir_is_not_under_media_root():
+    from django.conf import settings as project_settings
+
+    path = _incoming_path(PbxCallRecord(id=7, company_id=3))
+    assert not path.resolve().is_relative_to(Path(project_settings.MEDIA_ROOT).resolve())
+
+
+@pytest.mark.django_db
+def test_partial_upload_is_staged_outside_media_root(record, settings):
+    append_recording_chunk(
+        record, stream=io.BytesIO(AUDIO[:100]), start=0, length=100, total=len(AUDIO), filename="a.wav"
+    )
+
+    staged = _incoming_path(record)
+    assert staged.stat().st_size == 100
+    assert staged.is_relative_to(Path(settings.RECORDING_INCOMING_ROOT))
+    assert not staged.is_relative_to(Path(settings.MEDIA_ROOT))
+    assert not any(Path(settings.MEDIA_ROOT).rglob("*.part"))
+
+
+@pytest.mark.django_db
+def test_heartbeat_stores_transfer_stats(api_client, pbx):
+    api_client.post(
+        "/api/integrations/pbx/connector/heartbeat/",
+        {"stats": {"version": "1.5.0", "recordings": {"backlog": 12, "throughput_bps": 52000}}},
+        format="json",
+        HTTP_X_CONNECTOR_KEY=pbx.connector_api_key,
+    )
+
+    pbx.refresh_from_db()
+    assert pbx.connector_stats["recordings"] == {"backlog": 12, "throughput_bps": 52000}
+    assert pbx.connector_stats["version"] == "1.5.0"
+
+
+# --- connector -------------------------------------------------------------------
+
+
+@pytest.fixture
+def connector():
+    spec = importlib.util.spec_from_file_location("pbx_connector_under_test", CONNECTOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Response(io.BytesIO):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeFtp:
+    """Serves AUDIO over a socketpair, honouring REST like a real FTP server."""
+
+    def __init__(self):
+        self.rests = []
+
+    def size(self, path):
+        return len(AUDIO)
+
+    def transfercmd(self, cmd, rest=None):
+        self.rests.append(rest)
+        ours, theirs = socket.socketpair()
+
+        def send():
+            try:
+                ours.sendall(AUDIO[rest or 0 :])
+            except OSError:
+                pass
+            finally:
+                ours.close()
+
+        threading.Thread(target=send, daemon=True).start()
+        return theirs
+
+    def voidresp(self):
+        return "226 Transfer complete"
+
+    def quit(self):
+        pass
+
+
+@pytest.mark.django_db
+def test_connector_resumes_an_interrupted_transfer(connector, monkeypatch, pbx, record):
+    client = APIClient()
+    puts = []
+    fail_on_put = {2}
+
+    def urlopen(cfg, req, timeout=30):
+        body = req.data
+        if body is not None and not isinstance(body, bytes):
+            body = b"".join(body)
+        headers = {
+            "HTTP_" + k.upper().replace("-", "_"): v
+            for k, v in req.header_items()
+            if k.lower() not in ("content-type", "content-length")
+        }
+        if req.get_method() == "PUT":
+            puts.append(headers["HTTP_CONTENT_RANGE"])
+            if len(puts) in fail_on_put:
+                raise URLError("connection reset")
+        response = client.generic(
+            req.get_method(),
+            urlsplit(req.full_url).path,
+            data=body or b"",
+            content_type=req.get_header("Content-type") or "application/octet-stream",
+            **headers,
+        )
+        if response.status_code >= 400:
+            raise HTTPError(req.full_url, response.status_code, "error", {}, io.BytesIO(response.content))
+        return _Response(response.content)
+
+    ftp = FakeFtp()
+    monkeypatch.setattr(connector, "_urlopen", urlopen)
+    monkeypatch.setattr(connector, "_open_ftp", lambda cfg: ftp)
+    cfg = {
+        "api_base_url": "http://testserver",
+        "connector_api_key": pbx.connector_api_key,
+        "recording_chunk_mb": 2048 / (1024 * 1024),
+    }
+    job = {"record_id": record.id, "ftp_path": "/recording/20260603/104/call.wav"}
+
+    assert connector.process_recording_job(cfg, job) is False
+    assert connector.process_recording_job(cfg, job) is True
+
+    assert ftp.rests == [None, 2048]
+    assert puts == [
+        "bytes 0-2047/5120",
+        "bytes 2048-4095/5120",
+        "bytes 2048-4095/5120",
+        "bytes 4096-5119/5120",
+    ]
+    record.refresh_from_db()
+    assert record.recording_status == PbxRecordingStatus.READY
+    assert open_recording(record.recording_storage_key).read() == AUDIO
+    assert connector.TRANSFER_STATS.snapshot()["bytes_total"] == len(AUDIO)
@@ -0,0 +1,172 @@
+"""
+PBX call reports (integrations.services.pbx_reports): single-pass aggregation with
+company-timezone bounds, and hourly rollups for closed periods.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import count
+
+import pytest
+from conftest import api_body
+from django.core.management import call_command
+from django.utils import timezone
+
+from integrations.models import (
+    PbxCallDirection,
+    PbxCallDisposition,
+    PbxCallRecord,
+    PbxEventType,
+    PbxHourlyRollup,
+    PbxSettings,
+    UserPbxExtension,
+)
+from integrations.services import pbx_reports
+from integrations.services.pbx_reports import build_pbx_report, period_bounds, rollup_company
+
+UTC = dt_timezone.utc
+_ids = count()
+
+
+def hangup(company, started_at, *, extension="101", answered=True, inbound=True, billsec=60):
+    return PbxCallRecord.objects.create(
+        company=company,
+        uniqueid=f"u-{next(_ids)}",
+        event_type=PbxEventType.HANGUP,
+        direction=PbxCallDirection.INBOUND if inbound else PbxCallDirection.OUTBOUND,
+        disposition=PbxCallDisposition.ANSWERED if answered else PbxCallDisposition.NO_ANSWER,
+        extension=extension,
+        started_at=started_at,
+        billsec=billsec if answered else 0,
+    )
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(company=company, is_enabled=True)
+
+
+@pytest.mark.django_db
+def test_report_is_grouped_in_fixed_queries(company, pbx, owner_user, django_assert_num_queries):
+    base = datetime(2026, 3, 10, 9, tzinfo=UTC)
+    for i in range(30):
+        ext = str(200 + i % 10)
+        hangup(company, base + timedelta(minutes=i), extension=ext, answered=i % 3 != 0, inbound=i % 2 == 0)
+    hangup(company, base, extension="")
+    UserPbxExtension.objects.create(company=company, user=owner_user, extension="200")
+
+    # Watermark, grouped aggregate, extension mappings — however many extensions.
+    with django_assert_num_queries(3):
+        report = build_pbx_report(company, "2026-03-10", "2026-03-10")
+
+    summary = report["summary"]
+    assert summary["total"] == 31
+    assert summary["inbound"] == 16
+    assert summary["answered"] == 21
+    assert summary["missed"] == 10
+    assert [a["extension"] for a in report["agents"]] == [str(200 + i) for i in range(10)]
+    first = report["agents"][0]
+    assert (first["username"], first["total"], first["missed"]) == (owner_user.username, 3, 1)
+
+
+@pytest.mark.django_db
+def test_dates_are_days_in_company_timezone(company, pbx):
+    company.timezone = "Asia/Baghdad"  # UTC+3
+    company.save(update_fields=["timezone"])
+    hangup(company, datetime(2026, 3, 9, 21, 30, tzinfo=UTC))  # 00:30 on the 10th locally
+    hangup(company, datetime(2026, 3, 10, 20, 59, tzinfo=UTC))  # 23:59 on the 10th
+    hangup(company, datetime(2026, 3, 10, 21, 0, tzinfo=UTC))  # midnight, the 11th
+
+    start, end = period_bounds(company, "2026-03-10", "2026-03-10")
+
+    assert (start.astimezone(UTC), end.astimezone(UTC)) == (
+        datetime(2026, 3, 9, 21, tzinfo=UTC),
+        datetime(2026, 3, 10, 21, tzinfo=UTC),
+    )
+    assert build_pbx_report(company, "2026-03-10", "2026-03-10")["summary"]["total"] == 2
+
+
+@pytest.mark.django_db
+def test_rollups_give_the_same_report_as_live_aggregation(company, pbx):
+    company.timezone = "Asia/Kolkata"  # UTC+5:30: day bounds fall mid-hour
+    company.save(update_fields=["timezone"])
+    base = datetime(2026, 3, 1, tzinfo=UTC)
+    for i in range(200):
+        hangup(
+            company,
+            base + timedelta(minutes=47 * i),
+            extension=str(100 + i % 4),
+            answered=i % 5 != 0,
+            inbound=i % 3 != 0,
+            billsec=i,
+        )
+    ranges = [("2026-03-02", "2026-03-05"), ("2026-03-01", None), (None, "2026-03-03"), (None, None)]
+    live = [build_pbx_report(company, *r) for r in ranges]
+
+    written = rollup_company(company.id, now=datetime(2026, 3, 5, 12, tzinfo=UTC))
+
+    assert written > 0
+    pbx.refresh_from_db()
+    assert pbx.report_rollup_through == datetime(2026, 3, 5, 11, tzinfo=UTC)
+    assert [build_pbx_report(company, *r) for r in ranges] == live
+
+
+@pytest.mark.django_db
+def test_late_hangup_marks_its_hour_dirty_until_rolled_up_again(company, pbx):
+    old_hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=2)
+    hangup(company, old_hour + timedelta(minutes=5))
+    rollup_company(company.id)
+    assert PbxHourlyRollup.objects.get(company=company, hour_start=old_hour).total == 1
+
+    late = hangup(company, old_hour + timedelta(minutes=40), answered=False)
+    pbx_reports.mark_rollup_stale(company.id, late.started_at)
+
+    pbx.refresh_from_db()
+    assert pbx.report_rollup_dirty_from == old_hour
+    assert build_pbx_report(company, None, None)["summary"]["missed"] == 1
+
+    call_command("rollup_pbx_reports")
+
+    pbx.refresh_from_db()
+    assert pbx.report_rollup_dirty_from is None
+    rollup = PbxHourlyRollup.objects.get(company=company, hour_start=old_hour)
+    assert (rollup.total, rollup.missed) == (2, 1)
+    assert build_pbx_report(company, None, None)["summary"]["total"] == 2
+
+
+@pytest.mark.django_db
+def test_failed_rebuild_keeps_the_dirty_mark(company, pbx, monkeypatch):
+    old_hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=2)
+    hangup(company, old_hour + timedelta(minutes=5))
+    rollup_company(company.id)
+    late = hangup(company, old_hour + timedelta(minutes=40))
+    pbx_reports.mark_rollup_stale(company.id, late.started_at)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(PbxHourlyRollup.objects, "bulk_create", crash)
+    with pytest.raises(RuntimeError):
+        rollup_company(company.id)
+    monkeypatch.undo()
+
+    pbx.refresh_from_db()
+    assert pbx.report_rollup_dirty_from == old_hour
+    rollup_company(company.id)
+    assert PbxHourlyRollup.objects.get(company=company, hour_start=old_hour).total == 2
+
+
+@pytest.mark.django_db
+def test_recent_hangup_does_not_touch_the_watermark(company, pbx, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        pbx_reports.mark_rollup_stale(company.id, timezone.now() - timedelta(minutes=5))
+
+
+@pytest.mark.django_db
+def test_report_endpoints(authenticated_admin, company, pbx):
+    hangup(company, timezone.now(), extension="300")
+
+    summary = authenticated_admin.get("/api/v1/integrations/pbx/reports/summary/")
+    agents = authenticated_admin.get("/api/v1/integrations/pbx/reports/agents/")
+
+    assert summary.status_code == 200, summary.content
+    assert api_body(summary)["total"] == 1
+    assert [a["extension"] for a in api_body(agents)["agents"]] == ["300"]
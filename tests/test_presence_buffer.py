@@ -0,0 +1,150 @@
+"""
+Buffered presence (accounts.presence).
+
+Heartbeats must not write to ``users``; readers must still see them immediately, and
+flush_presence must bring the database columns up to date in one bulk UPDATE.
+"""
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts import presence
+from accounts.models import User
+
+
+def make_user(company, name):
+    return User.objects.create(
+        username=name,
+        email=f"{name}@test.com",
+        company=company,
+        role="employee",
+    )
+
+
+@pytest.mark.django_db
+def test_heartbeat_does_not_touch_the_database(company, django_assert_num_queries):
+    user = make_user(company, "beat_only")
+
+    with django_assert_num_queries(0):
+        presence.record_heartbeat(user, "web")
+
+    user.refresh_from_db()
+    assert user.last_seen_at is None
+    fresh = User.objects.get(pk=user.pk)
+    assert presence.is_online(fresh)
+    assert presence.last_seen(fresh)[1] == "web"
+
+
+@pytest.mark.django_db
+def test_online_user_ids_is_scoped_to_the_company_and_window(company):
+    online = make_user(company, "online_now")
+    stale = make_user(company, "online_earlier")
+    now = timezone.now()
+
+    presence.record_heartbeat(online, "mobile", now=now)
+    presence.record_heartbeat(stale, "mobile", now=now - timedelta(minutes=5))
+
+    assert presence.online_user_ids(company.id, now=now) == {online.pk}
+    assert presence.online_user_ids(company.id + 1000, now=now) == set()
+
+
+@pytest.mark.django_db
+def test_flush_writes_pending_beats_once(company, django_assert_max_num_queries):
+    users = [make_user(company, f"flush_{i}") for i in range(5)]
+    now = timezone.now()
+    for user in users:
+        presence.record_heartbeat(user, "web", now=now)
+
+    with django_assert_max_num_queries(2):
+        assert presence.flush_last_seen(now=now) == 5
+
+    assert set(
+        User.objects.filter(pk__in=[u.pk for u in users]).values_list("last_seen_source", flat=True)
+    ) == {"web"}
+    # Nothing new since the last flush: the second run has nothing to write.
+    assert presence.flush_last_seen(now=now + timedelta(minutes=15)) == 0
+
+
+@pytest.mark.django_db
+def test_flush_never_moves_last_seen_backwards(company):
+    user = make_user(company, "newer_in_db")
+    now = timezone.now()
+    presence.record_heartbeat(user, "web", now=now - timedelta(seconds=30))
+    User.objects.filter(pk=user.pk).update(last_seen_at=now, last_seen_source="mobile")
+
+    assert presence.flush_last_seen(now=now) == 0
+    user.refresh_from_db()
+    assert user.last_seen_source == "mobile"
+
+
+@pytest.mark.django_db
+def test_flush_presence_command(company):
+    user = make_user(company, "cmd_flush")
+    presence.record_heartbeat(user, "desktop")
+
+    call_command("flush_presence")
+
+    user.refresh_from_db()
+    assert user.last_seen_source == "desktop"
+
+
+class _RecordingCache:
+    """Delegates to the real cache and records the presence calls a test cares about."""
+
+    def __init__(self, real):
+        self.real = real
+        self.touched = []
+        self.beat_reads = 0
+
+    def touch(self, key, timeout=None):
+        self.touched.append((key, timeout))
+        return self.real.touch(key, timeout)
+
+    def get_many(self, keys):
+        self.beat_reads += 1
+        return self.real.get_many(keys)
+
+    def __getattr__(self, name):
+        return getattr(self.real, name)
+
+
+@pytest.mark.django_db
+def test_heartbeat_keeps_the_roster_alive(company, monkeypatch):
+    user = make_user(company, "long_session")
+    presence.record_heartbeat(user, "web")
+
+    recording = _RecordingCache(presence.cache)
+    monkeypatch.setattr(presence, "cache", recording)
+    presence.record_heartbeat(user, "web")
+
+    assert (presence._roster_key(company.id), presence.ROSTER_TTL_SECONDS) in recording.touched
+
+
+@pytest.mark.django_db
+def test_message_page_reads_sender_presence_once(company, monkeypatch):
+    from tenant_chat.models import ChatConversation, ChatMessage
+    from tenant_chat.serializers import ChatMessageSerializer
+
+    senders = [make_user(company, f"sender_{i}") for i in range(2)]
+    presence.record_heartbeat(senders[0], "web")
+    conversation, _ = ChatConversation.objects.get_or_create(
+        company=company, kind=ChatConversation.Kind.COMPANY_GROUP
+    )
+    first = ChatMessage.objects.create(conversation=conversation, sender=senders[1], body="hi")
+    for i in range(6):
+        ChatMessage.objects.create(
+            conversation=conversation, sender=senders[i % 2], body=f"m{i}", reply_to=first,
+        )
+    messages = list(
+        ChatMessage.objects.filter(conversation=conversation).select_related("sender").order_by("id")
+    )
+
+    recording = _RecordingCache(presence.cache)
+    monkeypatch.setattr(presence, "cache", recording)
+    data = ChatMessageSerializer(messages, many=True).data
+
+    assert recording.beat_reads == 1
+    by_sender = {row["sender"]["id"]: row["sender"]["is_online"] for row in data}
+    assert by_sender == {senders[0].pk: True, senders[1].pk: False}
@@ -124,6 +124,28 @@ def test_reassigns_when_only_previous_assignee_contacted(
     assert ClientEvent.objects.filter(client=client, event_type="re_assignment").exists()
 
 
+@pytest.mark.django_db
+def test_reassignment_stamps_last_contacted_at(reassign_company, employee_a, employee_b):
+    """Like the per-lead save + notify_lead_updated path did, for SLA / untouched reports."""
+    assigned_at = timezone.now() - timedelta(hours=48)
+    client = Client.objects.create(
+        name="Stamped Lead",
+        company=reassign_company,
+        assigned_to=employee_a,
+        assigned_at=assigned_at,
+    )
+    Client.objects.filter(pk=client.pk).update(last_contacted_at=assigned_at - timedelta(hours=1))
+    before = timezone.now()
+
+    re_assign_inactive_clients()
+
+    client.refresh_from_db()
+    assert client.assigned_to_id == employee_b.id
+    assert client.last_contacted_at is not None
+    assert client.last_contacted_at >= before
+    assert client.last_contacted_at == client.assigned_at
+
+
 @pytest.mark.django_db
 def test_reassigns_when_assignee_only_acted_before_current_assignment(
     reassign_company, employee_a, employee_b
@@ -151,3 +173,46 @@ def test_reassigns_when_assignee_only_acted_before_current_assignment(
 
     client.refresh_from_db()
     assert client.assigned_to_id == employee_b.id
+
+
+@pytest.mark.django_db
+def test_reassignment_spreads_leads_and_moves_workload(
+    reassign_company, employee_a, employee_b
+):
+    """The bulk planner simulates workload as it reassigns, like picking lead by lead."""
+    from crm.models import AssigneeWorkload
+    from notifications.models import Notification, NotificationType
+
+    employee_c = User.objects.create_user(
+        username="emp_c",
+        email="emp_c@test.com",
+        role="employee",
+        company=reassign_company,
+        is_active=True,
+    )
+    assigned_at = timezone.now() - timedelta(hours=48)
+    clients = [
+        Client.objects.create(
+            name=f"Stale {i}",
+            company=reassign_company,
+            assigned_to=employee_a,
+            assigned_at=assigned_at,
+        )
+        for i in range(4)
+    ]
+
+    re_assign_inactive_clients()
+
+    owners = list(
+        Client.objects.filter(pk__in=[c.pk for c in clients]).values_list(
+            "assigned_to_id", flat=True
+        )
+    )
+    # Sequential least-busy picks: B, C, B, then A is back at the minimum and keeps its lead.
+    assert sorted(owners) == sorted([employee_a.id, employee_b.id, employee_b.id, employee_c.id])
+    assert ClientEvent.objects.filter(event_type="re_assignment").count() == 3
+    assert AssigneeWorkload.objects.get(user=employee_a).active_count == 1
+    assert AssigneeWorkload.objects.get(user=employee_b).active_count == 2
+    assert Notification.objects.filter(
+        user=employee_a, type=NotificationType.LEAD_TRANSFERRED
+    ).count() == 3
@@ -0,0 +1,146 @@
+"""Chunked recording uploads and Range-aware playback (integrations.storage.recordings)."""
+
+import io
+import secrets
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from integrations.models import PbxCallRecord, PbxRecordingStatus, PbxSettings
+from integrations.services.pbx_recording_service import (
+    sign_playback_token,
+    stream_recording_for_user,
+)
+from integrations.storage import recordings
+from tests.s3_standin import S3StandIn
+
+AUDIO = bytes(range(256)) * 40  # 10 KiB
+
+
+@pytest.fixture
+def local_storage(settings, tmp_path):
+    settings.RECORDING_STORAGE_BACKEND = "local"
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return tmp_path / "media" / "pbx_recordings"
+
+
+@pytest.fixture
+def s3(settings, monkeypatch):
+    settings.RECORDING_STORAGE_BACKEND = "s3"
+    settings.RECORDING_S3_BUCKET = "recordings"
+    client = S3StandIn(min_part_size=1024)
+    monkeypatch.setattr(recordings, "_s3_client", lambda: client)
+    monkeypatch.setattr(recordings, "MULTIPART_PART_SIZE", 4096)
+    return client
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+@pytest.fixture
+def record(company):
+    return PbxCallRecord.objects.create(
+        company=company,
+        uniqueid="1780515827.110",
+        linkedid="1780515827.110",
+        recording_path="/recording/20260603/104/call.wav",
+        recording_status=PbxRecordingStatus.PROCESSING,
+    )
+
+
+def body(response) -> bytes:
+    return b"".join(response.streaming_content)
+
+
+def test_local_save_streams_into_place(local_storage):
+    key = recordings.save_recording_stream(
+        company_id=1, linkedid="abc", fileobj=io.BytesIO(AUDIO), original_filename="a.wav"
+    )
+
+    assert (local_storage / key).read_bytes() == AUDIO
+    assert not list(local_storage.rglob("*.part"))
+
+
+def test_s3_save_uses_multipart_for_large_files(s3):
+    key = recordings.save_recording_stream(
+        company_id=1, linkedid="abc", fileobj=io.BytesIO(AUDIO), original_filename="a.wav"
+    )
+
+    assert s3.objects[("recordings", key)] == AUDIO
+    sizes = [c[1]["size"] for c in s3.calls if c[0] == "upload_part"]
+    assert sizes == [4096, 4096, 2048]
+
+    small = recordings.save_recording(
+        company_id=1, linkedid="abc", file_bytes=b"short", original_filename="b.wav"
+    )
+    assert s3.objects[("recordings", small)] == b"short"
+    assert [c[0] for c in s3.calls].count("put_object") == 1
+
+
+def test_s3_failed_part_aborts_the_upload(s3):
+    s3.fail_on_part = 2
+
+    with pytest.raises(Exception):
+        recordings.save_recording_stream(
+            company_id=1, linkedid="abc", fileobj=io.BytesIO(AUDIO), original_filename="a.wav"
+        )
+
+    assert s3.calls[-1][0] == "abort_multipart_upload"
+    assert not s3.uploads and not s3.objects
+
+
+@pytest.mark.django_db
+def test_connector_upload_then_ranged_playback(api_client, pbx, record, local_storage):
+    response = api_client.post(
+        f"/api/integrations/pbx/connector/recordings/{record.id}/upload/",
+        {"file": SimpleUploadedFile("call.wav", AUDIO, content_type="audio/wav")},
+        format="multipart",
+        HTTP_X_CONNECTOR_KEY=pbx.connector_api_key,
+    )
+    assert response.status_code == 200
+    record.refresh_from_db()
+    assert record.recording_status == PbxRecordingStatus.READY
+
+    url = f"/api/integrations/pbx/recordings/{record.id}/play/?token=" + sign_playback_token(
+        record.id, record.company_id
+    )
+    full = api_client.get(url)
+    assert full.status_code == 200
+    assert full["Accept-Ranges"] == "bytes"
+    assert full["Content-Type"] == "audio/wav"
+    assert body(full) == AUDIO
+
+    part = api_client.get(url, HTTP_RANGE="bytes=100-199")
+    assert part.status_code == 206
+    assert part["Content-Length"] == "100"
+    assert part["Content-Range"] == f"bytes 100-199/{len(AUDIO)}"
+    assert body(part) == AUDIO[100:200]
+
+    assert api_client.get(url, HTTP_RANGE=f"bytes={len(AUDIO)}-").status_code == 416
+
+
+@pytest.mark.django_db
+def test_s3_playback_fetches_only_the_requested_range(rf, s3, record):
+    record.recording_storage_key = recordings.save_recording(
+        company_id=record.company_id, linkedid="x", file_bytes=AUDIO, original_filename="c.wav"
+    )
+    record.recording_status = PbxRecordingStatus.READY
+
+    response = stream_recording_for_user(rf.get("/", HTTP_RANGE="bytes=-10"), record)
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes {len(AUDIO) - 10}-{len(AUDIO) - 1}/{len(AUDIO)}"
+    assert body(response) == AUDIO[-10:]
+    ranges = [c[1]["Range"] for c in s3.calls if c[0] == "get_object"]
+    assert ranges == [f"bytes={len(AUDIO) - 10}-{len(AUDIO) - 1}"]
+
+    missing = record.recording_storage_key + ".gone"
+    with pytest.raises(FileNotFoundError):
+        recordings.recording_response(rf.get("/"), missing, filename="c.wav")
@@ -0,0 +1,178 @@
+"""Opus renditions of stored recordings (integrations.services.recording_transcode)."""
+
+import secrets
+import stat
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from integrations.models import (
+    PbxCallRecord,
+    PbxRecordingStatus,
+    PbxSettings,
+    RecordingTranscodeStatus,
+)
+from integrations.services import recording_transcode
+from integrations.services.pbx_recording_service import sign_playback_token
+
+# Stands in for ffmpeg: writes an .ogg for the first output and 2.5 s of 8 kHz s16le
+# PCM (quiet, then loud from 1 s to 1.5 s) on stdout for the second.
+FAKE_FFMPEG = """#!{python}
+import struct, sys
+args = sys.argv[1:]
+src = args[args.index("-i") + 1]
+if b"BROKEN" in open(src, "rb").read():
+    sys.stderr.write("Invalid data found when processing input")
+    sys.exit(1)
+ogg = args[args.index("ogg") + 1]
+open(ogg, "wb").write(b"OggS" + b"\\0" * 60)
+for i in range(20000):
+    level = 16000 if 8000 <= i < 12000 else 800
+    sys.stdout.buffer.write(struct.pack("<h", level if i % 2 else -level))
+"""
+
+WAV = b"RIFF" + bytes(4000)
+PLAY_URL = "/api/integrations/pbx/recordings/{id}/play/?token={token}"
+
+
+@pytest.fixture
+def fake_ffmpeg(settings, tmp_path):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    settings.FFMPEG_BINARY = str(path)
+    return path
+
+
+@pytest.fixture
+def transcoding(settings, tmp_path, monkeypatch):
+    settings.RECORDING_STORAGE_BACKEND = "local"
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.RECORDING_TRANSCODE_ENABLED = True
+    queued = []
+
+    def run_now(path, *args, **kwargs):
+        queued.append(kwargs)
+        recording_transcode.transcode_recording(*args)
+
+    monkeypatch.setattr("django_q.tasks.async_task", run_now)
+    return queued
+
+
+@pytest.fixture
+def pbx(company):
+    return PbxSettings.objects.create(
+        company=company,
+        is_enabled=True,
+        webhook_token=secrets.token_urlsafe(32),
+        connector_api_key=secrets.token_urlsafe(32),
+    )
+
+
+def upload(api_client, pbx, content=WAV, record=None):
+    if record is None:
+        record = PbxCallRecord.objects.create(
+            company=pbx.company,
+            uniqueid="1780515827.110",
+            recording_path="/recording/20260603/104/call.wav",
+            recording_status=PbxRecordingStatus.PROCESSING,
+        )
+    response = api_client.post(
+        f"/api/integrations/pbx/connector/recordings/{record.id}/upload/",
+        {"file": SimpleUploadedFile("call.wav", content, content_type="audio/wav")},
+        format="multipart",
+        HTTP_X_CONNECTOR_KEY=pbx.connector_api_key,
+    )
+    assert response.status_code == 200
+    record.refresh_from_db()
+    return record
+
+
+@pytest.mark.django_db
+def test_upload_is_transcoded_and_served_compressed(api_client, pbx, fake_ffmpeg, transcoding):
+    record = upload(api_client, pbx)
+
+    assert transcoding[0]["timeout"] > 60
+    assert record.recording_transcode_status == RecordingTranscodeStatus.READY
+    assert record.recording_compressed_key.endswith(".ogg")
+    assert record.recording_duration_ms == 2500
+    assert len(record.recording_peaks) == 25
+    assert record.recording_peaks[10:15] == [100] * 5
+    assert max(record.recording_peaks[:10]) == 5
+
+    url = PLAY_URL.format(id=record.id, token=sign_playback_token(record.id, record.company_id))
+    compressed = api_client.get(url)
+    assert compressed["Content-Type"] == "audio/ogg"
+    assert b"".join(compressed.streaming_content).startswith(b"OggS")
+    original = api_client.get(url + "&original=1")
+    assert original["Content-Type"] == "audio/wav"
+    assert b"".join(original.streaming_content) == WAV
+
+
+@pytest.mark.django_db
+def test_failed_transcode_keeps_serving_the_original(api_client, pbx, fake_ffmpeg, transcoding):
+    record = upload(api_client, pbx, content=b"BROKEN" + WAV)
+
+    assert record.recording_transcode_status == RecordingTranscodeStatus.FAILED
+    assert not record.recording_compressed_key
+    url = PLAY_URL.format(id=record.id, token=sign_playback_token(record.id, record.company_id))
+    assert api_client.get(url)["Content-Type"] == "audio/wav"
+
+
+@pytest.mark.django_db
+def test_missing_ffmpeg_leaves_recording_for_the_sweep(
+    api_client, pbx, settings, transcoding, fake_ffmpeg, monkeypatch
+):
+    monkeypatch.setattr(recording_transcode, "_resolve_ffmpeg_binary", lambda: None)
+    record = upload(api_client, pbx)
+    assert record.recording_transcode_status == RecordingTranscodeStatus.PENDING
+
+    # Still inside the grace period: the sweep leaves queued work alone.
+    monkeypatch.undo()
+    settings.FFMPEG_BINARY = str(fake_ffmpeg)
+    assert recording_transcode.transcode_backlog() == 0
+
+    PbxCallRecord.objects.filter(pk=record.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+    assert recording_transcode.transcode_backlog() == 1
+    record.refresh_from_db()
+    assert record.recording_transcode_status == RecordingTranscodeStatus.READY
+
+
+@pytest.mark.django_db
+def test_replaced_recording_deletes_the_old_rendition(
+    api_client, pbx, settings, fake_ffmpeg, transcoding
+):
+    record = upload(api_client, pbx)
+    old_key = record.recording_compressed_key
+    old_file = Path(settings.MEDIA_ROOT) / "pbx_recordings" / old_key
+    assert old_file.is_file()
+
+    record = upload(api_client, pbx, content=WAV + b"retake", record=record)
+
+    assert record.recording_transcode_status == RecordingTranscodeStatus.READY
+    assert record.recording_compressed_key != old_key
+    assert not old_file.exists()
+    assert (Path(settings.MEDIA_ROOT) / "pbx_recordings" / record.recording_compressed_key).is_file()
+
+
+@pytest.mark.django_db
+def test_enqueue_restarts_the_sweep_grace_period(
+    api_client, pbx, fake_ffmpeg, transcoding, monkeypatch
+):
+    record = upload(api_client, pbx)
+    PbxCallRecord.objects.filter(pk=record.pk).update(
+        recording_transcode_status=RecordingTranscodeStatus.NONE,
+        updated_at=timezone.now() - timedelta(hours=1),
+    )
+    monkeypatch.setattr("django_q.tasks.async_task", lambda *args, **kwargs: None)
+
+    assert recording_transcode.enqueue_transcode("pbx", record.pk)
+
+    # Queued a moment ago: the sweep must not transcode it alongside the task.
+    assert recording_transcode.transcode_backlog() == 0
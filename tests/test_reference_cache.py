@@ -0,0 +1,123 @@
+"""
+Per-company reference data cache: statuses, channels, stages, call methods, tags.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import api_body
+from settings.models import CallMethod, LeadStatus, Tag
+from settings.reference_cache import (
+    call_methods,
+    invalidate_reference_data,
+    lead_statuses,
+    tags,
+)
+
+
+def _queries_on(model, ctx):
+    table = model._meta.db_table
+    return [q for q in ctx.captured_queries if table in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_table_is_loaded_once_and_indexed(company):
+    status = LeadStatus.objects.create(company=company, name="Hot lead", category="active")
+
+    lead_statuses(company)
+    with CaptureQueriesContext(connection) as ctx:
+        table = lead_statuses(company.id)
+
+    assert not _queries_on(LeadStatus, ctx)
+    assert table.by_name["Hot lead"].pk == status.pk
+    assert table.get(str(status.pk)).name == "Hot lead"
+    assert set(table.by_id) == set(
+        LeadStatus.objects.filter(company=company).values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_saves_and_deletes_invalidate_the_company(company, other_company):
+    status = LeadStatus.objects.create(company=company, name="Before", category="active")
+    other_rows = len(lead_statuses(other_company))
+    assert "Before" in lead_statuses(company).by_name
+
+    status.name = "After"
+    status.save()
+    names = lead_statuses(company).by_name
+    assert "After" in names and "Before" not in names
+
+    status.delete()
+    assert "After" not in lead_statuses(company).by_name
+    assert len(lead_statuses(other_company)) == other_rows
+
+    tag = Tag.objects.create(company=company, name="VIP")
+    assert tags(company).get(tag.pk) == tag
+
+
+@pytest.mark.django_db
+def test_queryset_updates_need_explicit_invalidation(company):
+    CallMethod.objects.filter(company=company).update(is_default=False)
+    method = CallMethod.objects.create(company=company, name="Desk phone", is_default=False)
+    assert call_methods(company).get(method.pk) is not None
+    CallMethod.objects.filter(pk=method.pk).update(is_default=True)
+    assert not call_methods(company).get(method.pk).is_default
+
+    invalidate_reference_data(company)
+    assert call_methods(company).default().pk == method.pk
+
+
+@pytest.mark.django_db
+def test_default_follows_model_ordering_with_several_defaults(company):
+    from crm.lead_defaults import get_default_lead_status
+
+    LeadStatus.objects.create(company=company, name="AAA company default", is_default=True)
+    invalidate_reference_data(company)
+
+    expected = LeadStatus.objects.filter(
+        company=company, is_active=True, is_hidden=False, is_default=True
+    ).first()
+    assert [s.pk for s in lead_statuses(company)] == list(
+        LeadStatus.objects.filter(company=company).values_list("pk", flat=True)
+    )
+    assert lead_statuses(company).default().pk == expected.pk
+    assert get_default_lead_status(company).pk == expected.pk
+
+
+@pytest.mark.django_db
+def test_client_create_resolves_status_and_tags(authenticated_admin, company):
+    # Not a seeded name: the company fixture already has the default statuses.
+    status = LeadStatus.objects.create(company=company, name="Cache qualified", category="active")
+    tag = Tag.objects.create(company=company, name="Cache referral")
+    data = {
+        "name": "Cached lead",
+        "priority": "high",
+        "type": "fresh",
+        "company": company.id,
+        "status": status.id,
+        "tags": [tag.id],
+    }
+
+    response = authenticated_admin.post("/api/v1/clients/", data, format="json")
+
+    assert response.status_code == 201, response.content
+    body = api_body(response)
+    assert body["status"] == status.id and body["tags"] == [tag.id]
+    assert body["status_name"] == "Cache qualified"
+
+
+@pytest.mark.django_db
+def test_client_create_rejects_another_companys_status(authenticated_admin, company, other_company):
+    foreign = LeadStatus.objects.create(company=other_company, name="Foreign", category="active")
+    data = {
+        "name": "Cross tenant",
+        "priority": "low",
+        "type": "fresh",
+        "company": company.id,
+        "status": foreign.id,
+    }
+
+    response = authenticated_admin.post("/api/v1/clients/", data, format="json")
+
+    assert response.status_code == 400
+    assert "status" in str(response.content)
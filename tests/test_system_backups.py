@@ -0,0 +1,155 @@
+"""
+System backups (settings.services): online SQLite copy, gzip + checksum, and the
+streamed, Range-aware download endpoint.
+"""
+import gzip
+import hashlib
+import sqlite3
+import threading
+
+import pytest
+from django.urls import reverse
+
+from accounts.models import User
+from settings import services
+from settings.models import SystemBackup
+
+
+@pytest.fixture
+def source_db(tmp_path, settings, monkeypatch):
+    """A stand-in "live" database in WAL mode, like production."""
+    path = tmp_path / "live.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE calls (id INTEGER PRIMARY KEY, note TEXT)")
+    conn.executemany("INSERT INTO calls (note) VALUES (?)", [(f"call {i}" * 20,) for i in range(2000)])
+    conn.commit()
+    conn.close()
+
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.BACKUP_ROOT = settings.MEDIA_ROOT / "backups"
+    monkeypatch.setattr(services, "_ensure_sqlite_backend", lambda: (path, "django.db.backends.sqlite3"))
+    return path
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    user = User.objects.create_superuser(
+        username="backup_admin",
+        email="backup_admin@test.com",
+        password="securepassword123",
+    )
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def _expand(backup, settings):
+    with gzip.open(settings.MEDIA_ROOT / backup.file.name, "rb") as fh:
+        return fh.read()
+
+
+@pytest.mark.django_db
+def test_backup_is_compressed_consistent_copy_with_checksum(source_db, settings, tmp_path):
+    backup = services.create_database_backup()
+
+    assert backup.status == SystemBackup.Status.COMPLETED
+    stored = settings.MEDIA_ROOT / backup.file.name
+    assert stored.name.endswith(".sqlite3.gz")
+    assert backup.metadata["sha256"] == hashlib.sha256(stored.read_bytes()).hexdigest()
+    assert backup.file_size == stored.stat().st_size < backup.metadata["raw_size"]
+    assert not list(stored.parent.glob(".*.partial"))
+
+    restored = tmp_path / "check.sqlite3"
+    restored.write_bytes(_expand(backup, settings))
+    assert sqlite3.connect(restored).execute("SELECT count(*) FROM calls").fetchone() == (2000,)
+
+
+def test_online_backup_lets_writers_commit_and_still_finishes(source_db, tmp_path, monkeypatch):
+    # One page per step: the copy spans many steps, and writers commit between them.
+    monkeypatch.setattr(services, "BACKUP_PAGES_PER_STEP", 1)
+    monkeypatch.setattr(services, "BACKUP_STEP_SLEEP_SECONDS", 0.002)
+    dest = tmp_path / "copy.sqlite3"
+    worker = threading.Thread(target=services.online_sqlite_backup, args=(source_db, dest))
+
+    writer = sqlite3.connect(source_db, timeout=0)
+    worker.start()
+    writes = 0
+    while worker.is_alive() and writes < 200:
+        # timeout=0: raises at once if the backup were holding writers off.
+        writer.execute("INSERT INTO calls (note) VALUES ('late')")
+        writer.commit()
+        writes += 1
+    worker.join(timeout=30)
+    writer.close()
+
+    # The pinned snapshot keeps the copy from restarting on every commit.
+    assert not worker.is_alive()
+    assert writes > 0
+    assert sqlite3.connect(dest).execute("SELECT count(*) FROM calls").fetchone()[0] >= 2000
+
+
+@pytest.mark.django_db
+def test_download_streams_and_honours_range(source_db, settings, admin_client):
+    backup = services.create_database_backup()
+    stored = (settings.MEDIA_ROOT / backup.file.name).read_bytes()
+    url = reverse("systembackup-download", args=[backup.id])
+
+    full = admin_client.get(url)
+    assert full.status_code == 200
+    assert full.streaming
+    assert full["Accept-Ranges"] == "bytes"
+    assert full["ETag"] == f'"{backup.metadata["sha256"]}"'
+    assert b"".join(full.streaming_content) == stored
+
+    partial = admin_client.get(url, HTTP_RANGE="bytes=10-99")
+    assert partial.status_code == 206
+    assert partial["Content-Range"] == f"bytes 10-99/{len(stored)}"
+    assert b"".join(partial.streaming_content) == stored[10:100]
+
+    tail = admin_client.get(url, HTTP_RANGE="bytes=-16")
+    assert b"".join(tail.streaming_content) == stored[-16:]
+
+    beyond = admin_client.get(url, HTTP_RANGE=f"bytes={len(stored)}-")
+    assert beyond.status_code == 416
+
+
+@pytest.mark.django_db
+def test_restore_refuses_corrupted_backup(source_db, settings):
+    backup = services.create_database_backup()
+    stored = settings.MEDIA_ROOT / backup.file.name
+    data = bytearray(stored.read_bytes())
+    data[-1] ^= 0xFF
+    stored.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="checksum"):
+        services.restore_database_backup(backup)
+
+
+@pytest.mark.django_db
+def test_download_reads_from_the_backup_root(source_db, settings, tmp_path, admin_client):
+    settings.BACKUP_ROOT = tmp_path / "elsewhere"
+    backup = services.create_database_backup()
+    stored = services.backup_file_path(backup)
+    assert stored.parent == settings.BACKUP_ROOT
+
+    response = admin_client.get(reverse("systembackup-download", args=[backup.id]))
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == stored.read_bytes()
+
+
+@pytest.mark.django_db
+def test_restore_is_seen_by_connections_already_open(source_db, settings):
+    backup = services.create_database_backup()
+    # Another worker's long-lived connection (CONN_MAX_AGE), opened before the restore.
+    worker = sqlite3.connect(source_db)
+    worker.execute("INSERT INTO calls (note) VALUES ('after backup')")
+    worker.commit()
+
+    services.restore_database_backup(backup)
+
+    assert worker.execute("SELECT count(*) FROM calls").fetchone() == (2000,)
+    worker.execute("INSERT INTO calls (note) VALUES ('after restore')")
+    worker.commit()
+    worker.close()
+    assert sqlite3.connect(source_db).execute("SELECT count(*) FROM calls").fetchone() == (2001,)
+    assert not list(source_db.parent.glob(".live.sqlite3.restore*"))
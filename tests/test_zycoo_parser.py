@@ -0,0 +1,65 @@
+"""ZYCOO push parsing into PbxEvent, and the parser benchmark command."""
+
+import io
+import json
+
+from django.core.management import call_command
+
+from integrations.management.commands.benchmark_pbx_parser import DEFAULT_CORPUS
+from integrations.models import PbxCallDirection, PbxCallDisposition, PbxEventType
+from integrations.services.zycoo_parser import parse_zycoo_event, parse_zycoo_payload
+
+
+def test_corpus_parses_to_the_expected_events():
+    rows = [json.loads(line) for line in DEFAULT_CORPUS.read_text().splitlines()]
+    events = [parse_zycoo_payload(row["body"].encode(), row["content_type"]) for row in rows]
+
+    assert [e.event_type for e in events] == [
+        PbxEventType.RINGING,
+        PbxEventType.RINGING,
+        PbxEventType.RINGING,
+        PbxEventType.ANSWERED,
+        PbxEventType.HANGUP,
+        PbxEventType.HANGUP,
+        PbxEventType.HANGUP,
+        PbxEventType.AGENT_LOGIN,
+        PbxEventType.RINGING,
+        PbxEventType.HANGUP,
+        PbxEventType.RINGING,
+        PbxEventType.HANGUP,
+    ]
+    cdr = events[5]
+    assert (cdr.caller, cdr.extension, cdr.external_phone) == ("07809418884", "104", "07809418884")
+    assert (cdr.duration_sec, cdr.billsec) == (158, 151)
+    assert cdr.disposition == PbxCallDisposition.ANSWERED
+    assert events[1].extension == "104"  # DestCallerIDNum beats the trunk caller
+    assert events[10].external_phone == "07501112233"
+    assert "mapped_type=ringing" in events[0].summary()
+
+
+def test_field_names_match_regardless_of_case():
+    event = parse_zycoo_event(
+        {
+            "EVENT": "Hangup",
+            "UniqueID": "1.5",
+            "CALLERIDNUM": "",
+            "callerIDnum": "07701234567",
+            "exten": "201",
+            "DIRECTION": "Inbound",
+            "billSec": 12,
+        }
+    )
+
+    assert event.uniqueid == event.linkedid == "1.5"
+    assert event.caller == "07701234567"
+    assert event.direction == PbxCallDirection.INBOUND
+    assert event.billsec == 12
+
+
+def test_benchmark_command_reports_both_paths():
+    out = io.StringIO()
+    call_command("benchmark_pbx_parser", iterations=2, repeat=1, stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert lines[1].startswith("webhook") and lines[1].rstrip().endswith("µs/event")
+    assert lines[2].startswith("batch")
@@ -46,11 +46,11 @@ def test_cdr_recording_filename_parsed():
         "recording_filename": CDR_PATH,
     }
     parsed = parse_zycoo_payload(json.dumps(body).encode(), "application/json")
-    assert parsed["event_type"] == PbxEventType.HANGUP
-    assert parsed["caller"] == "07809418884"
-    assert parsed["disposition"] == PbxCallDisposition.NO_ANSWER
-    assert parsed["duration_sec"] == 27
-    assert "1780515827.110-07809418884" in parsed["recording_path"]
+    assert parsed.event_type == PbxEventType.HANGUP
+    assert parsed.caller == "07809418884"
+    assert parsed.disposition == PbxCallDisposition.NO_ANSWER
+    assert parsed.duration_sec == 27
+    assert "1780515827.110-07809418884" in parsed.recording_path
 
 
 def test_build_recording_ftp_path_from_zycoo_monitor_path():